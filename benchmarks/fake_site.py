@@ -0,0 +1,345 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: fake_site.py
+# @Time: 19/10/2026 22:20
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""
+fake_site.py
+这个模块提供了用于基准测试的本地模拟网站。
+类:
+    FakeSite: 在独立的进程中运行的本地 HTTP 服务, 按 Engine2、Engine3 和 Engine4
+              解析的页面结构生成书籍、目录和章节页面, 可以设置延迟、错误率和反爬页面的比例。
+    LocalSiteAdapter: requests 的传输适配器, 将发往真实网站的请求转发到模拟网站,
+                      返回的响应中的 URL 仍然是原来的 URL。
+函数:
+    render: 不启动模拟网站, 直接生成指定引擎的页面, 供解析的基准测试使用。
+注意事项:
+    模拟网站运行在独立的进程中, 因此它消耗的 CPU 时间和内存不会计入基准测试的结果。
+"""
+
+
+# 导入标准库
+import os
+import json
+import time
+import random
+import threading
+import multiprocessing
+from urllib.parse import urlparse, urlunparse
+from typing import Dict, List, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 导入第三方库
+from requests.adapters import HTTPAdapter
+
+
+# 各引擎的网站域名
+DOMAINS = {
+    "Engine2": ["www.biequgei.com",],
+    "Engine3": ["www.fanqienovel.com", "fanqienovel.com"],
+    "Engine4": ["www.xbqg77.com",],
+}
+# 封面图片, 使用仓库根目录中的默认封面
+COVER_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "default_cover.png"
+)
+# 生成章节内容使用的文字
+WORDS = "天地玄黄宇宙洪荒日月盈昃辰宿列张寒来暑往秋收冬藏闰余成岁律吕调阳云腾致雨露结为霜"
+
+
+class FakeSite(object):
+    def __init__(
+        self, books: int = 2, chapters: int = 50, paragraphs: int = 30,
+        latency: float = 0.0, error_rate: float = 0.0,
+        protect_rate: float = 0.0, seed: int = 0
+    ):
+        """本地模拟网站
+
+        :param books: 每个网站的书籍数量
+        :type books: int
+        :param chapters: 每本书籍的章节数量
+        :type chapters: int
+        :param paragraphs: 每个章节的段落数量
+        :type paragraphs: int
+        :param latency: 每个请求的延迟, 单位是秒
+        :type latency: float
+        :param error_rate: 返回 500 错误的请求比例
+        :type error_rate: float
+        :param protect_rate: 章节页面返回反爬页面的比例
+        :type protect_rate: float
+        :param seed: 随机数种子, 相同的种子生成相同的错误序列
+        :type seed: int
+
+        Example:
+            >>> with FakeSite(books=1, chapters=10) as site:
+            >>>     print(site.book_urls("Engine2"))
+        """
+        # 确认传入的参数是否正确
+        assert isinstance(books, int) and books > 0
+        assert isinstance(chapters, int) and chapters > 0
+        assert isinstance(paragraphs, int) and paragraphs > 0
+        assert 0 <= latency and 0 <= error_rate < 1 and 0 <= protect_rate < 1
+        self.books = books
+        self.chapters = chapters
+        self.paragraphs = paragraphs
+        self.latency = latency
+        self.error_rate = error_rate
+        self.protect_rate = protect_rate
+        self.seed = seed
+        self.port = 0
+        self.__process: multiprocessing.Process | None = None
+
+    def __enter__(self) -> "FakeSite":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> int:
+        """在独立的进程中启动模拟网站, 返回监听的端口"""
+        parent, child = multiprocessing.Pipe()
+        self.__process = multiprocessing.Process(
+            target=_serve, args=(self.__config(), child), daemon=True
+        )
+        self.__process.start()
+        self.port = parent.recv()
+        return self.port
+
+    def stop(self) -> None:
+        """停止模拟网站"""
+        if self.__process is not None:
+            self.__process.terminate()
+            self.__process.join()
+            self.__process = None
+
+    def adapter(self) -> "LocalSiteAdapter":
+        """将请求转发到该模拟网站的传输适配器"""
+        return LocalSiteAdapter(self.port)
+
+    def prefixes(self) -> List[str]:
+        """模拟网站接管的所有 URL 前缀"""
+        return [
+            f"{scheme}://{domain}/"
+            for domains in DOMAINS.values() for domain in domains
+            for scheme in ("http", "https")
+        ]
+
+    def book_urls(self, engine: str) -> List[str]:
+        """获取指定引擎的所有书籍 URL
+
+        :param engine: 引擎的类名, 例如 "Engine2"
+        :type engine: str
+        :return: 书籍 URL 列表
+        """
+        domain = DOMAINS[engine][0]
+        path = {
+            "Engine2": "/novel/{}.html", "Engine3": "/page/{}",
+            "Engine4": "/{}",
+        }[engine]
+        return [
+            f"https://{domain}{path.format(i)}"
+            for i in range(1, self.books + 1)
+        ]
+
+    def __config(self) -> Dict[str, float]:
+        return {
+            "books": self.books, "chapters": self.chapters,
+            "paragraphs": self.paragraphs, "latency": self.latency,
+            "error_rate": self.error_rate,
+            "protect_rate": self.protect_rate, "seed": self.seed,
+        }
+
+
+class LocalSiteAdapter(HTTPAdapter):
+    def __init__(self, port: int):
+        """将请求转发到本地模拟网站的传输适配器"""
+        super().__init__()
+        self.__port = port
+
+    def send(self, request, **kwargs):
+        # 记录原来的 URL 与主机名, 通过 Host 头告诉模拟网站
+        url = request.url
+        parsed = urlparse(url)
+        request.headers["Host"] = parsed.netloc
+        request.url = urlunparse(
+            ("http", f"127.0.0.1:{self.__port}") + tuple(parsed[2:])
+        )
+        response = super().send(request, **kwargs)
+        # 响应中的 URL 仍然是原来的 URL, 以免引擎拼接出本地的地址
+        request.url = url
+        response.url = url
+        return response
+
+
+def _paragraphs(rng: random.Random, number: int) -> List[str]:
+    """生成章节的段落"""
+    return [
+        "".join(rng.choice(WORDS) for _ in range(rng.randint(30, 90)))
+        for _ in range(number)
+    ]
+
+
+def _engine2(config, path: str, rng: random.Random) -> Tuple[int, str]:
+    parts = path.strip("/").split("/")
+    if path.startswith("/novel/"):
+        book = int(parts[1].split(".")[0])
+        links = "".join(
+            f'<dd><a href="/book/{book}/{i}.html">第{i}章 章节{i}</a></dd>'
+            for i in range(1, config["chapters"] + 1)
+        )
+        return 200, (
+            f'<div class="imgbox"><img src="/cover/{book}.png"></div>'
+            f'<div class="info"><div class="top"><h1>测试书籍{book}</h1>'
+            f'<div class="fix"><p>作&nbsp;&nbsp;者：测试作者{book}</p>'
+            f'<p>类&nbsp;&nbsp;别：玄幻</p><p>状&nbsp;&nbsp;态：连载中</p>'
+            f'</div></div><div>　　这是测试书籍{book}的简介。</div></div>'
+            f'<div class="section-box"><a href="/book/{book}/1.html">最新</a>'
+            f'</div><div class="section-box">{links}</div>'
+        )
+    if path.startswith("/book/"):
+        chapter = int(parts[2].split(".")[0])
+        if rng.random() < config["protect_rate"]:
+            lines = ["章节内容转码失败！",]
+        else:
+            lines = _paragraphs(rng, config["paragraphs"])
+        text = "".join(f"<p>　　{i}</p>" for i in lines)
+        return 200, (
+            f'<div class="text-head"><h3>第{chapter}章 章节{chapter}</h3>'
+            f'<div class="info fl"><span>测试作者</span>'
+            f'<span>2026-10-19 12:00</span></div></div>'
+            f'<div class="read-content j_readContent">{text}</div>'
+        )
+    return 404, ""
+
+
+def _engine3(config, path: str, rng: random.Random) -> Tuple[int, str]:
+    parts = path.strip("/").split("/")
+    if path.startswith("/page/"):
+        book = int(parts[1])
+        if rng.random() < config["protect_rate"]:
+            directory = '<div class="page-directory-more"></div>'
+        else:
+            links = "".join(
+                f'<a href="/reader/{book * 100000 + i}">第{i}章 章节{i}</a>'
+                for i in range(1, config["chapters"] + 1)
+            )
+            directory = '<div class="page-directory-content">' \
+                f'<div class="chapter">{links}</div></div>'
+        images = json.dumps({"images": [f"/cover/{book}.png",]})
+        return 200, (
+            f'<script type="application/ld+json">{{}}</script>'
+            f'<script type="application/ld+json">{images}</script>'
+            f'<h1>测试书籍{book}</h1>'
+            f'<span class="author-name-text">测试作者{book}</span>'
+            f'<div class="info-label"><span>连载中</span></div>'
+            f'<div class="page-abstract-content">这是测试书籍{book}的简介。</div>'
+            f'{directory}'
+        )
+    if path.startswith("/reader/"):
+        chapter = int(parts[1]) % 100000
+        date = json.dumps({"dateModified": "2026-10-19T12:00:00"})
+        lines = _paragraphs(rng, config["paragraphs"])
+        text = "".join(f"<p>{i}</p>" for i in lines)
+        return 200, (
+            f'<script>{date}</script>'
+            f'<h1 class="muye-reader-title">第{chapter}章 章节{chapter}</h1>'
+            f'<div class="muye-reader-content noselect"><div>{text}</div></div>'
+        )
+    return 404, ""
+
+
+def _engine4(config, path: str, rng: random.Random) -> Tuple[int, str]:
+    parts = path.strip("/").split("/")
+    if len(parts) == 1 and parts[0].isdigit():
+        book = int(parts[0])
+        links = "".join(
+            f'<a href="/{book}/{i}">第{i}章 章节{i}</a>'
+            for i in range(1, config["chapters"] + 1)
+        )
+        return 200, (
+            f'<div class="cover"><img src="/cover/{book}.png"></div>'
+            f'<div class="title">测试书籍{book}</div>'
+            f'<div class="info"><div>作者：测试作者{book}</div>'
+            f'<div>状态：连载</div></div>'
+            f'<div class="text"><p>简介：</p>这是测试书籍{book}的简介。</div>'
+            f'<div class="chapter container">{links}</div>'
+        )
+    if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
+        if rng.random() < config["protect_rate"]:
+            return 429, ""
+        chapter = int(parts[1])
+        lines = _paragraphs(rng, config["paragraphs"])
+        return 200, (
+            f'<h2>第{chapter}章 章节{chapter}</h2>'
+            f'<article id="article"><!--go-->'
+            f'{"<br/>".join(lines)}<!--over--></article>'
+        )
+    return 404, ""
+
+
+# 各引擎的页面生成函数
+RENDERERS = {"Engine2": _engine2, "Engine3": _engine3, "Engine4": _engine4}
+
+
+def render(
+    engine: str, path: str, chapters: int = 50, paragraphs: int = 30,
+    seed: int = 0
+) -> Tuple[int, str]:
+    """不启动模拟网站, 直接生成指定引擎的页面
+
+    :param engine: 引擎的类名, 例如 "Engine2"
+    :type engine: str
+    :param path: 页面的路径, 例如 "/novel/1.html"
+    :type path: str
+    :return: 状态码与页面内容
+    """
+    config = {
+        "chapters": chapters, "paragraphs": paragraphs, "protect_rate": 0.0,
+    }
+    return RENDERERS[engine](config, path, random.Random(seed))
+
+
+def _serve(config: Dict[str, float], connection) -> None:
+    """模拟网站进程的入口"""
+    rng = random.Random(config["seed"])
+    lock = threading.Lock()
+    with open(COVER_PATH, "rb") as cover_file:
+        cover = cover_file.read()
+    pages = {
+        domain: renderer for engine, renderer in RENDERERS.items()
+        for domain in DOMAINS[engine]
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format: str, *args) -> None:
+            return None
+
+        def do_GET(self) -> None:
+            if config["latency"]:
+                time.sleep(config["latency"])
+            host = self.headers.get("Host", "")
+            path = urlparse(self.path).path
+            with lock:
+                failed = rng.random() < config["error_rate"]
+                # 每个请求使用独立的随机数生成器, 以免线程之间互相影响
+                page_rng = random.Random(rng.random())
+            if failed:
+                status, body, kind = 500, b"", "text/html"
+            elif path.startswith("/cover/"):
+                status, body, kind = 200, cover, "image/png"
+            elif host in pages:
+                status, text = pages[host](config, path, page_rng)
+                body, kind = text.encode("utf-8"), "text/html"
+            else:
+                status, body, kind = 404, b"", "text/html"
+            self.send_response(status)
+            self.send_header("Content-Type", f"{kind}; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    connection.send(server.server_address[1])
+    server.serve_forever()
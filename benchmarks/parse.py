@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: parse.py
+# @Time: 19/10/2026 19:40
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""
+parse.py
+页面解析的基准测试, 分别使用选择器与 BeautifulSoup 解析保存的页面,
+比较两者的耗时并确认解析的结果相同。
+使用方法:
+    python -m benchmarks.parse --engines=Engine2,Engine4 --repeat=100
+    python -m benchmarks.parse --save_dir=pages
+    python -m benchmarks.parse --pages_dir=pages --output=result.json
+保存的页面:
+    <目录>/<引擎的类名>/<book|chapter>.html 为页面内容,
+    <目录>/<引擎的类名>/index.json 记录各页面的 URL。
+    没有指定 pages_dir 时使用模拟网站生成的页面, 也可以放入从真实网站保存的页面。
+测量的指标(按引擎与操作分别统计):
+    selectors_ms / bs_ms: 每次解析的平均耗时, 单位是毫秒, 包括解析文档的时间。
+    speedup: bs_ms 与 selectors_ms 的比值。
+    same: 两种方式解析的结果是否相同。
+注意事项:
+    页面中引用的封面与章节页面由内存中的传输适配器返回, 不会访问网络。
+"""
+
+
+# 导入标准库
+import os
+import sys
+import json
+import time
+from typing import Any, Callable, Dict, Tuple
+
+# 导入第三方库
+import fire
+import requests
+from requests.adapters import BaseAdapter
+
+# 导入自定义库
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from novel_dl.utils.network import Network
+from novel_dl.services.download import BookWeb, engines
+from benchmarks.fake_site import COVER_PATH, DOMAINS, render
+
+
+# 模拟网站中各引擎的书籍页面与章节页面的路径
+PATHS = {
+    "Engine2": {"book": "/novel/1.html", "chapter": "/book/1/1.html"},
+    "Engine3": {"book": "/page/1", "chapter": "/reader/100001"},
+    "Engine4": {"book": "/1", "chapter": "/1/1"},
+}
+
+
+class FixtureAdapter(BaseAdapter):
+    def __init__(self, pages: Dict[str, bytes], default: bytes = b""):
+        """从内存中返回页面的传输适配器, 不在其中的 URL 返回 default"""
+        super().__init__()
+        self.__pages = pages
+        self.__default = default
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        response._content = self.__pages.get(request.url, self.__default)
+        return response
+
+    def close(self) -> None:
+        return None
+
+
+def load_pages(
+    engine: str, pages_dir: str = "", paragraphs: int = 30
+) -> Dict[str, Tuple[str, bytes]]:
+    """获取一个引擎的书籍页面与章节页面
+
+    :param engine: 引擎的类名, 例如 "Engine2"
+    :type engine: str
+    :param pages_dir: 保存页面的目录, 为空时使用模拟网站生成的页面
+    :type pages_dir: str
+    :param paragraphs: 生成的章节页面的段落数量
+    :type paragraphs: int
+    :return: 页面类型到 URL 与页面内容的映射
+    """
+    if pages_dir:
+        folder = os.path.join(pages_dir, engine)
+        with open(os.path.join(folder, "index.json"), encoding="UTF-8") as f:
+            urls = json.load(f)
+        pages = {}
+        for kind, url in urls.items():
+            with open(os.path.join(folder, f"{kind}.html"), "rb") as f:
+                pages[kind] = (url, f.read())
+        return pages
+    return {
+        kind: (
+            f"https://{DOMAINS[engine][0]}{path}",
+            render(engine, path, paragraphs=paragraphs)[1].encode("UTF-8")
+        ) for kind, path in PATHS[engine].items()
+    }
+
+
+def save_pages(save_dir: str, engines_list: str, paragraphs: int = 30):
+    """将模拟网站生成的页面保存到目录中, 格式与 pages_dir 相同"""
+    for engine in engines_list.split(","):
+        folder = os.path.join(save_dir, engine.strip())
+        os.makedirs(folder, exist_ok=True)
+        pages = load_pages(engine.strip(), paragraphs=paragraphs)
+        for kind, (url, content) in pages.items():
+            with open(os.path.join(folder, f"{kind}.html"), "wb") as f:
+                f.write(content)
+        with open(
+            os.path.join(folder, "index.json"), "w", encoding="UTF-8"
+        ) as f:
+            json.dump(
+                {kind: url for kind, (url, _) in pages.items()}, f, indent=4
+            )
+
+
+def _summary(result: Any) -> Any:
+    """将解析结果转换为可以比较的值"""
+    if isinstance(result, list):
+        return result
+    if hasattr(result, "author"):
+        return (
+            result.name, result.author, str(result.state), result.desc,
+            len(list(result.cover_images))
+        )
+    return (
+        result.index, result.name, [str(i) for i in result.content]
+    )
+
+
+def _measure(
+    engine: BookWeb, operation: Callable[[Network], Any],
+    response: requests.Response, fast: bool, repeat: int
+) -> Tuple[float, Any]:
+    """只使用一种方式解析页面, 返回平均耗时(毫秒)与解析的结果"""
+    # 不允许回退, 以免测量到另一种方式的耗时
+    engine.extract = \
+        (lambda x, f, s: f(x)) if fast else (lambda x, f, s: s(x))
+    result = operation(Network(response, engine.encoding))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        operation(Network(response, engine.encoding))
+    return (time.perf_counter() - start) * 1000 / repeat, _summary(result)
+
+
+def run_parse_benchmark(
+    engines_list: str = "Engine2,Engine3,Engine4", repeat: int = 50,
+    paragraphs: int = 30, pages_dir: str = ""
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """运行解析的基准测试
+
+    :param engines_list: 要测试的引擎的类名, 使用逗号分隔
+    :type engines_list: str
+    :param repeat: 每种方式解析每个页面的次数
+    :type repeat: int
+    :param paragraphs: 生成的章节页面的段落数量
+    :type paragraphs: int
+    :param pages_dir: 保存页面的目录, 为空时使用模拟网站生成的页面
+    :type pages_dir: str
+    :return: 各引擎各操作的测量结果
+    """
+    if isinstance(engines_list, (list, tuple)):
+        engines_list = ",".join(engines_list)
+    with open(COVER_PATH, "rb") as cover_file:
+        cover = cover_file.read()
+    result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for name in [i.strip() for i in engines_list.split(",") if i.strip()]:
+        engine: BookWeb = getattr(engines, name)()
+        pages = load_pages(name, pages_dir, paragraphs)
+        adapter = FixtureAdapter(
+            {url: content for url, content in pages.values()}, cover
+        )
+        prefixes = [f"https://{i}/" for i in engine.domains]
+        for prefix in prefixes:
+            Network.mount(prefix, adapter)
+        try:
+            operations = {
+                "book_info": ("book", engine.get_book_info),
+                "chapter_url": ("book", engine.get_chapter_url),
+                "chapter": ("chapter", lambda x: engine.get_chapter(
+                    x, 1, "测试书籍"
+                )),
+            }
+            result[name] = {}
+            for operation, (kind, function) in operations.items():
+                url, content = pages[kind]
+                response = requests.Response()
+                response.status_code = 200
+                response.url = url
+                response._content = content
+                fast_ms, fast = _measure(
+                    engine, function, response, True, repeat
+                )
+                slow_ms, slow = _measure(
+                    engine, function, response, False, repeat
+                )
+                result[name][operation] = {
+                    "selectors_ms": fast_ms, "bs_ms": slow_ms,
+                    "speedup": slow_ms / fast_ms if fast_ms else None,
+                    "same": fast == slow,
+                }
+        finally:
+            for prefix in prefixes:
+                Network.mount(prefix, None)
+    return result
+
+
+def main(
+    engines: str = "Engine2,Engine3,Engine4", repeat: int = 50,
+    paragraphs: int = 30, pages_dir: str = "", save_dir: str = "",
+    output: str = ""
+) -> None:
+    """运行解析的基准测试并输出结果
+    save_dir 不为空时只保存模拟网站生成的页面, output 不为空时同时保存为 JSON 文件
+    """
+    if save_dir:
+        save_pages(save_dir, engines, paragraphs)
+        print(f"页面已保存到 {save_dir}")
+        return None
+    result = run_parse_benchmark(engines, repeat, paragraphs, pages_dir)
+    for name, operations in result.items():
+        print(f"[{name}]")
+        for operation, stats in operations.items():
+            print(
+                f"\t{operation}: selectors {stats['selectors_ms']:.3f} ms, "
+                f"bs {stats['bs_ms']:.3f} ms, "
+                f"speedup {stats['speedup']:.2f}x, same: {stats['same']}"
+            )
+    if output:
+        with open(output, "w", encoding="UTF-8") as output_file:
+            json.dump(result, output_file, ensure_ascii=False, indent=4)
+    return None
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: run.py
+# @Time: 19/10/2026 22:50
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""
+run.py
+离线基准测试的入口, 使用本地模拟网站测量完整的下载流程:
+WebManager.download -> Bookshelf -> Saver。
+使用方法:
+    python -m benchmarks.run --engines=Engine2,Engine4 --books=2 --chapters=100
+    python -m benchmarks.run --latency=0.05 --error_rate=0.01 --output=result.json
+测量的指标(按引擎分别统计):
+    chapters_per_second: 每秒完成的章节数量, 从开始下载到保存文件结束。
+    cpu_ms_per_chapter: 每个章节消耗的 CPU 时间, 不包括模拟网站进程。
+    db_writes_per_second: 书架每秒写入的章节数量, 只计算写入书架的时间。
+    download_seconds / store_seconds / export_seconds: 各阶段的耗时,
+        store_seconds 包含在 download_seconds 中。
+    peak_rss_mb: 当前进程的内存占用峰值, 不支持的平台上为 None。
+注意事项:
+    反爬页面会按引擎的 retry_delay 安排重试(Engine2 约 5 秒, Engine3 约 10 秒,
+    之后指数增加), 与真实网站的行为一致, 因此设置 protect_rate 时耗时会明显增加。
+"""
+
+
+# 导入标准库
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+from typing import Any, Dict
+
+# 导入第三方库
+import fire
+
+# 导入自定义库
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from novel_dl.core import Settings
+from novel_dl.core.books import SaveMethod, Saver
+from novel_dl.utils.network import Network
+from novel_dl.services.download import WebManager
+from novel_dl.services.bookshelf import Bookshelf
+from benchmarks.fake_site import FakeSite
+
+
+def peak_rss_mb() -> float | None:
+    """当前进程的内存占用峰值, 单位是 MiB"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 的单位是字节, Linux 的单位是 KiB
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def run_benchmark(
+    engines: str = "Engine2,Engine3,Engine4", books: int = 2,
+    chapters: int = 50, paragraphs: int = 30, latency: float = 0.0,
+    error_rate: float = 0.0, protect_rate: float = 0.0,
+    save_method: int = 1, seed: int = 0
+) -> Dict[str, Any]:
+    """运行基准测试
+
+    :param engines: 要测试的引擎的类名, 使用逗号分隔
+    :type engines: str
+    :param books: 每个引擎下载的书籍数量
+    :type books: int
+    :param chapters: 每本书籍的章节数量
+    :type chapters: int
+    :param paragraphs: 每个章节的段落数量
+    :type paragraphs: int
+    :param latency: 模拟网站每个请求的延迟, 单位是秒
+    :type latency: float
+    :param error_rate: 模拟网站返回 500 错误的请求比例
+    :type error_rate: float
+    :param protect_rate: 模拟网站的章节页面返回反爬页面的比例
+    :type protect_rate: float
+    :param save_method: 保存书籍的方式, 与 download_novel 命令相同
+    :type save_method: int
+    :param seed: 随机数种子
+    :type seed: int
+    :return: 测试的参数以及各引擎的测量结果
+    """
+    if isinstance(engines, (list, tuple)):
+        engines = ",".join(engines)
+    names = [i.strip() for i in engines.split(",") if i.strip()]
+    method = SaveMethod.to_obj(save_method)
+    result: Dict[str, Any] = {
+        "params": {
+            "books": books, "chapters": chapters,
+            "paragraphs": paragraphs, "latency": latency,
+            "error_rate": error_rate, "protect_rate": protect_rate,
+            "save_method": str(method), "seed": seed,
+        },
+        "engines": {},
+    }
+    old_data_dir = Settings().DATA_DIR
+    site = FakeSite(
+        books, chapters, paragraphs, latency, error_rate, protect_rate, seed
+    )
+    with tempfile.TemporaryDirectory() as data_dir, site:
+        # 使用临时的数据目录, 并将所有请求转发到模拟网站
+        Settings().DATA_DIR = data_dir
+        for prefix in site.prefixes():
+            Network.mount(prefix, site.adapter())
+        try:
+            manager = WebManager()
+            bookshelf = Bookshelf()
+            for name in names:
+                result["engines"][name] = _run_engine(
+                    manager, bookshelf, site, name, method
+                )
+        finally:
+            for prefix in site.prefixes():
+                Network.mount(prefix, None)
+            Settings().DATA_DIR = old_data_dir
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def _run_engine(
+    manager: WebManager, bookshelf: Bookshelf, site: FakeSite,
+    name: str, method: SaveMethod
+) -> Dict[str, Any]:
+    """测量一个引擎的完整下载流程"""
+    lock = threading.Lock()
+    counts = {"store_seconds": 0.0, "db_writes": 0}
+
+    def book_middle_ware(book):
+        start = time.perf_counter()
+        bookshelf.save_book_info(book)
+        book = bookshelf.complete_book(book)
+        with lock:
+            counts["store_seconds"] += time.perf_counter() - start
+        return book
+
+    def chapter_middle_ware(chapter, book):
+        start = time.perf_counter()
+        bookshelf.save_chapter_info(chapter, book.hash)
+        with lock:
+            counts["store_seconds"] += time.perf_counter() - start
+            counts["db_writes"] += 1
+        return chapter
+
+    downloaded = failed_books = 0
+    download_seconds = export_seconds = 0.0
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for url in site.book_urls(name):
+        # 下载书籍并写入书架
+        start = time.perf_counter()
+        book = manager.download(
+            url, book_middle_ware=book_middle_ware,
+            chapter_middle_ware=chapter_middle_ware
+        )
+        download_seconds += time.perf_counter() - start
+        if book is None:
+            failed_books += 1
+            continue
+        downloaded += len(list(book.chapters))
+        # 保存书籍文件
+        start = time.perf_counter()
+        Saver(book, method).save()
+        export_seconds += time.perf_counter() - start
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    return {
+        "chapters": downloaded,
+        "failed_books": failed_books,
+        "failed_chapters":
+            site.books * site.chapters - downloaded
+            - failed_books * site.chapters,
+        "seconds": wall,
+        "chapters_per_second": downloaded / wall if wall else 0.0,
+        "cpu_ms_per_chapter": cpu * 1000 / downloaded if downloaded else None,
+        "download_seconds": download_seconds,
+        "store_seconds": counts["store_seconds"],
+        "export_seconds": export_seconds,
+        "db_writes_per_second":
+            counts["db_writes"] / counts["store_seconds"]
+            if counts["store_seconds"] else None,
+    }
+
+
+def main(
+    engines: str = "Engine2,Engine3,Engine4", books: int = 2,
+    chapters: int = 50, paragraphs: int = 30, latency: float = 0.0,
+    error_rate: float = 0.0, protect_rate: float = 0.0,
+    save_method: int = 1, seed: int = 0, output: str = ""
+) -> None:
+    """运行基准测试并输出结果, output 不为空时同时保存为 JSON 文件
+    其余参数与 run_benchmark 相同
+    """
+    result = run_benchmark(
+        engines, books, chapters, paragraphs, latency, error_rate,
+        protect_rate, save_method, seed
+    )
+    for name, stats in result["engines"].items():
+        print(f"[{name}]")
+        for key, value in stats.items():
+            if isinstance(value, float):
+                value = f"{value:.3f}"
+            print(f"\t{key}: {value}")
+    print(f"peak_rss_mb: {result['peak_rss_mb']}")
+    if output:
+        with open(output, "w", encoding="UTF-8") as output_file:
+            json.dump(result, output_file, ensure_ascii=False, indent=4)
+    return None
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
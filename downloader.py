@@ -9,18 +9,42 @@
 # 导入标准库
 import os
 import sys
+import atexit
 
 # 导入第三方库
 import fire
 
 # 导入自定义库
+# 注意: 各命令用到的模块在命令内部导入, 以免每次启动都导入所有的第三方库
 import novel_dl
-from novel_dl.core.books import SaveMethod, Saver
-from novel_dl.services.download import WebManager
-from novel_dl.services.bookshelf import Bookshelf
 
 
 class Pipeline(object):
+    def __init__(self, metrics: str = "", profile: bool | str = False):
+        # 指定统计文件时记录各阶段的耗时, 并在程序退出时保存
+        # 扩展名为 .prom 或 .txt 时保存为 Prometheus 的文本格式, 否则保存为 JSON
+        if metrics:
+            from novel_dl.core import Settings
+            from novel_dl.utils.metrics import Metrics
+            Settings().METRICS = True
+            atexit.register(Metrics().save, metrics)
+        # 启用性能分析时分析整个命令, 并在程序退出时将结果写入日志目录
+        # profile 可以是 True(自动选择)、"cprofile" 或 "sample"
+        if profile:
+            from novel_dl.utils.profiler import Profiler
+            mode = profile if isinstance(profile, str) else "auto"
+            command = next(
+                (i for i in sys.argv[1:] if not i.startswith("-")), "profile"
+            )
+            profiler = Profiler(mode, command)
+            
+            def stop_profiler():
+                for path in profiler.stop():
+                    print(f"性能分析结果已保存到 {path}")
+            
+            atexit.register(stop_profiler)
+            profiler.start()
+    
     def test_cmd(self):
         print("命令行可正常使用。")
 
@@ -28,7 +52,14 @@ class Pipeline(object):
         import pytest
         pytest.main(["-s", "tests"])
     
-    def download_novel(self, url: str, save_method: int = 1):
+    def download_novel(
+        self, url: str, save_method: int = 1, multi_source: bool = False
+    ):
+        from novel_dl.core.books import SaveMethod, Saver
+        from novel_dl.services.download import WebManager
+        from novel_dl.services.download import MultiSourceDownloader
+        from novel_dl.services.bookshelf import Bookshelf
+        
         method = SaveMethod.to_obj(save_method)
         
         manager = WebManager()
@@ -44,20 +75,55 @@ class Pipeline(object):
             print(f"章节({chapter.name})信息已保存.")
             return chapter
         
-        book = manager.download(
-            url, book_middle_ware=book_middle_ware,
-            chapter_middle_ware=chapter_middle_ware
-        )
+        def report_callback(skipped, queued):
+            print(f"已跳过 {skipped} 个已下载的章节, 待下载 {queued} 个章节.")
+        
+        def failed_callback(failed):
+            for i in failed:
+                print(
+                    f"章节({i.index}: {i.url})在尝试 {i.attempts} 次后"
+                    f"下载失败({i.kind})."
+                )
+        
+        # 书架中记录的同一本书籍的其他来源
+        alternates = book_shelf.get_equivalent_sources(url)
+        if multi_source:
+            # 同时从所有来源下载章节, 并比较重叠章节的内容
+            downloader = MultiSourceDownloader(
+                manager, book_middle_ware=book_middle_ware,
+                chapter_middle_ware=chapter_middle_ware
+            )
+            book = downloader.download(
+                url, alternates, report_callback, failed_callback
+            )
+            for source, count in downloader.summary["sources"].items():
+                print(f"\t{source}: {count} 个章节")
+            for i in downloader.summary["mismatches"]:
+                print(
+                    f"章节({i['index']})的内容与{i['trusted']}不一致"
+                    f"(相似度 {i['ratio']}), 已停用来源{i['dropped']}."
+                )
+        else:
+            # 其他来源在该网站暂停访问时使用
+            book = manager.download(
+                url, book_middle_ware=book_middle_ware,
+                chapter_middle_ware=chapter_middle_ware,
+                report_callback=report_callback,
+                failed_callback=failed_callback,
+                alternates=alternates
+            )
         
         if book is not None:
             Saver(book, method).save()
     
     def download_novels(self, save_method: int = 1):
+        from novel_dl.core.books import SaveMethod, Saver
+        from novel_dl.services.download import BatchDownloader
+        from novel_dl.services.bookshelf import Bookshelf
+        
         BOOK_URLS_FILE = "book_urls.txt"
         # 将数字表示的保存方式改为保存方式常量
         method = SaveMethod.to_obj(save_method)
-        # 获取网站引擎管理类
-        manager = WebManager()
         # 确保书籍网址文件存在, 不存在则自动创建
         if not os.path.exists(BOOK_URLS_FILE):
             print(f"未找到书籍 URL 配置文件({BOOK_URLS_FILE}), 将自动创建.")
@@ -68,29 +134,115 @@ class Pipeline(object):
             BOOK_URLS_FILE, "r", encoding="UTF-8"
         ) as book_urls_file:
             urls = [i.strip("\n") for i in book_urls_file.readlines()]
-        for one_url in urls:
-            # 下载指定的书籍并保存
-            book = manager.download(one_url)
-            if book is not None:
-                Saver(book, method).save()
+        # 获取书架
+        book_shelf = Bookshelf()
+        # 同一行中的多个 URL 是同一本书籍的等价来源, 再加上书架中记录的其他来源,
+        # 所有书籍的其他来源在一次查询中获取
+        equivalents = book_shelf.get_equivalent_sources_batch(
+            i.split()[0] for i in urls if i.strip()
+        )
+        urls = [
+            " ".join([i,] + equivalents[i.split()[0]])
+            if i.strip() else i for i in urls
+        ]
+        
+        def book_middle_ware(book):
+            book_shelf.save_book_info(book)
+            return book_shelf.complete_book(book)
+        
+        def chapter_middle_ware(chapter, book):
+            book_shelf.save_chapter_info(chapter, book.hash)
+            return chapter
+        
+        def book_callback(book, url):
+            # 下载完成的书籍立即保存
+            if book is None:
+                print(f"书籍({url})下载失败.")
+                return None
+            Saver(book, method).save()
+            print(f"书籍({book.name})下载完成.")
+        
+        # 同时下载多本书籍
+        summary = BatchDownloader(
+            book_middle_ware=book_middle_ware,
+            chapter_middle_ware=chapter_middle_ware,
+            book_callback=book_callback
+        ).download(urls)
+        # 输出吞吐量统计
+        print(
+            f"共下载 {summary['books']} 本书籍"
+            f"(失败 {summary['failed_books']} 本), "
+            f"{summary['chapters']} 个章节"
+            f"(失败 {summary['failed_chapters']} 个), "
+            f"耗时 {summary['seconds']:.1f} 秒, "
+            f"平均每秒 {summary['chapters_per_second']:.2f} 个章节."
+        )
+        for domain, count in summary["domains"].items():
+            print(f"\t{domain}: {count} 个章节")
+        # 输出重试次数用完后仍然失败的章节
+        for i in summary["failures"]:
+            print(
+                f"书籍({i['book']})的章节({i['index']}: {i['url']})"
+                f"在尝试 {i['attempts']} 次后下载失败({i['kind']})."
+            )
         # 退出程序
         return None
     
+    def serve(
+        self, host: str = "127.0.0.1", port: int = 8765, workers: int = 2
+    ):
+        from novel_dl.services.daemon import Daemon
+        
+        # 创建常驻进程并启动本地 HTTP 服务
+        daemon = Daemon(workers)
+        server = daemon.make_server(host, port)
+        print(f"服务已启动: http://{host}:{server.server_address[1]}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("正在等待剩余的任务完成 . . .")
+        finally:
+            server.server_close()
+            daemon.jobs.close()
+        # 退出程序
+        return None
+    
+    def search_books_by_name(
+        self, name: str, limit: int = 20, with_chapters: bool = False
+    ):
+        from novel_dl.services.bookshelf import Bookshelf
+        
+        # 从书架中搜索书籍, 结果按相关程度排列
+        results = Bookshelf().search_books_by_name(
+            name, limit, with_chapters
+        )
+        # 输出搜索结果
+        counter = 0
+        for counter, (one_book, sources) in enumerate(results, 1):
+            print(f"{counter}.{one_book.author} - {one_book.name}")
+            for source in sources:
+                print(f"\t{source}")
+        if counter == 0:
+            print("未找到符合条件的书籍.")
+        return None
+    
     # TODO 在 README 文件中给这个命令添加说明
     def download_novel_by_name(
-        self, save_method: int = 1
+        self, save_method: int = 1, limit: int = 20
     ):
+        from novel_dl.services.download import WebManager
+        from novel_dl.services.bookshelf import Bookshelf
+        
         # 获取书籍引擎管理类
-        manager = novel_dl.WebManager()
+        manager = WebManager()
         # 获取书架
-        bookshelf = novel_dl.BookShelf()
+        bookshelf = Bookshelf()
         
         # 获取书籍名称
         name = input("请输入要搜索的书籍名称: ")
         # 搜索书籍
         print("查找书籍中 . . .", end="")
-        # TODO 限制获取上限
-        books = list(bookshelf.search_books_by_name(name))
+        books = list(bookshelf.search_books_by_name(name, limit))
         if len(books) == 0:
             print("未找到符合条件的书籍. 程序即将退出.")
             return None
@@ -111,7 +263,7 @@ class Pipeline(object):
             for i, source in enumerate(sources):
                 print(
                     f"{i + 1}." \
-                    f"[{manager.get_engine(source).name}]" \
+                    f"[{manager.get_engine_by_url(source)}]" \
                     f"{source}"
                 )
             # 选择书籍来源
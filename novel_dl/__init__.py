@@ -5,8 +5,18 @@
 # @Author: Amundsen Severus Rubeus Bjaaland
 
 
-# 预导入自定义函数(类)
-from . import core, utils, services
+# 导入标准库
+import importlib
+
+
+# 子模块在第一次访问时才导入, 以加快命令行的启动速度
+__all__ = ["core", "utils", "services"]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # 更新说明
@@ -5,9 +5,18 @@
 # @Author: Amundsen Severus Rubeus Bjaaland
 
 
-from .logger import Logger
 from .settings import Settings
 from .books import ContentType, Line
-from .books import CacheMethod, Chapter
+from .books import CacheMethod, Chapter, LazyChapter
 from .books import State, Tag, Book
-from .books import SaveMethod, Saver
\ No newline at end of file
+
+
+def __getattr__(name: str):
+    # 日志模块依赖 tqdm, 保存模块依赖 ebooklib 与 yaml, 第一次使用时才导入
+    if name == "Logger":
+        from .logger import Logger
+        return Logger
+    if name in ("SaveMethod", "Saver"):
+        from . import books
+        return getattr(books, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
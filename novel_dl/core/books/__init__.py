@@ -6,6 +6,13 @@
 
 
 from .line import ContentType, Line
-from .chapter import CacheMethod, Chapter
+from .chapter import CacheMethod, Chapter, LazyChapter
 from .book import State, Tag, Book
-from .saver import SaveMethod, Saver
\ No newline at end of file
+
+
+def __getattr__(name: str):
+    # saver 模块依赖 ebooklib 与 yaml, 只有保存书籍时才导入
+    if name in ("SaveMethod", "Saver"):
+        from . import saver
+        return getattr(saver, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
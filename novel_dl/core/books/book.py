@@ -62,7 +62,7 @@ import copy
 import hashlib
 from enum import Enum
 from threading import Lock
-from typing import Iterable, Generator, Dict, List
+from typing import Iterable, Generator, Dict, List, Set
 
 # 导入自定义库
 from .chapter import Chapter
@@ -225,6 +225,8 @@ class Book(object):
         # 初始化章节列表和锁对象
         self.__chapter_list: List[Chapter] = []
         self.__lock = Lock()
+        # 章节哈希值集合, 用于快速判断章节是否已经存在
+        self.__chapter_hashes: Set[int] = set()
     
     def __repr__(self):
         return f"<Book name={self.__name} " \
@@ -271,15 +273,18 @@ class Book(object):
         assert isinstance(value, Chapter)
         # 加锁
         with self.__lock:
-            # 设置章节对象
+            # 设置章节对象, 并更新章节哈希值集合
+            self.__chapter_hashes.discard(hash(self.__chapter_list[index]))
             self.__chapter_list[index] = value
+            self.__chapter_hashes.add(hash(value))
     
     def __delitem__(self, index: int) -> None:
         # 确保 index 是 int 类型
         assert isinstance(index, int)
         # 加锁
         with self.__lock:
-            # 删除章节对象
+            # 删除章节对象, 并更新章节哈希值集合
+            self.__chapter_hashes.discard(hash(self.__chapter_list[index]))
             del self.__chapter_list[index]
     
     @staticmethod
@@ -297,18 +302,22 @@ class Book(object):
         """
         # 确保 value 是 Chapter 类型
         assert isinstance(value, Chapter)
-        # 如果 value 已经在章节列表中,
-        # 或者 value 是默认章节对象,
+        # 如果 value 是默认章节对象,
         # 或者 value 的书名不是当前书籍的名称
         # 则返回 False
-        if (value in self.__chapter_list) or \
-            (value == Chapter.default()) or \
+        if (value == Chapter.default()) or \
             (value.book_name != self.__name):
             return False
+        # 计算章节的哈希值
+        value_hash = hash(value)
         # 加锁
         with self.__lock:
+            # 如果 value 已经在章节列表中则返回 False
+            if value_hash in self.__chapter_hashes:
+                return False
             # 添加章节对象
             self.__chapter_list.append(value)
+            self.__chapter_hashes.add(value_hash)
         # 返回 True
         return True
     
@@ -9,6 +9,7 @@
 - CacheMethod: 枚举类，定义章节内容的缓存方式（内存或磁盘）。
 - CacheList: 类，管理章节内容的缓存列表。
 - Chapter: 类，表示小说的一个章节。
+- LazyChapter: 类，在第一次访问内容时才加载内容的章节。
 模块依赖的标准库:
 - os: 提供操作系统相关功能。
 - copy: 提供浅拷贝和深拷贝操作。
@@ -17,6 +18,7 @@
 - hashlib: 提供哈希算法。
 - enum: 提供枚举支持。
 - typing: 提供类型提示支持。
+- threading: 提供锁支持。
 模块依赖的自定义库:
 - novel_dl.utils.options: 提供 mkdir 和 sanitize_filename 函数。
 - novel_dl.core.settings: 提供 Settings 类。
@@ -25,6 +27,7 @@
 - CacheMethod: 枚举类，定义章节内容的缓存方式（内存或磁盘）。
 - CacheList: 类，管理章节内容的缓存列表。
 - Chapter: 类，表示小说的一个章节。
+- LazyChapter: 类，在第一次访问内容时才加载内容的章节。
 CacheMethod 类:
 - Memory: 内存缓存方式。
 - Disk: 磁盘缓存方式。
@@ -67,6 +70,10 @@ Chapter 类:
 - cache_method: 返回缓存方式。
 - other_info: 返回其他信息。
 - content: 返回章节内容的生成器。
+LazyChapter 类:
+- __init__: 初始化章节对象，传入用于加载内容的函数。
+- loaded: 返回章节内容是否已经加载。
+- 其余方法与 Chapter 类相同，访问内容的方法会先加载内容。
 """
 
 
@@ -77,7 +84,8 @@ import json
 import time
 import hashlib
 from enum import Enum
-from typing import Iterable, Generator, List, Dict
+from threading import Lock
+from typing import Iterable, Generator, List, Dict, Callable
 
 # 导入自定义库
 from .line import Line
@@ -579,4 +587,99 @@ class Chapter(object):
         return _hash(
             f"{self.str_index}{self.__name}" \
             f"{self.__book_name}"
-        )
\ No newline at end of file
+        )
+
+
+class LazyChapter(Chapter):
+    def __init__(
+        self, index: int, name: str, sources: Iterable[str],
+        update_time: float, book_name: str,
+        loader: Callable[[], Iterable[Line]],
+        cache_method: CacheMethod = CacheMethod.Memory,
+        **other_info: Dict[str, str]
+    ):
+        """延迟加载内容的章节类
+        章节的基本信息在创建时即可使用, 章节内容则在第一次被访问时
+        才通过 loader 加载, 适用于只需要章节来源等信息的场景.  
+        注意: 章节内容的加载是线程安全的, 且只会加载一次.
+        
+        :param index: 章节索引
+        :type index: int
+        :param name: 章节名称
+        :type name: str
+        :param sources: 章节来源
+        :type sources: Iterable[str]
+        :param update_time: 更新时间
+        :type update_time: float
+        :param book_name: 书籍名称
+        :type book_name: str
+        :param loader: 用于加载章节内容的函数
+        :type loader: Callable[[], Iterable[Line]]
+        :param cache_method: 缓存方式
+        :type cache_method: CacheMethod
+        :param other_info: 其他信息
+        :type other_info: Dict[str, str]
+        
+        Example:
+            >>> LazyChapter(
+            >>>     1, "chapter_name", ["https://example.com/1",],
+            >>>     1643328000.0, "book_name", lambda: [Line.default(),]
+            >>> )
+        """
+        # 确认传入的参数的类型是否正确
+        assert callable(loader)
+        # 初始化章节的基本信息, 此时章节内容为空
+        super().__init__(
+            index, name, sources, update_time, book_name, (),
+            cache_method, **other_info
+        )
+        # 记录加载函数, 并初始化加载状态和锁对象
+        self.__loader = loader
+        self.__loaded = False
+        self.__lock = Lock()
+    
+    def __load(self) -> None:
+        """加载章节内容, 若已经加载过则不进行任何操作"""
+        # 如果已经加载过则直接返回
+        if self.__loaded:
+            return
+        # 加锁, 并再次检查是否已经加载过
+        with self.__lock:
+            if self.__loaded:
+                return
+            # 将加载得到的内容添加到章节中
+            for i in self.__loader():
+                Chapter.append(self, i)
+            # 标记为已加载, 并释放加载函数
+            self.__loaded = True
+            self.__loader = None
+    
+    def __len__(self):
+        self.__load()
+        return super().__len__()
+    
+    def __str__(self):
+        self.__load()
+        return super().__str__()
+    
+    def __repr__(self):
+        return f"<LazyChapter book_name={self.book_name} " \
+            f"index={self.index} name={self.name} " \
+            f"loaded={self.__loaded}>"
+    
+    def __iter__(self):
+        self.__load()
+        return super().__iter__()
+    
+    def append(self, line: Line) -> None:
+        self.__load()
+        super().append(line)
+    
+    @property
+    def loaded(self) -> bool:
+        return self.__loaded
+    
+    @property
+    def content(self) -> Generator[Line, None, None]:
+        self.__load()
+        return super().content
\ No newline at end of file
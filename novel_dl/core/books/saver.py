@@ -44,6 +44,7 @@ from novel_dl.utils.fs import mkdir
 from novel_dl.core.settings import Settings
 from novel_dl.utils.options import hash as _hash
 from novel_dl.utils.options import convert_image
+from novel_dl.utils.metrics import timed
 
 
 # 简介页面的 CSS 样式
@@ -195,6 +196,7 @@ class Saver(object):
         self.__book = book
         self.__save_method = save_method
     
+    @timed("saver.save")
     def save(self) -> int:
         """保存书籍
         
@@ -32,6 +32,19 @@ class Settings(object):
         11. BOOKS_CACHE_DIR: 书籍缓存目录, 默认为 "data/books/cache".
         12. BOOKS_DB_PATH: 书籍数据库路径, 默认为 "data/books/bookshelf.db".
         13. BOOKS_STORAGE_DIR: 书籍存储目录, 默认为 "data/books/storage".
+        14. SEARCH_CHAPTERS: 是否为章节内容建立全文搜索索引, 默认为 False.
+        15. BOOKSHELF_CACHE_SIZE: 书架读取缓存的容量, 单位是字节, 默认为 64 MiB.
+        16. PRESTORE_WORKERS: 预下载时每个网站的工作线程数量, 默认为 4.
+        17. DOMAIN_MAX_CONNECTIONS: 同一域名同时进行的最大请求数量, 默认为 4.
+        18. DOMAIN_REQUEST_INTERVAL: 同一域名两次请求之间的最短间隔, 单位是秒, 默认为 0.5.
+        19. MAX_CONNECTIONS: 批量下载时所有域名同时进行的最大请求数量, 默认为 16.
+        20. BATCH_MAX_BOOKS: 批量下载时同时下载的最大书籍数量, 默认为 8.
+        21. METRICS: 是否统计下载流程中各阶段的耗时, 默认为 False.
+        22. CIRCUIT_FAILURE_THRESHOLD: 域名连续失败多少次后暂停访问该域名, 默认为 5.
+        23. CIRCUIT_OPEN_SECONDS: 暂停访问域名的时间, 单位是秒, 默认为 30.0.
+        24. MULTI_SOURCE_VERIFY_INTERVAL: 多来源下载时每隔多少个章节比较一次两个来源的内容,
+            为 0 时不比较, 默认为 20.
+        25. ENGINES_DIR: 引擎配置文件目录, 默认为 "data/engines".
         
         TODO 添加新的设置项时应当:
         1. 在初始化函数中添加默认值.
@@ -53,6 +66,7 @@ class Settings(object):
             "%(filename)s-%(lineno)s, in %(funcName)s:\n\t%(message)s"
         
         self.__urls_dir: str = os.path.join(self.__data_dir, "urls")
+        self.__engines_dir: str = os.path.join(self.__data_dir, "engines")
         self.__books_dir: str = os.path.join(self.__data_dir, "books")
         self.__books_cache_dir: str = os.path.join(
             self.__books_dir, "cache"
@@ -63,6 +77,23 @@ class Settings(object):
         self.__books_storage_dir: str = os.path.join(
             self.__books_dir, "storage"
         )
+        
+        self.__search_chapters: Literal[True, False] = False
+        self.__bookshelf_cache_size: int = 64 * 1024 * 1024
+        
+        self.__prestore_workers: int = 4
+        self.__domain_max_connections: int = 4
+        self.__domain_request_interval: float = 0.5
+        
+        self.__max_connections: int = 16
+        self.__batch_max_books: int = 8
+        
+        self.__metrics: Literal[True, False] = False
+        
+        self.__circuit_failure_threshold: int = 5
+        self.__circuit_open_seconds: float = 30.0
+        
+        self.__multi_source_verify_interval: int = 20
     
     @property
     def DEBUG(self) -> bool:
@@ -102,6 +133,7 @@ class Settings(object):
         
         self.__log_dir = os.path.join(self.__data_dir, "logs")
         self.__urls_dir = os.path.join(self.__data_dir, "urls")
+        self.__engines_dir = os.path.join(self.__data_dir, "engines")
         self.__books_dir = os.path.join(self.__data_dir, "books")
         self.__books_cache_dir = os.path.join(
             self.__books_dir, "cache"
@@ -189,4 +221,148 @@ class Settings(object):
     @property
     def BOOKS_STORAGE_DIR(self) -> str:
         """书籍存储目录"""
-        return self.__books_storage_dir
\ No newline at end of file
+        return self.__books_storage_dir
+    
+    @property
+    def SEARCH_CHAPTERS(self) -> bool:
+        """是否为章节内容建立全文搜索索引"""
+        return self.__search_chapters
+    
+    @SEARCH_CHAPTERS.setter
+    def SEARCH_CHAPTERS(self, value: bool):
+        """设置是否为章节内容建立全文搜索索引"""
+        # 确保 value 是 bool 类型
+        assert isinstance(value, bool)
+        self.__search_chapters = value
+    
+    @property
+    def BOOKSHELF_CACHE_SIZE(self) -> int:
+        """书架读取缓存的容量, 单位是字节"""
+        return self.__bookshelf_cache_size
+    
+    @BOOKSHELF_CACHE_SIZE.setter
+    def BOOKSHELF_CACHE_SIZE(self, value: int):
+        """设置书架读取缓存的容量, 为 0 时不使用缓存"""
+        # 确保 value 是非负的 int 类型
+        assert isinstance(value, int) and value >= 0
+        self.__bookshelf_cache_size = value
+    
+    @property
+    def PRESTORE_WORKERS(self) -> int:
+        """预下载时每个网站的工作线程数量"""
+        return self.__prestore_workers
+    
+    @PRESTORE_WORKERS.setter
+    def PRESTORE_WORKERS(self, value: int):
+        """设置预下载时每个网站的工作线程数量"""
+        # 确保 value 是正的 int 类型
+        assert isinstance(value, int) and value > 0
+        self.__prestore_workers = value
+    
+    @property
+    def DOMAIN_MAX_CONNECTIONS(self) -> int:
+        """同一域名同时进行的最大请求数量"""
+        return self.__domain_max_connections
+    
+    @DOMAIN_MAX_CONNECTIONS.setter
+    def DOMAIN_MAX_CONNECTIONS(self, value: int):
+        """设置同一域名同时进行的最大请求数量"""
+        # 确保 value 是正的 int 类型
+        assert isinstance(value, int) and value > 0
+        self.__domain_max_connections = value
+    
+    @property
+    def DOMAIN_REQUEST_INTERVAL(self) -> float:
+        """同一域名两次请求之间的最短间隔, 单位是秒"""
+        return self.__domain_request_interval
+    
+    @DOMAIN_REQUEST_INTERVAL.setter
+    def DOMAIN_REQUEST_INTERVAL(self, value: float):
+        """设置同一域名两次请求之间的最短间隔, 单位是秒"""
+        # 确保 value 是非负的数字
+        assert isinstance(value, (int, float)) and value >= 0
+        self.__domain_request_interval = float(value)
+    
+    @property
+    def MAX_CONNECTIONS(self) -> int:
+        """批量下载时所有域名同时进行的最大请求数量"""
+        return self.__max_connections
+    
+    @MAX_CONNECTIONS.setter
+    def MAX_CONNECTIONS(self, value: int):
+        """设置批量下载时所有域名同时进行的最大请求数量"""
+        # 确保 value 是正的 int 类型
+        assert isinstance(value, int) and value > 0
+        self.__max_connections = value
+    
+    @property
+    def BATCH_MAX_BOOKS(self) -> int:
+        """批量下载时同时下载的最大书籍数量"""
+        return self.__batch_max_books
+    
+    @BATCH_MAX_BOOKS.setter
+    def BATCH_MAX_BOOKS(self, value: int):
+        """设置批量下载时同时下载的最大书籍数量"""
+        # 确保 value 是正的 int 类型
+        assert isinstance(value, int) and value > 0
+        self.__batch_max_books = value
+    
+    @property
+    def METRICS(self) -> bool:
+        """是否统计下载流程中各阶段的耗时"""
+        return self.__metrics
+    
+    @METRICS.setter
+    def METRICS(self, value: bool):
+        """设置是否统计下载流程中各阶段的耗时"""
+        # 确保 value 是 bool 类型
+        assert isinstance(value, bool)
+        self.__metrics = value
+    
+    @property
+    def CIRCUIT_FAILURE_THRESHOLD(self) -> int:
+        """域名连续失败多少次后暂停访问该域名"""
+        return self.__circuit_failure_threshold
+    
+    @CIRCUIT_FAILURE_THRESHOLD.setter
+    def CIRCUIT_FAILURE_THRESHOLD(self, value: int):
+        """设置域名连续失败多少次后暂停访问该域名"""
+        # 确保 value 是正的 int 类型
+        assert isinstance(value, int) and value > 0
+        self.__circuit_failure_threshold = value
+    
+    @property
+    def CIRCUIT_OPEN_SECONDS(self) -> float:
+        """暂停访问域名的时间, 单位是秒"""
+        return self.__circuit_open_seconds
+    
+    @CIRCUIT_OPEN_SECONDS.setter
+    def CIRCUIT_OPEN_SECONDS(self, value: float):
+        """设置暂停访问域名的时间, 单位是秒"""
+        # 确保 value 是非负的数字
+        assert isinstance(value, (int, float)) and value >= 0
+        self.__circuit_open_seconds = float(value)
+    
+    @property
+    def MULTI_SOURCE_VERIFY_INTERVAL(self) -> int:
+        """多来源下载时每隔多少个章节比较一次两个来源的内容"""
+        return self.__multi_source_verify_interval
+    
+    @MULTI_SOURCE_VERIFY_INTERVAL.setter
+    def MULTI_SOURCE_VERIFY_INTERVAL(self, value: int):
+        """设置多来源下载时每隔多少个章节比较一次两个来源的内容"""
+        # 确保 value 是非负的 int 类型
+        assert isinstance(value, int) and value >= 0
+        self.__multi_source_verify_interval = value
+    
+    @property
+    def ENGINES_DIR(self) -> str:
+        """引擎配置文件目录"""
+        return self.__engines_dir
+    
+    @ENGINES_DIR.setter
+    def ENGINES_DIR(self, value: str):
+        """设置引擎配置文件目录"""
+        # 确保 value 是 str 类型
+        assert isinstance(value, str)
+        self.__engines_dir = value
\ No newline at end of file
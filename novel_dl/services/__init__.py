@@ -5,4 +5,15 @@
 # @Author: Amundsen Severus Rubeus Bjaaland
 
 
-from . import download
\ No newline at end of file
+# 导入标准库
+import importlib
+
+
+# 子模块在第一次访问时才导入, 以免导入 sqlalchemy 等较重的第三方库
+__all__ = ["bookshelf", "daemon", "download", "prestore"]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
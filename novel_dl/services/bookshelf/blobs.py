@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: blobs.py
+# @Time: 19/10/2026 14:02
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""blobs.py
+==========
+该模块提供了 `BlobStore` 类, 为书架提供按内容寻址的二进制数据存储.
+类
+---
+BlobStore
+    以内容的 SHA-256 哈希值为键保存二进制数据 (章节附件、书籍封面等),
+    相同的内容无论出现在哪一章、哪一本书中都只保存一份, 并通过引用计数管理.
+函数
+----
+migrate_legacy_tables
+    将旧版本中直接保存二进制内容的附件表和封面表迁移为引用 `blobs` 表的结构.
+依赖
+----
+- 第三方库:
+    - sqlalchemy: 用于数据库操作.
+- 自定义库:
+    - novel_dl.utils.options: 提供哈希函数.
+    - .model: 提供数据库模型类 `Blobs`, `Attechments`, `BookCovers`, `Base`.
+注意事项
+--------
+- 引用计数等于引用该数据的附件记录与封面记录的数量之和,
+  计数降为 0 时数据会被删除.
+- 该类的方法均不会提交会话, 由调用者决定提交时机.
+"""
+
+
+# 导入标准库
+import json
+
+# 导入第三方库
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+# 导入自定义库
+from novel_dl.utils.options import hash as _hash
+from .model import Base, Blobs, Attechments, BookCovers
+
+
+class BlobStore(object):
+    @staticmethod
+    def key(content: bytes) -> bytes:
+        """计算二进制数据的键, 即内容的 SHA-256 哈希值
+
+        :param content: 二进制数据
+        :type content: bytes
+        :return: 键
+        """
+        return _hash(content)
+
+    def acquire(self, session: Session, content: bytes) -> bytes:
+        """保存二进制数据并增加一次引用
+        若数据已经存在则只增加引用计数, 不会重复写入
+
+        :param session: 数据库会话
+        :type session: Session
+        :param content: 二进制数据
+        :type content: bytes
+        :return: 该数据的键
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(content, bytes)
+        # 计算键
+        key = self.key(content)
+        # 如果数据已经存在则增加引用计数
+        updated = session.query(Blobs).filter_by(things_hash=key).update(
+            {Blobs.ref_count: Blobs.ref_count + 1},
+            synchronize_session=False
+        )
+        # 如果数据不存在则写入数据
+        if not updated:
+            session.add(
+                Blobs(
+                    things_hash=key, content=content,
+                    size=len(content), ref_count=1
+                )
+            )
+            session.flush()
+        # 返回键
+        return key
+
+    def release(self, session: Session, key: bytes) -> None:
+        """减少一次引用, 若引用计数降为 0 则删除数据
+
+        :param session: 数据库会话
+        :type session: Session
+        :param key: 数据的键
+        :type key: bytes
+        """
+        # 减少引用计数
+        session.query(Blobs).filter_by(things_hash=key).update(
+            {Blobs.ref_count: Blobs.ref_count - 1},
+            synchronize_session=False
+        )
+        # 删除不再被引用的数据
+        session.query(Blobs).filter(
+            Blobs.things_hash == key, Blobs.ref_count <= 0
+        ).delete(synchronize_session=False)
+
+    def get(self, session: Session, key: bytes) -> bytes | None:
+        """读取二进制数据
+
+        :param session: 数据库会话
+        :type session: Session
+        :param key: 数据的键
+        :type key: bytes
+        :return: 二进制数据, 若不存在则返回 None
+        """
+        record = session.query(Blobs.content) \
+            .filter_by(things_hash=key).first()
+        return None if record is None else record[0]
+
+
+def migrate_legacy_tables(engine: Engine) -> None:
+    """将旧版本的附件表和封面表迁移到按内容寻址的存储结构
+    旧版本中附件表的 content 列与封面表的 cover_image 列直接保存二进制内容,
+    迁移后内容被转移到 blobs 表中, 原表只保存引用.
+    若数据库不是旧版本的结构则不进行任何操作
+
+    :param engine: 数据库引擎
+    :type engine: Engine
+    """
+    # 获取数据库中已有的表及其列
+    inspector = inspect(engine)
+    tables = inspector.get_table_names()
+    legacy = []
+    if "attechments" in tables and "blob_hash" not in [
+        i["name"] for i in inspector.get_columns("attechments")
+    ]:
+        legacy.append("attechments")
+    if "book_covers" in tables and "blob_hash" not in [
+        i["name"] for i in inspector.get_columns("book_covers")
+    ]:
+        legacy.append("book_covers")
+    # 如果没有旧版本的表则直接返回
+    if not legacy:
+        return None
+    # 将旧版本的表重命名, 再按新的结构创建表
+    with engine.begin() as connection:
+        for i in legacy:
+            connection.execute(text(f"ALTER TABLE {i} RENAME TO {i}_legacy"))
+    Base.metadata.create_all(engine, checkfirst=True)
+    # 将旧表中的数据迁移到新表中
+    store = BlobStore()
+    with sessionmaker(bind=engine)() as session:
+        if "attechments" in legacy:
+            rows = session.execute(
+                text(
+                    "SELECT things_hash, chapter_hash, \"index\", content, "
+                    "content_type, attrs FROM attechments_legacy"
+                )
+            ).all()
+            for i in rows:
+                # 跳过无法迁移的内容
+                if not isinstance(i[3], bytes):
+                    continue
+                session.add(
+                    Attechments(
+                        things_hash=Attechments.make_hash(i[1], i[0]),
+                        chapter_hash=i[1], index=i[2],
+                        blob_hash=store.acquire(session, i[3]),
+                        content_type=i[4],
+                        attrs=json.loads(i[5]) if isinstance(i[5], str)
+                        else i[5]
+                    )
+                )
+            session.execute(text("DROP TABLE attechments_legacy"))
+        if "book_covers" in legacy:
+            rows = session.execute(
+                text(
+                    "SELECT book_hash, cover_image FROM book_covers_legacy"
+                )
+            ).all()
+            for i in rows:
+                # 已经存在相同的封面记录时不再增加引用, 以免引用计数无法归零
+                things_hash = _hash(i[0] + store.key(i[1]))
+                if session.get(BookCovers, things_hash) is not None:
+                    continue
+                session.add(
+                    BookCovers(
+                        things_hash=things_hash, book_hash=i[0],
+                        blob_hash=store.acquire(session, i[1])
+                    )
+                )
+                session.flush()
+            session.execute(text("DROP TABLE book_covers_legacy"))
+        session.commit()
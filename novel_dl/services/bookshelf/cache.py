@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: cache.py
+# @Time: 19/10/2026 15:10
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""cache.py
+==========
+该模块提供了 `BookshelfCache` 类, 是位于书架读取操作之前的进程内 LRU 缓存.
+类
+---
+BookshelfCache
+    按字节数限制容量的 LRU 缓存, 整个进程共享一个实例.
+    缓存的是从数据库读取并解码后的数据, 命中时不需要访问数据库或解析 HTML.
+函数
+----
+sizeof
+    估算缓存值占用的字节数.
+依赖
+----
+- 自定义库:
+    - novel_dl.core.books: 提供 `Line` 类.
+    - novel_dl.core.settings: 提供缓存容量的设置.
+    - novel_dl.utils.options: 提供单例装饰器.
+注意事项
+--------
+- 缓存中的值会被多个调用者共享, 因此只应当保存不会被修改的数据,
+  书籍与章节对象应当在读取缓存后重新构造.
+- 缓存的键中应当包含数据库的路径, 以区分不同的书架.
+- 读取数据库之前应当先通过 `generation` 获取键的版本号, 写入缓存时传给 `put`,
+  以免读取期间其他线程写入并使缓存失效后, 过期的数据又被写入缓存.
+"""
+
+
+# 导入标准库
+import sys
+from threading import Lock
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+
+# 导入自定义库
+from novel_dl.core.books import Line
+from novel_dl.core.settings import Settings
+from novel_dl.utils.options import singleton
+
+
+def sizeof(value: Any) -> int:
+    """估算缓存值占用的字节数
+    会递归计算容器中的元素, 对行对象则计算其内容与属性
+
+    :param value: 缓存值
+    :type value: Any
+    :return: 估算的字节数
+    """
+    if isinstance(value, Line):
+        return sys.getsizeof(value) + sizeof(value.content) + \
+            sizeof(value.attrs)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            sizeof(k) + sizeof(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(i) for i in value)
+    return sys.getsizeof(value)
+
+
+@singleton
+class BookshelfCache(object):
+    def __init__(self):
+        """书架缓存
+        按字节数限制容量的 LRU 缓存, 容量由 `Settings().BOOKSHELF_CACHE_SIZE`
+        决定, 容量为 0 时缓存不生效.
+        注意: 该类是线程安全的.
+        """
+        # 缓存内容, 值为 (缓存值, 字节数)
+        self.__data: OrderedDict[Hashable, Tuple[Any, int]] = OrderedDict()
+        # 缓存容量与当前占用的字节数
+        self.__max_bytes = Settings().BOOKSHELF_CACHE_SIZE
+        self.__bytes = 0
+        # 统计数据
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        # 每个键失效的次数, 用于发现读取数据库期间发生的写入
+        self.__generations: Dict[Hashable, int] = {}
+        # 锁对象
+        self.__lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取缓存, 命中时将其标记为最近使用
+
+        :param key: 键
+        :type key: Hashable
+        :param default: 未命中时返回的值
+        :return: 缓存值或者 default
+        """
+        with self.__lock:
+            item = self.__data.get(key)
+            # 未命中
+            if item is None:
+                self.__misses += 1
+                return default
+            # 命中, 将其移动到末尾
+            self.__data.move_to_end(key)
+            self.__hits += 1
+            return item[0]
+
+    def generation(self, key: Hashable) -> int:
+        """获取键的版本号, 每次使该键失效时版本号加一
+        应当在读取数据库之前获取, 并在写入缓存时传给 put
+
+        :param key: 键
+        :type key: Hashable
+        :return: 版本号
+        """
+        with self.__lock:
+            return self.__generations.get(key, 0)
+
+    def put(
+        self, key: Hashable, value: Any, generation: int | None = None
+    ) -> None:
+        """写入缓存, 超出容量时淘汰最久未使用的缓存
+        若该值本身超过容量则不会被缓存.
+        若该键的版本号已经不是 generation, 说明读取数据库之后该键已经失效,
+        读取到的数据可能已经过期, 同样不会被缓存
+
+        :param key: 键
+        :type key: Hashable
+        :param value: 缓存值
+        :type value: Any
+        :param generation: 读取数据库之前获取的版本号, 为 None 时不检查
+        :type generation: int | None
+        """
+        # 估算缓存值的大小
+        size = sizeof(value)
+        with self.__lock:
+            # 读取期间该键已经失效时不写入
+            if generation is not None and \
+                    generation != self.__generations.get(key, 0):
+                return None
+            # 移除旧的缓存
+            self.__pop(key)
+            # 超过容量的值不缓存
+            if size > self.__max_bytes:
+                return None
+            # 写入缓存
+            self.__data[key] = (value, size)
+            self.__bytes += size
+            # 淘汰最久未使用的缓存
+            while self.__bytes > self.__max_bytes:
+                _, (_, old_size) = self.__data.popitem(last=False)
+                self.__bytes -= old_size
+                self.__evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """使指定的缓存失效
+
+        :param key: 键
+        :type key: Hashable
+        """
+        with self.__lock:
+            self.__pop(key)
+            self.__generations[key] = self.__generations.get(key, 0) + 1
+
+    def clear(self) -> None:
+        """清空缓存, 统计数据会被保留"""
+        with self.__lock:
+            self.__data.clear()
+            self.__bytes = 0
+
+    def resize(self, max_bytes: int) -> None:
+        """修改缓存容量, 超出新容量的缓存会被淘汰
+
+        :param max_bytes: 缓存容量, 单位是字节
+        :type max_bytes: int
+        """
+        assert isinstance(max_bytes, int)
+        with self.__lock:
+            self.__max_bytes = max_bytes
+            while self.__data and self.__bytes > self.__max_bytes:
+                _, (_, old_size) = self.__data.popitem(last=False)
+                self.__bytes -= old_size
+                self.__evictions += 1
+
+    def __pop(self, key: Hashable) -> None:
+        """移除缓存, 调用者需要持有锁"""
+        item = self.__data.pop(key, None)
+        if item is not None:
+            self.__bytes -= item[1]
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """缓存的统计数据, 包括命中、未命中、淘汰次数以及当前的占用情况"""
+        with self.__lock:
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "evictions": self.__evictions,
+                "entries": len(self.__data),
+                "bytes": self.__bytes,
+                "max_bytes": self.__max_bytes,
+            }
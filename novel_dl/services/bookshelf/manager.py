@@ -18,29 +18,49 @@ Bookshelf
     - novel_dl.core.books: 提供 `Book` 和 `Chapter` 类。
     - novel_dl.core: 提供全局设置。
     - novel_dl.core.settings: 提供 `Settings` 类。
-    - .model: 提供数据库模型类 `Chapters`, `Books`, `Base`, `BookCovers`, `Attechments`。
+    - .model: 提供数据库模型类 `Chapters`, `Books`, `Base`, `BookCovers`, `Attechments`,
+      `BookSources`。
+    - .search: 提供全文搜索索引类 `SearchIndex`。
+    - .blobs: 提供按内容寻址的二进制数据存储类 `BlobStore`。
+    - .cache: 提供按字节数限制容量的读取缓存类 `BookshelfCache`。
 功能
 ----
 - 初始化数据库连接并创建表。
-- 保存书籍信息到数据库。
+- 保存书籍信息到数据库, 支持在一个事务中批量保存。
 - 保存章节信息到数据库。
-- 从数据库中完善书籍信息。
+- 从数据库中完善书籍信息, 章节内容延迟到第一次访问时加载。
+- 仅查询已保存章节的哈希值与来源。
+- 查询同一本书籍在其他网站或镜像中的来源, 支持在一次查询中查询多个 URL。
+- 按书名、作者、简介以及章节内容搜索书籍。
+- 附件与封面按内容去重保存, 相同的内容只保存一份。
+- 书籍信息、章节列表与章节内容的读取结果会被缓存, 保存时使对应的缓存失效。
 注意事项
 --------
 - 数据库路径由 `Settings().BOOKS_DB_PATH` 指定。
 - 如果 `Settings().FORCE_RELOAD` 为 True, 则会强制重新加载书籍或章节信息。
+- 缓存容量由 `Settings().BOOKSHELF_CACHE_SIZE` 指定, 为 0 时不使用缓存。
 """
 
 
+# 导入标准库
+from typing import Any, Dict, Generator, Iterable, List, Tuple
+
 # 导入第三方库
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 # 导入自定义库
-from novel_dl.core.books import Book, Chapter
+from novel_dl.core.books import Book, Chapter, LazyChapter
+from novel_dl.core.books import CacheMethod, Line, State, Tag
 from novel_dl.core import Settings
 from novel_dl.core.settings import Settings
+from novel_dl.utils.fs import mkdir
+from novel_dl.utils.metrics import timed
 from .model import Chapters, Books, Base, BookCovers, Attechments
+from .model import BookSources
+from .search import SearchIndex
+from .blobs import BlobStore, migrate_legacy_tables
+from .cache import BookshelfCache
 
 
 class Bookshelf(object):
@@ -48,13 +68,35 @@ class Bookshelf(object):
         """书架对象
         用于缓存已经下载过的书籍信息
         """
+        # 创建运行时必要的目录
+        mkdir(Settings().DATA_DIR)
+        mkdir(Settings().BOOKS_DIR)
         # 初始化数据库连接
         self.__engine = create_engine(
             f"sqlite:///{Settings().BOOKS_DB_PATH}",
             connect_args={"check_same_thread": False}
         )
-        # 创建表
+        # 迁移旧版本的附件表和封面表, 然后创建表
+        migrate_legacy_tables(self.__engine)
         Base.metadata.create_all(self.__engine, checkfirst=True)
+        # 初始化按内容寻址的二进制数据存储
+        self.__blob_store = BlobStore()
+        # 初始化读取缓存, 缓存的键以数据库路径开头以区分不同的书架
+        self.__db_path = Settings().BOOKS_DB_PATH
+        self.__cache = BookshelfCache()
+        self.__cache.resize(Settings().BOOKSHELF_CACHE_SIZE)
+        # 创建全文搜索索引, 如果书架中已有书籍但索引为空则重建索引
+        with sessionmaker(bind=self.__engine)() as session:
+            self.__search_index = SearchIndex(session)
+            if self.__search_index.is_empty(session) and \
+                session.query(Books).first() is not None:
+                self.rebuild_search_index()
+            # 旧版本的书架没有来源索引, 按书籍记录中的来源建立索引
+            if session.query(BookSources).first() is None:
+                for book_hash, sources in \
+                    session.query(Books.things_hash, Books.sources).all():
+                    self.__index_sources(session, book_hash, sources)
+                session.commit()
     
     def save_book_info(self, book: Book) -> None:
         """保存书籍信息
@@ -62,27 +104,77 @@ class Bookshelf(object):
         :param book: 书籍对象
         :type book: Book
         """
+        self.save_books_info([book,])
+    
+    @timed("bookshelf.save_books")
+    def save_books_info(self, books: Iterable[Book]) -> None:
+        """批量保存书籍信息
+        所有书籍在同一个事务中保存, 适合需要连续保存大量书籍的场景
+        
+        :param books: 书籍对象
+        :type books: Iterable[Book]
+        """
+        books = list(books)
         # 创建数据库会话
         with sessionmaker(bind=self.__engine)() as session:
-            # 查询数据库中是否已经存在该书籍
-            book_record = session.query(Books) \
-                .filter_by(things_hash=book.hash).first()
-            # 如果书籍不存在或者强制重新加载
-            if (book_record is None) or Settings().FORCE_RELOAD:
-                # 添加书籍信息以及封面信息
-                session.add(Books.from_book(book))
-                [session.add(i) for i in BookCovers.from_book(book)]
-            # 如果书籍存在
-            if book_record is not None:
-                # 将该书籍的来源信息与数据库中已经存在的信息合并
-                book_record.sources = list(
-                    set(book_record.sources + list(book.sources))
-                )
-                # 更新数据库中的信息
-                session.add(book_record)
+            for book in books:
+                self.__save_book(session, book)
             # 保存更改
             session.commit()
+        # 使这些书籍的缓存失效
+        for book in books:
+            self.__cache.invalidate(self.__key("book", book.hash))
     
+    def __save_book(self, session: Session, book: Book) -> None:
+        """在指定的会话中保存书籍信息, 不会提交会话"""
+        # 查询数据库中是否已经存在该书籍
+        book_record = session.query(Books) \
+            .filter_by(things_hash=book.hash).first()
+        # 保存内容的函数, 相同的内容只会保存一份
+        acquire = lambda x: self.__blob_store.acquire(session, x)
+        # 如果书籍不存在, 则添加书籍信息以及封面信息
+        if book_record is None:
+            session.add(Books.from_book(book))
+            [session.add(i) for i in BookCovers.from_book(book, acquire)]
+            self.__index_sources(session, book.hash, book.sources)
+        # 如果书籍存在
+        else:
+            # 记录数据库中已经存在的来源信息
+            sources = list(book_record.sources)
+            # 如果强制重新加载, 则释放旧的封面并覆盖书籍信息以及封面信息
+            if Settings().FORCE_RELOAD:
+                for i in list(book_record.cover_images):
+                    self.__blob_store.release(session, i.blob_hash)
+                    book_record.cover_images.remove(i)
+                    session.delete(i)
+                session.flush()
+                book_record = session.merge(Books.from_book(book))
+                [
+                    session.add(i) for i in
+                    BookCovers.from_book(book, acquire)
+                ]
+            # 将该书籍的来源信息与数据库中已经存在的信息合并
+            book_record.sources = list(
+                set(sources + list(book.sources))
+            )
+            self.__index_sources(
+                session, book.hash,
+                [i for i in book.sources if i not in sources]
+            )
+            # 更新数据库中的信息
+            session.add(book_record)
+        # 更新全文搜索索引
+        self.__search_index.add_book(session, book)
+    
+    @staticmethod
+    def __index_sources(
+        session: Session, book_hash: bytes, sources: Iterable[str]
+    ) -> None:
+        """在指定的会话中为书籍的来源建立索引, 不会提交会话"""
+        for i in set(sources):
+            session.merge(BookSources(source=i, book_hash=book_hash))
+    
+    @timed("bookshelf.save_chapter")
     def save_chapter_info(
         self, chapter: Chapter, book_hash: bytes
     ) -> None:
@@ -98,40 +190,352 @@ class Bookshelf(object):
             # 查询数据库中是否已经存在该章节
             chapter_record = session.query(Chapters) \
                 .filter_by(things_hash=chapter.hash).first()
-            # 如果章节不存在或者强制重新加载
-            if (chapter_record is None) or Settings().FORCE_RELOAD:
-                # 添加章节信息以及附件信息
+            # 保存内容的函数, 相同的内容只会保存一份
+            acquire = lambda x: self.__blob_store.acquire(session, x)
+            # 如果章节不存在, 则添加章节信息以及附件信息
+            if chapter_record is None:
                 session.add(Chapters.from_chapter(chapter, book_hash))
                 [
                     session.add(i) for i in
-                    Attechments.from_chapter(chapter)
+                    Attechments.from_chapter(chapter, acquire)
                 ]
             # 如果章节存在
-            if chapter_record is not None:
+            else:
+                # 记录数据库中已经存在的来源信息
+                sources = list(chapter_record.sources)
+                # 如果强制重新加载, 则释放旧的附件并覆盖章节信息以及附件信息
+                if Settings().FORCE_RELOAD:
+                    for i in list(chapter_record.attechments):
+                        self.__blob_store.release(session, i.blob_hash)
+                        chapter_record.attechments.remove(i)
+                        session.delete(i)
+                    session.flush()
+                    chapter_record = session.merge(
+                        Chapters.from_chapter(chapter, book_hash)
+                    )
+                    [
+                        session.add(i) for i in
+                        Attechments.from_chapter(chapter, acquire)
+                    ]
                 # 将该章节的来源信息与数据库中已经存在的信息合并
                 chapter_record.sources = list(
-                    set(chapter_record.sources + list(chapter.sources))
+                    set(sources + list(chapter.sources))
                 )
                 # 更新数据库中的信息
                 session.add(chapter_record)
+            # 如果需要, 更新章节的全文搜索索引
+            if Settings().SEARCH_CHAPTERS:
+                self.__search_index.add_chapter(session, chapter)
             # 保存更改
             session.commit()
+        # 使该章节的内容缓存以及所属书籍的章节列表缓存失效
+        self.__cache.invalidate(self.__key("content", chapter.hash))
+        self.__cache.invalidate(self.__key("chapters", book_hash))
+    
+    def __key(self, kind: str, things_hash: bytes) -> Tuple[str, str, bytes]:
+        """生成缓存的键"""
+        return (self.__db_path, kind, things_hash)
+    
+    @staticmethod
+    def __book_fields(record: Books) -> Tuple[Any, ...]:
+        """将书籍记录转换为不可变的字段元组, 用于缓存"""
+        return (
+            record.name, record.author, record.state, record.desc,
+            tuple(record.sources),
+            tuple(i.to_cover() for i in record.cover_images),
+            tuple(record.tags), tuple(record.attrs.items())
+        )
+    
+    @staticmethod
+    def __build_book(fields: Tuple[Any, ...]) -> Book:
+        """由缓存的字段元组构造新的书籍对象"""
+        name, author, state, desc, sources, covers, tags, attrs = fields
+        return Book(
+            name, author, State.to_obj(state), desc, list(sources),
+            list(covers), [Tag.to_obj(i) for i in tags], **dict(attrs)
+        )
+    
+    def __get_book_fields(
+        self, session: Session, book_hashes: List[bytes]
+    ) -> Dict[bytes, Tuple[Any, ...]]:
+        """批量读取书籍的字段元组
+        先查询缓存, 未命中的书籍再通过一次查询从数据库中读取
+        """
+        # 查询缓存
+        result: Dict[bytes, Tuple[Any, ...]] = {}
+        missing = []
+        for i in book_hashes:
+            fields = self.__cache.get(self.__key("book", i))
+            if fields is None:
+                missing.append(i)
+            else:
+                result[i] = fields
+        # 从数据库中读取未命中的书籍并写入缓存
+        if missing:
+            generations = {
+                i: self.__cache.generation(self.__key("book", i))
+                for i in missing
+            }
+            for i in session.query(Books) \
+                .filter(Books.things_hash.in_(missing)).all():
+                result[i.things_hash] = self.__book_fields(i)
+                self.__cache.put(
+                    self.__key("book", i.things_hash), result[i.things_hash],
+                    generations[i.things_hash]
+                )
+        # 返回结果
+        return result
+    
+    def get_book(self, book_hash: bytes) -> Book | None:
+        """按哈希值获取书籍对象, 不包含章节
+        
+        :param book_hash: 书籍的hash值
+        :type book_hash: bytes
+        :return: 书籍对象, 若书籍不存在则返回 None
+        """
+        # 创建数据库会话
+        with sessionmaker(bind=self.__engine)() as session:
+            fields = self.__get_book_fields(session, [book_hash])
+        # 每次都构造新的书籍对象, 以免调用者修改缓存中的数据
+        if book_hash not in fields:
+            return None
+        return self.__build_book(fields[book_hash])
+    
+    def get_equivalent_sources(self, url: str) -> List[str]:
+        """获取与该 URL 属于同一本书籍的其他来源
+        同一本书籍从不同网站或镜像下载后, 所有来源都会合并保存在书架中,
+        下载时可以用这些来源代替暂停访问的网站
+        
+        :param url: 书籍的 URL
+        :type url: str
+        :return: 其他来源的 URL, 书架中没有该书籍时返回空列表
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(url, str)
+        return self.get_equivalent_sources_batch([url,])[url]
+    
+    def get_equivalent_sources_batch(
+        self, urls: Iterable[str]
+    ) -> Dict[str, List[str]]:
+        """批量获取与每个 URL 属于同一本书籍的其他来源
+        通过来源索引在一次查询中完成, 适合下载前查询大量书籍的场景
+        
+        :param urls: 书籍的 URL
+        :type urls: Iterable[str]
+        :return: URL 到其他来源的映射, 书架中没有该书籍的 URL 对应空列表
+        
+        Example:
+            >>> Bookshelf().get_equivalent_sources_batch(["https://a.com/1"])
+            {'https://a.com/1': ['https://b.com/9']}
+        """
+        urls = list(urls)
+        # 确认传入的参数的类型是否正确
+        assert all(isinstance(i, str) for i in urls)
+        result: Dict[str, List[str]] = {i: [] for i in urls}
+        if not urls:
+            return result
+        with sessionmaker(bind=self.__engine)() as session:
+            records = session.query(BookSources.source, Books.sources) \
+                .join(Books, Books.things_hash == BookSources.book_hash) \
+                .filter(BookSources.source.in_(set(urls))).all()
+        for url, sources in records:
+            result[url] += [
+                i for i in sources if i != url and i not in result[url]
+            ]
+        return result
+    
+    @property
+    def cache_stats(self) -> Dict[str, int]:
+        """读取缓存的统计数据, 包括命中、未命中、淘汰次数以及当前的占用情况"""
+        return self.__cache.stats
+    
+    def get_chapter_sources(
+        self, book_hash: bytes
+    ) -> List[Tuple[bytes, List[str]]]:
+        """获取书籍中所有已保存章节的哈希值与来源
+        该方法只读取这两列, 不会读取和解析章节内容
+        
+        :param book_hash: 书籍的hash值
+        :type book_hash: bytes
+        :return: 由章节哈希值与章节来源列表组成的列表
+        """
+        # 章节的哈希值与来源均包含在章节列表中
+        return [(i[0], list(i[3])) for i in self.__get_chapter_rows(book_hash)]
+    
+    def __get_chapter_rows(self, book_hash: bytes) -> Tuple[Tuple, ...]:
+        """读取书籍中所有章节的基本信息, 不读取章节内容
+        结果会被缓存, 每一项依次为哈希值、序号、章节名、来源、更新时间、
+        书名、缓存方式以及其他信息
+        """
+        # 查询缓存
+        key = self.__key("chapters", book_hash)
+        rows = self.__cache.get(key)
+        if rows is not None:
+            return rows
+        # 读取期间该书籍的章节被修改时不写入缓存
+        generation = self.__cache.generation(key)
+        # 创建数据库会话
+        with sessionmaker(bind=self.__engine)() as session:
+            # 获取数据库中该书籍的所有章节的基本信息, 不读取章节内容
+            rows = tuple(
+                (
+                    i.things_hash, i.index, i.name, tuple(i.sources),
+                    float(i.update_time), i.book_name, i.cache_method,
+                    tuple(i.attrs.items())
+                ) for i in session.query(
+                    Chapters.things_hash, Chapters.index, Chapters.name,
+                    Chapters.sources, Chapters.update_time,
+                    Chapters.book_name, Chapters.cache_method,
+                    Chapters.attrs
+                ).filter_by(book_hash=book_hash).all()
+            )
+        # 写入缓存并返回
+        self.__cache.put(key, rows, generation)
+        return rows
+    
+    def load_chapter_content(self, chapter_hash: bytes) -> List[Line]:
+        """从数据库中加载并解析指定章节的内容
+        
+        :param chapter_hash: 章节的hash值
+        :type chapter_hash: bytes
+        :return: 章节内容, 若章节不存在则返回空列表
+        """
+        # 查询缓存, 返回新的列表以免调用者修改缓存中的数据
+        key = self.__key("content", chapter_hash)
+        content = self.__cache.get(key)
+        if content is not None:
+            return list(content)
+        # 读取期间该章节被修改时不写入缓存
+        generation = self.__cache.generation(key)
+        # 创建数据库会话
+        with sessionmaker(bind=self.__engine)() as session:
+            # 查询章节记录
+            chapter_record = session.query(Chapters) \
+                .filter_by(things_hash=chapter_hash).first()
+            # 如果章节不存在则返回空列表
+            if chapter_record is None:
+                return []
+            # 解析章节内容, 附件需要在会话关闭前读取
+            content = chapter_record.decode_content()
+        # 写入缓存并返回
+        self.__cache.put(key, tuple(content), generation)
+        return content
     
     def complete_book(self, book: Book) -> Book:
         """完善书籍信息
+        添加到书籍对象中的是延迟加载的章节对象,
+        章节内容只有在第一次被访问时才会从数据库中读取并解析
         
         :param book: 书籍对象
         :type book: Book
         :return: 完善后的书籍对象
         :rtype: Book
         """
+        # 将章节信息转换为延迟加载的章节对象并添加到书籍对象中
+        for (
+            things_hash, index, name, sources, update_time,
+            book_name, cache_method, attrs
+        ) in self.__get_chapter_rows(book.hash):
+            book.append(
+                LazyChapter(
+                    index, name, list(sources), update_time, book_name,
+                    self.__chapter_loader(things_hash),
+                    CacheMethod.to_obj(cache_method), **dict(attrs)
+                )
+            )
+        # 返回完善后的书籍对象
+        return book
+    
+    def __chapter_loader(self, chapter_hash: bytes):
+        """生成用于延迟加载章节内容的函数"""
+        return lambda: self.load_chapter_content(chapter_hash)
+    
+    def search_books_by_name(
+        self, name: str, limit: int = 20, with_chapters: bool = False
+    ) -> Generator[Tuple[Book, List[str]], None, None]:
+        """搜索书籍
+        在书名、作者和简介中搜索关键词, 结果按相关程度从高到低排列.  
+        如果 with_chapters 为 True, 则在书籍结果之后追加章节内容命中的书籍,
+        这需要在保存章节前开启 `Settings().SEARCH_CHAPTERS`.
+        
+        :param name: 关键词
+        :type name: str
+        :param limit: 返回结果的最大数量
+        :type limit: int
+        :param with_chapters: 是否同时搜索章节内容
+        :type with_chapters: bool
+        :return: 由书籍对象及其来源列表组成的生成器
+        
+        Example:
+            >>> for book, sources in Bookshelf().search_books_by_name("斗破"):
+            >>>     print(book.name, sources)
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(name, str)
+        assert isinstance(limit, int)
         # 创建数据库会话
         with sessionmaker(bind=self.__engine)() as session:
-            # 获取数据库中该书籍的所有章节
-            chapters = session.query(Chapters) \
-                .filter_by(book_hash=book.hash).all()
-            # 将数据库中的章节信息转换为章节对象并添加到书籍对象中
-            for i in chapters:
-                book.append(i.to_chapter())
-        # 返回完善后的书籍对象
-        return book
\ No newline at end of file
+            # 在书籍索引中搜索, 得到按相关程度排列的书籍哈希值
+            book_hashes = [
+                i[0] for i in
+                self.__search_index.search_books(session, name, limit)
+            ]
+            # 如果需要则在章节索引中搜索, 并将命中章节所属的书籍追加到结果中
+            if with_chapters and len(book_hashes) < limit:
+                chapter_hashes = [
+                    i[0] for i in self.__search_index.search_chapters(
+                        session, name, limit * 5
+                    )
+                ]
+                rows = session.query(
+                    Chapters.things_hash, Chapters.book_hash
+                ).filter(Chapters.things_hash.in_(chapter_hashes)).all()
+                chapter_to_book = {i[0]: i[1] for i in rows}
+                for i in chapter_hashes:
+                    book_hash = chapter_to_book.get(i)
+                    if (book_hash is not None) and \
+                        (book_hash not in book_hashes):
+                        book_hashes.append(book_hash)
+                book_hashes = book_hashes[:limit]
+            # 先查询缓存, 未命中的书籍按主键一次性取出
+            records = self.__get_book_fields(session, book_hashes)
+        # 按相关程度依次返回书籍对象及其来源
+        for i in book_hashes:
+            fields = records.get(i)
+            if fields is None:
+                continue
+            yield self.__build_book(fields), list(fields[4])
+    
+    def rebuild_search_index(self) -> None:
+        """重建全文搜索索引
+        会清空现有的索引, 并重新写入书架中的所有书籍,
+        如果开启了 `Settings().SEARCH_CHAPTERS`, 则同时写入所有章节
+        """
+        # 创建数据库会话
+        with sessionmaker(bind=self.__engine)() as session:
+            # 清空现有的索引
+            self.__search_index.clear(session)
+            # 重新写入所有书籍, 仅读取建立索引所需的字段
+            books = session.query(
+                Books.things_hash, Books.name, Books.author, Books.desc
+            ).all()
+            for i in books:
+                self.__search_index.index_book(session, *i)
+            # 如果需要则分批重新写入所有章节
+            if Settings().SEARCH_CHAPTERS:
+                chapter_hashes = [
+                    i[0] for i in session.query(Chapters.things_hash).all()
+                ]
+                for start in range(0, len(chapter_hashes), 200):
+                    batch = chapter_hashes[start:start + 200]
+                    for i in session.query(Chapters).filter(
+                        Chapters.things_hash.in_(batch)
+                    ).all():
+                        self.__search_index.add_chapter(
+                            session, i.to_chapter()
+                        )
+                    # 释放已经处理过的章节记录
+                    session.flush()
+                    session.expunge_all()
+            # 保存更改
+            session.commit()
\ No newline at end of file
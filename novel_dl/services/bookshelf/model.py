@@ -7,13 +7,20 @@
 模块名称: novel_dl.services.bookshelf.model
 模块功能: 定义与书架相关的数据库模型，包括书籍、章节、附件和封面等。
 类:
+    - Blobs:
+        按内容寻址的二进制数据, 附件与封面的内容都保存在这里。
+        属性:
+            - things_hash: 内容的 SHA-256 哈希值 (主键)。
+            - content: 二进制内容。
+            - size: 内容的字节数。
+            - ref_count: 引用该内容的附件与封面的数量。
     - Attechments:
         描述章节中的附件信息，例如图片、音频、视频等。
         属性:
-            - things_hash: 附件的唯一哈希值 (主键)。
+            - things_hash: 附件的唯一哈希值 (主键), 由章节哈希值与行哈希值计算得到。
             - chapter_hash: 所属章节的哈希值 (外键)。
             - index: 附件在章节中的索引。
-            - content: 附件的内容。
+            - blob_hash: 附件内容在 Blobs 中的键 (外键)。
             - content_type: 附件的类型 (如图片、音频、视频等)。
             - attrs: 附件的其他属性 (JSON 格式)。
         方法:
@@ -35,13 +42,14 @@
         方法:
             - encode_content: 将章节内容编码为 HTML 格式。
             - from_chapter: 从章节对象生成数据库章节对象。
+            - decode_content: 将 HTML 格式的章节内容解码为行对象列表。
             - to_chapter: 将数据库章节对象转换为章节对象。
     - BookCovers:
         描述书籍的封面信息。
         属性:
-            - things_hash: 封面的唯一哈希值 (主键)。
+            - things_hash: 封面的唯一哈希值 (主键), 由书籍哈希值与内容的键计算得到。
             - book_hash: 所属书籍的哈希值 (外键)。
-            - cover_image: 封面图片的内容。
+            - blob_hash: 封面图片在 Blobs 中的键 (外键)。
         方法:
             - from_book: 从书籍对象生成封面列表。
             - to_cover: 将封面对象转换为图片内容。
@@ -59,6 +67,17 @@
         方法:
             - from_book: 从书籍对象生成数据库书籍对象。
             - to_book: 将数据库书籍对象转换为书籍对象。
+    - BookSources:
+        书籍来源到书籍的索引, 用于按来源查找书籍, 与 Books 的 sources 保持一致。
+        属性:
+            - source: 书籍的来源 (主键)。
+            - book_hash: 该来源所属书籍的哈希值 (主键, 外键)。
+    - SearchIndexes:
+        描述全文搜索索引中的文档编号与书籍、章节之间的对应关系。
+        属性:
+            - doc_id: 文档在全文搜索表中的编号 (主键)。
+            - things_hash: 书籍或章节的哈希值 (唯一)。
+            - kind: 文档的类型 (1 为书籍, 2 为章节)。
 注意:
     - 本模块依赖 SQLAlchemy 进行 ORM 映射。
     - 使用了自定义的枚举类 (ContentType, CacheMethod, State, Tag) 和工具函数 (如 _hash)。
@@ -70,10 +89,9 @@
 # 导入标准库
 import json
 import base64
-from typing import List
+from typing import List, Callable
 
 # 导入第三方库
-from bs4 import BeautifulSoup as bs
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import Column, ForeignKey, CheckConstraint
@@ -89,6 +107,18 @@ from novel_dl.core.books import ContentType, CacheMethod, State, Tag
 Base = declarative_base()
 
 
+class Blobs(Base):
+    __tablename__ = "blobs"
+    
+    things_hash = Column(BLOB, primary_key=True)
+    content = Column(BLOB, nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<Blobs size={self.size} ref_count={self.ref_count}>"
+
+
 class Attechments(Base):
     __tablename__ = "attechments"
     
@@ -97,10 +127,14 @@ class Attechments(Base):
         BLOB, ForeignKey("chapters.things_hash"), nullable=False
     )
     index = Column(Integer, nullable=False)
-    content = Column(BLOB, nullable=False)
+    blob_hash = Column(
+        BLOB, ForeignKey("blobs.things_hash"), nullable=False
+    )
     content_type = Column(SmallInteger, nullable=False)
     attrs = Column(JSON, nullable=False)
     
+    blob = relationship("Blobs")
+    
     __table_args__ = (
         CheckConstraint(
             content_type.in_([int(i) for i in list(ContentType)]),
@@ -112,8 +146,22 @@ class Attechments(Base):
         return f"<Attechments index={self.index} " \
             f"content_type={self.content_type}>"
     
+    @staticmethod
+    def make_hash(chapter_hash: bytes, line_hash: bytes) -> bytes:
+        return _hash(chapter_hash + line_hash)
+    
     @classmethod
-    def from_chapter(cls, chapter: Chapter) -> List["Attechments"]:
+    def from_chapter(
+        cls, chapter: Chapter, acquire: Callable[[bytes], bytes]
+    ) -> List["Attechments"]:
+        """从章节对象生成附件列表
+        
+        :param chapter: 章节对象
+        :type chapter: Chapter
+        :param acquire: 保存附件内容并返回其键的函数
+        :type acquire: Callable[[bytes], bytes]
+        :return: 附件列表
+        """
         buffer = []
         for i in chapter.content:
             if i.content_type in [
@@ -122,9 +170,9 @@ class Attechments(Base):
             ]:
                 buffer.append(
                     cls(
-                        things_hash=i.hash,
+                        things_hash=cls.make_hash(chapter.hash, i.hash),
                         chapter_hash=chapter.hash,
-                        index=i.index, content=i,
+                        index=i.index, blob_hash=acquire(i.content),
                         content_type=int(i.content_type),
                         attrs=i.attrs
                     )
@@ -133,9 +181,9 @@ class Attechments(Base):
     
     def to_line(self) -> Line:
         return Line(
-            self.index, self.content,
+            self.index, self.blob.content,
             ContentType.to_obj(self.content_type),
-            *self.attrs
+            **self.attrs
         )
 
 
@@ -216,10 +264,15 @@ class Chapters(Base):
             attrs=chapter.other_info
         )
     
-    def to_chapter(self) -> Chapter:
+    def decode_content(self) -> List[Line]:
+        # 只有读取章节内容时才需要 bs4, 因此在这里导入
+        from bs4 import BeautifulSoup as bs
         content = []
         contents = bs(self.content, "lxml")
         contents = contents.find("body")
+        # 章节内容为空时, lxml 不会生成 body 标签
+        if contents is None:
+            return content
         for index, item in enumerate(contents.children):
             attrs = json.loads(
                 base64.b64decode(item.get("attrs").encode()).decode()
@@ -228,27 +281,34 @@ class Chapters(Base):
                 case "p":
                     content.append(Line(
                         index+1, item.text,
-                        ContentType.Text, *attrs
+                        ContentType.Text, **attrs
                     ))
                 case "link":
                     content.append(Line(
                         index+1, item.text,
-                        ContentType.CSS, *attrs
+                        ContentType.CSS, **attrs
                     ))
                 case "script":
                     content.append(Line(
                         index+1, item.text,
-                        ContentType.JS, *attrs
+                        ContentType.JS, **attrs
                     ))
                 case _:
-                    hash_value = base64.b64decode(item.text.encode())
+                    hash_value = Attechments.make_hash(
+                        self.things_hash,
+                        base64.b64decode(item.text.encode())
+                    )
                     for i in self.attechments:
                         if i.things_hash == hash_value:
                             content.append(i.to_line())
+        return content
+    
+    def to_chapter(self) -> Chapter:
         return Chapter(
             self.index, self.name, self.sources,
-            float(self.update_time), self.book_name, content,
-            CacheMethod.to_obj(self.cache_method), *self.attrs
+            float(self.update_time), self.book_name,
+            self.decode_content(),
+            CacheMethod.to_obj(self.cache_method), **self.attrs
         )
 
 
@@ -259,23 +319,40 @@ class BookCovers(Base):
     book_hash = Column(
         BLOB, ForeignKey("books.things_hash"), nullable=False
     )
-    cover_image = Column(BLOB, nullable=False)
+    blob_hash = Column(
+        BLOB, ForeignKey("blobs.things_hash"), nullable=False
+    )
+    
+    blob = relationship("Blobs")
     
     @classmethod
-    def from_book(cls, book: Book) -> List["BookCovers"]:
-        buffer = []
+    def from_book(
+        cls, book: Book, acquire: Callable[[bytes], bytes]
+    ) -> List["BookCovers"]:
+        """从书籍对象生成封面列表
+        
+        :param book: 书籍对象
+        :type book: Book
+        :param acquire: 保存封面内容并返回其键的函数
+        :type acquire: Callable[[bytes], bytes]
+        :return: 封面列表
+        """
+        buffer = {}
         for i in book.cover_images:
-            buffer.append(
-                cls(
-                    things_hash=_hash(i),
-                    book_hash=book.hash,
-                    cover_image=i
-                )
+            blob_hash = _hash(i)
+            things_hash = _hash(book.hash + blob_hash)
+            # 同一本书中重复的封面只保存一次
+            if things_hash in buffer:
+                continue
+            buffer[things_hash] = cls(
+                things_hash=things_hash,
+                book_hash=book.hash,
+                blob_hash=acquire(i)
             )
-        return buffer
+        return list(buffer.values())
     
     def to_cover(self) -> bytes:
-        return self.cover_image
+        return self.blob.content
 
 
 class Books(Base):
@@ -314,6 +391,35 @@ class Books(Base):
     def to_book(self) -> Book:
         return Book(
             self.name, self.author, State.to_obj(self.state), self.desc,
-            self.sources, self.cover_images,
-            [Tag.to_obj(i) for i in self.tags], *self.attrs
-        )
\ No newline at end of file
+            self.sources, [i.to_cover() for i in self.cover_images],
+            [Tag.to_obj(i) for i in self.tags], **self.attrs
+        )
+
+
+class BookSources(Base):
+    __tablename__ = "book_sources"
+    
+    # 来源在前的联合主键同时作为按来源查找书籍的索引
+    source = Column(String, primary_key=True)
+    book_hash = Column(
+        BLOB, ForeignKey("books.things_hash"), primary_key=True
+    )
+    
+    def __repr__(self):
+        return f"<BookSources source={self.source}>"
+
+
+class SearchIndexes(Base):
+    __tablename__ = "search_indexes"
+    
+    # 全文搜索表的 rowid 与该编号一致, 使用显式整数主键以保证其稳定
+    doc_id = Column(Integer, primary_key=True, autoincrement=True)
+    things_hash = Column(BLOB, nullable=False, unique=True)
+    kind = Column(SmallInteger, nullable=False)
+    
+    __table_args__ = (
+        CheckConstraint(kind.in_([1, 2]), name="kind_check"),
+    )
+    
+    def __repr__(self):
+        return f"<SearchIndexes doc_id={self.doc_id} kind={self.kind}>"
\ No newline at end of file
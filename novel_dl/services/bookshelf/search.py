@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: search.py
+# @Time: 19/10/2026 10:12
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""search.py
+==========
+该模块提供了 `SearchIndex` 类, 基于 SQLite FTS5 虚拟表为书架建立全文搜索索引.
+类
+---
+SearchIndex
+    全文搜索索引, 使用 jieba 对书名、作者、简介以及(可选的)章节内容进行分词,
+    并将分词结果写入 FTS5 虚拟表, 搜索时使用 bm25 算法对结果进行排序.
+依赖
+----
+- 第三方库:
+    - jieba: 用于中文分词.
+    - sqlalchemy: 用于执行 SQL 语句.
+- 自定义库:
+    - novel_dl.core.books: 提供 `Book` 和 `Chapter` 类.
+    - .model: 提供数据库模型类 `SearchIndexes`.
+注意事项
+--------
+- FTS5 使用 unicode61 分词器, 它只按空白字符切分文本,
+  因此写入前需要先用 jieba 分词并以空格连接.
+- 虚拟表的 rowid 与 `SearchIndexes.doc_id` 一致, 更新与删除均按 rowid 进行,
+  不需要扫描整张表.
+"""
+
+
+# 导入标准库
+import logging
+from typing import Dict, List, Tuple
+
+# 导入第三方库
+import jieba
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# 导入自定义库
+from novel_dl.core.books import Book, Chapter, ContentType
+from .model import SearchIndexes
+
+
+# 关闭 jieba 加载词典时输出的调试信息
+jieba.setLogLevel(logging.WARNING)
+
+
+# 文档类型: 书籍
+KIND_BOOK = 1
+# 文档类型: 章节
+KIND_CHAPTER = 2
+
+
+class SearchIndex(object):
+    # 书籍全文搜索表的建表语句
+    BOOKS_FTS_DDL = "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts " \
+        "USING fts5(name, author, description, tokenize='unicode61')"
+    # 章节全文搜索表的建表语句
+    CHAPTERS_FTS_DDL = "CREATE VIRTUAL TABLE IF NOT EXISTS chapters_fts " \
+        "USING fts5(name, content, tokenize='unicode61')"
+    # 书籍各列在 bm25 算法中的权重, 依次为书名、作者、简介
+    BOOKS_WEIGHTS = (10.0, 5.0, 1.0)
+    # 章节各列在 bm25 算法中的权重, 依次为章节名、章节内容
+    CHAPTERS_WEIGHTS = (2.0, 1.0)
+
+    def __init__(self, session: Session):
+        """全文搜索索引
+        初始化时会创建所需的虚拟表
+
+        :param session: 数据库会话
+        :type session: Session
+        """
+        # 创建全文搜索表
+        session.execute(text(self.BOOKS_FTS_DDL))
+        session.execute(text(self.CHAPTERS_FTS_DDL))
+        session.commit()
+
+    @staticmethod
+    def tokenize(value: str) -> List[str]:
+        """使用 jieba 的搜索引擎模式对文本进行分词
+
+        :param value: 要分词的文本
+        :type value: str
+        :return: 分词结果, 已去除空白词
+
+        Example:
+            >>> SearchIndex.tokenize("斗破苍穹")
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(value, str)
+        # 分词并去除空白字符
+        return [i.strip() for i in jieba.cut_for_search(value) if i.strip()]
+
+    @classmethod
+    def build_query(cls, keyword: str, operator: str = "AND") -> str:
+        """将关键词转换为 FTS5 的 MATCH 表达式
+        每个词都会被双引号包裹, 以避免被当作 FTS5 的语法
+
+        :param keyword: 关键词
+        :type keyword: str
+        :param operator: 词与词之间的连接方式, 可选 "AND" 和 "OR"
+        :type operator: str
+        :return: MATCH 表达式, 若关键词中没有有效的词则返回空字符串
+        """
+        # 确认传入的参数是否正确
+        assert operator in ("AND", "OR")
+        # 分词并去重, 同时保持词的顺序
+        tokens = list(dict.fromkeys(cls.tokenize(keyword)))
+        # 转义双引号并包裹每一个词
+        tokens = ['"' + i.replace('"', '""') + '"' for i in tokens]
+        # 返回 MATCH 表达式
+        return f" {operator} ".join(tokens)
+
+    @classmethod
+    def __match(
+        cls, session: Session, sql: str, params: dict,
+        keyword: str, limit: int
+    ) -> List[Tuple[bytes, float]]:
+        """执行全文搜索
+        先要求所有词都命中, 结果不足时再用任意词命中的结果补足,
+        这样常见的精确搜索只需要一次代价很小的查询
+        """
+        # 存放结果, 键为哈希值, 值为得分
+        result: Dict[bytes, float] = {}
+        for operator in ("AND", "OR"):
+            # 生成 MATCH 表达式, 若为空则直接返回
+            query = cls.build_query(keyword, operator)
+            if not query:
+                break
+            # 执行查询并合并结果, 先得到的结果排在前面
+            rows = session.execute(
+                text(sql), dict(params, query=query, limit=limit)
+            )
+            for i in rows:
+                result.setdefault(i[0], i[1])
+            # 如果结果已经足够则不再继续查询
+            if len(result) >= limit:
+                break
+        # 返回结果
+        return list(result.items())[:limit]
+
+    @staticmethod
+    def __get_doc_id(
+        session: Session, things_hash: bytes, kind: int
+    ) -> int:
+        """获取书籍或章节对应的文档编号, 若不存在则创建"""
+        # 查询该对象是否已经拥有文档编号
+        record = session.query(SearchIndexes) \
+            .filter_by(things_hash=things_hash).first()
+        # 如果没有则新建一个
+        if record is None:
+            record = SearchIndexes(things_hash=things_hash, kind=kind)
+            session.add(record)
+            session.flush()
+        # 返回文档编号
+        return record.doc_id
+
+    def add_book(self, session: Session, book: Book) -> None:
+        """将书籍写入全文搜索表, 若已存在则覆盖
+        注意: 该方法不会提交会话
+
+        :param session: 数据库会话
+        :type session: Session
+        :param book: 书籍对象
+        :type book: Book
+        """
+        self.index_book(
+            session, book.hash, book.name, book.author, book.desc
+        )
+
+    def index_book(
+        self, session: Session, things_hash: bytes,
+        name: str, author: str, desc: str
+    ) -> None:
+        """按字段将书籍写入全文搜索表, 若已存在则覆盖
+        重建索引时使用该方法可以避免构造完整的书籍对象
+        注意: 该方法不会提交会话
+
+        :param session: 数据库会话
+        :type session: Session
+        :param things_hash: 书籍的哈希值
+        :type things_hash: bytes
+        :param name: 书名
+        :type name: str
+        :param author: 作者
+        :type author: str
+        :param desc: 简介
+        :type desc: str
+        """
+        # 获取文档编号
+        doc_id = self.__get_doc_id(session, things_hash, KIND_BOOK)
+        # 先删除旧的索引, 再写入新的索引
+        session.execute(
+            text("DELETE FROM books_fts WHERE rowid = :doc_id"),
+            {"doc_id": doc_id}
+        )
+        session.execute(
+            text(
+                "INSERT INTO books_fts(rowid, name, author, description) "
+                "VALUES (:doc_id, :name, :author, :description)"
+            ),
+            {
+                "doc_id": doc_id,
+                "name": " ".join(self.tokenize(name)),
+                "author": " ".join(self.tokenize(author)),
+                "description": " ".join(self.tokenize(desc)),
+            }
+        )
+
+    def add_chapter(self, session: Session, chapter: Chapter) -> None:
+        """将章节写入全文搜索表, 若已存在则覆盖
+        注意: 该方法不会提交会话, 仅文本类型的内容会被索引
+
+        :param session: 数据库会话
+        :type session: Session
+        :param chapter: 章节对象
+        :type chapter: Chapter
+        """
+        # 获取文档编号
+        doc_id = self.__get_doc_id(session, chapter.hash, KIND_CHAPTER)
+        # 拼接章节中的文本内容
+        content = "\n".join(
+            [
+                i.content for i in chapter.content
+                if i.content_type == ContentType.Text
+            ]
+        )
+        # 先删除旧的索引, 再写入新的索引
+        session.execute(
+            text("DELETE FROM chapters_fts WHERE rowid = :doc_id"),
+            {"doc_id": doc_id}
+        )
+        session.execute(
+            text(
+                "INSERT INTO chapters_fts(rowid, name, content) "
+                "VALUES (:doc_id, :name, :content)"
+            ),
+            {
+                "doc_id": doc_id,
+                "name": " ".join(self.tokenize(chapter.name)),
+                "content": " ".join(self.tokenize(content)),
+            }
+        )
+
+    def search_books(
+        self, session: Session, keyword: str, limit: int = 20
+    ) -> List[Tuple[bytes, float]]:
+        """在书名、作者和简介中搜索
+
+        :param session: 数据库会话
+        :type session: Session
+        :param keyword: 关键词
+        :type keyword: str
+        :param limit: 返回结果的最大数量
+        :type limit: int
+        :return: 书籍哈希值与得分组成的列表, 得分越小越相关
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(keyword, str)
+        assert isinstance(limit, int)
+        # 按 bm25 得分排序并返回
+        return self.__match(
+            session,
+            "SELECT s.things_hash, bm25(books_fts, :w1, :w2, :w3) "
+            "AS score FROM books_fts "
+            "JOIN search_indexes AS s ON s.doc_id = books_fts.rowid "
+            "WHERE books_fts MATCH :query "
+            "ORDER BY score LIMIT :limit",
+            {
+                "w1": self.BOOKS_WEIGHTS[0], "w2": self.BOOKS_WEIGHTS[1],
+                "w3": self.BOOKS_WEIGHTS[2]
+            },
+            keyword, limit
+        )
+
+    def search_chapters(
+        self, session: Session, keyword: str, limit: int = 20
+    ) -> List[Tuple[bytes, float]]:
+        """在章节名和章节内容中搜索
+
+        :param session: 数据库会话
+        :type session: Session
+        :param keyword: 关键词
+        :type keyword: str
+        :param limit: 返回结果的最大数量
+        :type limit: int
+        :return: 章节哈希值与得分组成的列表, 得分越小越相关
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(keyword, str)
+        assert isinstance(limit, int)
+        # 按 bm25 得分排序并返回
+        return self.__match(
+            session,
+            "SELECT s.things_hash, bm25(chapters_fts, :w1, :w2) "
+            "AS score FROM chapters_fts "
+            "JOIN search_indexes AS s "
+            "ON s.doc_id = chapters_fts.rowid "
+            "WHERE chapters_fts MATCH :query "
+            "ORDER BY score LIMIT :limit",
+            {
+                "w1": self.CHAPTERS_WEIGHTS[0],
+                "w2": self.CHAPTERS_WEIGHTS[1]
+            },
+            keyword, limit
+        )
+
+    def is_empty(self, session: Session) -> bool:
+        """判断书籍全文搜索表是否为空"""
+        return session.execute(
+            text("SELECT rowid FROM books_fts LIMIT 1")
+        ).first() is None
+
+    def clear(self, session: Session) -> None:
+        """清空所有全文搜索表
+        注意: 该方法不会提交会话
+        """
+        session.execute(text("DELETE FROM books_fts"))
+        session.execute(text("DELETE FROM chapters_fts"))
+        session.query(SearchIndexes).delete()
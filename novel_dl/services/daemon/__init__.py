@@ -0,0 +1,9 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: __init__.py
+# @Time: 19/10/2026 21:20
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+from .jobs import JobState, Job, JobQueue
+from .server import Daemon
\ No newline at end of file
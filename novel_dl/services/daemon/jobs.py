@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: jobs.py
+# @Time: 19/10/2026 21:20
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""
+jobs.py
+这个模块提供了常驻进程使用的任务队列。
+类:
+    JobState(Enum): 任务的状态常量。
+    Job: 一个任务, 记录任务的类型、参数、状态以及结果。
+    JobQueue: 任务队列, 使用固定数量的工作线程依次执行提交的任务。
+"""
+
+
+# 导入标准库
+import time
+import uuid
+import threading
+from enum import Enum
+from queue import Queue
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List
+
+
+class JobState(Enum):
+    """任务的状态常量"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __str__(self):
+        return self.value
+
+
+class Job(object):
+    def __init__(self, kind: str, params: Dict[str, Any]):
+        """一个任务
+
+        :param kind: 任务的类型
+        :type kind: str
+        :param params: 任务的参数
+        :type params: Dict[str, Any]
+        """
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.state = JobState.QUEUED
+        self.created = time.time()
+        self.started: float | None = None
+        self.finished: float | None = None
+        self.result: Any = None
+        self.error: str | None = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """将任务转换为可以序列化为 JSON 的字典"""
+        return {
+            "id": self.id, "type": self.kind, "params": self.params,
+            "state": str(self.state), "created": self.created,
+            "started": self.started, "finished": self.finished,
+            "result": self.result, "error": self.error,
+        }
+
+
+class JobQueue(object):
+    # 保留的任务数量上限, 超过后最早完成的任务会被遗忘
+    MAX_HISTORY = 1000
+
+    def __init__(
+        self, handlers: Dict[str, Callable[[Dict[str, Any]], Any]],
+        workers: int = 2
+    ):
+        """任务队列
+        按提交的顺序执行任务, 任务的结果为处理函数的返回值,
+        处理函数抛出的异常会被记录为任务的错误信息.
+        注意: 该类是线程安全的.
+
+        :param handlers: 任务类型到处理函数的映射, 处理函数的参数为任务的参数
+        :type handlers: Dict[str, Callable[[Dict[str, Any]], Any]]
+        :param workers: 工作线程的数量
+        :type workers: int
+
+        Example:
+            >>> queue = JobQueue({"echo": lambda params: params}, 1)
+            >>> job = queue.submit("echo", {"text": "测试"})
+            >>> queue.get(job.id).to_dict()
+        """
+        # 确认传入的参数是否正确
+        assert isinstance(handlers, dict)
+        assert isinstance(workers, int) and workers > 0
+        self.__handlers = handlers
+        # 所有任务, 按提交的顺序排列
+        self.__jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.__lock = threading.Lock()
+        # 等待执行的任务, None 表示线程应当退出
+        self.__queue: Queue[Job | None] = Queue()
+        # 启动工作线程
+        self.__threads: List[threading.Thread] = []
+        for i in range(workers):
+            one_thread = threading.Thread(
+                target=self.__run, name=f"任务线程{i}", daemon=True
+            )
+            one_thread.start()
+            self.__threads.append(one_thread)
+
+    @property
+    def kinds(self) -> List[str]:
+        """支持的任务类型"""
+        return list(self.__handlers)
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> Job:
+        """提交任务
+
+        :param kind: 任务的类型
+        :type kind: str
+        :param params: 任务的参数
+        :type params: Dict[str, Any]
+        :return: 任务对象
+        :raise ValueError: 任务类型不受支持时抛出该异常
+        """
+        if kind not in self.__handlers:
+            raise ValueError(f"不支持的任务类型: {kind}")
+        job = Job(kind, params)
+        with self.__lock:
+            self.__jobs[job.id] = job
+            self.__forget()
+        self.__queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """按编号获取任务, 不存在时返回 None"""
+        with self.__lock:
+            return self.__jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        """获取所有任务, 按提交的顺序排列"""
+        with self.__lock:
+            return list(self.__jobs.values())
+
+    def stats(self) -> Dict[str, int]:
+        """统计各状态的任务数量"""
+        result = {str(i): 0 for i in JobState}
+        with self.__lock:
+            for job in self.__jobs.values():
+                result[str(job.state)] += 1
+        return result
+
+    def close(self) -> None:
+        """等待已经提交的任务全部完成, 然后结束所有工作线程"""
+        for _ in self.__threads:
+            self.__queue.put(None)
+        for i in self.__threads:
+            i.join()
+
+    def __forget(self) -> None:
+        """任务数量超过上限时, 遗忘最早完成的任务"""
+        finished = [
+            i.id for i in self.__jobs.values()
+            if i.state in (JobState.DONE, JobState.FAILED)
+        ]
+        for job_id in finished[:len(self.__jobs) - self.MAX_HISTORY]:
+            self.__jobs.pop(job_id)
+
+    def __run(self) -> None:
+        while True:
+            job = self.__queue.get()
+            if job is None:
+                break
+            job.state = JobState.RUNNING
+            job.started = time.time()
+            try:
+                job.result = self.__handlers[job.kind](job.params)
+                job.state = JobState.DONE
+            except Exception as error:
+                job.error = f"{type(error).__name__}: {error}"
+                job.state = JobState.FAILED
+            job.finished = time.time()
+            with self.__lock:
+                self.__forget()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: server.py
+# @Time: 19/10/2026 21:40
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""
+server.py
+这个模块提供了常驻进程以及本地的 HTTP 任务接口。
+类:
+    Daemon: 常驻进程, 持有引擎管理器、书架以及任务队列,
+            所有任务共用同一份会话连接池、数据库连接和读取缓存。
+接口:
+    POST /jobs: 提交任务, 请求体为 JSON, 包括 type 以及任务的参数,
+        type 可以是 download、update 或 export, 返回任务信息。
+    GET /jobs: 获取所有任务的信息。
+    GET /jobs/<id>: 获取指定任务的信息, 用于轮询任务的状态。
+    GET /books?name=<name>&limit=<limit>: 在书架中搜索书籍。
+    GET /stats: 获取任务、书架缓存以及各域名断路器的统计数据。
+    GET /metrics: 获取各阶段的耗时统计, 为 Prometheus 的文本格式,
+        只有启用 Settings().METRICS 时才有数据。
+任务的参数:
+    download: url, 可选 save_method (默认为 1), 下载书籍并保存为文件。
+    update: url, 只下载书架中还没有的章节, 不保存文件。
+    download 与 update 可以用 alternates 指定同一本书籍的其他来源,
+        书架中已经记录的其他来源会自动加入。
+    export: hash (书籍哈希值的十六进制表示), 可选 save_method,
+        直接使用书架中的内容保存文件, 不发起网络请求。
+注意事项:
+    服务默认只监听 127.0.0.1, 接口没有任何身份验证, 不应当暴露到网络中。
+"""
+
+
+# 导入标准库
+import json
+import threading
+from urllib.parse import urlparse, parse_qs
+from typing import Any, Dict, List, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 导入自定义库
+from novel_dl.core.books import Book, SaveMethod, Saver
+from novel_dl.services.download import WebManager
+from novel_dl.services.bookshelf import Bookshelf
+from novel_dl.utils.circuit import CircuitBreaker
+from .jobs import JobQueue
+
+
+class Daemon(object):
+    def __init__(self, workers: int = 2):
+        """常驻进程
+        启动时创建引擎管理器与书架, 之后的所有任务都复用它们,
+        因此不需要为每个任务重新启动进程、创建引擎和数据库连接
+
+        :param workers: 同时执行的任务数量
+        :type workers: int
+
+        Example:
+            >>> daemon = Daemon()
+            >>> server = daemon.make_server("127.0.0.1", 8765)
+            >>> server.serve_forever()
+        """
+        self.__manager = WebManager()
+        self.__bookshelf = Bookshelf()
+        # 书架的写入依次进行
+        self.__write_lock = threading.Lock()
+        self.__jobs = JobQueue(
+            {
+                "download": self.__download,
+                "update": self.__update,
+                "export": self.__export,
+            }, workers
+        )
+
+    @property
+    def jobs(self) -> JobQueue:
+        """任务队列"""
+        return self.__jobs
+
+    def __fetch(self, params: Dict[str, Any]) -> Tuple[Book, Dict[str, Any]]:
+        """下载书籍, 已经保存在书架中的章节会被跳过"""
+        url = params.get("url")
+        if not isinstance(url, str) or not url:
+            raise ValueError("缺少参数 url")
+        alternates = params.get("alternates", [])
+        if not isinstance(alternates, list) or \
+            not all(isinstance(i, str) for i in alternates):
+            raise ValueError("参数 alternates 必须是 URL 列表")
+        # 加上书架中记录的同一本书籍的其他来源, 复制一份以免修改任务的参数
+        alternates = list(alternates)
+        alternates += [
+            i for i in self.__bookshelf.get_equivalent_sources(url)
+            if i not in alternates
+        ]
+        counts = {"skipped": 0, "queued": 0, "downloaded": 0}
+
+        def book_middle_ware(book: Book) -> Book:
+            with self.__write_lock:
+                self.__bookshelf.save_book_info(book)
+            return self.__bookshelf.complete_book(book)
+
+        def chapter_middle_ware(chapter, book):
+            with self.__write_lock:
+                self.__bookshelf.save_chapter_info(chapter, book.hash)
+                counts["downloaded"] += 1
+            return chapter
+
+        def report_callback(skipped: int, queued: int) -> None:
+            counts["skipped"], counts["queued"] = skipped, queued
+
+        book = self.__manager.download(
+            url, book_middle_ware=book_middle_ware,
+            chapter_middle_ware=chapter_middle_ware,
+            report_callback=report_callback, alternates=alternates
+        )
+        if book is None:
+            raise RuntimeError(f"书籍下载失败: {url}")
+        return book, dict(self.__describe(book), **counts)
+
+    def __download(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        book, result = self.__fetch(params)
+        result["size"] = Saver(
+            book, SaveMethod.to_obj(params.get("save_method", 1))
+        ).save()
+        return result
+
+    def __update(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self.__fetch(params)[1]
+
+    def __export(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            book_hash = bytes.fromhex(params.get("hash", ""))
+        except (TypeError, ValueError):
+            raise ValueError("参数 hash 不是合法的十六进制字符串")
+        book = self.__bookshelf.get_book(book_hash)
+        if book is None:
+            raise LookupError(f"书架中没有该书籍: {params.get('hash')}")
+        book = self.__bookshelf.complete_book(book)
+        result = self.__describe(book)
+        result["size"] = Saver(
+            book, SaveMethod.to_obj(params.get("save_method", 1))
+        ).save()
+        return result
+
+    @staticmethod
+    def __describe(book: Book) -> Dict[str, Any]:
+        """书籍的基本信息"""
+        return {
+            "hash": book.hash.hex(), "name": book.name,
+            "author": book.author, "sources": list(book.sources),
+        }
+
+    def search(self, name: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """在书架中搜索书籍, 返回书籍的基本信息"""
+        return [
+            self.__describe(book)
+            for book, _ in self.__bookshelf.search_books_by_name(name, limit)
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """任务与书架缓存的统计数据"""
+        return {
+            "jobs": self.__jobs.stats(),
+            "cache": self.__bookshelf.cache_stats,
+            "domains": CircuitBreaker().stats,
+        }
+
+    def make_server(self, host: str, port: int) -> ThreadingHTTPServer:
+        """创建本地 HTTP 服务, 端口为 0 时由系统分配
+
+        :param host: 监听的地址
+        :type host: str
+        :param port: 监听的端口
+        :type port: int
+        :return: HTTP 服务对象
+        """
+        handler = type("Handler", (_Handler,), {"daemon": self})
+        return ThreadingHTTPServer((host, port), handler)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # 处理请求的常驻进程, 由 Daemon.make_server 设置
+    daemon: Daemon
+
+    def log_message(self, format: str, *args) -> None:
+        # 不在标准错误中输出每一个请求
+        return None
+
+    def __reply(self, status: int, data: Any) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        parsed = urlparse(self.path)
+        parts = [i for i in parsed.path.split("/") if i]
+        query = parse_qs(parsed.query)
+        if parts == ["jobs"]:
+            return self.__reply(
+                200, [i.to_dict() for i in self.daemon.jobs.jobs()]
+            )
+        if len(parts) == 2 and parts[0] == "jobs":
+            job = self.daemon.jobs.get(parts[1])
+            if job is None:
+                return self.__reply(404, {"error": "任务不存在"})
+            return self.__reply(200, job.to_dict())
+        if parts == ["books"]:
+            try:
+                limit = int(query.get("limit", ["20"])[0])
+            except ValueError:
+                return self.__reply(400, {"error": "limit 必须是整数"})
+            name = query.get("name", [""])[0]
+            return self.__reply(200, self.daemon.search(name, limit))
+        if parts == ["stats"]:
+            return self.__reply(200, self.daemon.stats())
+        if parts == ["metrics"]:
+            from novel_dl.utils.metrics import Metrics
+            body = Metrics().to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return None
+        return self.__reply(404, {"error": "接口不存在"})
+
+    def do_POST(self) -> None:
+        if urlparse(self.path).path.rstrip("/") != "/jobs":
+            return self.__reply(404, {"error": "接口不存在"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            params = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            params = None
+        if not isinstance(params, dict):
+            return self.__reply(400, {"error": "请求体必须是 JSON 对象"})
+        kind = params.pop("type", None)
+        try:
+            job = self.daemon.jobs.submit(kind, params)
+        except ValueError as error:
+            return self.__reply(400, {"error": str(error)})
+        return self.__reply(202, job.to_dict())
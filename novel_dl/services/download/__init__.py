@@ -7,4 +7,9 @@
 
 from .config import BookWeb
 from .engines import ENGINE_LIST
-from .manager import WebManager
\ No newline at end of file
+from .manager import WebManager
+from .retry import ErrorKind, FailedChapter, PageFetchError, RetryPolicy
+from .batch import BatchDownloader
+from .multi import MultiSourceDownloader
+from .spec import SpecEngine, EngineSpecs, EngineSpecError
+from .registry import EngineRegistry
\ No newline at end of file
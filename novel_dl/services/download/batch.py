@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: batch.py
+# @Time: 19/10/2026 20:10
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""
+batch.py
+这个模块提供了同时下载多本书籍的批量下载器。
+类:
+    BatchDownloader: 批量下载器, 在全局与域名两级的连接预算内同时下载多本书籍,
+                     并在不同网站之间轮流调度章节, 避免一个缓慢的网站拖慢其他网站。
+注意事项:
+    所有书籍与章节的请求共用同一个线程池, 线程数量即为全局的连接预算。
+    同一域名的请求数量不超过 `Settings().DOMAIN_MAX_CONNECTIONS`,
+    管理器按实际请求的域名占用 DomainThrottle 的名额,
+    与预下载等其他请求共用同一份域名预算。
+    下载失败的章节进入延迟重试队列, 等待期间不占用线程池中的线程。
+"""
+
+
+# 导入标准库
+import time
+import threading
+from collections import deque, OrderedDict
+from urllib.parse import urlparse
+from typing import Any, Callable, Deque, Dict, Iterable, List, Tuple
+from concurrent.futures import (
+    Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+)
+
+# 导入自定义库
+from .config import BookWeb
+from .manager import WebManager
+from .retry import ErrorKind, RetryQueue, retry_delay
+from novel_dl.core import Settings, Book, Chapter
+from novel_dl.utils.network import Network
+
+
+class _BookJob(object):
+    def __init__(self, url: str, alternates: List[str] | None = None):
+        """一本书籍的下载状态"""
+        self.url = url
+        # 同一本书籍在其他网站或镜像中的 URL
+        self.alternates = alternates if alternates is not None else []
+        self.engine: BookWeb | None = None
+        self.book: Book | None = None
+        # 尚未完成的章节数量
+        self.remaining = 0
+        # 下载成功与失败的章节数量
+        self.chapters = 0
+        self.failed_chapters = 0
+
+
+class BatchDownloader(object):
+    def __init__(
+        self, manager: WebManager | None = None,
+        book_middle_ware: Callable[[Book], Book] = lambda x: x,
+        chapter_middle_ware: Callable[[Chapter, Book], Chapter] = \
+        lambda x, y: x,
+        book_callback: Callable[[Book | None, str], None] = \
+        lambda x, y: None,
+        max_connections: int | None = None,
+        max_books: int | None = None
+    ):
+        """批量下载器
+        同时下载多本书籍: 先获取书籍信息与章节列表, 再把章节分配到各域名的队列中,
+        按域名轮流提交到共用的线程池. 每个域名同时进行的请求数量有上限,
+        因此一个缓慢的网站最多只会占用自己的那部分连接, 其他网站的书籍照常下载.
+        中间件会在持有写入锁的情况下调用, 可以直接写入书架.
+
+        :param manager: 书籍网站引擎管理器, 为 None 时新建一个
+        :type manager: WebManager | None
+        :param book_middle_ware: 书籍中间件, 用于处理书籍信息
+        :type book_middle_ware: Callable[[Book], Book]
+        :param chapter_middle_ware: 章节中间件, 用于处理章节信息
+        :type chapter_middle_ware: Callable[[Chapter, Book], Chapter]
+        :param book_callback: 每本书籍完成后调用的函数, 参数依次为书籍对象和 URL,
+            下载失败时书籍对象为 None
+        :type book_callback: Callable[[Book | None, str], None]
+        :param max_connections: 全局同时进行的最大请求数量,
+            为 None 时使用 `Settings().MAX_CONNECTIONS`
+        :type max_connections: int | None
+        :param max_books: 同时下载的最大书籍数量,
+            为 None 时使用 `Settings().BATCH_MAX_BOOKS`
+        :type max_books: int | None
+
+        Example:
+            >>> downloader = BatchDownloader(
+            >>>     book_callback=lambda book, url: print(url)
+            >>> )
+            >>> summary = downloader.download(urls)
+        """
+        self.__manager = manager if manager is not None else WebManager()
+        self.__book_middle_ware = book_middle_ware
+        self.__chapter_middle_ware = chapter_middle_ware
+        self.__book_callback = book_callback
+        self.__max_connections = max_connections \
+            if max_connections is not None else Settings().MAX_CONNECTIONS
+        self.__max_books = max_books \
+            if max_books is not None else Settings().BATCH_MAX_BOOKS
+        # 确认传入的参数是否正确
+        assert isinstance(self.__manager, WebManager)
+        assert isinstance(self.__max_connections, int)
+        assert isinstance(self.__max_books, int)
+        assert self.__max_connections > 0 and self.__max_books > 0
+        # 调用中间件时持有的锁, 保证书架的写入依次进行
+        self.__write_lock = threading.Lock()
+
+    @staticmethod
+    def __domain_of(url: str) -> str:
+        """获取 URL 规范化后的域名"""
+        return urlparse(Network.normalize_url(url)).netloc
+
+    def __domain_limit(self, engine: BookWeb | None) -> int:
+        """获取引擎所属域名同时进行的最大请求数量"""
+        if not Settings().MULTI_THREAD or \
+            (engine is not None and not engine.multi_thread):
+            return 1
+        limit = Settings().DOMAIN_MAX_CONNECTIONS
+        if engine is not None and engine.max_connections is not None:
+            limit = min(limit, engine.max_connections)
+        return limit
+
+    def __book_middle_ware_locked(self, book: Book) -> Book:
+        with self.__write_lock:
+            return self.__book_middle_ware(book)
+
+    def __get_info(
+        self, job: _BookJob
+    ) -> Tuple[
+        BookWeb, Book, List[str], Dict[str, int], Dict[str, str]
+    ] | None:
+        """在线程池中获取书籍信息与章节列表"""
+        # 名额由管理器按实际请求的域名占用, 切换来源或镜像时也受到限制
+        return self.__manager.download_info(
+            job.url, self.__book_middle_ware_locked,
+            alternates=job.alternates, throttle=True
+        )
+
+    def __get_chapter(
+        self, job: _BookJob, url: str, index: int
+    ) -> Tuple[Chapter | None, ErrorKind | None]:
+        """在线程池中尝试下载一次章节, 失败时返回失败的类型"""
+        chapter, kind = self.__manager.attempt_chapter(
+            job.engine, url, index, job.book.name, throttle=True
+        )
+        if chapter is None:
+            return None, kind
+        with self.__write_lock:
+            return self.__chapter_middle_ware(chapter, job.book), None
+
+    def download(self, urls: Iterable[str]) -> Dict[str, Any]:
+        """下载所有书籍
+        每本书籍完成后都会调用书籍回调函数, 全部完成后返回吞吐量统计
+
+        :param urls: 书籍的 URL, 同一行中以空白分隔的多个 URL
+            视为同一本书籍的等价来源, 第一个来源失败时会尝试其他来源
+        :type urls: Iterable[str]
+        :return: 统计信息, 包括书籍与章节的成功和失败数量、耗时、
+            每秒下载的章节数量、各域名下载的章节数量,
+            以及重试次数用完后仍然失败的章节(failures)
+        """
+        start = time.monotonic()
+        summary: Dict[str, Any] = {
+            "books": 0, "failed_books": 0,
+            "chapters": 0, "failed_chapters": 0, "domains": {},
+            "failures": [],
+        }
+        # 等待下载的书籍, 空行会被忽略
+        pending_urls = (i.strip() for i in urls if i.strip())
+        # 各域名等待提交的任务, 按插入顺序轮流调度
+        lanes: "OrderedDict[str, Deque[Tuple]]" = OrderedDict()
+        # 各域名正在进行的请求数量以及请求数量上限
+        in_flight: Dict[str, int] = {}
+        limits: Dict[str, int] = {}
+        # 正在进行的任务以及对应的任务信息
+        running: Dict[Future, Tuple] = {}
+        # 等待重试的章节, 等待期间线程继续下载其他章节
+        retry_queue = RetryQueue()
+        active_books = 0
+        exhausted = False
+
+        def enqueue(domain: str, task: Tuple, limit: int) -> None:
+            lanes.setdefault(domain, deque()).append(task)
+            in_flight.setdefault(domain, 0)
+            limits[domain] = limit
+
+        def finish(job: _BookJob) -> None:
+            # 记录一本书籍完成, 并调用书籍回调函数
+            if job.book is None:
+                summary["failed_books"] += 1
+            else:
+                job.book.sort()
+                summary["books"] += 1
+            summary["chapters"] += job.chapters
+            summary["failed_chapters"] += job.failed_chapters
+            self.__book_callback(job.book, job.url)
+
+        executor = ThreadPoolExecutor(
+            self.__max_connections, thread_name_prefix="批量下载线程"
+        )
+        try:
+            while True:
+                # 补充正在下载的书籍, 直到达到书籍数量上限
+                while not exhausted and active_books < self.__max_books:
+                    url = next(pending_urls, None)
+                    if url is None:
+                        exhausted = True
+                        break
+                    url, *alternates = url.split()
+                    job = _BookJob(url, alternates)
+                    engine = next((
+                        i for i in map(
+                            self.__manager.get_engine_by_url,
+                            [url,] + alternates
+                        ) if i is not None
+                    ), None)
+                    if engine is None:
+                        finish(job)
+                        continue
+                    active_books += 1
+                    enqueue(
+                        self.__domain_of(url), ("info", job),
+                        self.__domain_limit(engine)
+                    )
+                # 等待时间已经结束的章节排在所属域名的最前面
+                for domain, task in retry_queue.pop_ready():
+                    lanes[domain].appendleft(task)
+                # 按域名轮流提交任务, 直到全局或各域名的预算用完
+                while len(running) < self.__max_connections:
+                    for domain, lane in lanes.items():
+                        if lane and in_flight[domain] < limits[domain]:
+                            break
+                    else:
+                        break
+                    task = lane.popleft()
+                    lanes.move_to_end(domain)
+                    in_flight[domain] += 1
+                    if task[0] == "info":
+                        future = executor.submit(self.__get_info, task[1])
+                    else:
+                        future = executor.submit(
+                            self.__get_chapter, task[1], task[2], task[3]
+                        )
+                    running[future] = (domain,) + task
+                # 没有正在进行和等待重试的任务时说明全部完成
+                if not running:
+                    if not len(retry_queue):
+                        break
+                    time.sleep(retry_queue.next_delay())
+                    continue
+                # 等待任意一个任务完成, 或者下一个章节可以重试
+                done, _ = wait(
+                    list(running), timeout=retry_queue.next_delay(),
+                    return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    domain, kind, job, *args = running.pop(future)
+                    in_flight[domain] -= 1
+                    try:
+                        result = future.result()
+                    except Exception:
+                        result = None
+                    if kind == "info":
+                        # 获取书籍信息失败时记录失败
+                        if result is None:
+                            active_books -= 1
+                            finish(job)
+                            continue
+                        job.engine, job.book, chapter_list, indexes, _ = \
+                            result
+                        job.remaining = len(chapter_list)
+                        for index, chapter_url in enumerate(chapter_list):
+                            enqueue(
+                                self.__domain_of(chapter_url),
+                                (
+                                    "chapter", job, chapter_url,
+                                    indexes.get(chapter_url, index + 1), 1
+                                ),
+                                self.__domain_limit(job.engine)
+                            )
+                    else:
+                        chapter_url, index, attempt = args
+                        chapter, error = result \
+                            if result is not None else \
+                            (None, ErrorKind.PERMANENT)
+                        # 下载失败时安排重试, 不应当重试时记录为失败
+                        if chapter is None:
+                            delay = retry_delay(error, attempt, job.engine)
+                            if delay is not None:
+                                retry_queue.push((domain, (
+                                    "chapter", job, chapter_url, index,
+                                    attempt + 1
+                                )), delay)
+                                continue
+                        # 记录章节的下载结果
+                        job.remaining -= 1
+                        if chapter is None:
+                            job.failed_chapters += 1
+                            summary["failures"].append({
+                                "book": job.url, "url": chapter_url,
+                                "index": index, "kind": error.name.lower(),
+                                "attempts": attempt,
+                            })
+                        else:
+                            job.book.append(chapter)
+                            job.chapters += 1
+                            summary["domains"][domain] = \
+                                summary["domains"].get(domain, 0) + 1
+                    # 所有章节完成后书籍完成
+                    if job.remaining == 0:
+                        active_books -= 1
+                        finish(job)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        # 计算耗时与吞吐量
+        summary["seconds"] = time.monotonic() - start
+        summary["chapters_per_second"] = \
+            summary["chapters"] / summary["seconds"] \
+            if summary["seconds"] > 0 else 0.0
+        # 返回统计信息
+        return summary
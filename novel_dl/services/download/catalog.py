@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: catalog.py
+# @Time: 19/10/2026 19:20
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""
+catalog.py
+这个模块提供了枚举网站书籍目录的常用方法, 供引擎的 enumerate_book_urls 使用。
+函数:
+    get_page(engine, url):
+        在该域名的频率限制下获取页面。
+    sitemap_book_urls(engine, sitemap_url):
+        从站点地图中枚举书籍 URL, 支持站点地图索引。
+    listing_book_urls(engine, first_url, max_pages):
+        从分页的分类或列表页面中枚举书籍 URL。
+    id_range_book_urls(template, start, stop, step):
+        按编号范围生成书籍 URL。
+注意事项:
+    所有函数都是生成器, 每次只在内存中保留一个页面, 枚举大型网站时内存占用保持平稳。
+    所有请求都会经过 DomainThrottle, 与其他请求共用同一个域名的频率限制。
+"""
+
+
+# 导入标准库
+import re
+from io import BytesIO
+from urllib.parse import urlparse
+from xml.etree.ElementTree import iterparse
+from typing import Generator, Set
+
+# 导入自定义库
+from novel_dl.utils.network import Network
+from novel_dl.utils.throttle import DomainThrottle
+from .config import BookWeb
+
+
+# 表示下一页的链接文本
+NEXT_PAGE_TEXTS = ("下一页", "下页", "下一頁", "next", "Next", ">", "»")
+
+
+def get_page(engine: BookWeb, url: str) -> Network:
+    """在该域名的频率限制下获取页面"""
+    with DomainThrottle().slot(urlparse(url).netloc):
+        return Network.get(url, engine.encoding)
+
+
+def _is_book_url(engine: BookWeb, url: str, pattern: re.Pattern) -> bool:
+    """判断 URL 是否为该引擎支持的书籍 URL"""
+    parsed = urlparse(url)
+    return parsed.netloc in engine.domains and \
+        pattern.match(parsed.path) is not None
+
+
+def sitemap_book_urls(
+    engine: BookWeb, sitemap_url: str
+) -> Generator[str, None, None]:
+    """从站点地图中枚举书籍 URL
+    如果是站点地图索引, 则依次枚举其中的每一个站点地图
+
+    :param engine: 引擎对象
+    :type engine: BookWeb
+    :param sitemap_url: 站点地图的 URL
+    :type sitemap_url: str
+    :return: 书籍 URL 生成器
+
+    Example:
+        >>> for url in sitemap_book_urls(
+        >>>     engine, "https://www.example.com/sitemap.xml"
+        >>> ):
+        >>>     print(url)
+    """
+    # 确认传入的参数的类型是否正确
+    assert isinstance(engine, BookWeb)
+    assert isinstance(sitemap_url, str)
+    pattern = re.compile(engine.book_url_pattern)
+    # 待处理的站点地图以及已经处理过的站点地图
+    pending = [sitemap_url,]
+    seen: Set[str] = set()
+    while pending:
+        url = pending.pop()
+        if url in seen:
+            continue
+        seen.add(url)
+        # 获取站点地图, 失败时跳过
+        try:
+            response = get_page(engine, url)
+        except Exception:
+            continue
+        if response.response.status_code != 200:
+            continue
+        # 流式解析, 解析过的元素会被立即清除
+        try:
+            for _, element in iterparse(BytesIO(response.content)):
+                tag = element.tag.rsplit("}", 1)[-1]
+                if tag == "sitemap":
+                    loc = element.findtext("{*}loc")
+                    if loc:
+                        pending.append(loc.strip())
+                    element.clear()
+                elif tag == "url":
+                    loc = element.findtext("{*}loc")
+                    if loc and _is_book_url(engine, loc.strip(), pattern):
+                        yield loc.strip()
+                    element.clear()
+        except SyntaxError:
+            # 站点地图格式错误时跳过剩余的部分
+            continue
+
+
+def listing_book_urls(
+    engine: BookWeb, first_url: str, max_pages: int | None = None
+) -> Generator[str, None, None]:
+    """从分页的分类或列表页面中枚举书籍 URL
+    依次获取每一页, 返回页面中的书籍 URL, 再通过"下一页"链接前往下一页
+
+    :param engine: 引擎对象
+    :type engine: BookWeb
+    :param first_url: 列表第一页的 URL
+    :type first_url: str
+    :param max_pages: 最多获取的页面数量, 为 None 时不限制
+    :type max_pages: int | None
+    :return: 书籍 URL 生成器
+
+    Example:
+        >>> for url in listing_book_urls(
+        >>>     engine, "https://www.example.com/list/1.html"
+        >>> ):
+        >>>     print(url)
+    """
+    # 确认传入的参数的类型是否正确
+    assert isinstance(engine, BookWeb)
+    assert isinstance(first_url, str)
+    pattern = re.compile(engine.book_url_pattern)
+    # 已经获取过的页面, 用于避免循环翻页
+    seen: Set[str] = set()
+    url = first_url
+    while url and url not in seen:
+        if max_pages is not None and len(seen) >= max_pages:
+            break
+        seen.add(url)
+        # 获取列表页面, 失败时停止
+        try:
+            response = get_page(engine, url)
+        except Exception:
+            break
+        if response.response.status_code != 200:
+            break
+        # 返回页面中的书籍 URL, 同一页中重复的 URL 只返回一次
+        next_url = ""
+        page_urls: Set[str] = set()
+        for a_tag in response.tree.iter("a"):
+            href = a_tag.get("href")
+            if not href:
+                continue
+            one_url = response.get_next_url(href, True)
+            if not one_url:
+                continue
+            if _is_book_url(engine, one_url, pattern):
+                if one_url not in page_urls:
+                    page_urls.add(one_url)
+                    yield one_url
+            elif not next_url and \
+                a_tag.text_content().strip() in NEXT_PAGE_TEXTS:
+                next_url = one_url
+        url = next_url
+
+
+def id_range_book_urls(
+    template: str, start: int, stop: int, step: int = 1
+) -> Generator[str, None, None]:
+    """按编号范围生成书籍 URL, 适用于书籍编号连续的网站
+    不会发起任何请求, 不存在的编号会在爬取时被记录为 404
+
+    :param template: URL 模板, 使用 {} 表示编号的位置
+    :type template: str
+    :param start: 起始编号(包含)
+    :type start: int
+    :param stop: 结束编号(不包含)
+    :type stop: int
+    :param step: 步长, 为负数时从大到小生成
+    :type step: int
+    :return: 书籍 URL 生成器
+
+    Example:
+        >>> list(id_range_book_urls("https://example.com/{}.html", 1, 3))
+        ['https://example.com/1.html', 'https://example.com/2.html']
+    """
+    # 确认传入的参数的类型是否正确
+    assert isinstance(template, str)
+    assert isinstance(start, int) and isinstance(stop, int)
+    assert isinstance(step, int) and step != 0
+    for i in range(start, stop, step):
+        yield template.format(i)
@@ -9,6 +9,9 @@ config.py
 类:
     Operations(Enum): 定义了可选的操作类型常量。
     BookWeb(ABCMeta): 通用引擎模版，定义了一个基本的网站引擎应当包含的信息和方法。
+函数:
+    page_fetcher(fetcher: PageFetcher): 在当前上下文中使用该函数下载章节的分页,
+        引擎管理器使用它让分页的请求经过限流、熔断与重试。
 Operations 类:
     常量:
         INFO: 获取书籍信息。
@@ -28,14 +31,22 @@ BookWeb 类:
         encoding (str): 网站所使用的编码。
         prestore_book_urls (bool): 是否可以提前寻找网站内所有书籍。
         multi_thread (bool): 该网站是否支持多线程下载。
+        max_connections (int | None): 同一域名同时进行的最大请求数量,
+            不超过 DOMAIN_MAX_CONNECTIONS, 为 None 时使用 DOMAIN_MAX_CONNECTIONS。
+        retry_delay (float): 触发访问保护后第一次重试前的基础等待时间, 单位是秒。
+        selectors (Dict[str, Selector]): 页面中各项内容的选择器, 例如书名、作者、
+            状态、简介、封面、章节链接以及章节内容。
+        use_selectors (bool): 是否优先使用选择器解析页面。
     方法:
         __str__() -> str: 返回网站的名字。
         __repr__(): 返回网站配置的字符串表示。
-        __hash__(): 返回网站配置的哈希值。
+        __hash__(): 返回网站配置的哈希值, 计算结果会被缓存。
         __eq__(other: "BookWeb"): 判断两个网站配置是否相等。
         get_book_info(response: Network) -> Book: 获取书籍的基本信息。
         get_chapter_url(response: Network) -> List[str]:
             获取书籍的章节来源。
+        chapter_titles(response: Network, urls: List[str]) -> Dict[str, str]:
+            获取章节列表中各章节的标题, 默认使用指向章节的链接的文本。
         get_chapter(
             response: Network, index: int, book_name: str
         ) -> Chapter: 获取章节的内容。
@@ -43,22 +54,82 @@ BookWeb 类:
             response: Network | None, network_error: Exception | None,
             analyze_error: Exception | None
         ) -> bool: 判断是否为网站的访问保护。
-        prevent_protected(*param): 反爬操作。
+        prevent_protected(*param): 反爬操作, 不应当在其中等待,
+            等待由重试策略按 retry_delay 安排。
+        enumerate_book_urls() -> Generator[str, None, None]:
+            枚举网站中所有书籍的 URL, 默认不枚举任何 URL。
+        chapter_page_urls(response: Network) -> List[str]:
+            预测章节其余分页的 URL, 默认没有分页。
+        next_chapter_page(response: Network) -> str | None:
+            从一个分页中找到下一个分页的 URL, 默认没有下一个分页。
+        chapter_pages(response: Network) -> Generator[Network, None, None]:
+            按顺序生成章节的所有分页, 分页通过当前的分页下载函数下载。
+        select(response: Network, key: str) -> List[Any]:
+            使用选择器查询页面, 返回所有匹配的结果。
+        select_first(response: Network, key: str) -> Any:
+            使用选择器查询页面, 返回第一个匹配的结果。
+        extract(response: Network, fast: Callable, slow: Callable) -> Any:
+            优先使用选择器解析页面, 失败时改为使用 BeautifulSoup 解析。
 """
 
 
 # 导入标准库
 import time
 import hashlib
+import contextvars
 from enum import Enum
-from typing import List
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generator, List, TypeVar
 from abc import ABCMeta, abstractmethod
 
 # 导入自定义库
+from .selector import Selector
 from novel_dl.utils.network import Network
+from novel_dl.utils.metrics import Metrics
 from novel_dl.core.books import Book, Chapter, State
 
 
+# 解析结果的类型
+T = TypeVar("T")
+# 一个章节最多的分页数量, 防止分页链接形成循环
+MAX_CHAPTER_PAGES = 100
+# 下载章节分页的函数, 参数为引擎对象与分页的 URL, 按 URL 的顺序生成分页
+PageFetcher = Callable[["BookWeb", List[str]], Generator[Network, None, None]]
+
+
+def _fetch_pages(
+    engine: "BookWeb", urls: List[str]
+) -> Generator[Network, None, None]:
+    """默认的分页下载函数, 在当前线程中依次下载"""
+    for url in urls:
+        yield Network.get(url, engine.encoding)
+
+
+# 当前使用的分页下载函数, 引擎管理器在解析章节时设置
+_page_fetcher: contextvars.ContextVar[PageFetcher] = \
+    contextvars.ContextVar("novel_dl_page_fetcher", default=_fetch_pages)
+
+
+@contextmanager
+def page_fetcher(fetcher: PageFetcher) -> Generator[None, None, None]:
+    """在当前上下文中使用该函数下载章节的分页
+    引擎管理器通过它让分页的请求与章节的第一页一样经过限流、熔断与重试,
+    没有设置时在当前线程中依次下载
+
+    :param fetcher: 分页下载函数, 下载失败时应当抛出异常
+    :type fetcher: PageFetcher
+
+    Example:
+        >>> with page_fetcher(fetch):
+        >>>     chapter = engine.get_chapter(response, 1, "书名")
+    """
+    token = _page_fetcher.set(fetcher)
+    try:
+        yield None
+    finally:
+        _page_fetcher.reset(token)
+
+
 class Operations(Enum):
     """可选的操作类型常量"""
     INFO = (1, "获取书籍信息")
@@ -112,6 +183,14 @@ class BookWeb(metaclass=ABCMeta):
     prestore_book_urls: bool = False
     # 该网站是否支持多线程下载
     multi_thread: bool = True
+    # 同一域名同时进行的最大请求数量, 为 None 时使用设置中的值
+    max_connections: int | None = None
+    # 触发访问保护后第一次重试前的基础等待时间, 单位是秒
+    retry_delay: float = 5.0
+    # 页面中各项内容的选择器, 键为内容的名称
+    selectors: Dict[str, Selector] = {}
+    # 是否优先使用选择器解析页面
+    use_selectors: bool = True
     
     def __str__(self) -> str:
         return self.name
@@ -120,10 +199,16 @@ class BookWeb(metaclass=ABCMeta):
         return f"<WebConfig name={self.name} encoding={self.encoding}>"
     
     def __hash__(self):
+        # 哈希值只在名字或域名变化后重新计算
+        key = (self.name, tuple(self.domains))
+        cached = self.__dict__.get("_BookWeb__hash_cache")
+        if cached is not None and cached[0] == key:
+            return cached[1]
         text = self.name + "".join(self.domains)
         sha256_hash = hashlib.sha256(text.encode())
-        hash_value = sha256_hash.hexdigest()
-        return int(hash_value, 16)
+        hash_value = int(sha256_hash.hexdigest(), 16)
+        self.__hash_cache = (key, hash_value)
+        return hash_value
 
     def __eq__(self, other: "BookWeb"):
         if (isinstance(other, BookWeb) and (hash(self) == hash(other))):
@@ -143,6 +228,30 @@ class BookWeb(metaclass=ABCMeta):
         """获取书籍的章节来源"""
         return []
     
+    def chapter_titles(
+        self, response: Network, urls: List[str]
+    ) -> Dict[str, str]:
+        """获取章节列表中各章节的标题
+        可选的方法, 用于按标题对齐多个来源的章节列表.
+        默认使用章节列表页面中指向这些章节的第一个链接的文本,
+        章节列表不在该页面中或者链接没有文本的章节没有标题
+        
+        :param response: 获取章节列表时使用的页面
+        :type response: Network
+        :param urls: get_chapter_url 返回的章节 URL
+        :type urls: List[str]
+        :return: 章节 URL 到章节标题的映射
+        """
+        wanted = set(urls)
+        titles: Dict[str, str] = {}
+        for link in response.tree.xpath("//a[@href]"):
+            url = response.get_next_url(link.get("href"))
+            if url in wanted and url not in titles:
+                title = link.text_content().strip()
+                if title:
+                    titles[url] = title
+        return titles
+    
     @abstractmethod
     def get_chapter(
         self, response: Network, index: int, book_name: str
@@ -165,4 +274,126 @@ class BookWeb(metaclass=ABCMeta):
     @abstractmethod
     def prevent_protected(self, *param):
         """反爬操作"""
-        return None
\ No newline at end of file
+        return None
+    
+    def enumerate_book_urls(self) -> Generator[str, None, None]:
+        """枚举网站中所有书籍的 URL
+        可选的方法, 引擎可以通过站点地图、分页的列表页面或者书籍编号范围
+        直接列出网站的书籍目录, 预下载时会优先爬取这些书籍,
+        而不需要通过跟随链接逐步发现. 应当实现为生成器, 以保持内存占用平稳.
+        可以使用 catalog 模块中的 sitemap_book_urls、listing_book_urls
+        和 id_range_book_urls 函数. 默认不枚举任何 URL
+        """
+        return
+        yield
+    
+    def select(self, response: Network, key: str) -> List[Any]:
+        """使用选择器查询页面, 返回所有匹配的结果
+        
+        :param response: 网络对象
+        :type response: Network
+        :param key: 选择器的名称
+        :type key: str
+        :return: 元素、属性值或者文本的列表
+        """
+        return self.selectors[key](response.tree)
+    
+    def select_first(self, response: Network, key: str) -> Any:
+        """使用选择器查询页面, 返回第一个匹配的结果
+        没有匹配的结果时抛出 SelectorError
+        """
+        return self.selectors[key].first(response.tree)
+    
+    def extract(
+        self, response: Network,
+        fast: Callable[[Network], T], slow: Callable[[Network], T]
+    ) -> T:
+        """优先使用选择器解析页面, 失败时改为使用 BeautifulSoup 解析
+        fast 与 slow 应当从页面中提取相同的内容,
+        fast 抛出任何异常都会改为调用 slow, 并记录一次 selector.fallback
+        
+        :param response: 网络对象
+        :type response: Network
+        :param fast: 使用选择器的解析函数
+        :type fast: Callable[[Network], T]
+        :param slow: 使用 BeautifulSoup 的解析函数
+        :type slow: Callable[[Network], T]
+        :return: 解析的结果
+        
+        Example:
+            >>> name, author = self.extract(
+            >>>     response, self.__info_by_selectors, self.__info_by_bs
+            >>> )
+        """
+        if self.use_selectors and self.selectors:
+            try:
+                return fast(response)
+            except Exception:
+                Metrics().count("selector.fallback", engine=self.name)
+        return slow(response)
+    
+    def chapter_page_urls(self, response: Network) -> List[str]:
+        """预测章节其余分页的 URL
+        可选的方法, 分页的 URL 有规律或者第一页中列出了所有分页时,
+        按顺序返回第一页之后的所有分页的 URL, 这些分页可以同时下载.
+        默认没有分页
+        
+        :param response: 章节的第一页
+        :type response: Network
+        :return: 其余分页的 URL, 不包括第一页
+        """
+        return []
+    
+    def next_chapter_page(self, response: Network) -> str | None:
+        """从一个分页中找到下一个分页的 URL
+        可选的方法, 用于无法预测所有分页的网站, 这些分页只能依次下载.
+        默认没有下一个分页
+        
+        :param response: 章节的一个分页
+        :type response: Network
+        :return: 下一个分页的 URL, 没有下一个分页时返回 None
+        """
+        return None
+    
+    def chapter_pages(
+        self, response: Network
+    ) -> Generator[Network, None, None]:
+        """按顺序生成章节的所有分页, 包括第一页
+        分页通过当前的分页下载函数下载, 见 page_fetcher. 通过 WebManager 下载时,
+        chapter_page_urls 预测到的分页同时下载, 每个分页下载完成
+        并且之前的分页都已经生成后立即生成, 调用者可以一边解析一边等待之后的分页.
+        预测的分页之后再使用 next_chapter_page 依次寻找剩余的分页.
+        下载失败时抛出异常, 提前结束时尚未开始的下载会被取消
+        
+        :param response: 章节的第一页
+        :type response: Network
+        :return: 分页的生成器
+        
+        Example:
+            >>> for page in self.chapter_pages(response):
+            >>>     lines += [text_of(i) for i in self.select(page, "content")]
+        """
+        fetch = _page_fetcher.get()
+        yield response
+        seen = {response.response.url,}
+        last = response
+        predicted = list(dict.fromkeys(
+            i for i in self.chapter_page_urls(response)
+            if i and i not in seen
+        ))[:MAX_CHAPTER_PAGES - 1]
+        if predicted:
+            pages = fetch(self, predicted)
+            try:
+                for last in pages:
+                    yield last
+            finally:
+                pages.close()
+            seen.update(predicted)
+        # 依次寻找预测的分页之后的分页
+        while len(seen) < MAX_CHAPTER_PAGES:
+            next_url = self.next_chapter_page(last)
+            if not next_url or next_url in seen:
+                break
+            seen.add(next_url)
+            for last in fetch(self, [next_url,]):
+                yield last
\ No newline at end of file
@@ -10,16 +10,19 @@ import json
 import time
 import random
 import datetime
-from typing import List
+from typing import Generator, List, Tuple
 from threading import Lock
 
 import requests
+from lxml import etree
 
 from novel_dl.utils.network import Network
 from novel_dl.core.books import ContentType, Line
 from novel_dl.core.books import CacheMethod, Chapter
 from novel_dl.core.books import State, Book
 from .config import BookWeb
+from .catalog import get_page, id_range_book_urls
+from .selector import Selector, has_class, text_of
 
 
 class ProtectedError(Exception):
@@ -66,16 +69,35 @@ class Engine1(BookWeb):
         h1 = response.h1
         name = h1.split(" ")[1].split("（")[0]
         buffer = []
-        prev_response = response
-        while True:
-            chapter_p = prev_response.bs.find("div", attrs={"id": "chaptercontent"}).find_all("p")
+        for page in self.chapter_pages(response):
+            chapter_p = page.bs.find("div", attrs={"id": "chaptercontent"}).find_all("p")
             for i in chapter_p:
                 buffer.append(i.text.strip(" "))
-            a_tag = prev_response.bs.find("div", attrs={"class": "read-page"}).find_all("a")[-1]
-            if a_tag.text == "下一章":
-                break
-            prev_response = Network.get(prev_response.get_next_url(a_tag.get("href")), prev_response.encoding)
-        return Chapter(name, 0, response.response.url, "", buffer)
+        text = [
+            Line(number + 1, item, ContentType.Text)
+            for number, item in enumerate(buffer)
+        ]
+        return Chapter(
+            index, name, [response.response.url,], time.time(),
+            book_name, text
+        )
+
+    def chapter_page_urls(self, response: Network) -> List[str]:
+        # 标题的末尾为当前分页与总页数, 例如 "书名 第一章 标题（1/3）",
+        # 其余分页的 URL 为章节的 URL 加上 "_页码", 例如 "/book/1/2_2.html"
+        match = re.search(r"（1/(\d+)）\s*$", response.h1)
+        if match is None:
+            return []
+        return [
+            re.sub(r"(_\d+)?\.html$", f"_{i}.html", response.response.url)
+            for i in range(2, int(match.group(1)) + 1)
+        ]
+
+    def next_chapter_page(self, response: Network) -> str | None:
+        a_tag = response.bs.find("div", attrs={"class": "read-page"}).find_all("a")[-1]
+        if a_tag.text == "下一章":
+            return None
+        return response.get_next_url(a_tag.get("href"))
 
     def is_protected(
         self, response: Network | None,
@@ -95,8 +117,51 @@ class Engine2(BookWeb):
     chapter_url_pattern = r"^/book/\d+/.*?\.html$"
     encoding = "UTF-8"
     prestore_book_urls = True
+    selectors = {
+        "name": Selector(f"(//div[{has_class('top')}])[1]//h1"),
+        "info": Selector(f"(//div[{has_class('fix')}])[1]//p"),
+        "desc": Selector(f"(//div[{has_class('info')}])[1]//div"),
+        "cover": Selector(f"(//div[{has_class('imgbox')}])[1]//img/@src"),
+        "chapter_urls": Selector(
+            f"(//div[{has_class('section-box')}])[last()]//a/@href"
+        ),
+        "chapter_name": Selector(f"(//div[{has_class('text-head')}])[1]//h3"),
+        "content": Selector(
+            f"(//div[{has_class('read-content')} and "
+            f"{has_class('j_readContent')}])[1]//p"
+        ),
+        "update_time": Selector(
+            f"(//div[{has_class('info')} and {has_class('fl')}])[1]//span"
+        ),
+    }
     
     def get_book_info(self, response: Network) -> Book:
+        name, author, state_text, desc, image_url = self.extract(
+            response, self.__book_info_by_selectors, self.__book_info_by_bs
+        )
+        state = State.SERIALIZING if state_text == "连载中" \
+            else State.END
+        desc = desc.strip("\r\n ").replace("\u3000", "")
+        image = Network.get(response.get_next_url(image_url)).content
+        return Book(
+            name, author, state, desc, [response.response.url,],
+            [image,]
+        )
+    
+    def __book_info_by_selectors(
+        self, response: Network
+    ) -> Tuple[str, str, str, str, str]:
+        united_info = [text_of(i) for i in self.select(response, "info")]
+        return (
+            text_of(self.select_first(response, "name")),
+            united_info[0].split("：")[1], united_info[2].split("：")[1],
+            text_of(self.select(response, "desc")[-1]),
+            text_of(self.select_first(response, "cover"))
+        )
+    
+    def __book_info_by_bs(
+        self, response: Network
+    ) -> Tuple[str, str, str, str, str]:
         name = response.bs.find(
             "div", attrs={"class": "top"}
         ).find("h1").text
@@ -105,47 +170,39 @@ class Engine2(BookWeb):
         ).find_all("p")
         author = united_info[0].text.split("：")[1]
         state_text = united_info[2].text.split("：")[1]
-        state = State.SERIALIZING if state_text == "连载中" \
-            else State.END
         desc = response.bs \
             .find("div", attrs={"class": "info"}) \
-            .find_all("div")[-1].text \
-            .strip("\r\n ").replace("\u3000", "")
+            .find_all("div")[-1].text
         image_url = response.bs.find("div", attrs={"class": "imgbox"}).find("img").get("src")
-        image = Network.get(response.get_next_url(image_url)).content
-        return Book(
-            name, author, state, desc, [response.response.url,],
-            [image,]
-        )
+        return name, author, state_text, desc, image_url
 
     def get_chapter_url(self, response: Network) -> List[str]:
-        url_list = response.bs.find_all("div", attrs={"class": "section-box"})[-1].find_all("a")
-        url_list = [i.get("href") for i in url_list]
+        url_list = self.extract(
+            response,
+            lambda x: [text_of(i) for i in self.select(x, "chapter_urls")],
+            lambda x: [
+                i.get("href") for i in x.bs.find_all(
+                    "div", attrs={"class": "section-box"}
+                )[-1].find_all("a")
+            ]
+        )
         return [response.get_next_url(i) for i in url_list]
 
     def get_chapter(
         self, response: Network, index: int, book_name: str
     ) -> Chapter:
-        flag = response.bs.find("div", attrs={"class": "text-head"})
-        if flag is None:
-            response.save_debug_file()
-            article = response.bs.find("article")
-            name = article.find("h3").text.split(" ")[-1]
-            text = article.find_all("p")
+        name, text, update_time = self.extract(
+            response, self.__chapter_by_selectors, self.__chapter_by_bs
+        )
+        name = name.split(" ")[-1]
+        if update_time is None:
             update_time = time.time()
         else:
-            name = flag.find("h3").text.split(" ")[-1]
-            text = response.bs.find(
-                "div", attrs={"class": "read-content j_readContent"}
-            ).find_all("p")
-            update_time = response.bs.find(
-                "div", attrs={"class": "info fl"}
-            ).find_all("span")[-1].text
             update_time = time.mktime(
                 time.strptime(update_time, "%Y-%m-%d %H:%M")
             )
         text = [
-            i.text.strip("\r\n ").replace("\u3000", "") for i in text
+            i.strip("\r\n ").replace("\u3000", "") for i in text
         ]
         if text[0] == '章节内容转码失败！':
             raise ProtectedError("存在反爬机制!")
@@ -157,6 +214,36 @@ class Engine2(BookWeb):
             index, name, [response.response.url,], update_time,
             book_name, text
         )
+    
+    def __chapter_by_selectors(
+        self, response: Network
+    ) -> Tuple[str, List[str], str | None]:
+        # 没有 text-head 的页面结构不同, 由 BeautifulSoup 处理
+        return (
+            text_of(self.select_first(response, "chapter_name")),
+            [text_of(i) for i in self.select(response, "content")],
+            text_of(self.select(response, "update_time")[-1])
+        )
+    
+    def __chapter_by_bs(
+        self, response: Network
+    ) -> Tuple[str, List[str], str | None]:
+        flag = response.bs.find("div", attrs={"class": "text-head"})
+        if flag is None:
+            response.save_debug_file()
+            article = response.bs.find("article")
+            name = article.find("h3").text
+            text = article.find_all("p")
+            update_time = None
+        else:
+            name = flag.find("h3").text
+            text = response.bs.find(
+                "div", attrs={"class": "read-content j_readContent"}
+            ).find_all("p")
+            update_time = response.bs.find(
+                "div", attrs={"class": "info fl"}
+            ).find_all("span")[-1].text
+        return name, [i.text for i in text], update_time
 
     def is_protected(
         self, response: Network | None,
@@ -174,7 +261,20 @@ class Engine2(BookWeb):
         return super().is_protected(response, network_error, analyze_error)
 
     def prevent_protected(self, *param):
-        time.sleep(5.0)
+        return super().prevent_protected(*param)
+    
+    def enumerate_book_urls(self) -> Generator[str, None, None]:
+        # 书籍编号是连续的, 从主页中找到最大的编号后从新到旧依次生成
+        response = get_page(self, f"https://{self.domains[0]}/")
+        ids = [
+            int(i) for i in
+            re.findall(r"/novel/(\d+)\.html", response.text)
+        ]
+        if not ids:
+            return
+        yield from id_range_book_urls(
+            f"https://{self.domains[0]}/novel/{{}}.html", max(ids), 0, -1
+        )
 
 
 class Engine3(BookWeb):
@@ -185,10 +285,36 @@ class Engine3(BookWeb):
     encoding = "UTF-8"
     prestore_book_urls = False
     multi_thread = False
+    retry_delay = 10.0
     
     class ChapterListProtectedError(Exception):
         pass
     
+    selectors = {
+        "name": Selector("//h1"),
+        "author": Selector(f"//span[{has_class('author-name-text')}]"),
+        "state": Selector(f"(//div[{has_class('info-label')}])[1]//span"),
+        "desc": Selector(f"//div[{has_class('page-abstract-content')}]"),
+        "cover": Selector("//script[@type='application/ld+json']"),
+        "directory_more": Selector(
+            f"//div[{has_class('page-directory-more')}]"
+        ),
+        "chapter_urls": Selector(
+            f"(//div[{has_class('page-directory-content')}])[1]"
+            f"//div[{has_class('chapter')}]//a/@href"
+        ),
+        "chapter_name": Selector(f"//h1[{has_class('muye-reader-title')}]"),
+        "update_time": Selector("//script"),
+        "content_box": Selector(
+            f"(//div[{has_class('muye-reader-content')} and "
+            f"{has_class('noselect')}])[1]"
+        ),
+        "content": Selector(
+            f"(//div[{has_class('muye-reader-content')} and "
+            f"{has_class('noselect')}])[1]//div"
+        ),
+    }
+    
     CODE = [[58344, 58715], [58345, 58716]]
     CHARSET = [
         [
@@ -265,8 +391,13 @@ class Engine3(BookWeb):
                 User_Agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:133.0) " \
                     "Gecko/20100101 Firefox/133.0"
             )
-            n = response.bs \
-                .find("div", attrs={"class": "muye-reader-content noselect"}).text
+            n = self.extract(
+                response,
+                lambda x: text_of(self.select_first(x, "content_box")),
+                lambda x: x.bs.find(
+                    "div", attrs={"class": "muye-reader-content noselect"}
+                ).text
+            )
         except Exception:
             return None
         else:
@@ -307,6 +438,34 @@ class Engine3(BookWeb):
         return s
     
     def get_book_info(self, response: Network) -> Book:
+        name, author, state_text, desc, image_url = self.extract(
+            response, self.__book_info_by_selectors, self.__book_info_by_bs
+        )
+        state = State.SERIALIZING if state_text == "连载中" \
+            else State.END
+        image_url = json.loads(image_url)
+        image_url = image_url.get("images")[0]
+        image = Network.get(response.get_next_url(image_url)).content
+        fq_id = response.response.url.split("/")[-1]
+        return Book(
+            name, author, state, desc, [response.response.url,],
+            [image,], fq_id=fq_id
+        )
+    
+    def __book_info_by_selectors(
+        self, response: Network
+    ) -> Tuple[str, str, str, str, str]:
+        return (
+            text_of(self.select_first(response, "name")),
+            text_of(self.select_first(response, "author")),
+            text_of(self.select_first(response, "state")),
+            text_of(self.select_first(response, "desc")),
+            text_of(self.select(response, "cover")[1])
+        )
+    
+    def __book_info_by_bs(
+        self, response: Network
+    ) -> Tuple[str, str, str, str, str]:
         name = response.h1
         author = response.bs.find(
             "span", attrs={"class": "author-name-text"}
@@ -314,28 +473,39 @@ class Engine3(BookWeb):
         state_text = response.bs.find(
             "div", attrs={"class": "info-label"}
         ).find_all("span")[0].text
-        state = State.SERIALIZING if state_text == "连载中" \
-            else State.END
         desc = response.bs.find(
             "div", attrs={"class": "page-abstract-content"}
         ).text
         image_url = response.bs.find_all(
             "script", attrs={"type": "application/ld+json"}
-        )[1]
-        image_url = json.loads(image_url.text)
-        image_url = image_url.get("images")[0]
-        image = Network.get(response.get_next_url(image_url)).content
-        fq_id = response.response.url.split("/")[-1]
-        return Book(
-            name, author, state, desc, [response.response.url,],
-            [image,], fq_id=fq_id
-        )
+        )[1].text
+        return name, author, state_text, desc, image_url
     
     def get_chapter_url(self, response: Network) -> List[str]:
+        protected, url_list = self.extract(
+            response, self.__chapter_url_by_selectors,
+            self.__chapter_url_by_bs
+        )
+        if protected:
+            raise self.ChapterListProtectedError
+        return [response.get_next_url(i) for i in url_list]
+    
+    def __chapter_url_by_selectors(
+        self, response: Network
+    ) -> Tuple[bool, List[str]]:
+        if self.select(response, "directory_more"):
+            return True, []
+        return False, [
+            text_of(i) for i in self.select(response, "chapter_urls")
+        ]
+    
+    def __chapter_url_by_bs(
+        self, response: Network
+    ) -> Tuple[bool, List[str]]:
         if response.bs.find(
             "div", attrs={"class": "page-directory-more"}
         ):
-            raise self.ChapterListProtectedError
+            return True, []
         volume_list = response.bs.find(
             "div", attrs={"class": "page-directory-content"}
         ).find_all("div", attrs={"class": "chapter"})
@@ -343,7 +513,7 @@ class Engine3(BookWeb):
         for one_volume in volume_list:
             a_list = one_volume.find_all("a")
             [url_list.append(i.get("href")) for i in a_list]
-        return [response.get_next_url(i) for i in url_list]
+        return False, url_list
     
     def get_chapter(
         self, response: Network, index: int, book_name: str
@@ -351,23 +521,20 @@ class Engine3(BookWeb):
         chapter_response = self.__get_chapter_response(
             response.response.url
         )
-        name = chapter_response.bs.find(
-            "h1", attrs={"class": "muye-reader-title"}
-        ).text.split(" ")[-1]
-        update_time = chapter_response.bs.find("script")
-        update_time = json.loads(update_time.text).get("dateModified")
+        name, update_time, items = self.extract(
+            chapter_response, self.__chapter_by_selectors,
+            self.__chapter_by_bs
+        )
+        name = name.split(" ")[-1]
+        update_time = json.loads(update_time).get("dateModified")
         update_time = time.mktime(
             time.strptime(update_time, "%Y-%m-%dT%H:%M:%S")
         )
-        content_tag = chapter_response.bs.find(
-            "div", attrs={"class": "muye-reader-content noselect"}
-        ).find("div")
-        content_tag_list = list(content_tag.children)
         content_list = []
-        for line_index, html_tag in enumerate(content_tag_list):
-            match html_tag.name:
+        for line_index, tag_name, value in items:
+            match tag_name:
                 case "p":
-                    text = self.__decode_text(html_tag.text)
+                    text = self.__decode_text(value)
                     if not text:
                         continue
                     content_list.append(
@@ -376,28 +543,70 @@ class Engine3(BookWeb):
                             ContentType.Text
                         )
                     )
-                case "div":
-                    if html_tag.get("data-fanqie-type") != "image":
-                        continue
-                    p_list = html_tag.find_all("p")
-                    if len(p_list) != 2:
-                        continue
-                    image_src = p_list[0].find("img").get("src")
+                case "img":
+                    image_src, alt = value
                     image = Network.get(image_src).content
-                    alt = p_list[1].text
                     content_list.append(
                         Line(
                             line_index + 1, image,
                             ContentType.Image, alt=alt
                         )
                     )
-                case _:
-                    continue
         return Chapter(
             index, name, [response.response.url,], update_time, 
             book_name, content_list
         )
     
+    def __chapter_by_selectors(
+        self, response: Network
+    ) -> Tuple[str, str, List[Tuple[int, str, str | Tuple[str, str]]]]:
+        content_tag = self.select_first(response, "content")
+        # 与 BeautifulSoup 的 children 相同地计算序号, 文本节点也占用一个序号
+        items = []
+        line_index = 1 if content_tag.text else 0
+        for html_tag in content_tag:
+            if html_tag.tag == "p":
+                items.append((line_index, "p", str(html_tag.text_content())))
+            elif html_tag.tag == "div" and \
+                html_tag.get("data-fanqie-type") == "image":
+                p_list = html_tag.findall(".//p")
+                if len(p_list) == 2:
+                    items.append((line_index, "img", (
+                        p_list[0].find(".//img").get("src"),
+                        str(p_list[1].text_content())
+                    )))
+            line_index += 2 if html_tag.tail else 1
+        return (
+            text_of(self.select_first(response, "chapter_name")),
+            text_of(self.select_first(response, "update_time")), items
+        )
+    
+    def __chapter_by_bs(
+        self, response: Network
+    ) -> Tuple[str, str, List[Tuple[int, str, str | Tuple[str, str]]]]:
+        name = response.bs.find(
+            "h1", attrs={"class": "muye-reader-title"}
+        ).text
+        update_time = response.bs.find("script").text
+        content_tag = response.bs.find(
+            "div", attrs={"class": "muye-reader-content noselect"}
+        ).find("div")
+        items = []
+        for line_index, html_tag in enumerate(content_tag.children):
+            match html_tag.name:
+                case "p":
+                    items.append((line_index, "p", html_tag.text))
+                case "div":
+                    if html_tag.get("data-fanqie-type") != "image":
+                        continue
+                    p_list = html_tag.find_all("p")
+                    if len(p_list) != 2:
+                        continue
+                    items.append((line_index, "img", (
+                        p_list[0].find("img").get("src"), p_list[1].text
+                    )))
+        return name, update_time, items
+    
     def is_protected(
         self, response: Network | None,
         network_error: Exception | None,
@@ -416,7 +625,7 @@ class Engine3(BookWeb):
         return super().is_protected(response, network_error, analyze_error)
     
     def prevent_protected(self, *param):
-        time.sleep(10.0)
+        return super().prevent_protected(*param)
 
 
 class Engine4(BookWeb):
@@ -427,8 +636,53 @@ class Engine4(BookWeb):
     encoding = "UTF-8"
     prestore_book_urls = True
     multi_thread = False
+    selectors = {
+        "name": Selector(f"//div[{has_class('title')}]"),
+        "info": Selector(f"(//div[{has_class('info')}])[1]//div"),
+        "desc": Selector(f"//div[{has_class('text')}]"),
+        "cover": Selector(f"(//div[{has_class('cover')}])[1]//img/@src"),
+        "chapter_urls": Selector(
+            f"(//div[{has_class('chapter')} and "
+            f"{has_class('container')}])[1]//a/@href"
+        ),
+        "chapter_name": Selector("//h2"),
+        "content": Selector("//article"),
+    }
     
     def get_book_info(self, response: Network) -> Book:
+        name, author, state_text, desc, image_url = self.extract(
+            response, self.__book_info_by_selectors, self.__book_info_by_bs
+        )
+        state = State.SERIALIZING if state_text == "连载" \
+            else State.END
+        desc = desc.replace(" ", "").strip("\r\n")
+        image = Network.get(response.get_next_url(image_url))
+        if image.response.status_code != 200:
+            with open("default_cover.png", "rb") as f:
+                image = f.read()
+        else:
+            image = image.content
+        return Book(
+            name, author, state, desc, [response.response.url,],
+            [image,]
+        )
+
+    def __book_info_by_selectors(
+        self, response: Network
+    ) -> Tuple[str, str, str, str, str]:
+        united_info = [text_of(i) for i in self.select(response, "info")]
+        # 简介中的第一个段落是标题, 去除时保留其后的文本
+        desc = self.select_first(response, "desc")
+        desc.find(".//p").drop_tree()
+        return (
+            text_of(self.select_first(response, "name")),
+            united_info[0].split("：")[1], united_info[1].split("：")[1],
+            text_of(desc), text_of(self.select_first(response, "cover"))
+        )
+    
+    def __book_info_by_bs(
+        self, response: Network
+    ) -> Tuple[str, str, str, str, str]:
         name = response.bs.find(
             "div", attrs={"class": "title"}
         ).text
@@ -437,37 +691,63 @@ class Engine4(BookWeb):
         ).find_all("div")
         author = united_info[0].text.split("：")[1]
         state_text = united_info[1].text.split("：")[1]
-        state = State.SERIALIZING if state_text == "连载" \
-            else State.END
         desc = response.bs \
             .find("div", attrs={"class": "text"})
         desc.find("p").extract()
-        desc = desc.text.replace(" ", "").strip("\r\n")
         image_url = response.bs.find(
             "div", attrs={"class": "cover"}
         ).find("img").get("src")
-        image = Network.get(response.get_next_url(image_url))
-        if image.response.status_code != 200:
-            with open("default_cover.png", "rb") as f:
-                image = f.read()
-        else:
-            image = image.content
-        return Book(
-            name, author, state, desc, [response.response.url,],
-            [image,]
-        )
+        return name, author, state_text, desc.text, image_url
 
     def get_chapter_url(self, response: Network) -> List[str]:
-        url_list = response.bs.find(
-            "div", attrs={"class": "chapter container"}
-        ).find_all("a")
-        url_list = [i.get("href") for i in url_list]
+        url_list = self.extract(
+            response,
+            lambda x: [text_of(i) for i in self.select(x, "chapter_urls")],
+            lambda x: [
+                i.get("href") for i in x.bs.find(
+                    "div", attrs={"class": "chapter container"}
+                ).find_all("a")
+            ]
+        )
         return [response.get_next_url(i) for i in url_list]
 
     def get_chapter(
         self, response: Network, index: int, book_name: str
     ) -> Chapter:
-        name = response.bs.find("h2").text.split(" ")[-1]
+        name, contents = self.extract(
+            response, self.__chapter_by_selectors, self.__chapter_by_bs
+        )
+        name = name.split(" ")[-1]
+        contents = [i.replace("\xa0", "") for i in contents]
+        contents = [
+            Line(line_index + 1, item, ContentType.Text)
+            for line_index, item in enumerate(filter(None, contents))
+        ]
+        return Chapter(
+            index, name, [response.response.url,], time.time(),
+            book_name, contents
+        )
+    
+    def __chapter_by_selectors(
+        self, response: Network
+    ) -> Tuple[str, List[str]]:
+        # 正文由 br 分隔, 注释被去除, 其他元素保留原来的 HTML
+        content = self.select_first(response, "content")
+        contents = [content.text or "",]
+        for html_tag in content:
+            if html_tag.tag == "br":
+                contents.append("")
+            elif isinstance(html_tag.tag, str):
+                contents[-1] += etree.tostring(
+                    html_tag, encoding="unicode", method="html",
+                    with_tail=False
+                )
+            contents[-1] += html_tag.tail or ""
+        contents[0] = contents[0].replace("\n", "")
+        return text_of(self.select_first(response, "chapter_name")), contents
+    
+    def __chapter_by_bs(self, response: Network) -> Tuple[str, List[str]]:
+        name = response.bs.find("h2").text
         content = response.bs.find("article")
         contents = str(content).split("<br/>")
         contents[0] = contents[0].replace("\n", "") \
@@ -475,14 +755,7 @@ class Engine4(BookWeb):
             .replace('<article id="article">', "")
         contents[-1] = contents[-1].replace("<!--over-->", "") \
             .replace("</article>", "")
-        contents = [i.replace("\xa0", "") for i in contents]
-        contents = list(
-            filter(lambda x: True if x else False, contents)
-        )
-        return Chapter(
-            index, name, [response.response.url,], time.time(),
-            book_name, contents
-        )
+        return name, contents
         
 
     def is_protected(
@@ -493,7 +766,7 @@ class Engine4(BookWeb):
         return super().is_protected(response, network_error, analyze_error)
 
     def prevent_protected(self, *param):
-        time.sleep(5.0)
+        return super().prevent_protected(*param)
 
 
 ENGINE_LIST = (
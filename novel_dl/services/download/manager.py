@@ -10,52 +10,94 @@
                 执行引擎操作、下载书籍信息和章节等功能。
 方法:
     __init__(self):
-        初始化 WebManager 实例，添加默认的引擎。
+        初始化 WebManager 实例，使用进程共享的引擎注册表中的引擎。
     append(self, web: BookWeb) -> bool:
-        添加引擎。如果引擎不可用或者已经添加过则返回 False。
+        添加只属于该管理器的引擎。如果引擎不可用或者已经添加过则返回 False。
     engines(self) -> Generator[BookWeb, None, None]:
         返回一个引擎生成器，包含所有引擎对象。
     get_engine_by_name(self, name: str) -> BookWeb | None:
         通过引擎名获取引擎对象。如果没有找到则返回 None。
     get_engine_by_url(self, url: str) -> BookWeb | None:
         通过 URL 获取引擎对象。如果没有找到则返回 None。
+        比较前会先规范化 URL, 主机名的大小写与默认端口不影响结果。
+        内置的引擎都不支持该域名时, 使用引擎配置文件中定义的引擎。
+    mirror_url(engine: BookWeb, url: str) -> str | None:
+        将 URL 的域名替换为该引擎可以访问的镜像域名。
     __operate(
-        执行引擎操作。如果操作失败则返回 False, None。
+        执行引擎操作, 失败时按重试策略等待后重试。
+        如果重试次数用完后仍然失败则返回 False, None。
         如果操作成功则返回 True, 结果。
+    __attempt(
+        执行一次引擎操作。如果操作失败则返回 False, 失败的类型。
+        解析章节时, 章节的分页同样经过镜像域名、限流、熔断与重试。
+    __fetch_page(
+        下载章节的一个分页, 失败时重试, 重试次数用完后抛出 PageFetchError。
     __download_book_info(
         下载书籍信息。如果下载失败则返回 None。
-        返回书籍信息和章节列表。
+        返回书籍信息、章节列表、章节在网站中的序号以及章节的标题。
     __download_chapter(
-        下载章节。返回书籍对象。
+        下载章节, 失败的章节进入延迟重试队列。返回书籍对象。
     download(
         下载书籍。如果下载失败则返回 None。
         返回书籍对象。
+    download_info(
+        下载书籍信息与待下载的章节列表, 不下载章节。如果下载失败则返回 None。
+        一个来源失败时会尝试其他镜像或引擎中的等价来源。
+    download_one_chapter(
+        下载单个章节。如果下载失败则返回 None。
+    attempt_chapter(
+        下载单个章节, 只尝试一次。返回章节对象或者失败的类型。
 """
 
 
 # 导入标准库
+import time
+import logging
+import threading
+from contextlib import nullcontext
 from urllib.parse import urlparse
-from typing import List, Generator, Tuple, Callable
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import (
+    List, Dict, Generator, Iterable, Set, Tuple, Callable, ContextManager
+)
+from concurrent.futures import (
+    Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+)
 
 # 导入自定义库
-from .engines import ENGINE_LIST
-from .config import Operations, BookWeb
+from .config import Operations, BookWeb, PageFetcher, page_fetcher
+from .registry import EngineRegistry
+from .retry import ErrorKind, FailedChapter, PageFetchError, RetryQueue
+from .retry import classify, retry_delay
+from .spec import EngineSpecs, EngineSpecError
 from novel_dl.utils.network import Network
+from novel_dl.utils.metrics import Metrics
+from novel_dl.utils.circuit import CircuitBreaker, CircuitState
+from novel_dl.utils.throttle import DomainThrottle
 from novel_dl.core import Settings, Book, Chapter
 
 
+# 使用包的日志记录器的子记录器, 由 Logger 配置输出方式
+logger = logging.getLogger("novel_dl.download")
+
+
 class WebManager(object):
     def __init__(self):
-        """书籍网站引擎管理器"""
-        # 初始化引擎列表
+        """书籍网站引擎管理器
+        内置引擎与插件引擎由进程共享的 EngineRegistry 管理, 创建管理器时不会复制,
+        通过 append 添加的引擎只属于该管理器, 排在注册表中的引擎之后
+        """
+        # 进程共享的引擎注册表
+        self.__registry = EngineRegistry()
+        # 只属于该管理器的引擎以及域名到这些引擎的索引
         self.__web_list: List[BookWeb] = []
-        # 添加默认的引擎
-        for i in ENGINE_LIST:
-            self.append(i)
+        self.__web_set: Set[BookWeb] = set()
+        self.__domain_index: Dict[str, List[BookWeb]] = {}
+        # 同时下载章节分页的线程池, 所有章节共用, 第一次使用时创建
+        self.__page_pool: ThreadPoolExecutor | None = None
+        self.__page_pool_lock = threading.Lock()
     
     def append(self, web: BookWeb) -> bool:
-        """添加引擎
+        """添加只属于该管理器的引擎
         如果引擎不可用或者已经添加过则返回 False
         
         :param web: 引擎对象
@@ -65,18 +107,41 @@ class WebManager(object):
         # 确认传入的参数的类型是否正确
         assert isinstance(web, BookWeb)
         # 如果引擎不可用或者已经添加过则返回 False
-        if (web.workable is False) or (web in self.__web_list):
+        if (web.workable is False) or (web in self.__web_set) \
+                or (web in self.__registry):
             return False
-        # 添加引擎至引擎列表
+        # 添加引擎至引擎列表, 并按域名建立索引
         self.__web_list.append(web)
+        self.__web_set.add(web)
+        for domain in web.domains:
+            self.__domain_index.setdefault(domain.lower(), []).append(web)
         # 返回添加成功
         return True
     
     def engines(self) -> Generator[BookWeb, None, None]:
         """返回一个引擎生成器, 包含所有引擎对象"""
+        for web in self.__registry.engines():
+            yield web
         for web in self.__web_list:
             yield web
     
+    def __engines_for(self, netloc: str) -> List[BookWeb]:
+        """获取支持该域名的所有引擎
+        内置的引擎都不支持该域名时, 使用引擎配置文件中定义的引擎,
+        配置文件不正确时记录日志并视为不支持该域名
+        """
+        result = list(self.__registry.find_all(netloc)) + \
+            self.__domain_index.get(netloc, [])
+        if not result:
+            try:
+                spec_engine = EngineSpecs().find(netloc)
+            except (OSError, EngineSpecError) as error:
+                logger.warning(f"无法加载 {netloc} 的引擎配置文件: {error}")
+                spec_engine = None
+            if spec_engine is not None:
+                result.append(spec_engine)
+        return result
+    
     def get_engine_by_name(self, name: str) -> BookWeb | None:
         """通过引擎名获取引擎对象
         如果有多个同名引擎则返回第一个  
@@ -86,7 +151,7 @@ class WebManager(object):
         :type name: str
         :return: 引擎对象或者 None
         """
-        for web in self.__web_list:
+        for web in self.engines():
             if web.name == name:
                 return web
         return None
@@ -94,22 +159,64 @@ class WebManager(object):
     def get_engine_by_url(self, url: str) -> BookWeb | None:
         """通过 URL 获取引擎对象
         如果有多个引擎支持该 URL 则返回第一个
+        内置的引擎都不支持该 URL 时, 使用引擎配置文件中定义的引擎
         如果没有找到则返回 None
         
         :param url: URL
         :type url: str
         :return: 引擎对象或者 None
         """
-        for web in self.__web_list:
-            if urlparse(url).netloc in web.domains:
-                return web
-        return None
+        # 使用规范化后的主机名进行比较, 忽略大小写与默认端口
+        netloc = urlparse(Network.normalize_url(url)).netloc
+        engines = self.__engines_for(netloc)
+        return engines[0] if engines else None
+    
+    @staticmethod
+    def mirror_url(engine: BookWeb, url: str) -> str | None:
+        """将 URL 的域名替换为该引擎可以访问的镜像域名
+        优先使用 URL 原来的域名, 不属于该引擎的域名不会被替换
+        如果所有镜像域名都暂停访问则返回 None
+        
+        :param engine: 引擎对象
+        :type engine: BookWeb
+        :param url: URL
+        :type url: str
+        :return: 替换域名后的 URL 或者 None
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(engine, BookWeb)
+        assert isinstance(url, str)
+        parsed = urlparse(url)
+        mirrors = engine.domains \
+            if parsed.netloc in engine.domains else [parsed.netloc,]
+        domain = CircuitBreaker().choose(mirrors, parsed.netloc)
+        if domain is None:
+            return None
+        return parsed._replace(netloc=domain).geturl()
+    
+    def __candidates(
+        self, url: str, alternates: Iterable[str]
+    ) -> List[Tuple[BookWeb, str]]:
+        """获取书籍的所有来源以及对应的引擎
+        有可以访问的域名的来源排在前面, 其余保持原来的顺序
+        """
+        result: List[Tuple[BookWeb, str]] = []
+        for source in [url,] + list(alternates):
+            netloc = urlparse(Network.normalize_url(source)).netloc
+            result += [(web, source) for web in self.__engines_for(netloc)]
+        breaker = CircuitBreaker()
+        healthy = lambda web: any(
+            breaker.state(i) != CircuitState.OPEN for i in web.domains
+        )
+        return sorted(result, key=lambda x: not healthy(x[0]))
     
     def __operate(
-        self, engine: BookWeb, url: str, operation: Operations, **kwargs
+        self, engine: BookWeb, url: str, operation: Operations,
+        throttle: bool = False, **kwargs
     ) -> Tuple[bool, Book | List[str] | Chapter | None]:
         """执行引擎操作
-        如果操作失败则返回 False, None
+        失败时按重试策略等待一段时间后重试, 等待期间会阻塞当前线程
+        如果重试次数用完后仍然失败则返回 False, None
         如果操作成功则返回 True, 结果
         
         :param engine: 引擎对象
@@ -118,6 +225,8 @@ class WebManager(object):
         :type url: str
         :param operation: 操作类型
         :type operation: Operations
+        :param throttle: 请求是否经过 DomainThrottle, 只在发出请求时占用名额
+        :type throttle: bool
         :param kwargs: 其他参数
         :return: 操作是否成功, 结果
         """
@@ -125,57 +234,239 @@ class WebManager(object):
         assert isinstance(engine, BookWeb)
         assert isinstance(url, str)
         assert isinstance(operation, Operations)
-        # 循环直到操作成功
+        # 循环直到操作成功或者重试次数用完
+        attempt = 0
         while True:
+            attempt += 1
+            success, result = self.__attempt(
+                engine, url, operation, throttle, **kwargs
+            )
+            # 如果操作成功则返回 True, 结果
+            if success:
+                return True, result
+            # 如果不应当重试则返回 False, None
+            delay = retry_delay(result, attempt, engine)
+            if delay is None:
+                return False, None
+            time.sleep(delay)
+    
+    def __attempt(
+        self, engine: BookWeb, url: str, operation: Operations,
+        throttle: bool = False, **kwargs
+    ) -> Tuple[bool, Book | List[str] | Chapter | ErrorKind]:
+        """执行一次引擎操作, 不进行重试
+        如果操作失败则返回 False, 失败的类型
+        如果操作成功则返回 True, 结果
+        
+        :param engine: 引擎对象
+        :type engine: BookWeb
+        :param url: URL
+        :type url: str
+        :param operation: 操作类型
+        :type operation: Operations
+        :param throttle: 请求是否经过 DomainThrottle, 只在发出请求时占用名额
+        :type throttle: bool
+        :param kwargs: 其他参数
+        :return: 操作是否成功, 结果或者失败的类型
+        """
+        metrics = Metrics()
+        stage = operation.name.lower()
+        # 选择可以访问的镜像域名, 全部暂停访问时不发出请求
+        url = self.mirror_url(engine, url)
+        if url is None:
+            return False, ErrorKind.UNAVAILABLE
+        domain = urlparse(url).netloc
+        # 在引擎与书籍的标签下统计该操作的耗时
+        with metrics.labels(
+            engine=engine.name, book=kwargs.get("book_name")
+        ), metrics.timer(f"operation.{stage}"):
             # 尝试获取网络对象
             try:
-                network_obj = Network.get(url, engine.encoding)
+                with self.__slot(domain, throttle):
+                    network_obj = Network.get(url, engine.encoding)
             except Exception as network_error:
-                # 如果网络对象获取失败则判断是否存在保护机制
-                if engine.is_protected(None, network_error, None):
-                    # 如果存在保护机制则反制保护机制
-                    engine.prevent_protected()
-                    continue
-                # 如果不存在保护机制则返回 False, None
-                return False, None
-            # 尝试执行操作
+                # 如果网络对象获取失败则判断失败的类型
+                kind = classify(engine, None, network_error, None)
+            else:
+                # 第一页本身是否已经记录为访问成功
+                recorded = False
+                # 尝试执行操作
+                try:
+                    # 根据操作类型执行不同的操作
+                    with metrics.timer(f"engine.{stage}"):
+                        match operation:
+                            case Operations.INFO:
+                                result = engine.get_book_info(network_obj)
+                            case Operations.URLS:
+                                # 同时从章节列表页面中获取章节的标题
+                                urls = engine.get_chapter_url(network_obj)
+                                result = (
+                                    urls,
+                                    engine.chapter_titles(network_obj, urls)
+                                )
+                            case Operations.CHAPTER:
+                                # 第一页下载成功后立即记录, 释放试探访问的名额,
+                                # 否则该域名的分页都会因为无法访问而失败
+                                if self.__page_ok(engine, network_obj):
+                                    CircuitBreaker().record_success(domain)
+                                    recorded = True
+                                # 章节的分页也经过限流、熔断与重试
+                                with page_fetcher(
+                                    self.__page_fetcher(throttle)
+                                ):
+                                    result = engine.get_chapter(
+                                        network_obj, **kwargs
+                                    )
+                    # 如果操作成功则返回 True, 结果
+                    CircuitBreaker().record_success(domain)
+                    return True, result
+                except PageFetchError as page_error:
+                    # 分页的健康状况在下载分页时已经记录过,
+                    # 第一页尚未记录时同样记录, 不会一直占用试探访问的名额
+                    if not recorded:
+                        self.__report_failure(engine, domain, page_error.kind)
+                    return False, page_error.kind
+                except Exception as analyze_error:
+                    # 如果操作失败则判断失败的类型
+                    kind = classify(
+                        engine, network_obj, None, analyze_error
+                    )
+        self.__report_failure(engine, domain, kind)
+        # 返回 False, 失败的类型
+        return False, kind
+
+    @staticmethod
+    def __report_failure(
+        engine: BookWeb, domain: str, kind: ErrorKind
+    ) -> None:
+        """记录一次失败后该域名的健康状况, 需要时反制访问保护"""
+        # 解析失败等与网站状况无关的错误视为访问成功
+        if kind in (
+            ErrorKind.PROTECTED, ErrorKind.NETWORK, ErrorKind.SERVER
+        ):
+            CircuitBreaker().record_failure(
+                domain, kind == ErrorKind.PROTECTED
+            )
+        else:
+            CircuitBreaker().record_success(domain)
+        # 如果存在保护机制则反制保护机制, 等待由重试策略安排
+        if kind == ErrorKind.PROTECTED:
+            engine.prevent_protected()
+
+    @staticmethod
+    def __page_ok(engine: BookWeb, page: Network) -> bool:
+        """页面的请求本身是否成功, 不检查页面能否解析"""
+        return page.response.status_code < 400 and \
+            not engine.is_protected(page, None, None)
+
+    @staticmethod
+    def __slot(domain: str, throttle: bool) -> ContextManager:
+        """占用该域名的并发名额, 不经过 DomainThrottle 时不做任何事"""
+        return DomainThrottle().slot(domain) if throttle else nullcontext()
+
+    def __fetch_page(
+        self, engine: BookWeb, url: str, throttle: bool
+    ) -> Network:
+        """下载章节的一个分页
+        与章节的第一页一样选择镜像域名、占用域名的并发名额并记录域名的健康状况,
+        失败时按重试策略等待一段时间后重试, 重试次数用完后抛出 PageFetchError
+
+        :param engine: 引擎对象
+        :type engine: BookWeb
+        :param url: 分页的 URL
+        :type url: str
+        :param throttle: 请求是否经过 DomainThrottle
+        :type throttle: bool
+        :return: 分页
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            page_url = self.mirror_url(engine, url)
+            if page_url is None:
+                kind = ErrorKind.UNAVAILABLE
+            else:
+                domain = urlparse(page_url).netloc
+                try:
+                    with self.__slot(domain, throttle), \
+                            Metrics().timer("operation.page"):
+                        page = Network.get(page_url, engine.encoding)
+                except Exception as network_error:
+                    kind = classify(engine, None, network_error, None)
+                else:
+                    # 分页的解析由引擎完成, 这里只检查请求本身是否成功
+                    if self.__page_ok(engine, page):
+                        CircuitBreaker().record_success(domain)
+                        return page
+                    kind = classify(engine, page, None, None)
+                self.__report_failure(engine, domain, kind)
+            # 按重试策略等待后重试, 所有镜像域名都暂停访问时同样等待
+            delay = retry_delay(kind, attempt, engine)
+            if delay is None:
+                raise PageFetchError(url, kind)
+            time.sleep(delay)
+
+    def __page_fetcher(self, throttle: bool) -> PageFetcher:
+        """获取下载章节分页的函数
+        多个分页在管理器共用的线程池中同时下载, 按分页的顺序返回.
+        经过 DomainThrottle 时, 同一域名的请求数量由 DomainThrottle 限制,
+        与章节共用同一份预算; 否则每个章节同时下载的分页数量不超过
+        引擎的 max_connections 与 DOMAIN_MAX_CONNECTIONS
+        """
+        def fetch(
+            engine: BookWeb, urls: List[str]
+        ) -> Generator[Network, None, None]:
+            if len(urls) == 1 or \
+                    not (Settings().MULTI_THREAD and engine.multi_thread):
+                for url in urls:
+                    yield self.__fetch_page(engine, url, throttle)
+                return
+            limit = len(urls)
+            if not throttle:
+                limit = min(limit, Settings().DOMAIN_MAX_CONNECTIONS)
+                if engine.max_connections is not None:
+                    limit = min(limit, engine.max_connections)
+            pool = self.__get_page_pool()
+            submit = lambda url: \
+                pool.submit(self.__fetch_page, engine, url, throttle)
+            # 只提前提交 limit 个分页, 每取出一个分页再提交下一个
+            futures = [submit(url) for url in urls[:limit]]
             try:
-                # 根据操作类型执行不同的操作
-                match operation:
-                    case Operations.INFO:
-                        result = engine.get_book_info(network_obj)
-                    case Operations.URLS:
-                        result = engine.get_chapter_url(
-                            network_obj
-                        )
-                    case Operations.CHAPTER:
-                        result = engine.get_chapter(
-                            network_obj, **kwargs
-                        )
-            except Exception as analyze_error:
-                # 如果操作失败则判断是否存在保护机制
-                if engine.is_protected(
-                    network_obj, None, analyze_error
-                ):
-                    # 如果存在保护机制则反制保护机制
-                    engine.prevent_protected()
-                    continue
-                # 如果不存在保护机制则返回 False, None
-                return False, None
-            # 如果操作成功则返回 True, 结果
-            return True, result
-    
+                for position in range(len(urls)):
+                    page = futures[position].result()
+                    if position + limit < len(urls):
+                        futures.append(submit(urls[position + limit]))
+                    yield page
+            finally:
+                # 下载失败或者提前结束时取消尚未开始的下载
+                for future in futures:
+                    future.cancel()
+        return fetch
+
+    def __get_page_pool(self) -> ThreadPoolExecutor:
+        """获取下载分页的线程池, 第一次使用时创建"""
+        with self.__page_pool_lock:
+            if self.__page_pool is None:
+                self.__page_pool = ThreadPoolExecutor(
+                    Settings().MAX_CONNECTIONS,
+                    thread_name_prefix="novel_dl_pages"
+                )
+            return self.__page_pool
+
     def __download_book_info(
         self, engine: BookWeb, url: str,
         book_middle_ware: Callable[[Book], Book] = lambda x: x,
         chapters_middle_ware: \
         Callable[[List[Chapter]], List[Chapter]] = lambda x: x,
-    ) -> Tuple[Book, List[str]] | None:
+        report_callback: Callable[[int, int], None] = lambda x, y: None,
+        throttle: bool = False
+    ) -> Tuple[Book, List[str], Dict[str, int], Dict[str, str]] | None:
         """下载书籍信息
         如果下载失败则返回 None  
         注意: 如果书籍中间件返回的书籍对象中的章节
         含有与章节列表中的章节重复的章节来源, 且强制重载为 False,
-        则章节列表中的章节来源会被移除
+        则章节列表中的章节来源会被移除. 比较时使用规范化后的 URL,
+        剩余章节保持网站中的顺序, 且序号仍然以网站章节列表中的位置为准
         
         :param engine: 引擎对象
         :type engine: BookWeb
@@ -186,44 +477,76 @@ class WebManager(object):
         :param chapters_middle_ware: 章节列表中间件, 用于处理章节列表
         :type chapters_middle_ware: 
         Callable[[List[Chapter]], List[Chapter]]
-        :return: 书籍信息和章节列表
+        :param report_callback: 报告函数, 参数依次为跳过的章节数和待下载的章节数
+        :type report_callback: Callable[[int, int], None]
+        :param throttle: 请求是否经过 DomainThrottle
+        :type throttle: bool
+        :return: 书籍信息、章节列表、章节 URL 到章节序号的映射
+            以及章节 URL 到章节标题的映射
         """
         # 确认传入的参数的类型是否正确
         assert isinstance(engine, BookWeb)
         assert isinstance(url, str)
         # 获取书籍信息
-        book = self.__operate(engine, url, Operations.INFO)
+        book = self.__operate(engine, url, Operations.INFO, throttle)
         # 如果获取失败则返回 None
         if book[0] == False:
             return None
         # 从结果中提取书籍信息
         book = book[1]
         # 使用书籍中间件处理书籍信息
-        book = book_middle_ware(book)
+        with Metrics().labels(engine=engine.name, book=book.name), \
+                Metrics().timer("middleware.book"):
+            book = book_middle_ware(book)
         # 获取章节列表
-        chapter_list = self.__operate(engine, url, Operations.URLS)
+        chapter_list = self.__operate(
+            engine, url, Operations.URLS, throttle
+        )
         # 如果获取失败则返回 None
         if chapter_list[0] == False:
             return None
-        # 从结果中提取章节列表
-        chapter_list = chapter_list[1]
+        # 从结果中提取章节列表与章节标题
+        chapter_list, chapter_titles = chapter_list[1]
+        # 记录每个章节在网站章节列表中的序号, 重复的 URL 以第一次出现为准
+        chapter_indexes: Dict[str, int] = {}
+        for index, chapter_url in enumerate(chapter_list):
+            chapter_indexes.setdefault(chapter_url, index + 1)
         # 如果不强制重新加载则从章节列表中移除已经下载的章节
+        skipped = 0
         if not Settings().FORCE_RELOAD:
-            for i in book.chapters:
-                for ii in i.sources:
-                    chapter_list.remove(ii)
+            # 已经下载的章节来源, 使用规范化后的 URL 进行比较
+            downloaded = {
+                Network.normalize_url(ii)
+                for i in book.chapters for ii in i.sources
+            }
+            if downloaded:
+                queued = [
+                    i for i in chapter_list
+                    if Network.normalize_url(i) not in downloaded
+                ]
+                skipped = len(chapter_list) - len(queued)
+                chapter_list = queued
         # 使用章节列表中间件处理章节列表
-        chapter_list = chapters_middle_ware(chapter_list)
-        # 返回书籍信息和章节列表
-        return (book, chapter_list)
+        with Metrics().labels(engine=engine.name, book=book.name), \
+                Metrics().timer("middleware.chapters"):
+            chapter_list = chapters_middle_ware(chapter_list)
+        # 报告跳过的章节数和待下载的章节数
+        report_callback(skipped, len(chapter_list))
+        # 返回书籍信息、章节列表、章节序号以及章节标题
+        return (book, chapter_list, chapter_indexes, chapter_titles)
     
     def __download_chapter(
         self, engine: BookWeb, url: str, book: Book,
         chapter_list: List[str],
         chapter_middle_ware: Callable[[Chapter, Book], Chapter] = \
-        lambda x: x
+        lambda x, y: x,
+        chapter_indexes: Dict[str, int] | None = None,
+        failed_callback: Callable[[List[FailedChapter]], None] = \
+        lambda x: None
     ) -> Book:
         """下载章节
+        失败的章节会进入延迟重试队列, 按重试策略等待一段时间后再次下载,
+        等待期间线程继续下载其他章节
         
         :param engine: 引擎对象
         :type engine: BookWeb
@@ -235,6 +558,12 @@ class WebManager(object):
         :type chapter_list: List[str]
         :param chapter_middle_ware: 章节中间件, 用于处理章节信息
         :type chapter_middle_ware: Callable[[Chapter], Chapter]
+        :param chapter_indexes: 章节 URL 到章节序号的映射,
+            不在其中的章节以其在章节列表中的位置作为序号
+        :type chapter_indexes: Dict[str, int] | None
+        :param failed_callback: 所有章节完成后调用的函数,
+            参数为重试次数用完后仍然失败的章节, 按章节序号排列
+        :type failed_callback: Callable[[List[FailedChapter]], None]
         :return: 书籍对象
         """
         # 确认传入的参数的类型是否正确
@@ -242,64 +571,101 @@ class WebManager(object):
         assert isinstance(url, str)
         assert isinstance(book, Book)
         assert isinstance(chapter_list, List)
-        # 如果启用多线程则使用多线程下载
-        if Settings().MULTI_THREAD and engine.multi_thread:
-            # 使用线程池下载章节
-            with ThreadPoolExecutor() as executor:
-                # 提交任务到线程池
-                future_to_url = {
-                    executor.submit(
-                        self.__operate, engine, chapter_url,
-                        Operations.CHAPTER, index=index + 1,
-                        book_name=book.name
-                    ): chapter_url
-                    for index, chapter_url in enumerate(chapter_list)
-                }
-                # 当所有任务完成时, 获取结果
-                for future in as_completed(future_to_url):
-                    # 获取结果
-                    chapter = future.result()
-                    # 如果获取失败则跳过
-                    if chapter[0] == False:
-                        continue
-                    # 从结果中提取章节
-                    chapter = chapter[1]
-                    # 使用章节中间件处理章节
-                    chapter = chapter_middle_ware(chapter, book)
-                    # 添加章节到书籍对象
-                    book.append(chapter)
-        # 如果不启用多线程则使用单线程下载
-        else:
-            for index, chapter_url in enumerate(chapter_list):
-                # 下载章节
-                chapter = self.__operate(
-                    engine, chapter_url, Operations.CHAPTER,
-                    index=index + 1, book_name=book.name
+        # 获取章节的序号
+        if chapter_indexes is None:
+            chapter_indexes = {}
+        get_index = lambda index, chapter_url: \
+            chapter_indexes.get(chapter_url, index + 1)
+        # 如果启用多线程则使用多个线程下载, 否则只使用一个线程
+        workers = None \
+            if Settings().MULTI_THREAD and engine.multi_thread else 1
+        # 引擎限制了同时进行的请求数量时, 线程数量不超过该值
+        if workers is None and engine.max_connections is not None:
+            workers = engine.max_connections
+        # 等待重试的章节, 等待期间线程继续下载其他章节
+        retry_queue = RetryQueue()
+        # 重试次数用完后仍然失败的章节
+        failed: List[FailedChapter] = []
+        with ThreadPoolExecutor(workers) as executor:
+            # 正在下载的章节, 值为章节 URL、章节序号以及第几次尝试
+            running: Dict[Future, Tuple[str, int, int]] = {}
+            
+            def submit(chapter_url: str, index: int, attempt: int) -> None:
+                future = executor.submit(
+                    self.__attempt, engine, chapter_url,
+                    Operations.CHAPTER, index=index, book_name=book.name
                 )
-                # 如果下载失败则跳过
-                if chapter[0] == False:
+                running[future] = (chapter_url, index, attempt)
+            
+            # 提交所有章节
+            for index, chapter_url in enumerate(chapter_list):
+                submit(chapter_url, get_index(index, chapter_url), 1)
+            # 直到所有章节都下载成功或者最终失败
+            while running or len(retry_queue):
+                # 提交等待时间已经结束的章节
+                for chapter_url, index, attempt in retry_queue.pop_ready():
+                    submit(chapter_url, index, attempt + 1)
+                # 没有正在下载的章节时等待下一个章节可以重试
+                if not running:
+                    time.sleep(retry_queue.next_delay() or 0.0)
                     continue
-                # 从结果中提取章节
-                chapter = chapter[1]
-                # 使用章节中间件处理章节
-                chapter = chapter_middle_ware(chapter, book)
-                # 添加章节到书籍对象
-                book.append(chapter)
+                # 等待任意一个章节完成, 或者下一个章节可以重试
+                done, _ = wait(
+                    list(running), timeout=retry_queue.next_delay(),
+                    return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    chapter_url, index, attempt = running.pop(future)
+                    success, result = future.result()
+                    # 下载成功时使用章节中间件处理章节并添加到书籍对象
+                    if success:
+                        self.__store_chapter(
+                            engine, book, result, chapter_middle_ware
+                        )
+                        continue
+                    # 下载失败时安排重试, 不应当重试时记录为失败
+                    delay = retry_delay(result, attempt, engine)
+                    if delay is None:
+                        failed.append(
+                            FailedChapter(chapter_url, index, result, attempt)
+                        )
+                    else:
+                        retry_queue.push((chapter_url, index, attempt), delay)
+        # 报告最终失败的章节
+        failed_callback(sorted(failed, key=lambda x: x.index))
         # 将书籍对象中的章节排序
         book.sort()
         # 返回书籍对象
         return book
     
+    @staticmethod
+    def __store_chapter(
+        engine: BookWeb, book: Book, chapter: Chapter,
+        chapter_middle_ware: Callable[[Chapter, Book], Chapter]
+    ) -> None:
+        """使用章节中间件处理章节, 然后添加到书籍对象, 并记录两者的耗时"""
+        metrics = Metrics()
+        with metrics.labels(engine=engine.name, book=book.name):
+            with metrics.timer("middleware.chapter"):
+                chapter = chapter_middle_ware(chapter, book)
+            with metrics.timer("book.append"):
+                book.append(chapter)
+    
     def download(
         self, url: str, only_info: bool = False,
         book_middle_ware: Callable[[Book], Book] = lambda x: x,
         chapters_middle_ware: \
         Callable[[List[Chapter]], List[Chapter]] = lambda x: x,
         chapter_middle_ware: Callable[[Chapter, Book], Chapter] = \
-        lambda x: x
+        lambda x, y: x,
+        report_callback: Callable[[int, int], None] = lambda x, y: None,
+        failed_callback: Callable[[List[FailedChapter]], None] = \
+        lambda x: None,
+        alternates: Iterable[str] = ()
     ) -> Book | None:
         """下载书籍
-        如果下载失败则返回 None
+        如果所有来源都下载失败则返回 None
+        来源按网站的健康状况排序, 一个来源获取书籍信息失败时会尝试下一个来源
         
         :param url: URL
         :type url: str
@@ -312,30 +678,139 @@ class WebManager(object):
         Callable[[List[Chapter]], List[Chapter]]
         :param chapter_middle_ware: 章节中间件, 用于处理章节信息
         :type chapter_middle_ware: Callable[[Chapter, Book], Chapter]
+        :param report_callback: 报告函数, 参数依次为跳过的章节数和待下载的章节数
+        :type report_callback: Callable[[int, int], None]
+        :param failed_callback: 章节下载完成后调用的函数,
+            参数为重试次数用完后仍然失败的章节, 按章节序号排列
+        :type failed_callback: Callable[[List[FailedChapter]], None]
+        :param alternates: 同一本书籍在其他网站或镜像中的 URL
+        :type alternates: Iterable[str]
         :return: 书籍对象或者 None
         """
         # 确认传入的参数的类型是否正确
         assert isinstance(url, str)
-        # 根据 URL 获取引擎对象
-        engine = self.get_engine_by_url(url)
-        # 如果引擎对象不存在则返回 None
-        if engine is None:
-            return None
         # 下载书籍信息
-        result = self.__download_book_info(
-            engine, url, book_middle_ware, chapters_middle_ware
+        result = self.download_info(
+            url, book_middle_ware, chapters_middle_ware, report_callback,
+            alternates
         )
-        # 如果下载失败则返回 None
+        # 如果没有支持的引擎或者下载失败则返回 None
         if result is None:
             return None
-        # 从结果中提取书籍信息和章节列表
-        book = result[0]
-        chapter_list = result[1]
+        # 从结果中提取引擎对象、书籍信息、章节列表和章节序号
+        engine, book, chapter_list, chapter_indexes, _ = result
         # 如果不是仅下载书籍信息则继续下载章节
         if not only_info:
             # 下载章节
             book = self.__download_chapter(
-                engine, url, book, chapter_list, chapter_middle_ware
+                engine, url, book, chapter_list, chapter_middle_ware,
+                chapter_indexes, failed_callback
             )
         # 返回书籍对象
-        return book
\ No newline at end of file
+        return book
+    
+    def download_info(
+        self, url: str,
+        book_middle_ware: Callable[[Book], Book] = lambda x: x,
+        chapters_middle_ware: \
+        Callable[[List[Chapter]], List[Chapter]] = lambda x: x,
+        report_callback: Callable[[int, int], None] = lambda x, y: None,
+        alternates: Iterable[str] = (),
+        throttle: bool = False
+    ) -> Tuple[
+        BookWeb, Book, List[str], Dict[str, int], Dict[str, str]
+    ] | None:
+        """下载书籍信息与待下载的章节列表, 不下载章节
+        供需要自行调度章节下载的调用者使用, 例如批量下载
+        来源按网站的健康状况排序, 一个来源下载失败时会尝试下一个来源
+        如果没有支持这些 URL 的引擎或者所有来源都下载失败则返回 None
+        
+        :param url: URL
+        :type url: str
+        :param book_middle_ware: 书籍中间件, 用于处理书籍信息
+        :type book_middle_ware: Callable[[Book], Book]
+        :param chapters_middle_ware: 章节列表中间件, 用于处理章节列表
+        :type chapters_middle_ware:
+        Callable[[List[Chapter]], List[Chapter]]
+        :param report_callback: 报告函数, 参数依次为跳过的章节数和待下载的章节数
+        :type report_callback: Callable[[int, int], None]
+        :param alternates: 同一本书籍在其他网站或镜像中的 URL
+        :type alternates: Iterable[str]
+        :param throttle: 请求是否经过 DomainThrottle, 名额按实际请求的域名占用
+        :type throttle: bool
+        :return: 引擎对象、书籍信息、章节列表、章节 URL 到章节序号的映射
+            以及章节 URL 到章节标题的映射, 没有标题的章节不在其中
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(url, str)
+        # 依次尝试支持这些 URL 的引擎
+        for engine, source in self.__candidates(url, alternates):
+            # 下载书籍信息
+            result = self.__download_book_info(
+                engine, source, book_middle_ware, chapters_middle_ware,
+                report_callback, throttle
+            )
+            # 如果下载成功则返回引擎对象以及书籍信息
+            if result is not None:
+                return (engine,) + result
+        # 如果没有支持的引擎或者所有来源都下载失败则返回 None
+        return None
+    
+    def download_one_chapter(
+        self, engine: BookWeb, url: str, index: int, book_name: str
+    ) -> Chapter | None:
+        """下载单个章节
+        如果下载失败则返回 None
+        
+        :param engine: 引擎对象
+        :type engine: BookWeb
+        :param url: 章节的 URL
+        :type url: str
+        :param index: 章节序号
+        :type index: int
+        :param book_name: 书籍名称
+        :type book_name: str
+        :return: 章节对象或者 None
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(index, int)
+        assert isinstance(book_name, str)
+        # 下载章节
+        success, chapter = self.__operate(
+            engine, url, Operations.CHAPTER,
+            index=index, book_name=book_name
+        )
+        # 返回章节对象, 下载失败时返回 None
+        return chapter if success else None
+    
+    def attempt_chapter(
+        self, engine: BookWeb, url: str, index: int, book_name: str,
+        throttle: bool = False
+    ) -> Tuple[Chapter | None, ErrorKind | None]:
+        """下载单个章节, 只尝试一次
+        供自行安排重试的调用者使用, 可以配合 retry_delay 与 RetryQueue
+        
+        :param engine: 引擎对象
+        :type engine: BookWeb
+        :param url: 章节的 URL
+        :type url: str
+        :param index: 章节序号
+        :type index: int
+        :param book_name: 书籍名称
+        :type book_name: str
+        :param throttle: 请求是否经过 DomainThrottle, 名额按实际请求的域名占用
+        :type throttle: bool
+        :return: 章节对象与 None, 或者 None 与失败的类型
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(engine, BookWeb)
+        assert isinstance(url, str)
+        assert isinstance(index, int)
+        assert isinstance(book_name, str)
+        # 下载章节
+        success, result = self.__attempt(
+            engine, url, Operations.CHAPTER, throttle,
+            index=index, book_name=book_name
+        )
+        # 返回章节对象或者失败的类型
+        return (result, None) if success else (None, result)
\ No newline at end of file
@@ -0,0 +1,564 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: multi.py
+# @Time: 19/10/2026 17:30
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""
+multi.py
+这个模块提供了从多个来源同时下载同一本书籍的多来源下载器。
+类:
+    MultiSourceDownloader: 多来源下载器, 按章节标题对齐各来源的章节列表,
+                           并把章节分散到所有来源中下载。
+函数:
+    similarity: 计算两个章节文本内容的相似度。
+    normalize_title: 规范化章节标题, 用于对齐多个来源的章节列表。
+注意事项:
+    各来源的章节按规范化后的标题与第一个来源的章节对齐, 标题相同的章节视为同一章节,
+    没有标题的章节按在网站章节列表中的序号对齐, 无法对齐的章节(例如公告)不会下载。
+    每个来源同时进行的请求数量不超过其域名的预算, 并且由管理器经过 DomainThrottle,
+    因此总吞吐量约为各网站频率限制之和。
+    一个来源下载失败的章节会立即交给其他来源, 所有来源都失败后才按重试策略等待。
+    每隔 `Settings().MULTI_SOURCE_VERIFY_INTERVAL` 个章节会从另一个来源再下载一次,
+    内容不一致的来源会被停用, 以免序号错位的章节混入书籍。
+"""
+
+
+# 导入标准库
+import re
+import time
+import difflib
+import threading
+from collections import deque
+from typing import (
+    Any, Callable, Deque, Dict, FrozenSet, Iterable, List, Tuple
+)
+from concurrent.futures import (
+    Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+)
+
+# 导入自定义库
+from .config import BookWeb
+from .manager import WebManager
+from .retry import ErrorKind, FailedChapter, RetryQueue, retry_delay
+from novel_dl.core import Settings, Book, Chapter
+
+
+# 两个来源的内容相似度低于该值时视为不一致
+AGREEMENT_RATIO = 0.8
+# 中文数字与数位
+_CHINESE_DIGITS = {
+    "零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4,
+    "五": 5, "六": 6, "七": 7, "八": 8, "九": 9,
+}
+_CHINESE_UNITS = {"十": 10, "百": 100, "千": 1000}
+# 标题中的章节序号, 例如 "第十二章" 与 "第012节"
+_CHAPTER_NUMBER = re.compile(
+    r"第([零〇一二两三四五六七八九十百千万\d]+)([章节回卷集部篇])"
+)
+
+
+def _chinese_number(text: str) -> int:
+    """将中文数字或者阿拉伯数字转换为整数"""
+    if text.isdigit():
+        return int(text)
+    total, section, number = 0, 0, 0
+    for char in text:
+        if char in _CHINESE_DIGITS:
+            number = _CHINESE_DIGITS[char]
+        elif char == "万":
+            total += (section + number) * 10000
+            section, number = 0, 0
+        else:
+            # "十二" 中省略了 "一"
+            section += (number or 1) * _CHINESE_UNITS[char]
+            number = 0
+    return total + section + number
+
+
+def normalize_title(title: str) -> str:
+    """规范化章节标题, 用于对齐多个来源的章节列表
+    章节序号统一为阿拉伯数字, 并忽略空白字符、标点符号与大小写,
+    例如 "第十二章 风起" 与 "第12章：风起" 的结果相同
+
+    :param title: 章节标题
+    :type title: str
+    :return: 规范化后的标题, 标题中没有文字时为空字符串
+
+    Example:
+        >>> normalize_title("第十二章 风起") == normalize_title("第012章：风起")
+        True
+    """
+    # 确认传入的参数的类型是否正确
+    assert isinstance(title, str)
+    title = _CHAPTER_NUMBER.sub(
+        lambda x: f"第{_chinese_number(x.group(1))}{x.group(2)}", title
+    )
+    return re.sub(r"[\W_]+", "", title).lower()
+
+
+def _align(
+    base: Dict[str, List[int]], indexes: Dict[str, int],
+    titles: Dict[str, str]
+) -> Dict[str, int]:
+    """将一个来源的章节对齐到第一个来源的章节序号
+    有标题的章节按规范化后的标题对齐, 标题相同的多个章节按出现的顺序依次对应,
+    该章节或者第一个来源没有标题时按章节序号对齐, 无法对齐的章节不在结果中
+
+    :param base: 第一个来源中规范化后的标题到章节序号的映射, 序号从小到大排列
+    :type base: Dict[str, List[int]]
+    :param indexes: 该来源的章节 URL 到章节序号的映射
+    :type indexes: Dict[str, int]
+    :param titles: 该来源的章节 URL 到章节标题的映射
+    :type titles: Dict[str, str]
+    :return: 该来源的章节 URL 到第一个来源的章节序号的映射
+    """
+    result: Dict[str, int] = {}
+    # 各标题已经对应过的章节数量
+    used: Dict[str, int] = {}
+    for url, index in sorted(indexes.items(), key=lambda x: x[1]):
+        title = normalize_title(titles.get(url, ""))
+        if not title or not base:
+            result[url] = index
+            continue
+        matched, count = base.get(title, []), used.get(title, 0)
+        if count < len(matched):
+            result[url] = matched[count]
+            used[title] = count + 1
+    return result
+
+
+def similarity(first: Chapter, second: Chapter) -> float:
+    """计算两个章节文本内容的相似度
+    只比较文本行, 并忽略所有空白字符, 两个章节都没有文本时视为一致
+
+    :param first: 章节对象
+    :type first: Chapter
+    :param second: 章节对象
+    :type second: Chapter
+    :return: 0 到 1 之间的相似度
+    """
+    # 确认传入的参数的类型是否正确
+    assert isinstance(first, Chapter)
+    assert isinstance(second, Chapter)
+    texts = [
+        re.sub(r"\s+", "", "".join(
+            str(i) for i in chapter.content
+            if not i.content_type.is_bytes()
+        )) for chapter in (first, second)
+    ]
+    if not any(texts):
+        return 1.0
+    return difflib.SequenceMatcher(None, *texts).ratio()
+
+
+class _Source(object):
+    def __init__(
+        self, number: int, engine: BookWeb, url: str, urls: Dict[int, str],
+        covered: Iterable[int], limit: int
+    ):
+        """一个来源的下载状态"""
+        # 来源的序号, 序号越小越可信
+        self.number = number
+        self.engine = engine
+        self.url = url
+        # 待下载的章节序号到章节 URL 的映射
+        self.urls = urls
+        # 该来源章节列表中的所有章节序号
+        self.covered = set(covered)
+        # 同时进行的请求数量以及上限
+        self.limit = limit
+        self.in_flight = 0
+        # 内容不一致时停用该来源
+        self.active = True
+        # 从该来源下载成功的章节数量
+        self.chapters = 0
+        # 该来源可以领取的任务, 其中可能有已经被其他来源领取的任务
+        self.tasks: Deque[_Task] = deque()
+
+
+class _Task(object):
+    def __init__(
+        self, index: int, attempt: int = 1, tries: int = 0,
+        tried: FrozenSet[int] = frozenset(), first: _Source | None = None,
+        chapter: Chapter | None = None
+    ):
+        """等待下载的任务
+        first 为 None 时为章节任务, 否则为比较任务,
+        即由另一个来源再下载一次 first 已经下载的章节
+        """
+        self.index = index
+        # 第几轮尝试、尝试的总次数以及本轮已经尝试过的来源的序号
+        self.attempt = attempt
+        self.tries = tries
+        self.tried = tried
+        # 比较任务中第一个来源以及它下载的章节
+        self.first = first
+        self.chapter = chapter
+        # 任务同时放在所有可以执行它的来源的队列中, 被领取后其他来源跳过它
+        self.taken = False
+
+
+class MultiSourceDownloader(object):
+    def __init__(
+        self, manager: WebManager | None = None,
+        book_middle_ware: Callable[[Book], Book] = lambda x: x,
+        chapters_middle_ware: \
+        Callable[[List[str]], List[str]] = lambda x: x,
+        chapter_middle_ware: Callable[[Chapter, Book], Chapter] = \
+        lambda x, y: x,
+        max_connections: int | None = None,
+        verify_interval: int | None = None
+    ):
+        """多来源下载器
+        同一本书籍在多个网站中都有来源时, 先获取所有来源的书籍信息与章节列表,
+        再按章节标题对齐, 每个来源有空闲的请求名额时就领取下一个它拥有的章节.
+        速度快的来源会领取更多的章节, 一个来源暂停访问时其他来源照常下载.
+        中间件会在持有写入锁的情况下调用, 可以直接写入书架.
+
+        :param manager: 书籍网站引擎管理器, 为 None 时新建一个
+        :type manager: WebManager | None
+        :param book_middle_ware: 书籍中间件, 每个来源的书籍信息都会经过该中间件
+        :type book_middle_ware: Callable[[Book], Book]
+        :param chapters_middle_ware: 章节列表中间件, 用于处理各来源的章节列表
+        :type chapters_middle_ware: Callable[[List[str]], List[str]]
+        :param chapter_middle_ware: 章节中间件, 用于处理章节信息
+        :type chapter_middle_ware: Callable[[Chapter, Book], Chapter]
+        :param max_connections: 所有来源同时进行的最大请求数量,
+            为 None 时使用 `Settings().MAX_CONNECTIONS`
+        :type max_connections: int | None
+        :param verify_interval: 每隔多少个章节比较一次两个来源的内容,
+            为 0 时不比较, 为 None 时使用 `Settings().MULTI_SOURCE_VERIFY_INTERVAL`
+        :type verify_interval: int | None
+
+        Example:
+            >>> downloader = MultiSourceDownloader()
+            >>> book = downloader.download(
+            >>>     "https://www.example.com/book/1/",
+            >>>     ["https://www.example.org/book/2/",]
+            >>> )
+            >>> print(downloader.summary["sources"])
+        """
+        self.__manager = manager if manager is not None else WebManager()
+        self.__book_middle_ware = book_middle_ware
+        self.__chapters_middle_ware = chapters_middle_ware
+        self.__chapter_middle_ware = chapter_middle_ware
+        self.__max_connections = max_connections \
+            if max_connections is not None else Settings().MAX_CONNECTIONS
+        self.__verify_interval = verify_interval \
+            if verify_interval is not None \
+            else Settings().MULTI_SOURCE_VERIFY_INTERVAL
+        # 确认传入的参数是否正确
+        assert isinstance(self.__manager, WebManager)
+        assert isinstance(self.__max_connections, int)
+        assert isinstance(self.__verify_interval, int)
+        assert self.__max_connections > 0 and self.__verify_interval >= 0
+        # 调用中间件时持有的锁, 保证书架的写入依次进行
+        self.__write_lock = threading.Lock()
+        # 最近一次下载的统计信息
+        self.summary: Dict[str, Any] = {}
+
+    @staticmethod
+    def __domain_limit(engine: BookWeb) -> int:
+        """获取引擎所属域名同时进行的最大请求数量"""
+        if not Settings().MULTI_THREAD or not engine.multi_thread:
+            return 1
+        limit = Settings().DOMAIN_MAX_CONNECTIONS
+        if engine.max_connections is not None:
+            limit = min(limit, engine.max_connections)
+        return limit
+
+    def __book_middle_ware_locked(self, book: Book) -> Book:
+        with self.__write_lock:
+            return self.__book_middle_ware(book)
+
+    def __get_info(
+        self, url: str
+    ) -> Tuple[
+        BookWeb, Book, List[str], Dict[str, int], Dict[str, str]
+    ] | None:
+        """在线程池中获取一个来源的书籍信息与章节列表"""
+        # 名额由管理器按实际请求的域名占用, 切换镜像时也受到限制
+        return self.__manager.download_info(
+            url, self.__book_middle_ware_locked,
+            self.__chapters_middle_ware, throttle=True
+        )
+
+    def __get_chapter(
+        self, source: _Source, index: int, book_name: str
+    ) -> Tuple[Chapter | None, ErrorKind | None]:
+        """在线程池中从一个来源尝试下载一次章节, 失败时返回失败的类型"""
+        return self.__manager.attempt_chapter(
+            source.engine, source.urls[index], index, book_name,
+            throttle=True
+        )
+
+    def __store(self, book: Book, chapter: Chapter) -> None:
+        """使用章节中间件处理章节, 然后添加到书籍对象"""
+        with self.__write_lock:
+            book.append(self.__chapter_middle_ware(chapter, book))
+
+    def __prepare(
+        self, urls: List[str]
+    ) -> Tuple[Book, List[_Source], List[int], int] | None:
+        """同时获取所有来源的书籍信息, 并按章节标题对齐到第一个成功的来源
+        返回第一个成功的来源的书籍对象、所有成功的来源、待下载的章节序号以及跳过的章节数量
+        """
+        with ThreadPoolExecutor(
+            min(len(urls), self.__max_connections),
+            thread_name_prefix="多来源下载线程"
+        ) as executor:
+            results = list(executor.map(self.__get_info, urls))
+        book: Book | None = None
+        sources: List[_Source] = []
+        pending: Dict[int, bool] = {}
+        # 第一个来源中规范化后的标题到章节序号的映射
+        base: Dict[str, List[int]] = {}
+        for url, result in zip(urls, results):
+            # 获取书籍信息失败的来源不参与下载
+            if result is None:
+                continue
+            engine, source_book, chapter_list, indexes, titles = result
+            if book is None:
+                # 第一个来源的章节序号即为书籍中的章节序号
+                book = source_book
+                aligned = indexes
+                for chapter_url, index in sorted(
+                    indexes.items(), key=lambda x: x[1]
+                ):
+                    title = normalize_title(titles.get(chapter_url, ""))
+                    if title:
+                        base.setdefault(title, []).append(index)
+            else:
+                aligned = _align(base, indexes, titles)
+            source = _Source(
+                len(sources), engine, url,
+                {aligned[i]: i for i in chapter_list if i in aligned},
+                aligned.values(), self.__domain_limit(engine)
+            )
+            sources.append(source)
+            # 只有所有拥有该章节的来源都没有下载过时才需要下载
+            for index in source.covered:
+                pending[index] = pending.get(index, True) and \
+                    index in source.urls
+        if book is None:
+            return None
+        queued = sorted(i for i, need in pending.items() if need)
+        return book, sources, queued, len(pending) - len(queued)
+
+    def download(
+        self, url: str, alternates: Iterable[str] = (),
+        report_callback: Callable[[int, int], None] = lambda x, y: None,
+        failed_callback: Callable[[List[FailedChapter]], None] = \
+        lambda x: None
+    ) -> Book | None:
+        """从所有来源下载书籍
+        书籍信息以第一个成功的来源为准, 所有来源都失败时返回 None,
+        完成后可以从 summary 属性获取统计信息
+
+        :param url: 书籍的 URL
+        :type url: str
+        :param alternates: 同一本书籍在其他网站中的 URL
+        :type alternates: Iterable[str]
+        :param report_callback: 报告函数, 参数依次为跳过的章节数和待下载的章节数
+        :type report_callback: Callable[[int, int], None]
+        :param failed_callback: 章节下载完成后调用的函数,
+            参数为所有来源都失败的章节, 按章节序号排列
+        :type failed_callback: Callable[[List[FailedChapter]], None]
+        :return: 书籍对象或者 None
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(url, str)
+        start = time.monotonic()
+        # 去除重复的来源, 保持原来的顺序
+        urls = list(dict.fromkeys([url,] + list(alternates)))
+        self.summary = {
+            "sources": {}, "chapters": 0, "failed_chapters": 0,
+            "verified": 0, "mismatches": [],
+        }
+        prepared = self.__prepare(urls)
+        if prepared is None:
+            return None
+        book, sources, queued, skipped = prepared
+        report_callback(skipped, len(queued))
+        # 需要比较内容的章节, 只比较至少有两个来源拥有的章节
+        interval = self.__verify_interval
+        samples = {
+            i for n, i in enumerate(queued)
+            if interval and n % interval == interval - 1 and
+            sum(i in s.urls for s in sources) > 1
+        }
+        # 每个来源按章节顺序排列的章节任务, 同一章节的任务对象由所有拥有它的来源共用
+        chapter_tasks = {i: _Task(i) for i in queued}
+        for source in sources:
+            source.tasks.extend(
+                chapter_tasks[i] for i in sorted(source.urls)
+                if i in chapter_tasks
+            )
+        # 轮流领取任务的来源
+        order: Deque[_Source] = deque(sources)
+        # 正在进行的任务以及对应的来源
+        running: Dict[Future, Tuple[_Source, _Task]] = {}
+        # 等待重试的章节, 等待期间其他来源继续下载
+        retry_queue = RetryQueue()
+        failed: List[FailedChapter] = []
+        # 等待执行的比较任务, 没有可用的来源时直接保存第一个来源下载的章节
+        verifies: List[_Task] = []
+
+        def eligible(task: _Task) -> List[_Source]:
+            # 可以执行该任务的来源, 拥有该章节的来源都被停用时仍然使用它们
+            if task.first is None:
+                owners = [
+                    s for s in sources
+                    if task.index in s.urls and s.number not in task.tried
+                ]
+            else:
+                owners = [
+                    s for s in sources
+                    if task.index in s.urls and s is not task.first
+                ]
+            return [s for s in owners if s.active] or \
+                (owners if task.first is None else [])
+
+        def push(task: _Task) -> None:
+            # 把任务放到所有可以执行它的来源的队列的最前面, 优先执行
+            for owner in eligible(task):
+                owner.tasks.appendleft(task)
+
+        def take(source: _Source) -> _Task | None:
+            # 领取该来源队列中第一个仍然可以由它执行的任务,
+            # 已经被领取或者不再可以由它执行的任务直接丢弃, 每个任务只会被检查一次
+            while source.tasks:
+                task = source.tasks.popleft()
+                if not task.taken and source in eligible(task):
+                    task.taken = True
+                    return task
+            return None
+
+        def verified(index: int, first: _Source, chapter: Chapter,
+                     second: _Source | None, other: Chapter | None) -> None:
+            # 记录比较的结果并保存可信的来源下载的章节
+            if other is not None:
+                self.summary["verified"] += 1
+                ratio = similarity(chapter, other)
+                if ratio < AGREEMENT_RATIO:
+                    # 停用两个来源中较不可信的一个
+                    trusted, dropped = sorted(
+                        (first, second), key=lambda s: s.number
+                    )
+                    dropped.active = False
+                    self.summary["mismatches"].append({
+                        "index": index, "ratio": round(ratio, 3),
+                        "trusted": trusted.url, "dropped": dropped.url,
+                    })
+                    if trusted is second:
+                        chapter, first = other, second
+            first.chapters += 1
+            self.__store(book, chapter)
+
+        executor = ThreadPoolExecutor(
+            self.__max_connections, thread_name_prefix="多来源下载线程"
+        )
+        try:
+            while True:
+                # 等待时间已经结束的章节排在最前面
+                for task in retry_queue.pop_ready():
+                    push(task)
+                # 各来源轮流领取任务, 直到全局或各来源的预算用完
+                submitted = True
+                while submitted and len(running) < self.__max_connections:
+                    submitted = False
+                    for _ in range(len(order)):
+                        source = order[0]
+                        order.rotate(-1)
+                        if source.in_flight >= source.limit:
+                            continue
+                        task = take(source)
+                        if task is None:
+                            continue
+                        source.in_flight += 1
+                        future = executor.submit(
+                            self.__get_chapter, source, task.index, book.name
+                        )
+                        running[future] = (source, task)
+                        submitted = True
+                        break
+                # 没有正在进行的任务时等待重试, 全部完成时结束
+                if not running:
+                    # 剩余的比较任务已经没有可用的来源, 直接保存章节
+                    for task in verifies:
+                        if not task.taken:
+                            task.taken = True
+                            verified(
+                                task.index, task.first, task.chapter,
+                                None, None
+                            )
+                    verifies.clear()
+                    if not len(retry_queue):
+                        break
+                    time.sleep(retry_queue.next_delay())
+                    continue
+                done, _ = wait(
+                    list(running), timeout=retry_queue.next_delay(),
+                    return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    source, task = running.pop(future)
+                    source.in_flight -= 1
+                    try:
+                        chapter, kind = future.result()
+                    except Exception:
+                        chapter, kind = None, ErrorKind.PERMANENT
+                    index = task.index
+                    # 比较任务失败时不再比较, 直接保存第一个来源下载的章节
+                    if task.first is not None:
+                        verified(
+                            index, task.first, task.chapter,
+                            source if chapter is not None else None, chapter
+                        )
+                        continue
+                    tries = task.tries + 1
+                    if chapter is not None:
+                        # 需要比较的章节交给另一个来源再下载一次
+                        verify_task = _Task(
+                            index, first=source, chapter=chapter
+                        )
+                        if index in samples and eligible(verify_task):
+                            push(verify_task)
+                            verifies.append(verify_task)
+                        else:
+                            verified(index, source, chapter, None, None)
+                        continue
+                    # 还有其他来源时立即交给其他来源
+                    other = _Task(
+                        index, task.attempt, tries,
+                        task.tried | {source.number}
+                    )
+                    if eligible(other):
+                        push(other)
+                        continue
+                    # 所有来源都失败时按重试策略等待, 不应当重试时记录为失败
+                    delay = retry_delay(kind, task.attempt, source.engine)
+                    if delay is None:
+                        failed.append(FailedChapter(
+                            source.urls[index], index, kind, tries
+                        ))
+                    else:
+                        retry_queue.push(
+                            _Task(index, task.attempt + 1, tries), delay
+                        )
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        # 报告最终失败的章节
+        failed_callback(sorted(failed, key=lambda x: x.index))
+        book.sort()
+        # 记录统计信息
+        seconds = time.monotonic() - start
+        self.summary.update({
+            "sources": {s.url: s.chapters for s in sources},
+            "chapters": sum(s.chapters for s in sources),
+            "failed_chapters": len(failed), "seconds": seconds,
+        })
+        self.summary["chapters_per_second"] = \
+            self.summary["chapters"] / seconds if seconds > 0 else 0.0
+        # 返回书籍对象
+        return book
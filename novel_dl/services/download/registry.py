@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: registry.py
+# @Time: 19/10/2026 21:20
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""
+registry.py
+这个模块提供了整个进程共享的引擎注册表, 按域名建立索引。
+类:
+    EngineRegistry: 引擎注册表, 包括内置的引擎以及通过入口点提供的插件引擎。
+常量:
+    ENGINE_ENTRY_POINT_GROUP: 插件引擎使用的入口点分组。
+插件引擎:
+    其他发行包可以在 "novel_dl.engines" 分组中声明入口点, 例如在 pyproject.toml 中:
+        [project.entry-points."novel_dl.engines"]
+        example = "novel_dl_example.engines:ExampleWeb"
+    入口点可以指向 BookWeb 的子类、引擎对象或者引擎对象的列表,
+    子类会在加载时使用无参数的构造函数创建对象。
+注意事项:
+    引擎的域名在注册后不应当再修改, 否则索引中仍然是原来的域名。
+    加载失败的插件不会影响其他引擎, 失败的原因记录在 plugin_errors 中。
+"""
+
+
+# 导入标准库
+import threading
+from importlib.metadata import entry_points
+from typing import Any, Dict, Iterable, List, Tuple
+
+# 导入自定义库
+from .config import BookWeb
+from .engines import ENGINE_LIST
+from novel_dl.utils.options import singleton
+
+
+# 插件引擎使用的入口点分组
+ENGINE_ENTRY_POINT_GROUP = "novel_dl.engines"
+
+
+@singleton
+class EngineRegistry(object):
+    def __init__(self):
+        """引擎注册表
+        创建时注册所有可用的内置引擎, 然后加载入口点中的插件引擎.
+        域名到引擎的索引使用字典, 查找引擎的耗时与引擎的数量无关.
+        整个进程共享同一个实例.
+        注意: 该类是线程安全的.
+
+        Example:
+            >>> engine = EngineRegistry().find("www.biequgei.com")
+        """
+        # 按注册顺序排列的引擎
+        self.__engines: List[BookWeb] = []
+        # 域名到支持该域名的引擎的映射, 引擎按注册顺序排列
+        self.__index: Dict[str, Tuple[BookWeb, ...]] = {}
+        # 加载失败的插件, 键为入口点的名字
+        self.plugin_errors: Dict[str, Exception] = {}
+        self.__lock = threading.Lock()
+        for i in ENGINE_LIST:
+            self.register(i)
+        self.load_plugins()
+
+    def __contains__(self, engine: BookWeb) -> bool:
+        return engine in self.__engines
+
+    def register(self, engine: BookWeb) -> bool:
+        """注册引擎
+        如果引擎不可用或者已经注册过则返回 False
+
+        :param engine: 引擎对象
+        :type engine: BookWeb
+        :return: 注册是否成功
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(engine, BookWeb)
+        with self.__lock:
+            if engine.workable is False or engine in self.__engines:
+                return False
+            self.__engines.append(engine)
+            for domain in engine.domains:
+                domain = domain.lower()
+                self.__index[domain] = \
+                    self.__index.get(domain, ()) + (engine,)
+        return True
+
+    def unregister(self, engine: BookWeb) -> bool:
+        """移除引擎, 引擎没有注册过时返回 False"""
+        with self.__lock:
+            if engine not in self.__engines:
+                return False
+            self.__engines.remove(engine)
+            for domain in engine.domains:
+                domain = domain.lower()
+                remain = tuple(
+                    i for i in self.__index.get(domain, ()) if i != engine
+                )
+                if remain:
+                    self.__index[domain] = remain
+                else:
+                    self.__index.pop(domain, None)
+        return True
+
+    def load_plugins(self, group: str = ENGINE_ENTRY_POINT_GROUP) -> int:
+        """加载入口点中的插件引擎
+
+        :param group: 入口点的分组
+        :type group: str
+        :return: 新注册的引擎的数量
+        """
+        registered = 0
+        for entry_point in entry_points(group=group):
+            try:
+                for engine in self.__plugin_engines(entry_point.load()):
+                    registered += self.register(engine)
+            except Exception as error:
+                self.plugin_errors[entry_point.name] = error
+        return registered
+
+    @staticmethod
+    def __plugin_engines(plugin: Any) -> Iterable[BookWeb]:
+        """将入口点指向的对象转换为引擎对象的列表"""
+        if isinstance(plugin, type) and issubclass(plugin, BookWeb):
+            return [plugin(),]
+        if isinstance(plugin, BookWeb):
+            return [plugin,]
+        plugin = list(plugin)
+        if not all(isinstance(i, BookWeb) for i in plugin):
+            raise TypeError(f"不是引擎对象: {plugin}")
+        return plugin
+
+    def engines(self) -> List[BookWeb]:
+        """按注册顺序排列的所有引擎"""
+        with self.__lock:
+            return list(self.__engines)
+
+    def find_all(self, domain: str) -> Tuple[BookWeb, ...]:
+        """获取支持该域名的所有引擎, 域名不区分大小写"""
+        return self.__index.get(domain.lower(), ())
+
+    def find(self, domain: str) -> BookWeb | None:
+        """获取支持该域名的第一个引擎, 没有找到时返回 None
+
+        :param domain: 域名, 不区分大小写
+        :type domain: str
+        :return: 引擎对象或者 None
+        """
+        engines = self.__index.get(domain.lower(), ())
+        return engines[0] if engines else None
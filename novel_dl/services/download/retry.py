@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: retry.py
+# @Time: 19/10/2026 14:20
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""
+retry.py
+这个模块提供了下载失败后的重试策略。
+类:
+    ErrorKind(Enum): 失败的类型, 不同类型的失败使用不同的重试策略。
+    RetryPolicy: 重试策略, 限制最大尝试次数, 并按指数退避计算带随机抖动的等待时间。
+    RetryQueue: 延迟重试队列, 等待中的任务不占用工作线程。
+    FailedChapter(NamedTuple): 重试次数用完后仍然失败的章节。
+    PageFetchError(Exception): 章节的分页在重试次数用完后仍然下载失败。
+函数:
+    classify: 判断一次失败属于哪种类型。
+    retry_delay: 获取第几次失败之后的等待时间, 不应当重试时返回 None。
+注意事项:
+    触发网站访问保护时, 等待时间以引擎的 retry_delay 为基础。
+    可以通过修改 DEFAULT_POLICIES 调整各类型的重试策略。
+"""
+
+
+# 导入标准库
+import time
+import heapq
+import random
+import itertools
+import threading
+from enum import Enum
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+# 导入第三方库
+import requests
+
+# 导入自定义库
+from .config import BookWeb
+from novel_dl.utils.network import Network
+from novel_dl.utils.metrics import Metrics
+
+
+class ErrorKind(Enum):
+    """失败的类型常量"""
+    PROTECTED = (1, "触发网站访问保护")
+    NETWORK = (2, "网络连接失败")
+    SERVER = (3, "网站暂时无法提供服务")
+    PARSE = (4, "页面解析失败")
+    PERMANENT = (5, "无法通过重试解决的错误")
+    UNAVAILABLE = (6, "所有镜像域名都暂停访问")
+
+    def __int__(self):
+        return self.value[0]
+
+    def __str__(self):
+        return self.value[1]
+
+
+class RetryPolicy(object):
+    def __init__(
+        self, max_attempts: int, base_delay: float = 1.0,
+        max_delay: float = 60.0, multiplier: float = 2.0
+    ):
+        """重试策略
+        第 n 次失败后的等待时间为 base_delay * multiplier ** (n - 1),
+        不超过 max_delay, 实际等待时间在该值的一半到全部之间随机选取,
+        以免同时失败的请求在同一时刻再次访问网站.
+
+        :param max_attempts: 最大尝试次数, 包括第一次尝试, 为 1 时不重试
+        :type max_attempts: int
+        :param base_delay: 第一次失败后的基础等待时间, 单位是秒
+        :type base_delay: float
+        :param max_delay: 等待时间的上限, 单位是秒
+        :type max_delay: float
+        :param multiplier: 每次失败后等待时间的倍数
+        :type multiplier: float
+
+        Example:
+            >>> policy = RetryPolicy(5, 1.0, 30.0)
+            >>> policy.delay(3)
+        """
+        # 确认传入的参数是否正确
+        assert isinstance(max_attempts, int) and max_attempts > 0
+        assert base_delay >= 0 and max_delay >= 0 and multiplier >= 1
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+
+    def __repr__(self):
+        return (
+            f"<RetryPolicy max_attempts={self.max_attempts} "
+            f"base_delay={self.base_delay} max_delay={self.max_delay}>"
+        )
+
+    def delay(
+        self, attempt: int, base_delay: float | None = None
+    ) -> float | None:
+        """获取第 attempt 次失败之后的等待时间
+
+        :param attempt: 已经失败的次数, 从 1 开始
+        :type attempt: int
+        :param base_delay: 覆盖策略中的基础等待时间
+        :type base_delay: float | None
+        :return: 等待时间, 尝试次数已经用完时返回 None
+        """
+        if attempt >= self.max_attempts:
+            return None
+        base = self.base_delay if base_delay is None else base_delay
+        delay = min(self.max_delay, base * self.multiplier ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+
+# 各类型失败的默认重试策略
+DEFAULT_POLICIES: Dict[ErrorKind, RetryPolicy] = {
+    ErrorKind.PROTECTED: RetryPolicy(8, 5.0, 120.0),
+    ErrorKind.NETWORK: RetryPolicy(4, 1.0, 30.0),
+    ErrorKind.SERVER: RetryPolicy(4, 2.0, 60.0),
+    ErrorKind.PARSE: RetryPolicy(2, 1.0, 1.0),
+    ErrorKind.PERMANENT: RetryPolicy(1),
+    ErrorKind.UNAVAILABLE: RetryPolicy(10, 5.0, 60.0),
+}
+
+
+def classify(
+    engine: BookWeb, response: Network | None,
+    network_error: Exception | None, analyze_error: Exception | None
+) -> ErrorKind:
+    """判断一次失败属于哪种类型
+    引擎认为是访问保护的失败优先归为 PROTECTED
+
+    :param engine: 引擎对象
+    :type engine: BookWeb
+    :param response: 获取到的页面, 网络请求失败时为 None
+    :type response: Network | None
+    :param network_error: 网络请求的异常
+    :type network_error: Exception | None
+    :param analyze_error: 解析页面的异常
+    :type analyze_error: Exception | None
+    :return: 失败的类型
+    """
+    if engine.is_protected(response, network_error, analyze_error):
+        return ErrorKind.PROTECTED
+    if network_error is not None:
+        if isinstance(network_error, (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+            requests.exceptions.ChunkedEncodingError,
+        )):
+            return ErrorKind.NETWORK
+        return ErrorKind.PERMANENT
+    status = response.response.status_code if response is not None else 200
+    if status == 429 or status >= 500:
+        return ErrorKind.SERVER
+    if status in (404, 410):
+        return ErrorKind.PERMANENT
+    return ErrorKind.PARSE
+
+
+def retry_delay(
+    kind: ErrorKind, attempt: int, engine: BookWeb
+) -> float | None:
+    """获取第 attempt 次失败之后的等待时间, 不应当重试时返回 None
+
+    :param kind: 失败的类型
+    :type kind: ErrorKind
+    :param attempt: 已经失败的次数, 从 1 开始
+    :type attempt: int
+    :param engine: 引擎对象
+    :type engine: BookWeb
+    :return: 等待时间或者 None
+    """
+    # 确认传入的参数是否正确
+    assert isinstance(kind, ErrorKind)
+    assert isinstance(attempt, int) and attempt > 0
+    policy = DEFAULT_POLICIES[kind]
+    if kind == ErrorKind.PROTECTED:
+        delay = policy.delay(attempt, engine.retry_delay)
+    else:
+        delay = policy.delay(attempt)
+    # 记录重试或者最终失败的次数
+    Metrics().count(
+        "operation.failures" if delay is None else "operation.retries",
+        engine=engine.name, kind=kind.name.lower()
+    )
+    return delay
+
+
+class FailedChapter(NamedTuple):
+    """重试次数用完后仍然失败的章节"""
+    # 章节的 URL
+    url: str
+    # 章节序号
+    index: int
+    # 最后一次失败的类型
+    kind: ErrorKind
+    # 尝试的次数
+    attempts: int
+
+
+class PageFetchError(Exception):
+    def __init__(self, url: str, kind: ErrorKind):
+        """章节的分页在重试次数用完后仍然下载失败
+        记录了最后一次失败的类型, 下载章节时按该类型安排重试
+
+        :param url: 分页的 URL
+        :type url: str
+        :param kind: 最后一次失败的类型
+        :type kind: ErrorKind
+        """
+        super().__init__(f"{kind}: {url}")
+        self.url = url
+        self.kind = kind
+
+
+class RetryQueue(object):
+    def __init__(self):
+        """延迟重试队列
+        任务在等待时间结束后才会被取出, 等待期间不占用任何线程,
+        调度者可以先处理其他任务, 再用 next_delay 计算最多需要等待多久.
+        注意: 该类是线程安全的.
+
+        Example:
+            >>> queue = RetryQueue()
+            >>> queue.push(("https://www.example.com/1.html", 1), 2.0)
+            >>> time.sleep(queue.next_delay())
+            >>> queue.pop_ready()
+        """
+        # 按可以重试的时间排列的堆, 序号用于保持相同时间的任务的顺序
+        self.__heap: List[Tuple[float, int, Any]] = []
+        self.__counter = itertools.count()
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return len(self.__heap)
+
+    def push(self, item: Any, delay: float) -> None:
+        """在 delay 秒之后重试该任务"""
+        with self.__lock:
+            heapq.heappush(
+                self.__heap,
+                (time.monotonic() + delay, next(self.__counter), item)
+            )
+
+    def pop_ready(self) -> List[Any]:
+        """取出所有已经可以重试的任务"""
+        now = time.monotonic()
+        result = []
+        with self.__lock:
+            while self.__heap and self.__heap[0][0] <= now:
+                result.append(heapq.heappop(self.__heap)[2])
+        return result
+
+    def next_delay(self) -> float | None:
+        """距离下一个任务可以重试的时间, 队列为空时返回 None"""
+        with self.__lock:
+            if not self.__heap:
+                return None
+            return max(0.0, self.__heap[0][0] - time.monotonic())
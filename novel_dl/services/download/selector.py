@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: selector.py
+# @Time: 19/10/2026 19:10
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""
+selector.py
+这个模块提供了引擎使用的页面选择器, 直接在 lxml 的文档树上查询页面。
+类:
+    SelectorError(Exception): 选择器无法使用或者没有匹配到任何内容。
+    Selector: 编译后的选择器, 支持 XPath 以及以 "css:" 开头的 CSS 选择器。
+函数:
+    has_class: 生成判断元素是否含有某个 class 的 XPath 条件。
+    text_of: 获取查询结果的文本。
+注意事项:
+    选择器在第一次使用时编译, 之后一直使用编译后的对象, 也可以调用 compile 提前编译。
+    CSS 选择器需要安装 cssselect 库, 未安装时该选择器在使用时抛出 SelectorError,
+    引擎会改为使用 BeautifulSoup 解析页面。
+"""
+
+
+# 导入标准库
+from typing import Any, List
+
+# 导入第三方库
+from lxml import etree
+
+
+class SelectorError(Exception):
+    """选择器无法使用或者没有匹配到任何内容"""
+    pass
+
+
+def has_class(name: str) -> str:
+    """生成判断元素是否含有某个 class 的 XPath 条件
+    与 BeautifulSoup 按 class 查找的规则相同, 只要 class 属性中含有该值即可
+
+    :param name: class 的值
+    :type name: str
+    :return: XPath 条件, 不包括两侧的方括号
+
+    Example:
+        >>> f"//div[{has_class('intro')}]//p"
+    """
+    # 确认传入的参数的类型是否正确
+    assert isinstance(name, str) and " " not in name
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def text_of(node: Any) -> str:
+    """获取查询结果的文本
+    元素返回其中所有文本拼接的结果, 与 BeautifulSoup 的 text 属性相同,
+    属性值和文本节点直接转换为字符串
+    """
+    if isinstance(node, etree._Element):
+        return node.text_content()
+    return str(node)
+
+
+class Selector(object):
+    def __init__(self, expression: str):
+        """页面选择器
+
+        :param expression: XPath 表达式, 或者以 "css:" 开头的 CSS 选择器
+        :type expression: str
+
+        Example:
+            >>> selector = Selector(f"//div[{has_class('intro')}]/p")
+            >>> selector.first(response.tree)
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(expression, str)
+        self.expression = expression
+        # 编译后的 XPath 对象, 在第一次使用时创建
+        self.__xpath: etree.XPath | None = None
+
+    def __repr__(self):
+        return f"<Selector expression={self.expression}>"
+
+    def __compile(self) -> etree.XPath:
+        """编译选择器, CSS 选择器先转换为 XPath"""
+        expression = self.expression
+        if expression.startswith("css:"):
+            try:
+                from cssselect import GenericTranslator
+            except ImportError:
+                raise SelectorError(f"需要 cssselect 库: {expression}")
+            expression = GenericTranslator().css_to_xpath(
+                expression[len("css:"):].strip()
+            )
+        try:
+            return etree.XPath(expression)
+        except etree.XPathSyntaxError as error:
+            raise SelectorError(f"{error}: {expression}")
+
+    def compile(self) -> "Selector":
+        """立即编译选择器, 无法编译时抛出 SelectorError, 返回选择器本身"""
+        if self.__xpath is None:
+            self.__xpath = self.__compile()
+        return self
+
+    def __call__(self, tree: etree._Element) -> List[Any]:
+        """查询所有匹配的结果, 结果为元素、属性值或者文本"""
+        if self.__xpath is None:
+            self.__xpath = self.__compile()
+        result = self.__xpath(tree)
+        return result if isinstance(result, list) else [result,]
+
+    def first(self, tree: etree._Element) -> Any:
+        """查询第一个匹配的结果, 没有匹配的结果时抛出 SelectorError"""
+        result = self(tree)
+        if not result:
+            raise SelectorError(f"没有匹配的内容: {self.expression}")
+        return result[0]
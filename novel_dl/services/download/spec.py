@@ -0,0 +1,446 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: spec.py
+# @Time: 19/10/2026 20:30
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""
+spec.py
+这个模块提供了通过配置文件定义的引擎, 新增网站或镜像时只需要添加配置文件。
+类:
+    EngineSpecError(Exception): 配置文件的内容不正确。
+    SpecProtectedError(Exception): 页面中含有访问保护的提示文本。
+    SpecEngine(BookWeb): 由配置编译而成的引擎。
+    EngineSpecs: 引擎配置文件的索引, 按域名查找时才编译对应的引擎。
+函数:
+    load_spec: 读取 JSON 或 YAML 格式的引擎配置文件。
+配置文件的格式(以 YAML 为例):
+    name: 示例书站
+    domains: [www.example.org, m.example.org]
+    book_url_pattern: '^/book/\\d+/$'
+    chapter_url_pattern: '^/book/\\d+/\\d+\\.html$'
+    encoding: GBK
+    multi_thread: true
+    max_connections: 2
+    prestore_book_urls: false
+    serializing: [连载]
+    time_format: '%Y-%m-%d %H:%M'
+    protection:
+        retry_delay: 10
+        status: [403, 503]
+        texts: [访问过于频繁]
+        network_errors: true
+    selectors:
+        name: //h1
+        author: {xpath: '//p[@class="author"]', regex: '作者：(.*)'}
+        state: //p[@class="state"]
+        desc: //div[@id="intro"]
+        cover: //div[@id="cover"]/img/@src
+        chapter_urls: //dl[@id="list"]//a/@href
+        chapter_name: //div[@class="bookname"]/h1
+        content: {xpath: '//div[@id="content"]/text()', drop: ['^请收藏']}
+        update_time: //span[@class="time"]
+        next_page: {xpath: '//a[@id="next"]/@href', regex: '.*_\\d+\\.html$'}
+选择器:
+    值为字符串时是 XPath 表达式(或者以 "css:" 开头的 CSS 选择器),
+    值为字典时可以使用以下的键:
+        xpath: 选择器的表达式, 必需。
+        index: 使用第几个匹配的结果, 默认为 0, 可以为负数。
+        regex: 从文本中提取内容的正则表达式, 有分组时使用第一个分组。
+        strip: 是否去除文本两端的空白字符, 默认为 true。
+        drop: 正则表达式列表, 匹配其中任意一个的文本会被丢弃, 用于章节内容。
+    name、author、state、desc、chapter_urls、chapter_name 与 content 是必需的,
+    cover、update_time、chapter_pages 与 next_page 是可选的。
+    chapter_pages 为章节第一页中列出的其余分页的链接, 这些分页可以同时下载;
+    next_page 为一个分页中指向下一个分页的链接, 只有不是下一章时才应当匹配。
+注意事项:
+    配置文件放在 `Settings().ENGINES_DIR` 中, 扩展名为 .json、.yaml 或 .yml。
+    配置在加载时编译, 错误的配置会在加载时抛出 EngineSpecError,
+    而不是在下载时才失败。
+    状态文本中含有 serializing 中的任意一个时为连载中, 否则为完结。
+    章节内容中只保留文本, 空行会被丢弃。
+"""
+
+
+# 导入标准库
+import os
+import re
+import json
+import time
+import threading
+from typing import Any, Dict, List
+
+# 导入第三方库
+import yaml
+import requests
+
+# 导入自定义库
+from .config import BookWeb
+from .selector import Selector, SelectorError, text_of
+from novel_dl.core.settings import Settings
+from novel_dl.core.books import Book, Chapter, ContentType, Line, State
+from novel_dl.utils.network import Network
+from novel_dl.utils.options import singleton
+
+
+# 配置文件的扩展名
+SPEC_EXTENSIONS = (".json", ".yaml", ".yml")
+# 两次扫描配置目录的最短间隔, 单位是秒
+SPEC_RESCAN_INTERVAL = 1.0
+# 必需的选择器
+REQUIRED_SELECTORS = (
+    "name", "author", "state", "desc",
+    "chapter_urls", "chapter_name", "content"
+)
+# 可选的选择器
+OPTIONAL_SELECTORS = ("cover", "update_time", "chapter_pages", "next_page")
+
+
+class EngineSpecError(Exception):
+    """配置文件的内容不正确"""
+    pass
+
+
+class SpecProtectedError(Exception):
+    """页面中含有访问保护的提示文本"""
+    pass
+
+
+def load_spec(path: str) -> Dict[str, Any]:
+    """读取 JSON 或 YAML 格式的引擎配置文件
+
+    :param path: 配置文件的路径
+    :type path: str
+    :return: 配置的内容
+    """
+    # 确认传入的参数的类型是否正确
+    assert isinstance(path, str)
+    with open(path, "r", encoding="UTF-8") as spec_file:
+        try:
+            if path.endswith(".json"):
+                spec = json.load(spec_file)
+            else:
+                spec = yaml.safe_load(spec_file)
+        except (ValueError, yaml.YAMLError) as error:
+            raise EngineSpecError(f"{path}: {error}")
+    if not isinstance(spec, dict):
+        raise EngineSpecError(f"{path}: 配置的内容应当是一个映射")
+    return spec
+
+
+class _Field(object):
+    def __init__(self, key: str, value: str | Dict[str, Any]):
+        """一项内容的提取方式, 在创建时完成编译"""
+        if isinstance(value, str):
+            value = {"xpath": value}
+        if not isinstance(value, dict) or \
+                not isinstance(value.get("xpath"), str):
+            raise EngineSpecError(f"选择器 {key} 缺少 xpath")
+        self.key = key
+        try:
+            self.selector = Selector(value["xpath"]).compile()
+            self.regex = re.compile(value["regex"]) \
+                if value.get("regex") else None
+            self.drop = [re.compile(i) for i in value.get("drop", [])]
+        except (SelectorError, re.error, TypeError) as error:
+            raise EngineSpecError(f"选择器 {key}: {error}")
+        self.index: int = value.get("index", 0)
+        self.strip: bool = value.get("strip", True)
+        if not isinstance(self.index, int):
+            raise EngineSpecError(f"选择器 {key} 的 index 应当是整数")
+
+    def __clean(self, node: Any) -> str | None:
+        """获取节点的文本, 被丢弃或者正则表达式不匹配时返回 None"""
+        text = text_of(node)
+        if self.strip:
+            text = text.strip()
+        if self.regex is not None:
+            match = self.regex.search(text)
+            if match is None:
+                return None
+            text = match.group(1) if match.groups() else match.group(0)
+        if any(i.search(text) for i in self.drop):
+            return None
+        return text
+
+    def first(self, response: Network) -> str:
+        """提取一项内容, 没有匹配的结果时抛出 SelectorError"""
+        result = self.selector(response.tree)
+        try:
+            text = self.__clean(result[self.index])
+        except IndexError:
+            text = None
+        if text is None:
+            raise SelectorError(f"没有匹配的内容: {self.key}")
+        return text
+
+    def all(self, response: Network) -> List[str]:
+        """提取所有匹配的内容, 丢弃空文本"""
+        result = []
+        for node in self.selector(response.tree):
+            text = self.__clean(node)
+            if text:
+                result.append(text)
+        return result
+
+
+class SpecEngine(BookWeb):
+    def __init__(self, spec: Dict[str, Any], path: str = ""):
+        """由配置编译而成的引擎
+        所有选择器在创建时编译, 配置不正确时抛出 EngineSpecError
+
+        :param spec: 配置的内容, 格式见模块说明
+        :type spec: Dict[str, Any]
+        :param path: 配置文件的路径, 仅用于错误信息
+        :type path: str
+
+        Example:
+            >>> engine = SpecEngine(load_spec("data/engines/example.yaml"))
+            >>> WebManager().append(engine)
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(spec, dict)
+        assert isinstance(path, str)
+        self.path = path
+        try:
+            self.__compile(spec)
+        except EngineSpecError as error:
+            raise EngineSpecError(f"{path or spec.get('name')}: {error}")
+
+    def __compile(self, spec: Dict[str, Any]) -> None:
+        """检查并编译配置"""
+        if not isinstance(spec.get("name"), str):
+            raise EngineSpecError("缺少引擎的名字 name")
+        domains = spec.get("domains")
+        if not isinstance(domains, list) or not domains or \
+                not all(isinstance(i, str) for i in domains):
+            raise EngineSpecError("domains 应当是非空的域名列表")
+        self.name = spec["name"]
+        self.domains = [i.lower() for i in domains]
+        self.book_url_pattern = spec.get(
+            "book_url_pattern", BookWeb.book_url_pattern
+        )
+        self.chapter_url_pattern = spec.get(
+            "chapter_url_pattern", BookWeb.chapter_url_pattern
+        )
+        self.encoding = spec.get("encoding", BookWeb.encoding)
+        self.prestore_book_urls = bool(spec.get("prestore_book_urls", False))
+        self.multi_thread = bool(spec.get("multi_thread", True))
+        self.max_connections = spec.get("max_connections")
+        if self.max_connections is not None and (
+            not isinstance(self.max_connections, int)
+            or self.max_connections < 1
+        ):
+            raise EngineSpecError("max_connections 应当是正整数")
+        self.serializing: List[str] = spec.get("serializing", ["连载",])
+        self.time_format: str = spec.get("time_format", "%Y-%m-%d %H:%M")
+        # 访问保护的判断方式
+        protection = spec.get("protection", {})
+        if not isinstance(protection, dict):
+            raise EngineSpecError("protection 应当是一个映射")
+        self.retry_delay = float(
+            protection.get("retry_delay", BookWeb.retry_delay)
+        )
+        self.protected_status = set(protection.get("status", []))
+        self.protected_texts: List[str] = protection.get("texts", [])
+        self.protected_network = bool(
+            protection.get("network_errors", False)
+        )
+        # 编译选择器
+        selectors = spec.get("selectors")
+        if not isinstance(selectors, dict):
+            raise EngineSpecError("缺少选择器 selectors")
+        for key in REQUIRED_SELECTORS:
+            if key not in selectors:
+                raise EngineSpecError(f"缺少选择器 {key}")
+        self.__fields: Dict[str, _Field] = {
+            key: _Field(key, selectors[key])
+            for key in REQUIRED_SELECTORS + OPTIONAL_SELECTORS
+            if key in selectors
+        }
+        self.selectors = {
+            key: field.selector for key, field in self.__fields.items()
+        }
+
+    def __repr__(self):
+        return f"<SpecEngine name={self.name} domains={self.domains}>"
+
+    def __check(self, response: Network) -> None:
+        """页面中含有访问保护的提示文本时抛出 SpecProtectedError"""
+        if self.protected_texts:
+            text = response.text
+            for i in self.protected_texts:
+                if i in text:
+                    raise SpecProtectedError(i)
+
+    def get_book_info(self, response: Network) -> Book:
+        self.__check(response)
+        fields = self.__fields
+        state_text = fields["state"].first(response)
+        state = State.SERIALIZING \
+            if any(i in state_text for i in self.serializing) else State.END
+        images = []
+        if "cover" in fields:
+            cover_url = fields["cover"].first(response)
+            images.append(
+                Network.get(response.get_next_url(cover_url)).content
+            )
+        return Book(
+            fields["name"].first(response), fields["author"].first(response),
+            state, fields["desc"].first(response),
+            [response.response.url,], images
+        )
+
+    def get_chapter_url(self, response: Network) -> List[str]:
+        self.__check(response)
+        return [
+            response.get_next_url(i)
+            for i in self.__fields["chapter_urls"].all(response)
+        ]
+
+    def get_chapter(
+        self, response: Network, index: int, book_name: str
+    ) -> Chapter:
+        self.__check(response)
+        fields = self.__fields
+        update_time = time.time()
+        if "update_time" in fields:
+            update_time = time.mktime(time.strptime(
+                fields["update_time"].first(response), self.time_format
+            ))
+        # 分页的章节按顺序拼接所有分页的内容
+        text = []
+        for page in self.chapter_pages(response):
+            self.__check(page)
+            text += fields["content"].all(page)
+        if not text:
+            raise SelectorError("没有匹配的内容: content")
+        return Chapter(
+            index, fields["chapter_name"].first(response),
+            [response.response.url,], update_time, book_name,
+            [
+                Line(number + 1, item, ContentType.Text)
+                for number, item in enumerate(text)
+            ]
+        )
+
+    def chapter_page_urls(self, response: Network) -> List[str]:
+        if "chapter_pages" not in self.__fields:
+            return []
+        return [
+            response.get_next_url(i)
+            for i in self.__fields["chapter_pages"].all(response)
+        ]
+
+    def next_chapter_page(self, response: Network) -> str | None:
+        if "next_page" not in self.__fields:
+            return None
+        result = self.__fields["next_page"].all(response)
+        return response.get_next_url(result[0]) if result else None
+
+    def is_protected(
+        self, response: Network | None,
+        network_error: Exception | None,
+        analyze_error: Exception | None
+    ) -> bool:
+        if isinstance(analyze_error, SpecProtectedError):
+            return True
+        if self.protected_network and isinstance(network_error, (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+        )):
+            return True
+        if response is not None and \
+                response.response.status_code in self.protected_status:
+            return True
+        return False
+
+    def prevent_protected(self, *param):
+        return None
+
+
+@singleton
+class EngineSpecs(object):
+    def __init__(self):
+        """引擎配置文件的索引
+        扫描 `Settings().ENGINES_DIR` 时只读取各配置文件的域名,
+        某个域名第一次被查找时才编译对应的引擎, 之后一直使用编译后的对象.
+        配置文件的增删与修改会在下一次查找时生效,
+        两次扫描之间至少间隔 SPEC_RESCAN_INTERVAL 秒.
+        整个进程共享同一个实例.
+        注意: 该类是线程安全的.
+
+        Example:
+            >>> engine = EngineSpecs().find("www.example.org")
+        """
+        # 域名到配置文件路径的映射
+        self.__index: Dict[str, str] = {}
+        # 配置文件路径到修改时间的映射, 用于判断是否需要重新扫描
+        self.__mtimes: Dict[str, float] = {}
+        # 已经编译的引擎, 键为配置文件的路径
+        self.__engines: Dict[str, SpecEngine] = {}
+        # 上一次扫描的目录与时间
+        self.__directory: str | None = None
+        self.__scanned = 0.0
+        self.__lock = threading.Lock()
+
+    def __scan(self, force: bool) -> None:
+        """扫描配置目录, 更新域名索引, 丢弃已经修改的配置的编译结果"""
+        directory = Settings().ENGINES_DIR
+        now = time.monotonic()
+        if not force and directory == self.__directory and \
+                now - self.__scanned < SPEC_RESCAN_INTERVAL:
+            return None
+        self.__directory, self.__scanned = directory, now
+        mtimes: Dict[str, float] = {}
+        if os.path.isdir(directory):
+            for entry in os.scandir(directory):
+                if entry.is_file() and entry.name.endswith(SPEC_EXTENSIONS):
+                    mtimes[entry.path] = entry.stat().st_mtime
+        if mtimes == self.__mtimes:
+            return None
+        self.__engines = {
+            path: engine for path, engine in self.__engines.items()
+            if self.__mtimes.get(path) == mtimes.get(path)
+        }
+        self.__mtimes = mtimes
+        self.__index = {}
+        for path in sorted(mtimes):
+            try:
+                domains = load_spec(path).get("domains", [])
+            except (OSError, EngineSpecError):
+                continue
+            if isinstance(domains, list):
+                for domain in domains:
+                    if isinstance(domain, str):
+                        self.__index.setdefault(domain.lower(), path)
+        return None
+
+    def reload(self) -> None:
+        """立即重新扫描配置目录"""
+        with self.__lock:
+            self.__scan(True)
+
+    def domains(self) -> List[str]:
+        """所有配置文件中的域名"""
+        with self.__lock:
+            self.__scan(False)
+            return list(self.__index)
+
+    def find(self, domain: str) -> SpecEngine | None:
+        """获取支持该域名的引擎
+        没有支持该域名的配置时返回 None, 配置不正确时抛出 EngineSpecError
+
+        :param domain: 域名, 不区分大小写
+        :type domain: str
+        :return: 引擎对象或者 None
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(domain, str)
+        with self.__lock:
+            self.__scan(False)
+            path = self.__index.get(domain.lower())
+            if path is None:
+                return None
+            if path not in self.__engines:
+                self.__engines[path] = SpecEngine(load_spec(path), path)
+            return self.__engines[path]
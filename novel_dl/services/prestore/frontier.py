@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: frontier.py
+# @Time: 19/10/2026 17:30
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import re
+import time
+from threading import Lock
+from typing import Callable, Dict, Iterable, Set, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from .model import URL, Frontier
+
+
+class CrawlFrontier(object):
+    # URL 的类型, 数值越小越先被爬取
+    TIER_BOOK = 0
+    TIER_LISTING = 1
+    TIER_CHAPTER = 2
+    # 深度的上限, 优先级 = 类型 * MAX_DEPTH + 深度
+    MAX_DEPTH = 1000
+    # 每次批量写入的 URL 数量
+    CHUNK_SIZE = 500
+
+    def __init__(
+        self, sql_engine: Engine,
+        book_pattern: re.Pattern, chapter_pattern: re.Pattern,
+        key: Callable[[str], int]
+    ):
+        """持久化的爬取队列
+        按优先级保存待爬取的 URL 路径: 书籍页面优先于列表页面,
+        列表页面优先于章节页面; 同类型的页面中深度较浅的优先,
+        深度相同时最近发现的优先. 队列保存在数据库中, 重启后可以继续爬取.
+        注意: 该类是线程安全的.
+
+        :param sql_engine: 数据库引擎, 与 URL 过滤器使用同一个数据库
+        :type sql_engine: Engine
+        :param book_pattern: 书籍 URL 路径的正则表达式
+        :type book_pattern: re.Pattern
+        :param chapter_pattern: 章节 URL 路径的正则表达式
+        :type chapter_pattern: re.Pattern
+        :param key: 计算路径的键的函数, 规范化后相同的路径应当得到相同的键
+        :type key: Callable[[str], int]
+        """
+        self.__sql_engine = sql_engine
+        self.__key = key
+        self.__book_pattern = book_pattern
+        self.__chapter_pattern = chapter_pattern
+        # 已经取出但尚未处理完成的路径的键, 多个工作线程共享同一个队列时
+        # 用于避免同一个路径被重复加入队列
+        self.__in_flight: Set[int] = set()
+        self.__lock = Lock()
+
+    def classify(self, path: str) -> int:
+        """判断 URL 路径的类型
+
+        :param path: URL 路径
+        :type path: str
+        :return: URL 的类型
+        """
+        if self.__book_pattern.match(path):
+            return self.TIER_BOOK
+        if self.__chapter_pattern.match(path):
+            return self.TIER_CHAPTER
+        return self.TIER_LISTING
+
+    def priority(self, path: str, depth: int) -> int:
+        """计算 URL 路径的优先级, 数值越小越先被爬取
+
+        :param path: URL 路径
+        :type path: str
+        :param depth: 该页面距离起始页面的深度
+        :type depth: int
+        :return: 优先级
+        """
+        return self.classify(path) * self.MAX_DEPTH + \
+            min(depth, self.MAX_DEPTH - 1)
+
+    def push(self, paths: Iterable[str], depth: int) -> int:
+        """将 URL 路径加入队列, 规范化后已经在队列中的路径会被忽略
+        调用者需要事先排除已经访问过的路径
+
+        :param paths: URL 路径
+        :type paths: Iterable[str]
+        :param depth: 这些页面距离起始页面的深度
+        :type depth: int
+        :return: 新加入队列的路径数量
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(depth, int)
+        # 批量写入, 已经在队列中或者正在处理的路径会被忽略
+        now = time.time()
+        count = 0
+        statement = insert(Frontier.__table__).prefix_with("OR IGNORE")
+        with self.__lock:
+            # 生成所有待写入的记录, 规范化后相同的路径只保留第一个
+            keyed = {}
+            for i in paths:
+                keyed.setdefault(self.__key(i), i)
+            rows = [
+                {
+                    "key_hash": key, "path": path,
+                    "priority": self.priority(path, depth),
+                    "depth": depth, "discovered_at": now,
+                } for key, path in keyed.items()
+                if key not in self.__in_flight
+            ]
+            if not rows:
+                return 0
+            with sessionmaker(bind=self.__sql_engine)() as session:
+                connection = session.connection()
+                for start in range(0, len(rows), self.CHUNK_SIZE):
+                    count += connection.execute(
+                        statement, rows[start:start + self.CHUNK_SIZE]
+                    ).rowcount
+                session.commit()
+        # 返回新加入队列的路径数量
+        return count
+
+    def pop(self) -> Tuple[str, int] | None:
+        """取出优先级最高的 URL 路径
+        处理完成后需要调用 `done` 方法
+
+        :return: URL 路径及其深度, 队列为空时返回 None
+        """
+        with self.__lock:
+            with sessionmaker(bind=self.__sql_engine)() as session:
+                # 按索引的顺序取出第一条记录
+                record = session.query(
+                    Frontier.key_hash, Frontier.path, Frontier.depth
+                ).order_by(
+                    Frontier.priority, Frontier.discovered_at.desc()
+                ).first()
+                if record is None:
+                    return None
+                # 从队列中删除该记录
+                session.query(Frontier) \
+                    .filter_by(key_hash=record.key_hash) \
+                    .delete(synchronize_session=False)
+                session.commit()
+            # 记录正在处理的路径
+            self.__in_flight.add(record.key_hash)
+        # 返回路径及其深度
+        return record.path, record.depth
+    
+    def done(self, path: str) -> None:
+        """标记取出的路径已经处理完成
+
+        :param path: URL 路径
+        :type path: str
+        """
+        with self.__lock:
+            self.__in_flight.discard(self.__key(path))
+
+    def __len__(self) -> int:
+        with sessionmaker(bind=self.__sql_engine)() as session:
+            return session.query(func.count(Frontier.key_hash)).scalar()
+
+    def stats(self) -> Dict[str, int]:
+        """统计爬取的覆盖情况
+
+        :return: 包括队列中各类型的数量, 以及已发现和已访问的页面数量
+        """
+        with sessionmaker(bind=self.__sql_engine)() as session:
+            # 统计队列中各类型 URL 的数量
+            queued = dict(
+                session.query(
+                    Frontier.priority // self.MAX_DEPTH,
+                    func.count(Frontier.key_hash)
+                ).group_by(Frontier.priority // self.MAX_DEPTH).all()
+            )
+            # 统计已发现和已访问的页面数量
+            discovered, visited, books, books_visited, not_found = \
+                session.query(
+                    func.count(URL.key_hash),
+                    func.coalesce(func.sum(URL.visited), 0),
+                    func.coalesce(func.sum(URL.is_book), 0),
+                    func.coalesce(func.sum(URL.is_book * URL.visited), 0),
+                    func.coalesce(func.sum(URL.is_404), 0),
+                ).one()
+        # 返回统计结果
+        return {
+            "queued_books": queued.get(self.TIER_BOOK, 0),
+            "queued_listings": queued.get(self.TIER_LISTING, 0),
+            "queued_chapters": queued.get(self.TIER_CHAPTER, 0),
+            "discovered": discovered,
+            "visited": visited,
+            "books_discovered": books,
+            "books_visited": books_visited,
+            "not_found": not_found,
+        }
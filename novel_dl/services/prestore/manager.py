@@ -8,12 +8,12 @@
 import re
 import os
 import time
-import random
-from threading import Thread
+import hashlib
+from threading import Event, Lock, Thread
 from urllib.parse import urlparse, urlunparse
-from typing import Iterable, Generator, Callable, List, Dict
+from typing import Iterable, Generator, Callable, List, Dict, Tuple
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, insert
 from sqlalchemy.orm import sessionmaker
 
 from novel_dl.core.books import Book
@@ -21,144 +21,446 @@ from novel_dl.utils.network import Network
 from novel_dl.core.settings import Settings
 from novel_dl.services.bookshelf import Bookshelf
 from novel_dl.services.download import BookWeb
-from novel_dl.services.download import WebManager
-from novel_dl.utils.options import hash as _hash
+from novel_dl.utils.fs import mkdir
+from novel_dl.utils.bloom import ScalableBloomFilter
+from novel_dl.utils.throttle import DomainThrottle
+from novel_dl.utils.circuit import CircuitBreaker
 
 from .model import URL, Base
+from .frontier import CrawlFrontier
+from .stage import BookInfoStage
 
 
 class URLFilter(object):
+    # 每次批量查询或写入的 URL 数量, 需要小于 SQLite 单条语句的参数数量上限
+    CHUNK_SIZE = 500
+    # 每新增多少个已访问的 URL 保存一次布隆过滤器的快照
+    SNAPSHOT_INTERVAL = 1000
+    
     def __init__(self, engine: BookWeb):
+        # 创建 URL 目录并初始化数据库连接
+        # 旧版本以 SHA256 为键的 {域名}.db 无法转换为新的键, 因此使用新的文件名
+        mkdir(Settings().URLS_DIR)
         db_path = os.path.join(
-            Settings().URLS_DIR, f'{engine.domains[0]}.db'
+            Settings().URLS_DIR, f'{engine.domains[0]}.urls.db'
         )
         
         self.__book_engine = engine
         self.__sql_engine = create_engine(
             f"sqlite:///{db_path}",
-            connect_args={"check_same_thread": False}
+            connect_args={"check_same_thread": False, "timeout": 30}
+        )
+        Base.metadata.create_all(self.__sql_engine, checkfirst=True)
+        
+        # 预先编译该引擎的书籍与章节 URL 的正则表达式
+        self.__book_pattern = re.compile(engine.book_url_pattern)
+        self.__chapter_pattern = re.compile(engine.chapter_url_pattern)
+        
+        # 加载已访问 URL 的布隆过滤器, 用于在不访问数据库的情况下排除未访问的 URL
+        self.__snapshot_path = os.path.join(
+            Settings().URLS_DIR, f'{engine.domains[0]}.urls.bloom'
+        )
+        self.__visited = self.__load_visited()
+        self.__new_visited = 0
+        self.__lock = Lock()
+        
+        # 持久化的爬取队列, 与 URL 记录保存在同一个数据库中
+        self.__frontier = CrawlFrontier(
+            self.__sql_engine, self.__book_pattern, self.__chapter_pattern,
+            lambda x: self.key(x)[0]
         )
     
+    @property
+    def book_pattern(self) -> re.Pattern:
+        """该网站书籍 URL 路径的预编译正则表达式"""
+        return self.__book_pattern
+    
+    @property
+    def frontier(self) -> CrawlFrontier:
+        """该网站的爬取队列"""
+        return self.__frontier
+    
+    def __load_visited(self) -> ScalableBloomFilter:
+        """加载已访问 URL 的布隆过滤器
+        快照中的元素数量与数据库中已访问的 URL 数量一致时直接使用快照,
+        否则从数据库中重新构建
+        """
+        with sessionmaker(bind=self.__sql_engine)() as session:
+            # 统计数据库中已访问的 URL 数量
+            visited_count = session.query(URL) \
+                .filter(URL.visited == 1).count()
+            # 尝试加载快照
+            if os.path.exists(self.__snapshot_path):
+                try:
+                    bloom = ScalableBloomFilter.load(self.__snapshot_path)
+                except (OSError, ValueError):
+                    pass
+                else:
+                    if len(bloom) == visited_count:
+                        return bloom
+            # 从数据库中重新构建
+            bloom = ScalableBloomFilter(max(100000, visited_count))
+            bloom.update(
+                self.__digest(*i) for i in
+                session.query(URL.key_hash, URL.check_hash)
+                .filter(URL.visited == 1).yield_per(10000)
+            )
+        return bloom
+    
+    def save_snapshot(self) -> None:
+        """将已访问 URL 的布隆过滤器保存为快照"""
+        with self.__lock:
+            self.__visited.save(self.__snapshot_path)
+            self.__new_visited = 0
+    
+    @staticmethod
+    def key(url: str) -> Tuple[int, int]:
+        """计算 URL 的键
+        先使用 `Network.canonical_path` 规范化, 再计算 128 位的 BLAKE2b 哈希值,
+        拆分为作为主键的 key_hash 与用于检查碰撞的 check_hash
+        
+        :param url: URL 或者 URL 路径
+        :type url: str
+        :return: (key_hash, check_hash)
+        """
+        digest = hashlib.blake2b(
+            Network.canonical_path(url).encode("utf-8"), digest_size=16
+        ).digest()
+        return (
+            int.from_bytes(digest[:8], "little", signed=True),
+            int.from_bytes(digest[8:], "little", signed=True)
+        )
+    
+    @staticmethod
+    def __digest(key_hash: int, check_hash: int) -> bytes:
+        """由键还原 128 位的哈希值, 用于布隆过滤器"""
+        return key_hash.to_bytes(8, "little", signed=True) + \
+            check_hash.to_bytes(8, "little", signed=True)
+    
+    @classmethod
+    def __hash_urls(
+        cls, urls: Iterable[str]
+    ) -> Dict[int, Tuple[int, str]]:
+        """计算 URL 的键, 规范化后相同的 URL 只保留第一个并保持原有顺序
+        返回值的键为 key_hash, 值为 check_hash 与原始的 URL
+        """
+        result: Dict[int, Tuple[int, str]] = {}
+        for one_url in urls:
+            key_hash, check_hash = cls.key(one_url)
+            result.setdefault(key_hash, (check_hash, one_url))
+        return result
+    
+    @classmethod
+    def __chunks(
+        cls, items: List[int]
+    ) -> Generator[List[int], None, None]:
+        """将列表按批量操作的大小分块"""
+        for i in range(0, len(items), cls.CHUNK_SIZE):
+            yield items[i:i + cls.CHUNK_SIZE]
+    
     def add_urls(self, urls: Iterable[str]) -> None:
+        # 计算哈希值, 每个 URL 只计算一次
+        hashed_urls = self.__hash_urls(urls)
+        if not hashed_urls:
+            return None
+        # 生成所有待写入的记录, 使用预先编译的正则表达式判断 URL 的类型
+        rows = [
+            {
+                "key_hash": key_hash, "check_hash": check_hash,
+                "visited": 0, "is_404": 0,
+                "is_book": 1 if self.__book_pattern.match(one_url) else 0,
+                "is_chapter": 1 if self.__chapter_pattern.match(one_url)
+                    else 0,
+            } for key_hash, (check_hash, one_url) in hashed_urls.items()
+        ]
+        # 批量写入, 已经存在的 URL 会被忽略
+        statement = insert(URL).prefix_with("OR IGNORE")
         with sessionmaker(bind=self.__sql_engine)() as session:
-            for one_url in urls:
-                url_record = session.query(URL) \
-                    .filter_by(thing_hash=_hash(one_url)).first()
-                if not url_record:
-                    is_book = False
-                    is_chapter = False
-                    if re.match(
-                        self.__book_engine.book_url_pattern, one_url
-                    ):
-                        is_book = True
-                    if re.match(
-                        self.__book_engine.chapter_url_pattern, one_url
-                    ):
-                        is_chapter = True
-                    session.add(
-                        URL(
-                            thing_hash=_hash(one_url),
-                            is_book=is_book, is_chapter=is_chapter
-                        )
-                    )
+            for start in range(0, len(rows), self.CHUNK_SIZE):
+                session.execute(
+                    statement, rows[start:start + self.CHUNK_SIZE]
+                )
             session.commit()
     
     def mark_url(self, url: str, is_404: bool = False) -> None:
+        key_hash, check_hash = self.key(url)
         with sessionmaker(bind=self.__sql_engine)() as session:
-            url_record = session.query(URL) \
-                .filter_by(thing_hash=_hash(url)).first()
-            if url_record:
-                url_record.visited = 1
-                url_record.is_404 = 1 if is_404 else 0
+            # 直接更新尚未访问的记录, 不需要先查询
+            newly_visited = session.query(URL).filter(
+                URL.key_hash == key_hash, URL.check_hash == check_hash,
+                URL.visited == 0
+            ).update(
+                {URL.visited: 1, URL.is_404: 1 if is_404 else 0},
+                synchronize_session=False
+            )
+            # 如果没有更新任何记录, 则尝试写入一条已访问的记录
+            if not newly_visited:
+                newly_visited = session.connection().execute(
+                    insert(URL.__table__).prefix_with("OR IGNORE"),
+                    {
+                        "key_hash": key_hash, "check_hash": check_hash,
+                        "visited": 1,
+                        "is_404": 1 if is_404 else 0,
+                        "is_book": 1 if self.__book_pattern.match(url)
+                            else 0,
+                        "is_chapter": 1 if self.__chapter_pattern.match(url)
+                            else 0,
+                    }
+                ).rowcount
             session.commit()
+        # 仅将新访问的 URL 添加到布隆过滤器中, 以保证数量与数据库一致
+        if newly_visited:
+            self.__visited.add(self.__digest(key_hash, check_hash))
+            with self.__lock:
+                self.__new_visited += 1
+                need_snapshot = self.__new_visited >= self.SNAPSHOT_INTERVAL
+            if need_snapshot:
+                self.save_snapshot()
     
     def rm_urls(
         self, urls: Iterable[str]
     ) -> Generator[str, None, None]:
-        with sessionmaker(bind=self.__sql_engine)() as session:
-            for one_url in urls:
-                url_record = session.query(URL) \
-                    .filter_by(thing_hash=_hash(one_url)).first()
-                if url_record:
-                    if url_record.visited:
-                        continue
-                    else:
-                        yield one_url
+        # 计算哈希值, 每个 URL 只计算一次
+        hashed_urls = self.__hash_urls(urls)
+        # 布隆过滤器中不存在的 URL 一定没有被访问过,
+        # 只有可能被访问过的 URL 才需要到数据库中确认
+        maybe_visited = [
+            key_hash for key_hash, (check_hash, _) in hashed_urls.items()
+            if self.__digest(key_hash, check_hash) in self.__visited
+        ]
+        # 已访问的 (key_hash, check_hash), check_hash 不一致时说明发生了碰撞,
+        # 此时该 URL 会被当作未访问
+        visited = set()
+        if maybe_visited:
+            with sessionmaker(bind=self.__sql_engine)() as session:
+                for chunk in self.__chunks(maybe_visited):
+                    visited.update(
+                        tuple(i) for i in
+                        session.query(URL.key_hash, URL.check_hash).filter(
+                            URL.key_hash.in_(chunk), URL.visited == 1
+                        )
+                    )
+        # 按原有顺序返回尚未访问的 URL
+        for key_hash, (check_hash, one_url) in hashed_urls.items():
+            if (key_hash, check_hash) not in visited:
+                yield one_url
 
 
 class PreStore(object):
+    # 队列为空时重新爬取主页的最短间隔, 单位是秒
+    IDLE_INTERVAL = 60
+    
     def __init__(
         self, engines: Iterable[BookWeb],
         url_info_callback: Callable[[str, BookWeb], None],
         book_info_callback: Callable[[Book, BookWeb], None],
         error_callback: Callable[[Exception, BookWeb], None],
+        workers: int | None = None
     ):
+        engines = list(engines)
         for i in engines:
             assert isinstance(i, BookWeb)
+        # 每个网站的工作线程数量, 默认使用全局设置
+        if workers is None:
+            workers = Settings().PRESTORE_WORKERS
+        assert isinstance(workers, int) and workers > 0
         self.__engines = {i: URLFilter(i) for i in engines}
         
-        self.__book_shelf = Bookshelf()
-        
         self.__url_info_callback = url_info_callback
-        self.__book_info_callback = book_info_callback
         self.__error_callback = error_callback
         
-        self.__stop_flag = False
-        self.__pause_flag = False
+        # 书籍页面交给单独的解析阶段处理, 爬取线程不需要等待
+        self.__info_stage = BookInfoStage(
+            Bookshelf(), book_info_callback, error_callback
+        )
+        
+        # 停止事件, 被设置后所有工作线程会尽快退出
+        self.__stop_event = Event()
+        # 运行事件, 被清除后所有工作线程会在取出下一个任务前阻塞
+        self.__run_event = Event()
+        self.__run_event.set()
         
-        self.__thread_pool: Dict[BookWeb, Thread] = {}
+        # 各网站下一次允许在队列为空时重新爬取主页的时间
+        self.__idle_until: Dict[BookWeb, float] = {i: 0.0 for i in engines}
+        # 各网站仍在运行的工作线程数量
+        self.__alive: Dict[BookWeb, int] = {i: workers for i in engines}
+        self.__lock = Lock()
+        
+        # 每个网站启动多个工作线程, 它们共享该网站的爬取队列与 URL 过滤器
+        self.__thread_pool: Dict[BookWeb, List[Thread]] = {}
         for i in engines:
+            self.__thread_pool[i] = []
+            for j in range(workers):
+                one_thread = Thread(
+                    target=self.__run, args=(i,),
+                    name=f"网站{i.name}预下载线程{j}"
+                )
+                one_thread.start()
+                self.__thread_pool[i].append(one_thread)
+            # 如果引擎能够直接列出书籍目录, 则另外启动一个线程将其批量加入队列
             one_thread = Thread(
-                target=self.__run, args=(i,),
-                name=f"网站{i.name}预下载线程"
+                target=self.__enumerate, args=(i,),
+                name=f"网站{i.name}书籍目录枚举线程"
             )
             one_thread.start()
-            self.__thread_pool[i] = one_thread
+            self.__thread_pool[i].append(one_thread)
     
     def stop(self) -> None:
-        self.__stop_flag = True
+        self.__stop_event.set()
+        # 唤醒处于暂停状态的工作线程, 使其能够退出
+        self.__run_event.set()
     
     def pause(self) -> None:
-        self.__pause_flag = True
+        self.__run_event.clear()
     
     def resume(self) -> None:
-        self.__pause_flag = False
+        self.__run_event.set()
     
     def join(self) -> None:
         for i in self.__thread_pool.values():
-            i.join()
+            for j in i:
+                j.join()
+    
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """各网站爬取的覆盖情况, 键为网站的名称"""
+        return {
+            i.name: url_filter.frontier.stats()
+            for i, url_filter in self.__engines.items()
+        }
+    
+    def __claim_seed(self, engine: BookWeb) -> bool:
+        """队列为空时判断当前线程是否应当重新爬取主页
+        同一个网站在 IDLE_INTERVAL 内只会有一个线程重新爬取主页
+        """
+        with self.__lock:
+            if time.time() < self.__idle_until[engine]:
+                return False
+            self.__idle_until[engine] = time.time() + self.IDLE_INTERVAL
+            return True
     
     def __run(self, engine: BookWeb) -> None:
-        next_url = f"https://{engine.domains[-1]}/"
-        while True:
-            if self.__stop_flag:
-                break
-            if self.__pause_flag:
-                time.sleep(1)
-                continue
-            try:
-                response = Network.get(
-                    next_url, engine.encoding, False
+        url_filter = self.__engines[engine]
+        frontier = url_filter.frontier
+        try:
+            while True:
+                # 暂停时阻塞, 直到恢复或者停止
+                self.__run_event.wait()
+                if self.__stop_event.is_set():
+                    break
+                # 从队列中取出优先级最高的路径, 队列为空时从主页重新开始
+                item = frontier.pop()
+                if item is None:
+                    if not self.__claim_seed(engine):
+                        self.__stop_event.wait(1)
+                        continue
+                    item = ("/", 0)
+                path, depth = item
+                # 选择可以访问的镜像域名, 全部暂停访问时稍后再试
+                domain = CircuitBreaker().choose(reversed(engine.domains))
+                if domain is None:
+                    frontier.done(path)
+                    frontier.push([path,], depth)
+                    self.__stop_event.wait(1)
+                    continue
+                next_url = urlunparse(
+                    ["https", domain, path, "", "", ""]
                 )
-            except Exception as network_error:
-                self.__error_callback(network_error, engine)
-                time.sleep(5)
-            else:
-                next_url = self.__deal_url(response, engine)
                 self.__url_info_callback(next_url, engine)
+                try:
+                    # 遵守该域名的请求频率限制
+                    with DomainThrottle().slot(domain):
+                        response = Network.get(next_url, engine.encoding)
+                    CircuitBreaker().record_success(domain)
+                except Exception as network_error:
+                    CircuitBreaker().record_failure(domain)
+                    self.__error_callback(network_error, engine)
+                    # 将该路径放回队列, 并降低其优先级
+                    frontier.done(path)
+                    frontier.push([path,], depth + 1)
+                    self.__stop_event.wait(5)
+                    continue
+                try:
+                    self.__deal_url(response, engine, depth, path)
+                except Exception as deal_error:
+                    self.__error_callback(deal_error, engine)
+                finally:
+                    frontier.done(path)
+        finally:
+            # 最后一个退出的工作线程保存已访问 URL 的快照
+            with self.__lock:
+                self.__alive[engine] -= 1
+                last = self.__alive[engine] == 0
+                all_done = sum(self.__alive.values()) == 0
+            if last:
+                url_filter.save_snapshot()
+            # 所有工作线程都退出后, 等待书籍信息解析阶段处理完剩余的页面
+            if all_done:
+                self.__info_stage.close()
+    
+    def __enumerate(self, engine: BookWeb) -> None:
+        url_filter = self.__engines[engine]
+        # 分批将引擎枚举的书籍路径加入队列, 内存中最多保留一批
+        chunk: List[str] = []
+        try:
+            for url in engine.enumerate_book_urls():
+                if self.__stop_event.is_set():
+                    return None
+                parsed = urlparse(url)
+                if parsed.netloc not in engine.domains:
+                    continue
+                chunk.append(self.__path_of(url))
+                if len(chunk) >= URLFilter.CHUNK_SIZE:
+                    self.__feed(url_filter, chunk)
+                    chunk = []
+            self.__feed(url_filter, chunk)
+        except Exception as enumerate_error:
+            self.__error_callback(enumerate_error, engine)
+    
+    @staticmethod
+    def __feed(url_filter: URLFilter, paths: List[str]) -> None:
+        """将一批书籍路径记录到 URL 过滤器, 并将其中尚未访问的加入队列"""
+        if not paths:
+            return None
+        url_filter.add_urls(paths)
+        url_filter.frontier.push(url_filter.rm_urls(paths), 0)
     
-    def __deal_url(self, response: Network, engine: BookWeb) -> str:
-        if not self.__check_status_code(response, engine):
-            return f"https://{engine.domains[-1]}/"
+    def __check_status_code(
+        self, response: Network, engine: BookWeb, path: str
+    ) -> bool:
+        # 重定向到其他网站的页面不进行处理
+        on_site = urlparse(response.response.url).netloc.lower() in [
+            i.lower() for i in engine.domains
+        ]
+        if response.response.status_code == 200 and on_site:
+            return True
+        # 记录无法访问的页面, 以免再次访问
+        self.__engines[engine].mark_url(
+            path, response.response.status_code == 404
+        )
+        return False
+    
+    @staticmethod
+    def __path_of(url: str) -> str:
+        """获取 URL 的路径以及查询参数"""
+        parsed = urlparse(url)
+        return parsed.path + (f"?{parsed.query}" if parsed.query else "")
+    
+    def __deal_url(
+        self, response: Network, engine: BookWeb, depth: int, path: str
+    ) -> None:
+        if not self.__check_status_code(response, engine, path):
+            return None
+        url_filter = self.__engines[engine]
         urls = self.__get_urls(response, engine)
-        next_url = self.__get_next_url(urls, engine)
-        path = urlparse(response.response.url).path
-        self.__engines[engine].mark_url(response.response.url)
-        if re.match(engine.book_url_pattern, path):
-            book = WebManager().download(response.response.url, True)
-            self.__book_shelf.save_book_info(book)
-            self.__book_info_callback(book, engine)
-        return next_url
+        # 将尚未访问的路径加入队列
+        url_filter.frontier.push(url_filter.rm_urls(urls), depth + 1)
+        # 同时记录请求的路径与重定向后的路径
+        final_path = self.__path_of(response.response.url)
+        url_filter.mark_url(path)
+        url_filter.mark_url(final_path)
+        # 将书籍页面交给解析阶段, 复用已经获取的页面
+        if url_filter.book_pattern.match(urlparse(final_path).path):
+            self.__info_stage.submit(response, engine, self.__stop_event)
 
     def __get_urls(
         self, response: Network, engine: BookWeb
@@ -166,33 +468,19 @@ class PreStore(object):
         # 如果没有获取到网页内容, 则返回空列表
         if not response.text:
             return []
-        # 获取网页上所有的 a 标签
-        a_tags = response.bs.find_all("a")
-        # 获取 a 标签中的 href 属性
-        hrefs = [i.get("href") for i in a_tags]
+        # 获取网页上所有 a 标签的 href 属性, 直接在 lxml 的文档树上查询
+        hrefs = [str(i) for i in response.tree.xpath("//a/@href")]
         # 过滤掉 None 值以及空字符串
         hrefs = list(filter(lambda x: True if x else False, hrefs))
         # 依据 href 内容转换得到对应的 URL, 同时过滤掉不是该引擎支持的域名的 URL
-        urls = [response.get_next_url(i, True) for i in hrefs]
+        urls = [
+            response.get_next_url(i, True, engine.domains) for i in hrefs
+        ]
         # 过滤掉空字符串
         urls = list(filter(lambda x: True if x else False, urls))
-        # 仅保留 URL 的路径部分
-        urls = [urlparse(i).path for i in urls]
+        # 仅保留 URL 的路径部分以及查询参数, 镜像域名上的页面视为同一页面
+        urls = [self.__path_of(i) for i in urls]
         # 将 URL 添加到 URL 过滤器中
-        self.__url_filters[engine].add_urls(urls)
+        self.__engines[engine].add_urls(urls)
         # 返回 URL 列表
         return urls
-
-    def __get_next_url(self, urls: List[str], engine: BookWeb) -> str:
-        if not urls:
-            return f"https://{engine.domains[-1]}/"
-        not_visited_urls = list(
-            self.__url_filters[engine].rm_urls(urls)
-        )
-        if not_visited_urls:
-            next_url = random.choice(not_visited_urls)
-        else:
-            next_url = random.choice(urls)
-        return urlunparse(
-            ["https", engine.domains[-1], next_url, "", "", ""]
-        )
\ No newline at end of file
@@ -6,8 +6,8 @@
 
 
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, CheckConstraint
-from sqlalchemy import BLOB, SmallInteger
+from sqlalchemy import Column, CheckConstraint, Index
+from sqlalchemy import SmallInteger, Integer, Float, String
 
 
 Base = declarative_base()
@@ -16,7 +16,11 @@ Base = declarative_base()
 class URL(Base):
     __tablename__ = 'url'
     
-    thing_hash = Column(BLOB, primary_key=True)
+    # 规范化后的 URL 路径的 128 位哈希值, 拆分为两个 64 位整数保存:
+    # key_hash 作为主键 (即 SQLite 的 rowid, 不需要额外的索引),
+    # check_hash 用于检查 key_hash 是否发生碰撞
+    key_hash = Column(Integer, primary_key=True, autoincrement=False)
+    check_hash = Column(Integer, nullable=False)
     visited = Column(SmallInteger, nullable=False, default=0)
     is_404 = Column(SmallInteger, nullable=False, default=0)
     is_book = Column(SmallInteger, nullable=False, default=0)
@@ -30,8 +34,26 @@ class URL(Base):
     )
     
     def __repr__(self):
-        return f'<URL thing_hash={self.thing_hash} ' \
+        return f'<URL key_hash={self.key_hash} ' \
             f'visited={True if self.visited else False} ' \
             f'is_404={True if self.is_404 else False} ' \
             f'is_book={True if self.is_book else False} ' \
-            f'is_chapter={True if self.is_chapter else False}>'
\ No newline at end of file
+            f'is_chapter={True if self.is_chapter else False}>'
+
+
+class Frontier(Base):
+    __tablename__ = 'frontier'
+    
+    key_hash = Column(Integer, primary_key=True, autoincrement=False)
+    path = Column(String, nullable=False)
+    priority = Column(Integer, nullable=False)
+    depth = Column(Integer, nullable=False, default=0)
+    discovered_at = Column(Float, nullable=False)
+    
+    __table_args__ = (
+        Index('frontier_order', priority, discovered_at.desc()),
+    )
+    
+    def __repr__(self):
+        return f'<Frontier path={self.path} ' \
+            f'priority={self.priority} depth={self.depth}>'
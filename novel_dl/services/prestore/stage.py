@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: stage.py
+# @Time: 19/10/2026 18:50
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import time
+from queue import Queue, Empty, Full
+from threading import Event, Thread
+from typing import Callable, List, Tuple
+
+from novel_dl.core.books import Book
+from novel_dl.utils.network import Network
+from novel_dl.services.bookshelf import Bookshelf
+from novel_dl.services.download import BookWeb
+
+
+class BookInfoStage(object):
+    # 解析书籍信息的线程数量
+    WORKERS = 2
+    # 等待解析的页面数量上限, 超过后提交页面的爬取线程会被阻塞
+    MAX_PENDING = 64
+    # 每批写入书架的书籍数量
+    BATCH_SIZE = 20
+    # 书籍在内存中停留的最长时间, 超过后即使未凑满一批也会写入书架, 单位是秒
+    FLUSH_INTERVAL = 1.0
+
+    def __init__(
+        self, bookshelf: Bookshelf,
+        book_info_callback: Callable[[Book, BookWeb], None],
+        error_callback: Callable[[Exception, BookWeb], None]
+    ):
+        """书籍信息解析阶段
+        爬取线程将已经获取的书籍页面提交到有界队列后即可继续爬取,
+        该阶段的线程直接使用提交的页面解析书籍信息, 不会再次请求该页面,
+        解析得到的书籍会分批写入书架, 写入完成后再调用书籍信息回调函数.
+        注意: 该类是线程安全的.
+
+        :param bookshelf: 书架对象
+        :type bookshelf: Bookshelf
+        :param book_info_callback: 书籍写入书架后调用的函数
+        :type book_info_callback: Callable[[Book, BookWeb], None]
+        :param error_callback: 解析或写入失败时调用的函数
+        :type error_callback: Callable[[Exception, BookWeb], None]
+        """
+        self.__bookshelf = bookshelf
+        self.__book_info_callback = book_info_callback
+        self.__error_callback = error_callback
+        # 等待解析的页面队列, 元素为 (页面, 引擎), None 表示线程应当退出
+        self.__queue: Queue[Tuple[Network, BookWeb] | None] = \
+            Queue(self.MAX_PENDING)
+        # 启动解析线程
+        self.__threads: List[Thread] = []
+        for i in range(self.WORKERS):
+            one_thread = Thread(
+                target=self.__run, name=f"书籍信息解析线程{i}"
+            )
+            one_thread.start()
+            self.__threads.append(one_thread)
+
+    def submit(
+        self, response: Network, engine: BookWeb, stop_event: Event
+    ) -> bool:
+        """提交已经获取的书籍页面
+        队列已满时会阻塞, 直到有空位或者 stop_event 被设置
+
+        :param response: 书籍页面
+        :type response: Network
+        :param engine: 该页面所属网站的引擎
+        :type engine: BookWeb
+        :param stop_event: 停止事件
+        :type stop_event: Event
+        :return: 是否提交成功
+        """
+        while not stop_event.is_set():
+            try:
+                self.__queue.put((response, engine), timeout=1)
+            except Full:
+                continue
+            return True
+        return False
+
+    def close(self) -> None:
+        """等待已经提交的页面全部处理完成, 然后结束所有解析线程"""
+        for _ in self.__threads:
+            self.__queue.put(None)
+        for i in self.__threads:
+            i.join()
+
+    def __run(self) -> None:
+        # 尚未写入书架的书籍
+        batch: List[Tuple[Book, BookWeb]] = []
+        last_flush = time.monotonic()
+        while True:
+            # 取出一个页面, 超时后检查是否需要写入书架
+            try:
+                item = self.__queue.get(timeout=self.FLUSH_INTERVAL)
+            except Empty:
+                item = False
+            # 收到退出信号时写入剩余的书籍并退出
+            if item is None:
+                self.__flush(batch)
+                break
+            # 直接使用已经获取的页面解析书籍信息
+            if item:
+                response, engine = item
+                try:
+                    batch.append((engine.get_book_info(response), engine))
+                except Exception as analyze_error:
+                    self.__error_callback(analyze_error, engine)
+            # 凑满一批或者等待时间过长时写入书架
+            if len(batch) >= self.BATCH_SIZE or (
+                batch and
+                time.monotonic() - last_flush >= self.FLUSH_INTERVAL
+            ):
+                self.__flush(batch)
+                batch = []
+                last_flush = time.monotonic()
+
+    def __flush(self, batch: List[Tuple[Book, BookWeb]]) -> None:
+        """将一批书籍写入书架, 并调用书籍信息回调函数"""
+        if not batch:
+            return None
+        try:
+            self.__bookshelf.save_books_info([i[0] for i in batch])
+        except Exception as save_error:
+            for _, engine in batch:
+                self.__error_callback(save_error, engine)
+            return None
+        for book, engine in batch:
+            self.__book_info_callback(book, engine)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: bloom.py
+# @Time: 19/10/2026 16:45
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+# 导入标准库
+import os
+import math
+import struct
+import threading
+from typing import Iterable, List
+
+
+class BloomFilter(object):
+    # 快照文件中每个过滤器的头部格式: 容量、误判率、哈希函数数量、位数、元素数量
+    HEADER = struct.Struct("<QdIQQ")
+
+    def __init__(self, capacity: int, error_rate: float):
+        """布隆过滤器
+        元素为至少 16 个字节的哈希值, 直接使用哈希值的前 16 个字节进行双重哈希,
+        因此不需要再次计算哈希值.
+        注意: 该类不是线程安全的.
+
+        :param capacity: 预计的元素数量
+        :type capacity: int
+        :param error_rate: 元素数量达到容量时的误判率
+        :type error_rate: float
+
+        Example:
+            >>> bloom = BloomFilter(1000, 0.001)
+            >>> bloom.add(hash("/book/1.html"))
+            >>> hash("/book/1.html") in bloom
+        """
+        # 确认传入的参数是否正确
+        assert isinstance(capacity, int) and capacity > 0
+        assert isinstance(error_rate, float) and 0 < error_rate < 1
+        # 记录容量与误判率
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # 计算所需的位数与哈希函数的数量
+        self.bits = max(
+            8, math.ceil(
+                -capacity * math.log(error_rate) / (math.log(2) ** 2)
+            )
+        )
+        self.hash_count = max(
+            1, round(self.bits / capacity * math.log(2))
+        )
+        # 初始化位数组与元素数量
+        self.array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def __positions(self, value: bytes) -> Iterable[int]:
+        """计算元素在位数组中对应的位置"""
+        # 使用哈希值的前 16 个字节生成两个独立的哈希值
+        first = int.from_bytes(value[:8], "little")
+        second = int.from_bytes(value[8:16], "little") | 1
+        # 双重哈希, 生成 hash_count 个位置
+        return (
+            (first + i * second) % self.bits
+            for i in range(self.hash_count)
+        )
+
+    def add(self, value: bytes) -> None:
+        """添加元素
+
+        :param value: 哈希值, 至少 16 个字节
+        :type value: bytes
+        """
+        for i in self.__positions(value):
+            self.array[i >> 3] |= 1 << (i & 7)
+        self.count += 1
+
+    def __contains__(self, value: bytes) -> bool:
+        for i in self.__positions(value):
+            if not self.array[i >> 3] & (1 << (i & 7)):
+                return False
+        return True
+
+    @property
+    def is_full(self) -> bool:
+        """元素数量是否已经达到容量"""
+        return self.count >= self.capacity
+
+
+class ScalableBloomFilter(object):
+    # 新的过滤器的容量相对于上一个过滤器的倍数
+    GROWTH = 2
+    # 新的过滤器的误判率相对于上一个过滤器的比例
+    TIGHTENING = 0.5
+    # 快照文件的魔数
+    MAGIC = b"NDBLOOM1"
+
+    def __init__(
+        self, initial_capacity: int = 100000, error_rate: float = 0.001
+    ):
+        """可扩展的布隆过滤器
+        当前的过滤器满了之后会新建一个容量更大、误判率更低的过滤器,
+        因此不需要预先知道元素的数量, 总的误判率约为 error_rate.
+        只会把不存在的元素误判为存在, 不会把存在的元素误判为不存在.
+        注意: 该类是线程安全的.
+
+        :param initial_capacity: 第一个过滤器的容量
+        :type initial_capacity: int
+        :param error_rate: 总的误判率
+        :type error_rate: float
+
+        Example:
+            >>> bloom = ScalableBloomFilter()
+            >>> bloom.add(hash("/book/1.html"))
+            >>> hash("/book/1.html") in bloom
+        """
+        # 确认传入的参数是否正确
+        assert isinstance(initial_capacity, int) and initial_capacity > 0
+        assert isinstance(error_rate, float) and 0 < error_rate < 1
+        # 记录参数
+        self.__initial_capacity = initial_capacity
+        self.__error_rate = error_rate
+        # 过滤器列表
+        self.__filters: List[BloomFilter] = []
+        # 锁对象
+        self.__lock = threading.Lock()
+
+    def add(self, value: bytes) -> None:
+        """添加元素
+        注意: 每次添加都会被计数, 调用者应当避免重复添加同一个元素
+
+        :param value: 哈希值, 至少 16 个字节
+        :type value: bytes
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(value, bytes) and len(value) >= 16
+        with self.__lock:
+            # 如果没有过滤器或者最后一个过滤器已满, 则新建一个过滤器
+            if not self.__filters or self.__filters[-1].is_full:
+                self.__filters.append(
+                    BloomFilter(
+                        self.__initial_capacity
+                        * self.GROWTH ** len(self.__filters),
+                        self.__error_rate * (1 - self.TIGHTENING)
+                        * self.TIGHTENING ** len(self.__filters)
+                    )
+                )
+            # 将元素添加到最后一个过滤器中
+            self.__filters[-1].add(value)
+
+    def update(self, values: Iterable[bytes]) -> None:
+        """批量添加元素
+
+        :param values: 哈希值组成的可迭代对象
+        :type values: Iterable[bytes]
+        """
+        for i in values:
+            self.add(i)
+
+    def __contains__(self, value: bytes) -> bool:
+        with self.__lock:
+            return any(value in i for i in self.__filters)
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return sum(i.count for i in self.__filters)
+
+    def save(self, path: str) -> None:
+        """将过滤器保存为快照文件
+        先写入临时文件再替换, 以免保存过程中断导致快照损坏
+
+        :param path: 快照文件的路径
+        :type path: str
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(path, str)
+        temp_path = path + ".tmp"
+        with self.__lock:
+            with open(temp_path, "wb") as file:
+                # 写入魔数、参数以及过滤器的数量
+                file.write(self.MAGIC)
+                file.write(
+                    struct.pack(
+                        "<QdI", self.__initial_capacity,
+                        self.__error_rate, len(self.__filters)
+                    )
+                )
+                # 依次写入每个过滤器的头部与位数组
+                for i in self.__filters:
+                    file.write(
+                        BloomFilter.HEADER.pack(
+                            i.capacity, i.error_rate, i.hash_count,
+                            i.bits, i.count
+                        )
+                    )
+                    file.write(i.array)
+        # 替换旧的快照文件
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ScalableBloomFilter":
+        """从快照文件中加载过滤器
+
+        :param path: 快照文件的路径
+        :type path: str
+        :return: 过滤器对象
+        :raise ValueError: 快照文件的格式不正确时抛出该异常
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(path, str)
+        with open(path, "rb") as file:
+            # 检查魔数
+            if file.read(len(cls.MAGIC)) != cls.MAGIC:
+                raise ValueError(f"快照文件格式不正确: {path}")
+            try:
+                # 读取参数并创建过滤器对象
+                head = file.read(struct.calcsize("<QdI"))
+                initial_capacity, error_rate, number = struct.unpack(
+                    "<QdI", head
+                )
+                bloom = cls(initial_capacity, error_rate)
+                # 依次读取每个过滤器
+                for _ in range(number):
+                    capacity, rate, hash_count, bits, count = \
+                        BloomFilter.HEADER.unpack(
+                            file.read(BloomFilter.HEADER.size)
+                        )
+                    one_filter = BloomFilter(capacity, rate)
+                    one_filter.hash_count = hash_count
+                    one_filter.bits = bits
+                    one_filter.count = count
+                    one_filter.array = bytearray(
+                        file.read((bits + 7) // 8)
+                    )
+                    if len(one_filter.array) != (bits + 7) // 8:
+                        raise ValueError(f"快照文件不完整: {path}")
+                    bloom.__filters.append(one_filter)
+            except struct.error:
+                raise ValueError(f"快照文件不完整: {path}")
+        # 返回过滤器对象
+        return bloom
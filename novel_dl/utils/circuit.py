@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: circuit.py
+# @Time: 19/10/2026 16:05
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""按域名记录网站健康状况的断路器, 主要为 CircuitBreaker 类."""
+
+
+# 导入标准库
+import time
+import threading
+from enum import Enum
+from typing import Any, Dict, Iterable
+
+# 导入自定义库
+from novel_dl.core.settings import Settings
+from novel_dl.utils.options import singleton
+
+
+class CircuitState(Enum):
+    """断路器的状态常量"""
+    CLOSED = (1, "正常访问")
+    OPEN = (2, "暂停访问")
+    HALF_OPEN = (3, "试探访问")
+
+    def __int__(self):
+        return self.value[0]
+
+    def __str__(self):
+        return self.value[1]
+
+
+class _DomainHealth(object):
+    def __init__(self):
+        """单个域名的健康状况"""
+        self.state = CircuitState.CLOSED
+        # 连续失败的次数
+        self.failures = 0
+        # 暂停访问结束的时间
+        self.open_until = 0.0
+        # 是否已经有一个试探请求正在进行
+        self.probing = False
+        # 断路器打开的总次数
+        self.opened = 0
+
+
+@singleton
+class CircuitBreaker(object):
+    def __init__(self):
+        """域名断路器
+        域名连续失败 `Settings().CIRCUIT_FAILURE_THRESHOLD` 次,
+        或者触发网站的访问保护时, 暂停访问该域名 `Settings().CIRCUIT_OPEN_SECONDS` 秒.
+        暂停结束后只放行一个试探请求, 试探成功则恢复访问, 失败则再次暂停.
+        整个进程共享同一个实例, 以便在镜像域名之间切换.
+        注意: 该类是线程安全的.
+
+        Example:
+            >>> domain = CircuitBreaker().choose(engine.domains)
+            >>> try:
+            >>>     Network.get(f"https://{domain}/")
+            >>>     CircuitBreaker().record_success(domain)
+            >>> except Exception:
+            >>>     CircuitBreaker().record_failure(domain)
+        """
+        # 各域名的健康状况
+        self.__domains: Dict[str, _DomainHealth] = {}
+        # 保护健康状况的锁
+        self.__lock = threading.Lock()
+
+    def __get_health(self, domain: str) -> _DomainHealth:
+        """获取域名的健康状况, 若不存在则创建, 调用时应当持有锁"""
+        if domain not in self.__domains:
+            self.__domains[domain] = _DomainHealth()
+        return self.__domains[domain]
+
+    def state(self, domain: str) -> CircuitState:
+        """获取域名的断路器状态
+
+        :param domain: 域名
+        :type domain: str
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(domain, str)
+        with self.__lock:
+            health = self.__get_health(domain)
+            if health.state == CircuitState.OPEN and \
+                time.monotonic() >= health.open_until:
+                return CircuitState.HALF_OPEN
+            return health.state
+
+    def allow(self, domain: str) -> bool:
+        """判断现在是否可以访问该域名
+        暂停结束后第一次调用会占用试探的名额, 之后的调用返回 False,
+        直到记录了试探请求的结果
+
+        :param domain: 域名
+        :type domain: str
+        :return: 是否可以访问
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(domain, str)
+        with self.__lock:
+            health = self.__get_health(domain)
+            if health.state == CircuitState.CLOSED:
+                return True
+            if health.state == CircuitState.OPEN:
+                if time.monotonic() < health.open_until:
+                    return False
+                health.state = CircuitState.HALF_OPEN
+                health.probing = False
+            # 半开状态只放行一个试探请求
+            if health.probing:
+                return False
+            health.probing = True
+            return True
+
+    def choose(
+        self, domains: Iterable[str], preferred: str | None = None
+    ) -> str | None:
+        """在镜像域名中选择一个可以访问的域名
+        优先选择 preferred, 其次按顺序选择, 全部暂停访问时返回 None
+
+        :param domains: 镜像域名
+        :type domains: Iterable[str]
+        :param preferred: 优先选择的域名
+        :type preferred: str | None
+        :return: 可以访问的域名或者 None
+        """
+        domains = list(domains)
+        if preferred is not None:
+            domains = [preferred,] + [i for i in domains if i != preferred]
+        for domain in domains:
+            if self.allow(domain):
+                return domain
+        return None
+
+    def record_success(self, domain: str) -> None:
+        """记录一次成功的访问, 断路器恢复为正常访问"""
+        with self.__lock:
+            health = self.__get_health(domain)
+            health.state = CircuitState.CLOSED
+            health.failures = 0
+            health.probing = False
+
+    def record_failure(self, domain: str, blocked: bool = False) -> None:
+        """记录一次失败的访问
+
+        :param domain: 域名
+        :type domain: str
+        :param blocked: 是否触发了网站的访问保护, 为 True 时立即暂停访问
+        :type blocked: bool
+        """
+        with self.__lock:
+            health = self.__get_health(domain)
+            health.failures += 1
+            if blocked or health.state != CircuitState.CLOSED or \
+                health.failures >= Settings().CIRCUIT_FAILURE_THRESHOLD:
+                health.state = CircuitState.OPEN
+                health.open_until = \
+                    time.monotonic() + Settings().CIRCUIT_OPEN_SECONDS
+                health.probing = False
+                health.opened += 1
+
+    def reset(self, domain: str | None = None) -> None:
+        """清除域名的健康状况, domain 为 None 时清除所有域名"""
+        with self.__lock:
+            if domain is None:
+                self.__domains.clear()
+            else:
+                self.__domains.pop(domain, None)
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各域名的断路器状态、连续失败次数以及打开的总次数"""
+        with self.__lock:
+            items = list(self.__domains.items())
+        return {
+            domain: {
+                "state": self.state(domain).name.lower(),
+                "failures": health.failures, "opened": health.opened,
+            } for domain, health in items
+        }
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: metrics.py
+# @Time: 19/10/2026 23:30
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""
+metrics.py
+这个模块提供了下载流程中各阶段耗时与计数的统计工具。
+类:
+    Metrics: 按阶段与标签记录耗时直方图与计数, 可以导出为 JSON 或 Prometheus 的文本格式。
+函数:
+    timed: 记录函数耗时的装饰器, 未启用统计时几乎没有额外开销。
+注意事项:
+    是否启用统计由 `Settings().METRICS` 决定, 未启用时计时器与标签都不做任何事情。
+    标签保存在 contextvars 中, 只对当前线程之后的统计生效,
+    线程池中的任务不会继承提交任务的线程的标签, 需要在任务中重新设置。
+"""
+
+
+# 导入标准库
+import json
+import time
+import bisect
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Generator, List, Tuple
+
+# 导入自定义库
+from novel_dl.core.settings import Settings
+from novel_dl.utils.options import singleton
+
+
+# 当前的标签, 例如引擎名称与书籍名称, 同一线程中之后的统计都会带上这些标签
+_labels: contextvars.ContextVar[Tuple[Tuple[str, str], ...]] = \
+    contextvars.ContextVar("novel_dl_metrics_labels", default=())
+# 未启用统计时使用的上下文管理器, 不做任何事情
+_NULL_CONTEXT = nullcontext()
+
+
+class _Histogram(object):
+    # 直方图的上边界, 单位是秒, 与 Prometheus 的默认值相同
+    BUCKETS = (
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+    )
+
+    def __init__(self):
+        """耗时的直方图"""
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        # 各区间的数量, 最后一个区间没有上边界
+        self.buckets = [0] * (len(self.BUCKETS) + 1)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.buckets[bisect.bisect_left(self.BUCKETS, value)] += 1
+
+
+@singleton
+class Metrics(object):
+    def __init__(self):
+        """统计下载流程中各阶段的耗时与计数
+        耗时按阶段以及标签(引擎名称、书籍名称等)分别记录为直方图,
+        可以导出为 JSON 或者 Prometheus 的文本格式.
+        是否启用由 `Settings().METRICS` 决定, 未启用时计时器不做任何事情.
+        注意: 该类是线程安全的.
+
+        Example:
+            >>> Settings().METRICS = True
+            >>> with Metrics().labels(engine="笔趣阁"):
+            >>>     with Metrics().timer("network.get"):
+            >>>         Network.get("https://www.example.com/")
+            >>> print(Metrics().to_prometheus())
+        """
+        self.__histograms: Dict[Tuple, _Histogram] = {}
+        self.__counters: Dict[Tuple, float] = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用统计"""
+        return Settings().METRICS
+
+    @contextmanager
+    def labels(self, **labels: str) -> Generator[None, None, None]:
+        """在该上下文中进行的统计都会带上这些标签, 可以嵌套使用
+
+        :param labels: 标签, 值为 None 或空字符串的标签会被忽略
+        """
+        if not self.enabled:
+            yield None
+            return
+        merged = dict(_labels.get())
+        merged.update({k: str(v) for k, v in labels.items() if v})
+        token = _labels.set(tuple(sorted(merged.items())))
+        try:
+            yield None
+        finally:
+            _labels.reset(token)
+
+    def timer(self, stage: str, **labels: str):
+        """记录一个阶段的耗时
+
+        :param stage: 阶段的名称, 例如 "network.get"
+        :type stage: str
+        :param labels: 额外的标签
+        :return: 上下文管理器
+        """
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self.__timer(stage, labels)
+
+    @contextmanager
+    def __timer(
+        self, stage: str, labels: Dict[str, str]
+    ) -> Generator[None, None, None]:
+        start = time.perf_counter()
+        try:
+            yield None
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def observe(self, stage: str, seconds: float, **labels: str) -> None:
+        """直接记录一个阶段的耗时"""
+        if not self.enabled:
+            return None
+        key = self.__key(stage, labels)
+        with self.__lock:
+            if key not in self.__histograms:
+                self.__histograms[key] = _Histogram()
+            self.__histograms[key].observe(seconds)
+
+    def count(self, name: str, value: float = 1, **labels: str) -> None:
+        """增加计数器的值
+
+        :param name: 计数器的名称, 例如 "operation.retries"
+        :type name: str
+        :param value: 增加的值
+        :type value: float
+        """
+        if not self.enabled:
+            return None
+        key = self.__key(name, labels)
+        with self.__lock:
+            self.__counters[key] = self.__counters.get(key, 0) + value
+
+    def reset(self) -> None:
+        """清除所有统计数据"""
+        with self.__lock:
+            self.__histograms.clear()
+            self.__counters.clear()
+
+    @staticmethod
+    def __key(name: str, labels: Dict[str, str]) -> Tuple:
+        merged = dict(_labels.get())
+        merged.update({k: str(v) for k, v in labels.items() if v})
+        return (name, tuple(sorted(merged.items())))
+
+    def to_dict(self) -> Dict[str, List[Dict[str, Any]]]:
+        """导出为可以序列化为 JSON 的字典"""
+        with self.__lock:
+            stages = [
+                {
+                    "stage": name, "labels": dict(labels),
+                    "count": i.count, "sum": i.sum, "max": i.max,
+                    "mean": i.sum / i.count if i.count else 0.0,
+                    "buckets": dict(zip(
+                        [str(ii) for ii in _Histogram.BUCKETS] + ["+Inf",],
+                        i.buckets
+                    )),
+                } for (name, labels), i in self.__histograms.items()
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in self.__counters.items()
+            ]
+        return {"stages": stages, "counters": counters}
+
+    def to_json(self) -> str:
+        """导出为 JSON 文本"""
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=4)
+
+    def to_prometheus(self) -> str:
+        """导出为 Prometheus 的文本格式"""
+        lines = [
+            "# TYPE novel_dl_stage_seconds histogram",
+        ]
+        with self.__lock:
+            for (name, labels), item in self.__histograms.items():
+                base = dict(labels, stage=name)
+                cumulative = 0
+                bounds = [str(i) for i in _Histogram.BUCKETS] + ["+Inf",]
+                for bound, number in zip(bounds, item.buckets):
+                    cumulative += number
+                    lines.append(
+                        "novel_dl_stage_seconds_bucket"
+                        f"{_format_labels(dict(base, le=bound))} {cumulative}"
+                    )
+                lines.append(
+                    "novel_dl_stage_seconds_sum"
+                    f"{_format_labels(base)} {item.sum}"
+                )
+                lines.append(
+                    "novel_dl_stage_seconds_count"
+                    f"{_format_labels(base)} {item.count}"
+                )
+            lines.append("# TYPE novel_dl_events_total counter")
+            for (name, labels), value in self.__counters.items():
+                lines.append(
+                    "novel_dl_events_total"
+                    f"{_format_labels(dict(labels, name=name))} {value}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def save(self, path: str) -> None:
+        """保存统计数据, 扩展名为 .prom 或 .txt 时保存为 Prometheus 的文本格式,
+        否则保存为 JSON
+
+        :param path: 文件路径
+        :type path: str
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(path, str)
+        text = self.to_prometheus() \
+            if path.endswith((".prom", ".txt")) else self.to_json()
+        with open(path, "w", encoding="UTF-8") as file:
+            file.write(text)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """将标签转换为 Prometheus 的格式"""
+    escape = lambda x: x.replace("\\", "\\\\") \
+        .replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(
+        f'{k}="{escape(v)}"' for k, v in sorted(labels.items())
+    ) + "}"
+
+
+def timed(stage: str) -> Callable[[Callable], Callable]:
+    """记录函数耗时的装饰器, 未启用统计时几乎没有额外开销
+
+    :param stage: 阶段的名称
+    :type stage: str
+
+    Example:
+        >>> @timed("saver.save")
+        >>> def save(self): ...
+    """
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not Settings().METRICS:
+                return function(*args, **kwargs)
+            with Metrics().timer(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -7,22 +7,57 @@
 
 
 # 导入标准库
-from typing import Dict
-from urllib.parse import urljoin, urlparse
+import threading
+from typing import Dict, Iterable
+from urllib.parse import urljoin, urlparse, urlunparse
+from urllib.parse import parse_qsl, urlencode
 
 # 导入第三方库
 import requests
-from fake_useragent import UserAgent  # 该库是否可以开箱即用暂时存疑
-from bs4 import BeautifulSoup as bs
+
+# 导入自定义库
+from novel_dl.utils.metrics import Metrics, timed
+
+
+class _LazyUserAgentPool(object):
+    def __init__(self):
+        """延迟创建的 UserAgent 创建池
+        fake_useragent 在创建 UserAgent 对象时会加载数据集,
+        因此只在第一次访问时才导入该库并创建对象, 之后一直使用同一个对象
+        """
+        self.__pool = None
+        self.__lock = threading.Lock()
+    
+    def __get__(self, instance, owner):
+        # 双重检查锁定, 保证只创建一个对象
+        if self.__pool is None:
+            with self.__lock:
+                if self.__pool is None:
+                    # 该库是否可以开箱即用暂时存疑
+                    from fake_useragent import UserAgent
+                    self.__pool = UserAgent()
+        return self.__pool
 
 
 class Network(object):
     # 将 requests 库内置到模块中, 以减少其他模块使用该库时的代码行数
     requests = requests
-    # 所有 Network 类共享这一个自动 UserAgent 创建池
-    user_agent_pool = UserAgent()
+    # 所有 Network 类共享这一个自动 UserAgent 创建池, 第一次使用时才会创建
+    user_agent_pool = _LazyUserAgentPool()
+    # 每个线程各自的会话, 同一线程的请求复用连接池
+    __sessions = threading.local()
+    # 额外挂载到会话上的传输适配器, 键为 URL 前缀
+    __adapters: Dict[str, requests.adapters.BaseAdapter] = {}
+    # 适配器的版本, 适配器变化后各线程会重新创建会话
+    __adapters_version = 0
     # URL 支持的协议
     SUPPORTED_PROTOCOLS = ["http", "https"]
+    # 各协议的默认端口
+    DEFAULT_PORTS = {"http": 80, "https": 443}
+    # 不影响页面内容的查询参数, 规范化时会被去除, 以 "_" 结尾的表示前缀,
+    # 其余的参数名需要完全相同. 小说网站常用 source、from 等参数选择来源或章节,
+    # 因此只包括明确用于跟踪的参数
+    TRACKING_PARAMS = ("utm_", "spm", "fbclid")
     
     def __init__(
         self, response: requests.Response, encoding: str = "UTF-8"
@@ -44,15 +79,25 @@ class Network(object):
         # 记录这些参数
         self.__response = response
         self.__encoding = encoding
+        # 解析后的页面, 第一次使用时才会解析, 之后一直使用同一个对象
+        self.__bs = None
+        self.__tree = None
     
-    def get_next_url(self, href: str, lock: bool = False) -> str:
+    def get_next_url(
+        self, href: str, lock: bool = False,
+        domains: Iterable[str] | None = None
+    ) -> str:
         """获取下一个 URL
-        依据自身的 URL 和指定的 a 标签 href 属性进行合理拼接
+        依据自身的 URL 和指定的 a 标签 href 属性进行合理拼接,
+        结果中不包含片段标识符
         
         :param href: 指定的 a 标签 href 属性
         :type href: str
         :param lock: 是否要求下一个网址仍然为该网站的网址
         :type lock: bool
+        :param domains: 该网站的所有镜像域名, lock 为 True 时
+            指向其中任意一个域名的网址都被视为该网站的网址
+        :type domains: Iterable[str] | None
         """
         # 确认传入的参数的类型是否正确
         assert isinstance(href, str)
@@ -65,32 +110,138 @@ class Network(object):
         # 确认 href 不为网站的主机名
         if href == urlparse(self.__response.url).netloc:
             return ""
-        # 获取下一个 URL
-        next_url = urljoin(self.__response.url, href)
+        # 获取下一个 URL, 并去除片段标识符
+        next_url = urljoin(self.__response.url, href).split("#", 1)[0]
         # 确认该 URL 的协议受该程序支持
         if urlparse(next_url).scheme not in self.SUPPORTED_PROTOCOLS:
             return ""
         # 如果要求下一个 URL 为该网站的 URL, 但不满足该条件, 则返回空字符串
-        if (lock and (
-            urlparse(next_url).netloc != 
-            urlparse(self.__response.url).netloc
-        )):
-            return ""
+        if lock:
+            allowed = {urlparse(self.__response.url).netloc.lower()}
+            allowed.update(i.lower() for i in (domains or ()))
+            if urlparse(next_url).netloc.lower() not in allowed:
+                return ""
         # 返回获取的结果
         return next_url
     
+    @classmethod
+    def normalize_url(cls, url: str) -> str:
+        """规范化 URL, 得到用于比较和去重的键
+        同一页面的不同写法会得到相同的结果:
+        协议统一为 https, 主机名转为小写, 去除默认端口、片段标识符
+        以及路径末尾的斜杠.  
+        注意: 结果仅用于比较, 不应当直接用于发起请求
+        
+        :param url: 要规范化的 URL
+        :type url: str
+        :return: 规范化后的 URL
+        
+        Example:
+            >>> Network.normalize_url("HTTP://Example.com:80/a/#top")
+            'https://example.com/a'
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(url, str)
+        # 解析 URL
+        parsed = urlparse(url.strip())
+        scheme = parsed.scheme.lower()
+        netloc = parsed.netloc.lower()
+        # 去除默认端口
+        port = cls.DEFAULT_PORTS.get(scheme)
+        if port is not None and netloc.endswith(f":{port}"):
+            netloc = netloc[:-len(f":{port}")]
+        # 统一协议
+        if scheme in cls.SUPPORTED_PROTOCOLS:
+            scheme = "https"
+        # 去除路径末尾的斜杠
+        path = parsed.path.rstrip("/") or "/"
+        # 拼接并返回结果, 片段标识符不会被保留
+        return urlunparse(
+            (scheme, netloc, path, parsed.params, parsed.query, "")
+        )
+    
+    @classmethod
+    def canonical_url(cls, url: str, domains: Iterable[str] = ()) -> str:
+        """规范化 URL, 得到同一页面唯一的键
+        在 `normalize_url` 的基础上, 将镜像域名统一为 domains 中的第一个,
+        去除不影响页面内容的查询参数, 并将剩余的查询参数排序.  
+        注意: 结果仅用于比较, 不应当直接用于发起请求
+        
+        :param url: 要规范化的 URL
+        :type url: str
+        :param domains: 该网站的所有镜像域名, 第一个为主域名
+        :type domains: Iterable[str]
+        :return: 规范化后的 URL
+        
+        Example:
+            >>> Network.canonical_url(
+            >>>     "http://m.example.com/a/?utm_source=x&b=1#top",
+            >>>     ["www.example.com", "m.example.com"]
+            >>> )
+            'https://www.example.com/a?b=1'
+        """
+        # 先进行基本的规范化
+        parsed = urlparse(cls.normalize_url(url))
+        # 将镜像域名统一为主域名
+        domains = [i.lower() for i in domains]
+        netloc = parsed.netloc
+        if netloc in domains:
+            netloc = domains[0]
+        # 去除不影响页面内容的查询参数, 并将剩余的查询参数排序
+        query = urlencode(
+            sorted(
+                (key, value) for key, value in
+                parse_qsl(parsed.query, keep_blank_values=True)
+                if not cls.__is_tracking_param(key)
+            )
+        )
+        # 拼接并返回结果
+        return urlunparse(
+            (parsed.scheme, netloc, parsed.path, parsed.params, query, "")
+        )
+    
+    @classmethod
+    def canonical_path(cls, url: str) -> str:
+        """获取规范化后的路径以及查询参数, 用于只记录路径的场景
+        
+        :param url: URL 或者以 "/" 开头的路径
+        :type url: str
+        :return: 规范化后的路径, 若有查询参数则以 "?" 连接
+        
+        Example:
+            >>> Network.canonical_path("/a/?spm=1&b=1#top")
+            '/a?b=1'
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(url, str)
+        # 路径需要补全为 URL 才能规范化
+        if url.startswith("/"):
+            url = "https://localhost" + url
+        parsed = urlparse(cls.canonical_url(url))
+        return parsed.path + (f"?{parsed.query}" if parsed.query else "")
+    
+    @classmethod
+    def __is_tracking_param(cls, key: str) -> bool:
+        """判断查询参数是否不影响页面内容"""
+        key = key.lower()
+        return any(
+            key.startswith(i) if i.endswith("_") else key == i
+            for i in cls.TRACKING_PARAMS
+        )
+    
     def save_debug_file(self):
         """保存该 URL 获取到的页面, 以支持开发人员进行调试"""
         with open("debug.html", "w", encoding=self.__encoding) as debug_file:
             debug_file.write(self.__response.text)
     
     @classmethod
+    @timed("network.get")
     def get(
         cls, url: str, encoding: str = "UTF-8",
         redirect: bool = True, **other_headers
     ):
         """使用 GET 方法获取 Web 页面
-        该方法主要将 requests.get 函数进行包装
+        该方法主要将 requests.get 函数进行包装, 请求通过当前线程的会话发出
         
         :param url: 要获取的页面的 URL
         :type url: str
@@ -118,10 +269,52 @@ class Network(object):
             buffer.pop("User_Agent")
         # 获取页面并返回
         return Network(
-            requests.get(url, allow_redirects=redirect, headers=buffer),
-               encoding
+            cls.session().get(
+                url, allow_redirects=redirect, headers=buffer
+            ), encoding
         )
     
+    @classmethod
+    def session(cls) -> requests.Session:
+        """获取当前线程的会话
+        requests.Session 不是线程安全的, 因此每个线程各使用一个会话,
+        同一线程对同一主机的请求可以复用已经建立的连接
+        
+        :return: 当前线程的会话
+        """
+        if getattr(cls.__sessions, "version", None) != \
+            cls.__adapters_version:
+            session = requests.Session()
+            for prefix, adapter in cls.__adapters.items():
+                session.mount(prefix, adapter)
+            cls.__sessions.session = session
+            cls.__sessions.version = cls.__adapters_version
+        return cls.__sessions.session
+    
+    @classmethod
+    def mount(
+        cls, prefix: str, adapter: requests.adapters.BaseAdapter | None
+    ) -> None:
+        """为所有线程的会话挂载传输适配器
+        以该前缀开头的 URL 都会通过该适配器发出, 可用于代理或者本地的模拟网站
+        
+        :param prefix: URL 前缀, 例如 "https://www.example.com/"
+        :type prefix: str
+        :param adapter: 传输适配器, 为 None 时取消挂载
+        :type adapter: requests.adapters.BaseAdapter | None
+        
+        Example:
+            >>> Network.mount("https://www.example.com/", adapter)
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(prefix, str)
+        if adapter is None:
+            cls.__adapters.pop(prefix, None)
+        else:
+            assert isinstance(adapter, requests.adapters.BaseAdapter)
+            cls.__adapters[prefix] = adapter
+        cls.__adapters_version += 1
+    
     @property
     def response(self):
         return self.__response
@@ -141,11 +334,38 @@ class Network(object):
     
     @property
     def bs(self):
-        return bs(self.text.replace("\xa0", ""), "lxml")
+        # 同一个页面只解析一次
+        if self.__bs is None:
+            from bs4 import BeautifulSoup
+            with Metrics().timer("network.parse"):
+                self.__bs = BeautifulSoup(
+                    self.text.replace("\xa0", ""), "lxml"
+                )
+        return self.__bs
+    
+    @property
+    def tree(self):
+        """lxml 解析的文档树, 根元素为 html 元素, 供引擎的选择器使用"""
+        # 同一个页面只解析一次, 与 bs 相同地去除不间断空格
+        if self.__tree is None:
+            import lxml.html
+            from lxml.etree import ParserError
+            with Metrics().timer("network.parse"):
+                try:
+                    self.__tree = lxml.html.document_fromstring(
+                        self.text.replace("\xa0", "").encode("UTF-8"),
+                        parser=lxml.html.HTMLParser(encoding="UTF-8")
+                    )
+                except ParserError:
+                    # 空白的页面视为没有任何内容的文档
+                    self.__tree = lxml.html.Element("html")
+        return self.__tree
     
     @property
+    @timed("network.parse")
     def h1(self):
-        result = bs(self.text, "lxml").find("h1")
+        from bs4 import BeautifulSoup
+        result = BeautifulSoup(self.text, "lxml").find("h1")
         if result:
             return result.text
         else:
@@ -10,9 +10,6 @@ import io
 import hashlib
 import threading
 
-# 导入 PIL 库
-from PIL import Image
-
 
 def singleton(cls):
     """单例模式装饰器
@@ -89,8 +86,13 @@ def convert_image(image: bytes, format: str = "JPEG") -> bytes:
     Example:
         >>> convert_image(image)
     """
+    # 导入 PIL 库, 该库只在保存书籍时使用, 因此在这里导入
+    from PIL import Image
     # 创建 BytesIO 对象
     image = Image.open(io.BytesIO(image))
+    # JPEG 不支持调色板和透明通道, 需要先转换为 RGB 模式
+    if format.upper() in ("JPEG", "JPG") and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
     # 创建 BytesIO 对象
     output = io.BytesIO()
     # 保存图像
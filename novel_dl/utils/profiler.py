@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: profiler.py
+# @Time: 19/10/2026 23:55
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""
+profiler.py
+这个模块提供了命令行使用的性能分析工具。
+类:
+    Profiler: 在 cProfile 与采样分析之间选择的性能分析器, 结束时将结果写入日志目录。
+    SamplingProfiler: 在独立的线程中定时采集所有线程的调用栈, 适用于多线程的下载流程。
+注意事项:
+    cProfile 只能分析启动它的线程, 因此多线程下载时应当使用采样分析。
+    采样分析的结果为 collapsed stack 格式(每行为 "函数;函数;函数 次数"),
+    可以直接使用 flamegraph.pl 或 speedscope 生成火焰图。
+"""
+
+
+# 导入标准库
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# 导入自定义库
+from novel_dl.core.settings import Settings
+from novel_dl.utils.fs import mkdir
+
+
+# 摘要中列出的函数数量
+TOP_FUNCTIONS = 30
+
+
+class SamplingProfiler(object):
+    def __init__(self, interval: float = 0.005):
+        """采样性能分析器
+        在独立的线程中每隔一段时间采集一次所有其他线程的调用栈.
+
+        :param interval: 采样的间隔, 单位是秒
+        :type interval: float
+
+        Example:
+            >>> profiler = SamplingProfiler()
+            >>> profiler.start()
+            >>> ...
+            >>> profiler.stop()
+            >>> print(profiler.summary())
+        """
+        # 确认传入的参数是否正确
+        assert isinstance(interval, (int, float)) and interval > 0
+        self.interval = interval
+        # 调用栈到采样次数的映射, 调用栈从最外层的函数开始
+        self.stacks: Counter[Tuple[str, ...]] = Counter()
+        self.samples = 0
+        self.__stop = threading.Event()
+        self.__thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """开始采样"""
+        self.__stop.clear()
+        self.__thread = threading.Thread(
+            target=self.__run, name="采样线程", daemon=True
+        )
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """停止采样"""
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __run(self) -> None:
+        own = threading.get_ident()
+        while not self.__stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} "
+                        f"({os.path.basename(code.co_filename)}:"
+                        f"{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """将采样结果转换为 collapsed stack 格式"""
+        return "".join(
+            f"{';'.join(stack)} {number}\n"
+            for stack, number in self.stacks.most_common()
+        )
+
+    def summary(self, limit: int = TOP_FUNCTIONS) -> str:
+        """采样次数最多的函数的摘要
+
+        :param limit: 列出的函数数量
+        :type limit: int
+        :return: 摘要文本, 分别按自身的采样次数与包括子函数的采样次数排列
+        """
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, number in self.stacks.items():
+            own[stack[-1]] += number
+            # 递归调用在同一个调用栈中只计算一次
+            for name in set(stack):
+                total[name] += number
+        all_samples = sum(self.stacks.values()) or 1
+        lines = [
+            f"采样次数: {self.samples}, 采样间隔: {self.interval} 秒", "",
+            "按自身的采样次数排列:",
+        ]
+        lines += [
+            f"{number:>8} {number / all_samples:>7.2%}  {name}"
+            for name, number in own.most_common(limit)
+        ]
+        lines += ["", "按包括子函数的采样次数排列:"]
+        lines += [
+            f"{number:>8} {number / all_samples:>7.2%}  {name}"
+            for name, number in total.most_common(limit)
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class Profiler(object):
+    # 支持的分析方式
+    MODES = ("auto", "cprofile", "sample")
+
+    def __init__(self, mode: str = "auto", name: str = "profile"):
+        """命令行使用的性能分析器
+        结束时将结果写入 `Settings().LOG_DIR`:
+        使用 cProfile 时为 <name>-<时间>-<进程号>.prof 以及 .txt 摘要,
+        使用采样分析时为 <name>-<时间>-<进程号>.collapsed 以及 .txt 摘要.
+
+        :param mode: 分析方式, auto 在启用多线程时使用采样分析, 否则使用 cProfile
+        :type mode: str
+        :param name: 输出文件名的前缀
+        :type name: str
+
+        Example:
+            >>> with Profiler("cprofile", "download_novel") as profiler:
+            >>>     ...
+            >>> print(profiler.paths)
+        """
+        # 确认传入的参数是否正确
+        assert mode in self.MODES
+        assert isinstance(name, str)
+        if mode == "auto":
+            mode = "sample" if Settings().MULTI_THREAD else "cprofile"
+        self.mode = mode
+        self.name = name
+        # 写入的文件路径, 结束后才有值
+        self.paths: List[str] = []
+        self.__profiler = None
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """开始分析"""
+        if self.mode == "cprofile":
+            import cProfile
+            self.__profiler = cProfile.Profile()
+            self.__profiler.enable()
+        else:
+            self.__profiler = SamplingProfiler()
+            self.__profiler.start()
+
+    def stop(self) -> List[str]:
+        """停止分析并写入结果, 返回写入的文件路径"""
+        if self.__profiler is None:
+            return self.paths
+        profiler, self.__profiler = self.__profiler, None
+        mkdir(Settings().LOG_DIR)
+        base = os.path.join(
+            Settings().LOG_DIR,
+            f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        )
+        if self.mode == "cprofile":
+            import io
+            import pstats
+            profiler.disable()
+            profiler.dump_stats(f"{base}.prof")
+            stream = io.StringIO()
+            stats = pstats.Stats(profiler, stream=stream)
+            stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            stats.sort_stats("tottime").print_stats(TOP_FUNCTIONS)
+            outputs: Dict[str, str] = {".txt": stream.getvalue()}
+            self.paths = [f"{base}.prof",]
+        else:
+            profiler.stop()
+            outputs = {
+                ".collapsed": profiler.collapsed(),
+                ".txt": profiler.summary(),
+            }
+            self.paths = []
+        for suffix, text in outputs.items():
+            with open(f"{base}{suffix}", "w", encoding="UTF-8") as file:
+                file.write(text)
+            self.paths.append(f"{base}{suffix}")
+        return self.paths
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: throttle.py
+# @Time: 19/10/2026 18:10
+# @Author: Amundsen Severus Rubeus Bjaaland
+"""按域名限制请求频率的工具, 主要为 DomainThrottle 类."""
+
+
+# 导入标准库
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Generator
+
+# 导入自定义库
+from novel_dl.core.settings import Settings
+from novel_dl.utils.options import singleton
+
+
+class _DomainState(object):
+    def __init__(self, max_connections: int):
+        """单个域名的限流状态"""
+        # 限制同时进行的请求数量
+        self.semaphore = threading.BoundedSemaphore(max_connections)
+        # 下一个请求最早可以开始的时间
+        self.next_time = 0.0
+        # 保护 next_time 的锁
+        self.lock = threading.Lock()
+
+
+@singleton
+class DomainThrottle(object):
+    def __init__(self):
+        """域名限流器
+        整个进程共享同一个实例, 因此同一个域名上的所有请求共用一份预算:
+        同时进行的请求数量不超过 `Settings().DOMAIN_MAX_CONNECTIONS`,
+        相邻两次请求开始的间隔不小于 `Settings().DOMAIN_REQUEST_INTERVAL`.
+        注意: 该类是线程安全的.
+
+        Example:
+            >>> with DomainThrottle().slot("www.example.com"):
+            >>>     Network.get("https://www.example.com/")
+        """
+        # 各域名的限流状态
+        self.__states: Dict[str, _DomainState] = {}
+        # 保护状态字典的锁
+        self.__lock = threading.Lock()
+
+    def __get_state(self, domain: str) -> _DomainState:
+        """获取域名的限流状态, 若不存在则创建"""
+        with self.__lock:
+            if domain not in self.__states:
+                self.__states[domain] = _DomainState(
+                    Settings().DOMAIN_MAX_CONNECTIONS
+                )
+            return self.__states[domain]
+
+    @contextmanager
+    def slot(self, domain: str) -> Generator[None, None, None]:
+        """占用一次请求的名额, 名额不足或间隔不够时会阻塞等待
+
+        :param domain: 请求的域名
+        :type domain: str
+        """
+        # 确认传入的参数的类型是否正确
+        assert isinstance(domain, str)
+        state = self.__get_state(domain)
+        # 等待同时进行的请求数量低于上限
+        with state.semaphore:
+            # 预约请求开始的时间, 保证相邻两次请求的间隔
+            with state.lock:
+                now = time.monotonic()
+                start = max(now, state.next_time)
+                state.next_time = start + Settings().DOMAIN_REQUEST_INTERVAL
+            # 等待到预约的时间
+            if start > now:
+                time.sleep(start - now)
+            yield None
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: conftest.py
+# @Time: 19/10/2026 23:40
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import time
+import threading
+from collections import Counter
+from urllib.parse import urlparse
+
+import pytest
+import requests
+
+from novel_dl.core import Settings, State, Book, Chapter
+from novel_dl.utils.network import Network
+from novel_dl.utils.circuit import CircuitBreaker
+from novel_dl.services.download import BookWeb, ErrorKind, RetryPolicy
+from novel_dl.services.download import retry
+
+
+def page(url, text="", status=200, encoding="UTF-8"):
+    """使用给定的状态码与文本构造页面, 不发出请求"""
+    response = requests.Response()
+    response.status_code = status
+    response.url = url
+    response._content = text.encode(encoding)
+    return Network(response, encoding)
+
+
+class StubWeb(BookWeb):
+    """测试使用的引擎
+    书籍信息只依赖于页面的 URL, 章节列表为书籍 URL 之后的 1.html 到 chapters.html,
+    状态码不是 200 的章节页面解析失败, 章节内容由 chapter_content 决定.
+    测试中只需要覆盖与测试有关的属性或方法
+    """
+    name = "测试网站"
+    domains = ["stub.test",]
+    # 章节列表中的章节数量
+    chapters = 3
+
+    def get_book_info(self, response):
+        return Book(
+            "测试书籍名", "测试作者名", State.END, "测试简介",
+            [response.response.url,]
+        )
+
+    def get_chapter_url(self, response):
+        return [
+            f"{response.response.url}{i}.html"
+            for i in range(1, self.chapters + 1)
+        ]
+
+    def get_chapter(self, response, index, book_name):
+        if response.response.status_code != 200:
+            raise ValueError(response.response.status_code)
+        return Chapter(
+            index, f"第{index}章", [response.response.url,],
+            time.time(), book_name, self.chapter_content(response, index)
+        )
+
+    def chapter_content(self, response, index):
+        return []
+
+    def is_protected(self, response, network_error, analyze_error):
+        return False
+
+    def prevent_protected(self, *param):
+        return None
+
+
+class FakeNetwork:
+    """替换 Network.get 的模拟网络
+    记录每个 URL 与每个域名的请求次数, 以及同时进行的请求数量的峰值.
+    respond 的参数为 URL 与该 URL 第几次被请求, 返回页面的文本或者 (状态码, 文本),
+    也可以抛出异常; delay 为每次请求的耗时, 可以是以 URL 为参数的函数
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = Counter()
+        self.domains = Counter()
+        self.active = Counter()
+        self.peak = Counter()
+        self.total_peak = 0
+        self.delay = 0.0
+        self.respond = lambda url, count: ""
+
+    def get(self, url, encoding="UTF-8", redirect=True, **other_headers):
+        domain = urlparse(url).netloc
+        with self.lock:
+            self.calls[url] += 1
+            count = self.calls[url]
+            self.domains[domain] += 1
+            self.active[domain] += 1
+            self.peak[domain] = max(self.peak[domain], self.active[domain])
+            self.total_peak = max(
+                self.total_peak, sum(self.active.values())
+            )
+        try:
+            time.sleep(self.delay(url) if callable(self.delay) else self.delay)
+            result = self.respond(url, count)
+        finally:
+            with self.lock:
+                self.active[domain] -= 1
+        status, text = result if isinstance(result, tuple) else (200, result)
+        return page(url, text, status, encoding)
+
+
+@pytest.fixture
+def network(monkeypatch):
+    """使用模拟网络, 并取消重试的等待时间与同一域名的请求间隔"""
+    fake = FakeNetwork()
+    monkeypatch.setattr(Network, "get", fake.get)
+    for kind in ErrorKind:
+        monkeypatch.setitem(
+            retry.DEFAULT_POLICIES, kind,
+            RetryPolicy(retry.DEFAULT_POLICIES[kind].max_attempts, 0.0)
+        )
+    old_interval = Settings().DOMAIN_REQUEST_INTERVAL
+    Settings().DOMAIN_REQUEST_INTERVAL = 0.0
+    CircuitBreaker().reset()
+    yield fake
+    CircuitBreaker().reset()
+    Settings().DOMAIN_REQUEST_INTERVAL = old_interval
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_startup.py
+# @Time: 19/10/2026 21:00
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import os
+import sys
+import subprocess
+from typing import Dict
+
+
+# 仓库的根目录
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)
+)))
+# 启动时不应当导入的第三方库
+HEAVY_MODULES = (
+    "ebooklib", "PIL", "yaml", "sqlalchemy", "bs4", "lxml",
+    "requests", "fake_useragent", "jieba",
+)
+# 导入 novel_dl 及其核心模块的时间预算, 单位是微秒
+IMPORT_BUDGET = 150000
+
+
+def import_time(code: str) -> Dict[str, int]:
+    """使用 python -X importtime 运行代码, 返回各模块的累计导入时间"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestStartup:
+    def test_import_budget(self):
+        times = import_time(
+            "import novel_dl; from novel_dl.core import Settings, Book"
+        )
+        assert [i for i in HEAVY_MODULES if i in times] == []
+        assert times["novel_dl"] + times["novel_dl.core"] < IMPORT_BUDGET
+
+    def test_lazy_network(self):
+        times = import_time("from novel_dl.utils.network import Network")
+        assert "fake_useragent" not in times
+        assert "bs4" not in times
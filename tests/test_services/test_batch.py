@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_batch.py
+# @Time: 19/10/2026 20:40
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import requests
+
+from conftest import StubWeb
+from novel_dl.core import Settings, State, Book
+from novel_dl.services.download import WebManager, BatchDownloader
+
+
+CHAPTERS = 6
+
+
+class FakeWeb(StubWeb):
+    name = "快速网站"
+    domains = ["fast.test",]
+    chapters = CHAPTERS
+
+    def get_book_info(self, response):
+        # 每本书的书名不同, 以便区分下载完成的书籍
+        return Book(
+            response.response.url, "测试作者名", State.END, "测试简介",
+            [response.response.url,]
+        )
+
+
+class SlowWeb(FakeWeb):
+    name = "缓慢网站"
+    domains = ["slow.test",]
+
+
+def respond(url, count):
+    if "missing" in url:
+        raise requests.ConnectionError(url)
+    return ""
+
+
+class TestBatchDownloader:
+    def test_download(self, network):
+        network.respond = respond
+        network.delay = lambda url: 0.05 if "slow.test" in url else 0.005
+        manager = WebManager()
+        manager.append(FakeWeb())
+        manager.append(SlowWeb())
+        urls = [f"https://slow.test/book/{i}/" for i in range(2)] + \
+            [f"https://fast.test/book/{i}/" for i in range(4)] + \
+            ["", "https://fast.test/missing/", "https://unknown.test/1/"]
+        finished, saved = [], []
+        summary = BatchDownloader(
+            manager, chapter_middle_ware=lambda x, y: saved.append(x) or x,
+            book_callback=lambda book, url: finished.append((book, url)),
+            max_connections=6, max_books=6
+        ).download(urls)
+
+        assert summary["books"] == 6
+        assert summary["failed_books"] == 2
+        assert summary["failures"] == []
+        assert summary["chapters"] == 6 * CHAPTERS == len(saved)
+        assert summary["domains"] == {
+            "slow.test": 2 * CHAPTERS, "fast.test": 4 * CHAPTERS
+        }
+        # 缓慢网站不会拖慢快速网站的书籍
+        books = [i[1] for i in finished if i[0] is not None]
+        assert all("fast.test" in i for i in books[:4])
+        # 章节按序号排列
+        for book, url in finished:
+            if book is not None:
+                assert [i.index for i in book.chapters] == \
+                    list(range(1, CHAPTERS + 1))
+        # 连接数量不超过预算
+        assert network.total_peak <= 6
+        assert max(network.peak.values()) <= \
+            Settings().DOMAIN_MAX_CONNECTIONS
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_bookshelf.py
+# @Time: 19/10/2026 11:05
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import time
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+
+from novel_dl.core import Settings
+from novel_dl.core import ContentType, Line, Chapter
+from novel_dl.core import State, Book
+from novel_dl.services.bookshelf import Bookshelf
+from novel_dl.services.bookshelf.search import SearchIndex
+from novel_dl.services.bookshelf.cache import BookshelfCache
+from novel_dl.services.bookshelf.blobs import migrate_legacy_tables
+
+
+@pytest.fixture
+def bookshelf(tmp_path):
+    old_data_dir = Settings().DATA_DIR
+    Settings().DATA_DIR = str(tmp_path)
+    yield Bookshelf()
+    Settings().DATA_DIR = old_data_dir
+
+
+class TestSearch:
+    def test_build_query(self):
+        assert SearchIndex.build_query("") == ""
+        assert SearchIndex.build_query('"') == '""""'
+        assert " OR " in SearchIndex.build_query("斗破苍穹", "OR")
+    
+    def test_search_books_by_name(self, bookshelf):
+        book_1 = Book(
+            "斗破苍穹", "天蚕土豆", State.END, "这里是斗气大陆",
+            ["https://example.com/1",]
+        )
+        book_2 = Book(
+            "武动乾坤", "天蚕土豆", State.END, "修炼武道",
+            ["https://example.com/2",]
+        )
+        bookshelf.save_book_info(book_1)
+        bookshelf.save_book_info(book_2)
+        
+        result = list(bookshelf.search_books_by_name("斗破"))
+        assert [i[0] for i in result] == [book_1,]
+        assert result[0][1] == ["https://example.com/1",]
+        
+        result = list(bookshelf.search_books_by_name("天蚕土豆"))
+        assert len(result) == 2
+        
+        assert list(bookshelf.search_books_by_name("不存在的书")) == []
+    
+    def test_search_chapters(self, bookshelf):
+        Settings().SEARCH_CHAPTERS = True
+        try:
+            book = Book(
+                "斗破苍穹", "天蚕土豆", State.END, "这里是斗气大陆",
+                ["https://example.com/1",]
+            )
+            chapter = Chapter(
+                1, "陨落的天才", ["https://example.com/1/1",],
+                time.time(), "斗破苍穹",
+                [Line(1, "萧炎看着测验魔石碑", ContentType.Text),]
+            )
+            bookshelf.save_book_info(book)
+            bookshelf.save_chapter_info(chapter, book.hash)
+            
+            assert list(bookshelf.search_books_by_name("萧炎")) == []
+            result = list(
+                bookshelf.search_books_by_name("萧炎", with_chapters=True)
+            )
+            assert [i[0] for i in result] == [book,]
+        finally:
+            Settings().SEARCH_CHAPTERS = False
+
+
+class TestCompleteBook:
+    def test_complete_book(self, bookshelf):
+        book = Book(
+            "斗破苍穹", "天蚕土豆", State.END, "这里是斗气大陆",
+            ["https://example.com/1",]
+        )
+        bookshelf.save_book_info(book)
+        for i in range(1, 4):
+            bookshelf.save_chapter_info(
+                Chapter(
+                    i, f"测试章节名_{i}", [f"https://example.com/1/{i}",],
+                    time.time(), "斗破苍穹",
+                    [Line(1, f"内容_{i}", ContentType.Text),]
+                ),
+                book.hash
+            )
+        
+        sources = bookshelf.get_chapter_sources(book.hash)
+        assert sorted([i[1] for i in sources]) == [
+            ["https://example.com/1/1",], ["https://example.com/1/2",],
+            ["https://example.com/1/3",]
+        ]
+        
+        book = bookshelf.complete_book(book)
+        assert len(book) == 3
+        chapter = book[1]
+        assert chapter.loaded == False
+        assert chapter.sources == ["https://example.com/1/2",]
+        assert chapter.loaded == False
+        assert [i.content for i in chapter.content] == ["内容_2",]
+        assert chapter.loaded == True
+    
+    def test_equivalent_sources(self, bookshelf):
+        for source in ("https://a.example.com/1", "https://b.example.com/9"):
+            bookshelf.save_book_info(Book(
+                "斗破苍穹", "天蚕土豆", State.END, "这里是斗气大陆", [source,]
+            ))
+        assert bookshelf.get_equivalent_sources(
+            "https://a.example.com/1"
+        ) == ["https://b.example.com/9",]
+        assert bookshelf.get_equivalent_sources(
+            "https://a.example.com/"
+        ) == []
+        assert bookshelf.get_equivalent_sources_batch([
+            "https://b.example.com/9", "https://c.example.com/2"
+        ]) == {
+            "https://b.example.com/9": ["https://a.example.com/1",],
+            "https://c.example.com/2": [],
+        }
+    
+    def test_index_legacy_sources(self, bookshelf):
+        # 没有来源索引的旧书架在打开时按书籍记录中的来源建立索引
+        bookshelf.save_book_info(Book(
+            "斗破苍穹", "天蚕土豆", State.END, "这里是斗气大陆",
+            ["https://a.example.com/1", "https://b.example.com/9"]
+        ))
+        with sqlite3.connect(Settings().BOOKS_DB_PATH) as connection:
+            connection.execute("DELETE FROM book_sources")
+        assert Bookshelf().get_equivalent_sources(
+            "https://b.example.com/9"
+        ) == ["https://a.example.com/1",]
+
+
+class TestBlobStore:
+    def test_deduplicate(self, bookshelf):
+        image = b"image" * 100
+        book_1 = Book(
+            "测试书籍名_1", "测试作者名_1", State.END, "测试简介_1",
+            ["https://example.com/1",], [image, image]
+        )
+        book_2 = Book(
+            "测试书籍名_2", "测试作者名_1", State.END, "测试简介_2",
+            ["https://example.com/2",], [image,]
+        )
+        bookshelf.save_book_info(book_1)
+        bookshelf.save_book_info(book_2)
+        for i in range(1, 3):
+            bookshelf.save_chapter_info(
+                Chapter(
+                    i, f"测试章节名_{i}", [f"https://example.com/1/{i}",],
+                    time.time(), "测试书籍名_1",
+                    [Line(1, image, ContentType.Image, alt="图片"),]
+                ),
+                book_1.hash
+            )
+        
+        with sqlite3.connect(Settings().BOOKS_DB_PATH) as connection:
+            assert connection.execute(
+                "SELECT COUNT(*), SUM(ref_count) FROM blobs"
+            ).fetchone() == (1, 4)
+        
+        book = bookshelf.complete_book(book_1)
+        assert [i.content for i in book[0].content] == [image,]
+        assert [i.attrs for i in book[0].content] == [{"alt": "图片"},]
+    
+    def test_migrate_duplicate_covers(self, tmp_path):
+        # 旧版本中重复的封面记录迁移后只保留一次引用
+        path = tmp_path / "legacy.db"
+        with sqlite3.connect(path) as connection:
+            connection.execute(
+                "CREATE TABLE book_covers (book_hash BLOB, cover_image BLOB)"
+            )
+            connection.executemany(
+                "INSERT INTO book_covers VALUES (?, ?)",
+                [(b"book", b"image"), (b"book", b"image")]
+            )
+        migrate_legacy_tables(create_engine(f"sqlite:///{path}"))
+        with sqlite3.connect(path) as connection:
+            assert connection.execute(
+                "SELECT COUNT(*), SUM(ref_count) FROM blobs"
+            ).fetchone() == (1, 1)
+            assert connection.execute(
+                "SELECT COUNT(*) FROM book_covers"
+            ).fetchone() == (1,)
+
+
+class TestCache:
+    def test_read_through(self, bookshelf):
+        book = Book(
+            "斗破苍穹", "天蚕土豆", State.END, "这里是斗气大陆",
+            ["https://example.com/1",]
+        )
+        bookshelf.save_book_info(book)
+        chapter = Chapter(
+            1, "测试章节名_1", ["https://example.com/1/1",],
+            time.time(), "斗破苍穹", [Line(1, "内容_1", ContentType.Text),]
+        )
+        bookshelf.save_chapter_info(chapter, book.hash)
+        
+        assert bookshelf.get_book(book.hash) == book
+        hits = bookshelf.cache_stats["hits"]
+        assert bookshelf.get_book(book.hash) == book
+        assert bookshelf.cache_stats["hits"] == hits + 1
+        assert bookshelf.get_book(b"0" * 32) is None
+        
+        content = bookshelf.load_chapter_content(chapter.hash)
+        assert [i.content for i in content] == ["内容_1",]
+        content.clear()
+        assert len(bookshelf.load_chapter_content(chapter.hash)) == 1
+    
+    def test_invalidate(self, bookshelf):
+        Settings().FORCE_RELOAD = True
+        try:
+            book = Book(
+                "斗破苍穹", "天蚕土豆", State.END, "这里是斗气大陆",
+                ["https://example.com/1",]
+            )
+            bookshelf.save_book_info(book)
+            assert bookshelf.get_book(book.hash).desc == "这里是斗气大陆"
+            book = Book(
+                "斗破苍穹", "天蚕土豆", State.END, "新的简介",
+                ["https://example.com/1",]
+            )
+            bookshelf.save_book_info(book)
+            assert bookshelf.get_book(book.hash).desc == "新的简介"
+            
+            chapter = Chapter(
+                1, "测试章节名_1", ["https://example.com/1/1",],
+                time.time(), "斗破苍穹", [Line(1, "旧内容", ContentType.Text),]
+            )
+            bookshelf.save_chapter_info(chapter, book.hash)
+            assert len(bookshelf.get_chapter_sources(book.hash)) == 1
+            assert bookshelf.load_chapter_content(chapter.hash)[0].content \
+                == "旧内容"
+            chapter = Chapter(
+                1, "测试章节名_1", ["https://example.com/1/1",],
+                time.time(), "斗破苍穹", [Line(1, "新内容", ContentType.Text),]
+            )
+            bookshelf.save_chapter_info(chapter, book.hash)
+            assert bookshelf.load_chapter_content(chapter.hash)[0].content \
+                == "新内容"
+        finally:
+            Settings().FORCE_RELOAD = False
+    
+    def test_stale_put(self):
+        # 读取数据库期间其他线程写入并使缓存失效, 读取到的旧数据不会被缓存
+        cache = BookshelfCache()
+        key = ("test.db", "content", b"1" * 32)
+        generation = cache.generation(key)
+        cache.invalidate(key)
+        cache.put(key, ("旧内容",), generation)
+        assert cache.get(key) is None
+        cache.put(key, ("新内容",), cache.generation(key))
+        assert cache.get(key) == ("新内容",)
+        cache.invalidate(key)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_catalog.py
+# @Time: 19/10/2026 19:40
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import pytest
+import requests
+
+from novel_dl.core import Settings
+from novel_dl.utils.network import Network
+from novel_dl.services.download.engines import Engine2
+from novel_dl.services.download.catalog import sitemap_book_urls
+from novel_dl.services.download.catalog import listing_book_urls
+from novel_dl.services.download.catalog import id_range_book_urls
+
+
+DOMAIN = Engine2.domains[0]
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+PAGES = {
+    f"https://{DOMAIN}/": '<a href="/novel/7.html">最新</a>',
+    f"https://{DOMAIN}/sitemap.xml":
+        f'<sitemapindex xmlns="{SITEMAP_NS}">'
+        f'<sitemap><loc>https://{DOMAIN}/sitemap-1.xml</loc></sitemap>'
+        f'</sitemapindex>',
+    f"https://{DOMAIN}/sitemap-1.xml":
+        f'<urlset xmlns="{SITEMAP_NS}">'
+        f'<url><loc>https://{DOMAIN}/novel/1.html</loc></url>'
+        f'<url><loc>https://{DOMAIN}/about.html</loc></url>'
+        f'<url><loc>https://other.com/novel/2.html</loc></url>'
+        f'</urlset>',
+    f"https://{DOMAIN}/list/1":
+        '<a href="/novel/1.html">1</a><a href="/novel/1.html">1</a>'
+        '<a href="/book/1/1.html">章节</a><a href="/list/2">下一页</a>',
+    f"https://{DOMAIN}/list/2":
+        '<a href="/novel/2.html">2</a><a href="/list/1">下一页</a>',
+}
+
+
+def fake_get(url, encoding="UTF-8", redirect=True, **other_headers):
+    response = requests.Response()
+    response.status_code = 200 if url in PAGES else 404
+    response.url = url
+    response._content = PAGES.get(url, "").encode("utf-8")
+    return Network(response, encoding)
+
+
+@pytest.fixture(autouse=True)
+def fake_network(monkeypatch):
+    monkeypatch.setattr(Network, "get", fake_get)
+    old_interval = Settings().DOMAIN_REQUEST_INTERVAL
+    Settings().DOMAIN_REQUEST_INTERVAL = 0.0
+    yield None
+    Settings().DOMAIN_REQUEST_INTERVAL = old_interval
+
+
+class TestCatalog:
+    def test_sitemap(self):
+        assert list(
+            sitemap_book_urls(Engine2(), f"https://{DOMAIN}/sitemap.xml")
+        ) == [f"https://{DOMAIN}/novel/1.html",]
+    
+    def test_listing(self):
+        assert list(
+            listing_book_urls(Engine2(), f"https://{DOMAIN}/list/1")
+        ) == [
+            f"https://{DOMAIN}/novel/1.html", f"https://{DOMAIN}/novel/2.html"
+        ]
+        assert len(list(
+            listing_book_urls(Engine2(), f"https://{DOMAIN}/list/1", 1)
+        )) == 1
+    
+    def test_id_range(self):
+        assert list(id_range_book_urls("/{}.html", 3, 0, -1)) == [
+            "/3.html", "/2.html", "/1.html"
+        ]
+        urls = list(Engine2().enumerate_book_urls())
+        assert len(urls) == 7
+        assert urls[0] == f"https://{DOMAIN}/novel/7.html"
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_daemon.py
+# @Time: 19/10/2026 22:00
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import json
+import time
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from novel_dl.core import Settings, State, Book
+from novel_dl.services.download import WebManager
+from novel_dl.services.bookshelf import Bookshelf
+from novel_dl.services.daemon import Daemon, JobQueue, JobState
+
+
+@pytest.fixture
+def server(tmp_path):
+    old_data_dir = Settings().DATA_DIR
+    Settings().DATA_DIR = str(tmp_path)
+    daemon = Daemon(1)
+    server = daemon.make_server("127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    thread.join()
+    daemon.jobs.close()
+    Settings().DATA_DIR = old_data_dir
+
+
+def request(url, data=None):
+    body = None if data is None else json.dumps(data).encode("utf-8")
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, body)) as r:
+            return r.status, json.loads(r.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+def wait_job(base, job_id):
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        status, job = request(f"{base}/jobs/{job_id}")
+        if job["state"] in ("done", "failed"):
+            return job
+        time.sleep(0.02)
+    raise TimeoutError(job_id)
+
+
+class TestJobQueue:
+    def test_jobs(self, monkeypatch):
+        monkeypatch.setattr(JobQueue, "MAX_HISTORY", 3)
+        queue = JobQueue({"echo": lambda params: params["text"]}, 2)
+        jobs = [queue.submit("echo", {"text": str(i)}) for i in range(5)]
+        jobs.append(queue.submit("echo", {}))
+        queue.close()
+        assert [i.result for i in jobs[:5]] == ["0", "1", "2", "3", "4"]
+        assert jobs[-1].state == JobState.FAILED
+        assert jobs[-1].error.startswith("KeyError")
+        assert queue.jobs() == jobs[-3:]
+        with pytest.raises(ValueError):
+            queue.submit("unknown", {})
+
+
+class TestDaemon:
+    def test_api(self, server, monkeypatch):
+        book = Book(
+            "测试书籍名", "测试作者名", State.END, "测试简介",
+            ["https://www.example.com/book/1/",]
+        )
+        monkeypatch.setattr(
+            WebManager, "download", lambda self, url, **kwargs: book
+        )
+        status, job = request(
+            f"{server}/jobs", {"type": "update", "url": "https://x/1/"}
+        )
+        assert status == 202 and job["state"] == "queued"
+        job = wait_job(server, job["id"])
+        assert job["state"] == "done"
+        assert job["result"]["name"] == "测试书籍名"
+        assert job["result"]["hash"] == book.hash.hex()
+
+        status, job = request(
+            f"{server}/jobs", {"type": "export", "hash": "00"}
+        )
+        job = wait_job(server, job["id"])
+        assert job["state"] == "failed"
+        assert job["error"].startswith("LookupError")
+
+        assert request(f"{server}/jobs", {"type": "rm"})[0] == 400
+        # 请求体不是 JSON 对象时同样返回 400, 不依赖 assert
+        assert request(f"{server}/jobs", ["update",])[0] == 400
+        assert request(f"{server}/jobs", "update")[0] == 400
+        assert request(f"{server}/jobs/missing")[0] == 404
+        assert len(request(f"{server}/jobs")[1]) == 2
+        status, stats = request(f"{server}/stats")
+        assert stats["jobs"]["done"] == 1 and stats["jobs"]["failed"] == 1
+
+
+    def test_alternates(self, server, monkeypatch):
+        # 书架中记录的其他来源不会写入任务的参数
+        received = []
+        monkeypatch.setattr(
+            Bookshelf, "get_equivalent_sources",
+            lambda self, url: ["https://y/1/",]
+        )
+        monkeypatch.setattr(
+            WebManager, "download", lambda self, url, **kwargs:
+            received.append(kwargs["alternates"])
+        )
+        status, job = request(f"{server}/jobs", {
+            "type": "update", "url": "https://x/1/",
+            "alternates": ["https://z/1/",]
+        })
+        job = wait_job(server, job["id"])
+        assert received == [["https://z/1/", "https://y/1/"],]
+        assert job["params"]["alternates"] == ["https://z/1/",]
@@ -0,0 +1,19 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_engines.py
+# @Time: 19/10/2026 23:10
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+from benchmarks.run import run_benchmark
+
+
+class TestEngines:
+    def test_fake_site(self):
+        # 使用基准测试的模拟网站, 确认各引擎可以完整地下载、保存书籍
+        result = run_benchmark(books=1, chapters=3, paragraphs=3)
+        for name in ("Engine2", "Engine3", "Engine4"):
+            stats = result["engines"][name]
+            assert stats["chapters"] == 3, name
+            assert stats["failed_books"] == 0, name
+            assert stats["failed_chapters"] == 0, name
\ No newline at end of file
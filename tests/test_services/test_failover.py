@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_failover.py
+# @Time: 19/10/2026 16:50
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+from contextlib import contextmanager
+
+import pytest
+import requests
+
+from conftest import StubWeb
+from novel_dl.core import Settings
+from novel_dl.utils.circuit import CircuitBreaker, CircuitState
+from novel_dl.utils.throttle import DomainThrottle
+from novel_dl.services.download import WebManager
+
+
+class MirrorWeb(StubWeb):
+    name = "镜像网站"
+    domains = ["down.test", "up.test"]
+
+
+class OtherWeb(StubWeb):
+    name = "其他网站"
+    domains = ["other.test",]
+
+
+def respond(url, count):
+    if "//down.test/" in url:
+        raise requests.ConnectionError(url)
+    return ""
+
+
+@pytest.fixture
+def mirror(network):
+    network.respond = respond
+    old = Settings().CIRCUIT_FAILURE_THRESHOLD
+    Settings().CIRCUIT_FAILURE_THRESHOLD = 2
+    yield network.domains
+    Settings().CIRCUIT_FAILURE_THRESHOLD = old
+
+
+class TestFailover:
+    def test_mirror(self, mirror):
+        manager = WebManager()
+        manager.append(MirrorWeb())
+        book = manager.download("https://down.test/book/")
+        # 连续失败两次后切换到镜像域名, 之后不再访问暂停的域名
+        assert mirror["down.test"] == 2
+        assert CircuitBreaker().state("down.test") == CircuitState.OPEN
+        assert [i.sources for i in book.chapters] == [
+            [f"https://up.test/book/{i}.html",] for i in range(1, 4)
+        ]
+
+    def test_alternate(self, mirror):
+        manager = WebManager()
+        manager.append(OtherWeb())
+        manager.append(MirrorWeb())
+        CircuitBreaker().record_failure("down.test", blocked=True)
+        CircuitBreaker().record_failure("up.test", blocked=True)
+        # 镜像域名全部暂停访问时使用其他网站中的等价来源
+        book = manager.download(
+            "https://up.test/book/", alternates=["https://other.test/9/"]
+        )
+        assert list(book.sources) == ["https://other.test/9/",]
+        assert len(book) == 3 and mirror["up.test"] == 0
+
+    def test_throttle_domain(self, mirror, monkeypatch):
+        slots = []
+
+        @contextmanager
+        def slot(domain):
+            slots.append(domain)
+            yield
+        monkeypatch.setattr(DomainThrottle(), "slot", slot)
+        manager = WebManager()
+        engine = MirrorWeb()
+        manager.append(engine)
+        result = manager.download_info("https://down.test/book/", throttle=True)
+        # 名额按实际请求的镜像域名占用, 而不是调用者传入的域名
+        assert slots == ["down.test", "down.test", "up.test", "up.test"]
+        chapter, kind = manager.attempt_chapter(
+            engine, result[2][0], 1, "测试书籍名", throttle=True
+        )
+        assert kind is None and slots[-1] == "up.test"
+        # 不经过 DomainThrottle 时不占用名额
+        manager.attempt_chapter(engine, result[2][1], 2, "测试书籍名")
+        assert len(slots) == 5
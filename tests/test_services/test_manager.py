@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_manager.py
+# @Time: 19/10/2026 23:55
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import time
+
+import pytest
+
+from conftest import StubWeb
+from novel_dl.core import Settings, Chapter
+from novel_dl.services.download import WebManager
+
+
+class ResumeWeb(StubWeb):
+    chapters = 5
+
+
+def downloaded(*sources):
+    # 书籍中间件, 添加来源为 sources 的已经下载的章节
+    def middle_ware(book):
+        for index, source in enumerate(sources, 1):
+            book.append(Chapter(
+                index, f"第{index}章", [source,], time.time(), book.name
+            ))
+        return book
+    return middle_ware
+
+
+@pytest.fixture
+def manager(network):
+    manager = WebManager()
+    manager.append(ResumeWeb())
+    return manager
+
+
+class TestResume:
+    def test_skip_downloaded(self, manager):
+        # 来源的写法不同, 但规范化之后与网站中的章节相同
+        reports = []
+        result = manager.download_info(
+            "https://stub.test/book/",
+            book_middle_ware=downloaded(
+                "HTTP://STUB.TEST:80/book/2.html/",
+                "https://Stub.Test:443/book/4.html#top",
+                "https://stub.test/book/9.html",
+            ),
+            report_callback=lambda *x: reports.append(x)
+        )
+        _, book, chapter_list, indexes, _ = result
+        # 剩余章节保持网站中的顺序, 序号仍然以网站章节列表中的位置为准
+        assert chapter_list == [
+            f"https://stub.test/book/{i}.html" for i in (1, 3, 5)
+        ]
+        assert [indexes[i] for i in chapter_list] == [1, 3, 5]
+        # 网站中不存在的来源不影响结果
+        assert reports == [(2, 3),]
+        assert len(book) == 3
+
+    def test_force_reload(self, manager):
+        reports = []
+        old = Settings().FORCE_RELOAD
+        Settings().FORCE_RELOAD = True
+        try:
+            result = manager.download_info(
+                "https://stub.test/book/",
+                book_middle_ware=downloaded("https://stub.test/book/2.html"),
+                report_callback=lambda *x: reports.append(x)
+            )
+        finally:
+            Settings().FORCE_RELOAD = old
+        assert len(result[2]) == 5 and reports == [(0, 5),]
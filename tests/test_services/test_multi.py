@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_multi.py
+# @Time: 19/10/2026 18:20
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import pytest
+
+from conftest import StubWeb
+from novel_dl.core.books import Line, ContentType
+from novel_dl.services.download import WebManager, MultiSourceDownloader
+from novel_dl.services.download.multi import normalize_title
+
+
+CHAPTERS = 12
+NUMERALS = "一 二 三 四 五 六 七 八 九 十 十一 十二".split()
+
+
+def text_of(number):
+    return "".join(
+        chr(0x4e00 + (number * 7919 + i * 104729) % 20000) for i in range(200)
+    )
+
+
+class SourceWeb(StubWeb):
+    name = "来源网站"
+    domains = ["a.test",]
+    chapters = CHAPTERS
+    # 该网站的章节序号相对于真实章节的偏移
+    offset = 0
+
+    def chapter_content(self, response, index):
+        return [Line(0, text_of(index + self.offset), ContentType.Text),]
+
+
+class OtherWeb(SourceWeb):
+    name = "其他来源网站"
+    domains = ["b.test",]
+
+
+class ShiftedWeb(SourceWeb):
+    name = "错位来源网站"
+    domains = ["c.test",]
+    offset = 1
+
+
+class NoticeWeb(SourceWeb):
+    # 章节列表的第一项为公告, 之后的章节序号都比真实章节大 1
+    name = "公告来源网站"
+    domains = ["d.test",]
+
+    def get_chapter_url(self, response):
+        return [
+            f"{response.response.url}{i}.html" for i in range(CHAPTERS + 1)
+        ]
+
+    def chapter_content(self, response, index):
+        # 内容由 URL 决定, 对齐错误时内容与其他来源不一致
+        number = int(response.response.url.rsplit("/", 1)[1][:-5])
+        return [Line(0, text_of(number), ContentType.Text),]
+
+
+def chapter_list(url):
+    # 章节列表页面, 公告来源网站使用中文数字与不同的标点
+    if url.startswith("https://d.test/"):
+        links = ['<a href="0.html">公告：请假条</a>',] + [
+            f'<a href="{i}.html">第{NUMERALS[i - 1]}章：标题{i}</a>'
+            for i in range(1, CHAPTERS + 1)
+        ]
+    else:
+        links = [
+            f'<a href="{i}.html">第{i}章 标题{i}</a>'
+            for i in range(1, CHAPTERS + 1)
+        ]
+    return "<ul>" + "".join(f"<li>{i}</li>" for i in links) + "</ul>"
+
+
+def respond(url, count):
+    if url.endswith("/"):
+        return chapter_list(url)
+    # 第一个来源缺少第 4 章
+    if url == "https://a.test/1/4.html":
+        return 404, ""
+    return ""
+
+
+@pytest.fixture
+def sources(network):
+    network.respond = respond
+    network.delay = 0.005
+    return network
+
+
+@pytest.fixture
+def manager():
+    manager = WebManager()
+    for web in (SourceWeb(), OtherWeb(), ShiftedWeb(), NoticeWeb()):
+        manager.append(web)
+    return manager
+
+
+class TestMultiSourceDownloader:
+    def test_download(self, sources, manager):
+        downloader = MultiSourceDownloader(manager, verify_interval=4)
+        failed = []
+        book = downloader.download(
+            "https://a.test/1/", ["https://b.test/2/",],
+            failed_callback=failed.extend
+        )
+        summary = downloader.summary
+        assert [i.index for i in book.chapters] == \
+            list(range(1, CHAPTERS + 1))
+        # 第一个来源缺少的章节由其他来源补充
+        assert failed == [] and summary["failed_chapters"] == 0
+        assert "https://b.test/2/4.html" in book[3].sources
+        # 两个来源都参与了下载
+        assert all(i > 0 for i in summary["sources"].values())
+        assert summary["chapters"] == CHAPTERS
+        # 第 4 章只有一个来源可以下载, 因此只比较了第 8 章与第 12 章
+        assert summary["verified"] == 2
+        assert summary["mismatches"] == []
+
+    def test_mismatch(self, sources, manager):
+        downloader = MultiSourceDownloader(manager, verify_interval=1)
+        book = downloader.download("https://b.test/2/", ["https://c.test/3/",])
+        # 序号错位的来源被停用, 比较过的章节使用可信来源的内容
+        mismatches = downloader.summary["mismatches"]
+        assert mismatches and all(
+            i["dropped"] == "https://c.test/3/" for i in mismatches
+        )
+        assert [i.index for i in book.chapters] == \
+            list(range(1, CHAPTERS + 1))
+        assert all(
+            str(next(i.content)) == text_of(i.index) for i in book.chapters
+        )
+
+    def test_align_titles(self, sources, manager):
+        downloader = MultiSourceDownloader(manager, verify_interval=1)
+        book = downloader.download("https://b.test/2/", ["https://d.test/4/",])
+        # 按标题对齐后公告不会错开之后的章节, 也不会被下载
+        summary = downloader.summary
+        assert summary["mismatches"] == [] and summary["verified"] > 0
+        assert summary["sources"]["https://d.test/4/"] > 0
+        assert [i.index for i in book.chapters] == \
+            list(range(1, CHAPTERS + 1))
+        assert all(
+            str(next(i.content)) == text_of(i.index) for i in book.chapters
+        )
+        assert all(
+            "https://d.test/4/0.html" not in i.sources for i in book.chapters
+        )
+
+    def test_normalize_title(self):
+        assert normalize_title("第十二章 风起") == \
+            normalize_title("第012章：风起") == "第12章风起"
+        assert normalize_title("第一百零五回") == "第105回"
+        assert normalize_title("第两千零一章") == "第2001章"
+        assert normalize_title(" ！ ") == ""
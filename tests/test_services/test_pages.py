@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_pages.py
+# @Time: 19/10/2026 22:10
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import re
+import time
+
+import pytest
+import requests
+
+from conftest import StubWeb, page
+from novel_dl.core import Settings
+from novel_dl.utils.circuit import CircuitBreaker, CircuitState
+from novel_dl.core.books import ContentType, Line
+from novel_dl.services.download import WebManager, ErrorKind
+from novel_dl.services.download.engines import Engine1
+
+
+def render(url, pages):
+    # 每个分页显示总页数, 除了最后一页之外都有指向下一页的链接
+    number = int(re.search(r"_(\d+)\.html$", url).group(1))
+    link = f'<a id="next" href="1_{number + 1}.html">下一页</a>' \
+        if number < pages else '<a id="next" href="2_1.html">下一章</a>'
+    return f"<p>第{number}页</p><span>共{pages}页</span>{link}"
+
+
+def render_engine1(url, pages):
+    # 与 www.biquge.hk 的章节页面结构相同, 标题的末尾为当前分页与总页数
+    match = re.search(r"/(\d+)(?:_(\d+))?\.html$", url)
+    chapter, number = match.group(1), int(match.group(2) or 1)
+    link = f'<a href="/book/1/{chapter}_{number + 1}.html">下一页</a>' \
+        if number < pages else '<a href="/book/1/3.html">下一章</a>'
+    return f"""
+    <html><body>
+    <h1>测试书籍 第二章 分页（{number}/{pages}）</h1>
+    <div id="chaptercontent">
+        <p>第{number}页第一段</p><p>第{number}页第二段</p>
+    </div>
+    <div class="read-page">
+        <a href="/book/1/1.html">上一章</a><a href="/book/1/">目录</a>{link}
+    </div>
+    </body></html>
+    """
+
+
+class PagedWeb(StubWeb):
+    name = "分页网站"
+    domains = ["paged.test",]
+
+    def __init__(self, predict):
+        self.predict = predict
+
+    def chapter_content(self, response, index):
+        return [
+            Line(number + 1, i.tree.xpath("//p/text()")[0], ContentType.Text)
+            for number, i in enumerate(self.chapter_pages(response))
+        ]
+
+    def get_chapter_url(self, response):
+        return [response.get_next_url("/1_1.html"),]
+
+    def chapter_page_urls(self, response):
+        if not self.predict:
+            return []
+        pages = int(re.search(r"共(\d+)页", response.text).group(1))
+        return [
+            response.get_next_url(f"1_{i}.html") for i in range(2, pages + 1)
+        ]
+
+    def next_chapter_page(self, response):
+        link = response.tree.xpath('//a[@id="next"]')[0]
+        if link.text_content() == "下一章":
+            return None
+        return response.get_next_url(link.get("href"))
+
+
+class Site:
+    def __init__(self, renderer, pages):
+        self.renderer = renderer
+        self.pages = pages
+        # URL 到前几次请求失败的映射
+        self.failures = {}
+
+    def respond(self, url, count):
+        if count <= self.failures.get(url, 0):
+            raise requests.ConnectionError(url)
+        # 书籍页面只用于获取章节列表
+        if url.endswith("/"):
+            return ""
+        return self.renderer(url, self.pages)
+
+
+@pytest.fixture
+def site(network):
+    site = Site(render, 5)
+    network.respond = site.respond
+    network.delay = lambda url: 0.1 if url.endswith(".html") else 0.0
+    old = Settings().DOMAIN_MAX_CONNECTIONS
+    Settings().DOMAIN_MAX_CONNECTIONS = 3
+    yield site
+    Settings().DOMAIN_MAX_CONNECTIONS = old
+
+
+def attempt(engine, url="https://paged.test/1_1.html"):
+    return WebManager().attempt_chapter(engine, url, 1, "测试书籍", True)
+
+
+def download_one(engine):
+    chapter = WebManager().download_one_chapter(
+        engine, "https://paged.test/1_1.html", 1, "测试书籍"
+    )
+    return chapter, None
+
+
+def download(engine):
+    manager = WebManager()
+    manager.append(engine)
+    book = manager.download("https://paged.test/book/")
+    return book[0], None
+
+
+class TestChapterPages:
+    @pytest.mark.parametrize("predict", [True, False])
+    @pytest.mark.parametrize("fetch", [attempt, download_one, download])
+    def test_order(self, site, network, predict, fetch):
+        start = time.perf_counter()
+        chapter, kind = fetch(PagedWeb(predict))
+        elapsed = time.perf_counter() - start
+        assert kind is None
+        assert [str(i) for i in chapter.content] == \
+            [f"第{i}页" for i in range(1, 6)]
+        # 预测的分页同时下载, 之后确认没有更多的分页时不会重复请求
+        assert sorted(
+            i for i in network.calls.elements() if i.endswith(".html")
+        ) == [f"https://paged.test/1_{i}.html" for i in range(1, 6)]
+        # 经过 DomainThrottle 时分页与章节共用同一域名的预算,
+        # 否则每个章节同时下载的分页数量同样不超过该预算
+        if predict:
+            assert network.peak["paged.test"] == 3 and elapsed < 0.45
+        else:
+            assert network.peak["paged.test"] == 1 and elapsed >= 0.5
+
+    def test_retry(self, site, network):
+        # 分页下载失败时按重试策略重试, 不会重新下载整个章节
+        site.failures["https://paged.test/1_3.html"] = 2
+        chapter, kind = attempt(PagedWeb(True))
+        assert kind is None and len(list(chapter.content)) == 5
+        assert network.calls["https://paged.test/1_1.html"] == 1
+        assert network.calls["https://paged.test/1_3.html"] == 3
+        # 重试次数用完后章节失败, 失败的类型为分页最后一次失败的类型
+        site.failures["https://paged.test/1_3.html"] = 100
+        assert attempt(PagedWeb(True)) == \
+            (None, ErrorKind.NETWORK)
+
+    @pytest.mark.parametrize("predict", [True, False])
+    def test_half_open(self, site, predict):
+        # 暂停结束后第一页占用试探访问的名额, 分页不会因此失败
+        old = Settings().CIRCUIT_OPEN_SECONDS
+        Settings().CIRCUIT_OPEN_SECONDS = 0.05
+        try:
+            CircuitBreaker().record_failure("paged.test", blocked=True)
+            time.sleep(0.06)
+            assert CircuitBreaker().state("paged.test") == \
+                CircuitState.HALF_OPEN
+            chapter, kind = attempt(PagedWeb(predict))
+        finally:
+            Settings().CIRCUIT_OPEN_SECONDS = old
+        assert kind is None and len(list(chapter.content)) == 5
+        assert CircuitBreaker().state("paged.test") == CircuitState.CLOSED
+
+    def test_loop(self, network):
+        # 分页链接形成循环时只下载一次
+        network.respond = \
+            lambda url, count: '<a id="next" href="1_1.html">下一页</a>'
+        first_url = "https://paged.test/1_1.html"
+        pages = list(PagedWeb(False).chapter_pages(page(
+            first_url, '<a id="next" href="1_2.html">下一页</a>'
+        )))
+        assert [i.response.url for i in pages] == \
+            [first_url, "https://paged.test/1_2.html"]
+
+
+class TestEngine1Pages:
+    def test_predict(self, site, network):
+        site.renderer = render_engine1
+        site.pages = 3
+        first_url = "https://www.biquge.hk/book/1/2.html"
+        assert Engine1().chapter_page_urls(
+            page(first_url, render_engine1(first_url, 3))
+        ) == [
+            "https://www.biquge.hk/book/1/2_2.html",
+            "https://www.biquge.hk/book/1/2_3.html",
+        ]
+        chapter, kind = attempt(Engine1(), first_url)
+        assert kind is None and chapter.name == "第二章"
+        assert [str(i) for i in chapter.content] == [
+            f"第{i}页第{j}段" for i in range(1, 4) for j in ("一", "二")
+        ]
+        # 所有分页都是预测得到的, 最后一页指向下一章, 没有多余的请求
+        assert sorted(network.calls.elements()) == [
+            first_url, "https://www.biquge.hk/book/1/2_2.html",
+            "https://www.biquge.hk/book/1/2_3.html",
+        ]
+        assert network.peak["www.biquge.hk"] == 2
+
+    def test_single_page(self):
+        # 标题中没有页码的章节没有其他分页
+        url = "https://www.biquge.hk/book/1/2.html"
+        response = page(url, render_engine1(url, 1).replace("（1/1）", ""))
+        assert Engine1().chapter_page_urls(response) == []
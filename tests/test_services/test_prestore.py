@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_prestore.py
+# @Time: 19/10/2026 16:20
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import os
+import time
+import sqlite3
+from urllib.parse import urlparse
+
+import pytest
+import requests
+
+from novel_dl.core import Settings
+from novel_dl.core import State, Book
+from novel_dl.services.bookshelf import Bookshelf
+from novel_dl.services.download.engines import Engine2
+from novel_dl.utils.network import Network
+from novel_dl.services.prestore.manager import URLFilter, PreStore
+
+
+@pytest.fixture
+def url_filter(tmp_path):
+    old_data_dir = Settings().DATA_DIR
+    Settings().DATA_DIR = str(tmp_path)
+    yield URLFilter(Engine2())
+    Settings().DATA_DIR = old_data_dir
+
+
+class TestURLFilter:
+    def test_add_urls(self, url_filter):
+        urls = ["/novel/1.html", "/book/1/1.html", "/about", "/novel/1.html"]
+        url_filter.add_urls(urls)
+        url_filter.add_urls(urls)
+        db_path = os.path.join(
+            Settings().URLS_DIR, f"{Engine2.domains[0]}.urls.db"
+        )
+        with sqlite3.connect(db_path) as connection:
+            assert connection.execute(
+                "SELECT COUNT(*), SUM(is_book), SUM(is_chapter) FROM url"
+            ).fetchone() == (3, 1, 1)
+    
+    def test_rm_urls(self, url_filter):
+        urls = [f"/novel/{i}.html" for i in range(URLFilter.CHUNK_SIZE + 10)]
+        url_filter.add_urls(urls)
+        url_filter.mark_url(urls[1])
+        url_filter.mark_url(urls[-1], True)
+        result = list(url_filter.rm_urls(urls + ["/not/added"]))
+        assert result == [urls[0],] + urls[2:-1] + ["/not/added",]
+    
+    def test_canonical(self, url_filter):
+        url_filter.add_urls(["/list/1", "/list/1/", "/list/1?spm=2#top"])
+        assert url_filter.frontier.stats()["discovered"] == 1
+        url_filter.mark_url("/list/1/#top")
+        assert list(url_filter.rm_urls(["/list/1?utm_source=x", "/list/2"])) == [
+            "/list/2",
+        ]
+    
+    def test_snapshot(self, url_filter):
+        urls = [f"/novel/{i}.html" for i in range(10)]
+        url_filter.add_urls(urls)
+        for i in urls[:5]:
+            url_filter.mark_url(i)
+        url_filter.mark_url(urls[0])
+        url_filter.save_snapshot()
+        url_filter.mark_url("/")
+        
+        new_filter = URLFilter(Engine2())
+        assert list(new_filter.rm_urls(urls + ["/",])) == urls[5:]
+
+
+class TestCrawlFrontier:
+    def test_order(self, url_filter):
+        frontier = url_filter.frontier
+        assert frontier.push(["/book/1/1.html", "/list/1"], 1) == 2
+        assert frontier.push(["/novel/2.html", "/list/1"], 2) == 1
+        frontier.push(["/list/2"], 2)
+        assert len(frontier) == 4
+        
+        stats = frontier.stats()
+        assert stats["queued_books"] == 1
+        assert stats["queued_listings"] == 2
+        assert stats["queued_chapters"] == 1
+        
+        frontier = URLFilter(Engine2()).frontier
+        assert [frontier.pop() for _ in range(5)] == [
+            ("/novel/2.html", 2), ("/list/1", 1), ("/list/2", 2),
+            ("/book/1/1.html", 1), None
+        ]
+    
+    def test_stats(self, url_filter):
+        url_filter.add_urls(["/novel/1.html", "/novel/2.html", "/list/1"])
+        url_filter.mark_url("/novel/1.html")
+        url_filter.mark_url("/missing", True)
+        stats = url_filter.frontier.stats()
+        assert stats["discovered"] == 4
+        assert stats["visited"] == 2
+        assert stats["books_discovered"] == 2
+        assert stats["books_visited"] == 1
+        assert stats["not_found"] == 1
+
+
+
+class TestPreStore:
+    PAGES = {
+        "/": ["/list/1", "/list/2"],
+        "/list/1": ["/list/3", "/list/4"],
+        "/list/2": ["/list/3", "/"],
+        "/list/3": ["/list/5", "/novel/1.html"],
+        "/list/4": [],
+        "/novel/1.html": ["/list/1"],
+    }
+    
+    @classmethod
+    def fake_get(
+        cls, url, encoding="UTF-8", redirect=True, **other_headers
+    ):
+        path = urlparse(url).path
+        response = requests.Response()
+        response.status_code = 200 if path in cls.PAGES else 404
+        response.url = url
+        response._content = "".join(
+            f'<a href="{i}">链接</a>' for i in cls.PAGES.get(path, [])
+        ).encode("utf-8")
+        return Network(response, encoding)
+    
+    def test_workers(self, url_filter, monkeypatch):
+        monkeypatch.setattr(Network, "get", self.fake_get)
+        monkeypatch.setattr(
+            Engine2, "get_book_info", lambda engine, response: Book(
+                "测试书籍名", "测试作者名", State.END, "测试简介",
+                [response.response.url,]
+            )
+        )
+        old_interval = Settings().DOMAIN_REQUEST_INTERVAL
+        Settings().DOMAIN_REQUEST_INTERVAL = 0.0
+        crawled, books, errors = [], [], []
+        prestore = PreStore(
+            [Engine2(),], lambda url, engine: crawled.append(url),
+            lambda book, engine: books.append(book),
+            lambda error, engine: errors.append(error), workers=3
+        )
+        try:
+            prestore.pause()
+            deadline = time.time() + 10
+            while time.time() < deadline:
+                stats = prestore.stats()[Engine2.name]
+                if stats["visited"] == 7:
+                    break
+                prestore.resume()
+                time.sleep(0.05)
+        finally:
+            prestore.stop()
+            prestore.join()
+            Settings().DOMAIN_REQUEST_INTERVAL = old_interval
+        
+        assert errors == []
+        assert stats["visited"] == 7
+        assert [i.name for i in books] == ["测试书籍名",]
+        assert [
+            i[0].name for i in Bookshelf().search_books_by_name("测试书籍名")
+        ] == ["测试书籍名",]
+        assert stats["not_found"] == 1
+        assert sorted(urlparse(i).path for i in crawled) == sorted(
+            list(self.PAGES) + ["/list/5",]
+        )
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_registry.py
+# @Time: 19/10/2026 21:40
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+from conftest import StubWeb
+from novel_dl.services.download import EngineRegistry, WebManager
+from novel_dl.services.download import registry
+from novel_dl.services.download.engines import Engine1, Engine2
+
+
+class PluginWeb(StubWeb):
+    name = "插件网站"
+    domains = ["plugin.test", "Mirror.Plugin.Test"]
+
+
+class EntryPoint:
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+    def load(self):
+        if isinstance(self.value, Exception):
+            raise self.value
+        return self.value
+
+
+class TestEngineRegistry:
+    def test_builtin(self):
+        engine = EngineRegistry().find("WWW.BIEQUGEI.COM")
+        assert isinstance(engine, Engine2)
+        # 不可用的引擎不会注册
+        assert EngineRegistry().find("www.biquge.hk") is None
+        assert Engine1() not in EngineRegistry()
+        assert EngineRegistry().register(Engine2()) is False
+        # 名字与域名相同的引擎相等
+        assert hash(engine) == hash(Engine2()) and engine == Engine2()
+
+    def test_plugins(self, monkeypatch):
+        monkeypatch.setattr(registry, "entry_points", lambda group: [
+            EntryPoint("class", PluginWeb),
+            EntryPoint("broken", ImportError("no module")),
+            EntryPoint("invalid", [object()]),
+        ])
+        try:
+            assert EngineRegistry().load_plugins() == 1
+            engine = EngineRegistry().find("mirror.plugin.test")
+            assert isinstance(engine, PluginWeb)
+            errors = EngineRegistry().plugin_errors
+            assert "broken" in errors and "invalid" in errors
+            manager = WebManager()
+            assert manager.get_engine_by_url("https://plugin.test/1") \
+                is engine
+            assert manager.append(PluginWeb()) is False
+        finally:
+            EngineRegistry().unregister(PluginWeb())
+            EngineRegistry().plugin_errors.clear()
+        assert EngineRegistry().find("plugin.test") is None
+
+    def test_manager_local(self):
+        # 添加到管理器的引擎不会影响其他管理器
+        manager = WebManager()
+        assert manager.append(PluginWeb()) is True
+        assert manager.append(PluginWeb()) is False
+        assert isinstance(
+            manager.get_engine_by_url("https://MIRROR.plugin.test/"),
+            PluginWeb
+        )
+        assert manager.get_engine_by_name("插件网站") is not None
+        assert WebManager().get_engine_by_url("https://plugin.test/") is None
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_retry.py
+# @Time: 19/10/2026 15:10
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import time
+
+import pytest
+import requests
+
+from conftest import StubWeb
+from novel_dl.core import Settings
+from novel_dl.utils.network import Network
+from novel_dl.services.download import WebManager, ErrorKind, RetryPolicy
+from novel_dl.services.download.retry import RetryQueue, classify
+
+
+class ProtectedError(Exception):
+    pass
+
+
+class FlakyWeb(StubWeb):
+    name = "不稳定网站"
+    domains = ["flaky.test",]
+    chapters = 5
+    retry_delay = 0.01
+
+    def __init__(self):
+        self.prevented = 0
+
+    def chapter_content(self, response, index):
+        if response.text == "protected":
+            raise ProtectedError()
+        return []
+
+    def is_protected(self, response, network_error, analyze_error):
+        return isinstance(analyze_error, ProtectedError)
+
+    def prevent_protected(self, *param):
+        self.prevented += 1
+
+
+def respond(url, count):
+    # 每个章节以不同的方式失败, 部分失败在重试后恢复
+    if url.endswith("/2.html") and count == 1:
+        return 503, ""
+    if url.endswith("/3.html"):
+        return 404, ""
+    if url.endswith("/4.html") and count <= 2:
+        return "protected"
+    if url.endswith("/5.html") and count == 1:
+        raise requests.ConnectionError(url)
+    return ""
+
+
+@pytest.fixture
+def flaky(network):
+    network.respond = respond
+    old_open_seconds = Settings().CIRCUIT_OPEN_SECONDS
+    Settings().CIRCUIT_OPEN_SECONDS = 0.0
+    yield network
+    Settings().CIRCUIT_OPEN_SECONDS = old_open_seconds
+
+
+class TestRetryPolicy:
+    def test_delay(self):
+        policy = RetryPolicy(4, 1.0, 3.0)
+        for attempt, limit in ((1, 1.0), (2, 2.0), (3, 3.0)):
+            assert limit / 2 <= policy.delay(attempt) <= limit
+        assert policy.delay(4) is None
+        assert 1.5 <= policy.delay(1, 10.0) <= 3.0
+
+    def test_queue(self):
+        queue = RetryQueue()
+        queue.push("后", 0.05)
+        queue.push("先", 0.0)
+        assert queue.pop_ready() == ["先",]
+        assert len(queue) == 1 and 0 < queue.next_delay() <= 0.05
+        time.sleep(0.06)
+        assert queue.pop_ready() == ["后",] and queue.next_delay() is None
+
+    def test_classify(self, flaky):
+        engine = FlakyWeb()
+        page = lambda url: Network.get(url)
+        assert classify(
+            engine, None, requests.ConnectionError(), None
+        ) == ErrorKind.NETWORK
+        assert classify(
+            engine, None, requests.exceptions.InvalidURL(), None
+        ) == ErrorKind.PERMANENT
+        assert classify(
+            engine, page("https://flaky.test/2.html"), None, ValueError()
+        ) == ErrorKind.SERVER
+        assert classify(
+            engine, page("https://flaky.test/3.html"), None, ValueError()
+        ) == ErrorKind.PERMANENT
+        assert classify(
+            engine, page("https://flaky.test/1.html"), None, ValueError()
+        ) == ErrorKind.PARSE
+        assert classify(
+            engine, None, None, ProtectedError()
+        ) == ErrorKind.PROTECTED
+
+
+class TestWebManagerRetry:
+    @pytest.mark.parametrize("multi_thread", [True, False])
+    def test_download(self, flaky, multi_thread):
+        old = Settings().MULTI_THREAD
+        Settings().MULTI_THREAD = multi_thread
+        engine = FlakyWeb()
+        manager = WebManager()
+        manager.append(engine)
+        failed = []
+        try:
+            book = manager.download(
+                "https://flaky.test/book/", failed_callback=failed.extend
+            )
+        finally:
+            Settings().MULTI_THREAD = old
+        assert [i.index for i in book.chapters] == [1, 2, 4, 5]
+        assert [(i.index, i.kind, i.attempts) for i in failed] == \
+            [(3, ErrorKind.PERMANENT, 1),]
+        assert engine.prevented == 2
+        assert flaky.calls["https://flaky.test/book/4.html"] == 3
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_selector.py
+# @Time: 19/10/2026 20:00
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import pytest
+
+from conftest import page
+from novel_dl.services.download.engines import Engine4
+from novel_dl.services.download.selector import Selector, SelectorError
+from novel_dl.services.download.selector import has_class, text_of
+from benchmarks.parse import run_parse_benchmark, load_pages
+
+
+class TestSelector:
+    def test_select(self):
+        response = page(
+            "https://example.com/",
+            '<div class="a  intro b"><p>第一段</p><p>第二\xa0段</p></div>'
+            '<div class="introduction"><p>其他</p></div>'
+        )
+        paragraphs = Selector(f"//div[{has_class('intro')}]//p")
+        assert [text_of(i) for i in paragraphs(response.tree)] == \
+            ["第一段", "第二段"]
+        assert Selector("//p/text()").first(response.tree) == "第一段"
+        with pytest.raises(SelectorError):
+            Selector("//h1").first(response.tree)
+        # 同一个页面只解析一次
+        assert response.tree is response.tree
+        assert Selector("//a")(response.tree) == []
+        assert page("https://example.com/", "").tree.xpath("//a") == []
+
+    def test_fallback(self):
+        url, content = load_pages("Engine4", paragraphs=3)["chapter"]
+        expected = Engine4().get_chapter(
+            page(url, content.decode("UTF-8")), 1, "测试书籍"
+        )
+        # 选择器失效时改为使用 BeautifulSoup 解析
+        engine = Engine4()
+        engine.selectors = dict(
+            Engine4.selectors, chapter_name=Selector("//h9")
+        )
+        chapter = engine.get_chapter(
+            page(url, content.decode("UTF-8")), 1, "测试书籍"
+        )
+        assert chapter.name == expected.name == "章节1"
+        assert [str(i) for i in chapter.content] == \
+            [str(i) for i in expected.content]
+        assert len(expected) == 3
+
+    def test_parse_benchmark(self):
+        # 两种方式解析模拟网站的页面, 结果应当相同
+        # 注意: Engine3 会把少于 200 个字符的章节页面视为无效的页面
+        result = run_parse_benchmark(repeat=1, paragraphs=10)
+        for name, operations in result.items():
+            for operation, stats in operations.items():
+                assert stats["same"], (name, operation)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_spec.py
+# @Time: 19/10/2026 20:50
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import json
+
+import pytest
+import yaml
+import requests
+
+from novel_dl.core import Settings, State
+from novel_dl.utils.network import Network
+from novel_dl.utils.circuit import CircuitBreaker
+from novel_dl.services.download import WebManager, ErrorKind
+from novel_dl.services.download import EngineSpecs, EngineSpecError
+from novel_dl.services.download.retry import classify
+from novel_dl.services.download.spec import SpecEngine, load_spec
+
+
+SPEC = """
+name: 配置书站
+domains: [www.spec.test, M.Spec.Test]
+encoding: UTF-8
+max_connections: 2
+time_format: '%Y-%m-%d'
+protection:
+    status: [403]
+    texts: [访问过于频繁]
+selectors:
+    name: //h1
+    author: {xpath: '//p[@class="author"]', regex: '作者：(.*)'}
+    state: //p[@class="state"]
+    desc: //div[@id="intro"]
+    chapter_urls: //dl//a/@href
+    chapter_name: //div[@class="bookname"]/h1
+    content: {xpath: '//div[@id="content"]/text()', drop: ['^请收藏']}
+    update_time: {xpath: '//span', index: -1}
+"""
+
+BOOK_PAGE = """
+<h1>配置书籍</h1><p class="author">作者：某人</p><p class="state">连载中</p>
+<div id="intro"> 简介 </div>
+<dl><dd><a href="/1/1.html">1</a></dd><dd><a href="/1/2.html">2</a></dd></dl>
+"""
+
+CHAPTER_PAGE = """
+<div class="bookname"><h1>第{0}章</h1></div><span>作者</span>
+<span>2026-10-19</span>
+<div id="content">第一段<br/>  第二段 <br/><br/>请收藏本站</div>
+"""
+
+
+def page(url, text, status=200):
+    response = requests.Response()
+    response.status_code = status
+    response.url = url
+    response._content = text.encode("UTF-8")
+    return Network(response)
+
+
+@pytest.fixture
+def engines_dir(tmp_path):
+    old = Settings().ENGINES_DIR
+    Settings().ENGINES_DIR = str(tmp_path)
+    EngineSpecs().reload()
+    CircuitBreaker().reset()
+    yield tmp_path
+    Settings().ENGINES_DIR = old
+    EngineSpecs().reload()
+
+
+class TestSpecEngine:
+    def test_parse(self, engines_dir):
+        (engines_dir / "spec.yaml").write_text(SPEC, encoding="UTF-8")
+        engine = SpecEngine(load_spec(str(engines_dir / "spec.yaml")))
+        assert engine.domains == ["www.spec.test", "m.spec.test"]
+        book = engine.get_book_info(
+            page("https://www.spec.test/1/", BOOK_PAGE)
+        )
+        assert (book.name, book.author, book.state, book.desc) == \
+            ("配置书籍", "某人", State.SERIALIZING, "简介")
+        assert engine.get_chapter_url(
+            page("https://www.spec.test/1/", BOOK_PAGE)
+        ) == [
+            "https://www.spec.test/1/1.html", "https://www.spec.test/1/2.html"
+        ]
+        chapter = engine.get_chapter(page(
+            "https://www.spec.test/1/1.html", CHAPTER_PAGE.format(1)
+        ), 1, "配置书籍")
+        assert chapter.name == "第1章"
+        assert [str(i) for i in chapter.content] == ["第一段", "第二段"]
+
+    def test_paginated(self, engines_dir, monkeypatch):
+        spec = yaml.safe_load(SPEC)
+        spec["selectors"]["chapter_pages"] = '//div[@id="pages"]/a/@href'
+        engine = SpecEngine(spec)
+        monkeypatch.setattr(
+            Network, "get", lambda url, encoding="UTF-8": page(
+                url, f'<div id="content">{url[-8:]}</div>'
+            )
+        )
+        chapter = engine.get_chapter(page(
+            "https://www.spec.test/1/1.html", CHAPTER_PAGE.format(1) +
+            '<div id="pages"><a href="1_2.html">2</a>'
+            '<a href="1_3.html">3</a></div>'
+        ), 1, "配置书籍")
+        assert [str(i) for i in chapter.content] == \
+            ["第一段", "第二段", "1_2.html", "1_3.html"]
+
+    def test_protected(self, engines_dir):
+        (engines_dir / "spec.yaml").write_text(SPEC, encoding="UTF-8")
+        engine = SpecEngine(load_spec(str(engines_dir / "spec.yaml")))
+        url = "https://www.spec.test/1/1.html"
+        for response in (page(url, "访问过于频繁"), page(url, "", 403)):
+            with pytest.raises(Exception) as error:
+                engine.get_chapter(response, 1, "配置书籍")
+            assert classify(engine, response, None, error.value) == \
+                ErrorKind.PROTECTED
+
+    def test_invalid(self, engines_dir):
+        with pytest.raises(EngineSpecError):
+            SpecEngine({"name": "错误", "domains": ["a.test"]})
+        with pytest.raises(EngineSpecError):
+            SpecEngine(dict(
+                yaml.safe_load(SPEC), selectors={"name": "//["}
+            ))
+        with pytest.raises(EngineSpecError):
+            spec = yaml.safe_load(SPEC)
+            spec["selectors"]["name"] = "//["
+            SpecEngine(spec)
+
+
+class TestEngineSpecs:
+    def test_lazy_lookup(self, engines_dir):
+        assert EngineSpecs().find("www.spec.test") is None
+        # JSON 格式的配置与 YAML 格式的配置等价
+        (engines_dir / "spec.json").write_text(
+            json.dumps(yaml.safe_load(SPEC)), encoding="UTF-8"
+        )
+        (engines_dir / "broken.yaml").write_text("name: [", encoding="UTF-8")
+        EngineSpecs().reload()
+        engine = EngineSpecs().find("M.SPEC.TEST")
+        assert engine is not None and engine.name == "配置书站"
+        assert EngineSpecs().find("www.spec.test") is engine
+        assert sorted(EngineSpecs().domains()) == \
+            ["m.spec.test", "www.spec.test"]
+
+    def test_download(self, engines_dir, monkeypatch):
+        (engines_dir / "spec.yaml").write_text(SPEC, encoding="UTF-8")
+        EngineSpecs().reload()
+
+        def get(url, encoding="UTF-8", redirect=True, **other_headers):
+            if url.endswith("/1/"):
+                return page(url, BOOK_PAGE)
+            return page(url, CHAPTER_PAGE.format(url[-6]))
+        monkeypatch.setattr(Network, "get", get)
+        manager = WebManager()
+        assert manager.get_engine_by_url("https://WWW.spec.test/1/") \
+            is EngineSpecs().find("www.spec.test")
+        book = manager.download("https://www.spec.test/1/")
+        assert [i.name for i in book.chapters] == ["第1章", "第2章"]
+
+
+    def test_broken_spec(self, engines_dir, caplog):
+        # 配置文件不正确时视为不支持该域名, 不会中断下载
+        spec = yaml.safe_load(SPEC)
+        spec["selectors"]["name"] = "//["
+        (engines_dir / "spec.yaml").write_text(
+            yaml.safe_dump(spec, allow_unicode=True), encoding="UTF-8"
+        )
+        EngineSpecs().reload()
+        with pytest.raises(EngineSpecError):
+            EngineSpecs().find("www.spec.test")
+        manager = WebManager()
+        assert manager.get_engine_by_url("https://www.spec.test/1/") is None
+        assert manager.download("https://www.spec.test/1/") is None
+        assert "www.spec.test" in caplog.text
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_bloom.py
+# @Time: 19/10/2026 17:05
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import pytest
+
+from novel_dl.utils.options import hash as _hash
+from novel_dl.utils.bloom import ScalableBloomFilter
+
+
+class TestScalableBloomFilter:
+    def test_contains(self):
+        bloom = ScalableBloomFilter(100, 0.01)
+        values = [_hash(f"/book/{i}.html") for i in range(1000)]
+        bloom.update(values)
+        assert len(bloom) == 1000
+        assert all(i in bloom for i in values)
+        false_positives = sum(
+            _hash(f"/chapter/{i}.html") in bloom for i in range(10000)
+        )
+        assert false_positives < 200
+    
+    def test_save_and_load(self, tmp_path):
+        bloom = ScalableBloomFilter(10, 0.01)
+        values = [_hash(str(i)) for i in range(50)]
+        bloom.update(values)
+        path = str(tmp_path / "test.bloom")
+        bloom.save(path)
+        
+        loaded = ScalableBloomFilter.load(path)
+        assert len(loaded) == 50
+        assert all(i in loaded for i in values)
+        
+        with open(path, "r+b") as file:
+            file.truncate(20)
+        with pytest.raises(ValueError):
+            ScalableBloomFilter.load(path)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_circuit.py
+# @Time: 19/10/2026 16:40
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import time
+
+import pytest
+
+from novel_dl.core import Settings
+from novel_dl.utils.circuit import CircuitBreaker, CircuitState
+
+
+@pytest.fixture
+def breaker():
+    old = (
+        Settings().CIRCUIT_FAILURE_THRESHOLD, Settings().CIRCUIT_OPEN_SECONDS
+    )
+    Settings().CIRCUIT_FAILURE_THRESHOLD = 2
+    Settings().CIRCUIT_OPEN_SECONDS = 0.05
+    CircuitBreaker().reset()
+    yield CircuitBreaker()
+    CircuitBreaker().reset()
+    Settings().CIRCUIT_FAILURE_THRESHOLD, Settings().CIRCUIT_OPEN_SECONDS = old
+
+
+class TestCircuitBreaker:
+    def test_open(self, breaker):
+        breaker.record_failure("a.test")
+        assert breaker.allow("a.test")
+        breaker.record_failure("a.test")
+        assert breaker.state("a.test") == CircuitState.OPEN
+        assert not breaker.allow("a.test")
+        assert breaker.choose(["a.test", "b.test"]) == "b.test"
+        # 暂停结束后只放行一个试探请求
+        time.sleep(0.06)
+        assert breaker.state("a.test") == CircuitState.HALF_OPEN
+        assert breaker.allow("a.test") and not breaker.allow("a.test")
+        breaker.record_failure("a.test")
+        assert breaker.state("a.test") == CircuitState.OPEN
+        time.sleep(0.06)
+        assert breaker.choose(["b.test",], "a.test") == "a.test"
+        breaker.record_success("a.test")
+        assert breaker.state("a.test") == CircuitState.CLOSED
+        assert breaker.stats["a.test"] == {
+            "state": "closed", "failures": 0, "opened": 2
+        }
+
+    def test_blocked(self, breaker):
+        breaker.record_failure("a.test", blocked=True)
+        assert breaker.state("a.test") == CircuitState.OPEN
+        breaker.record_failure("b.test", blocked=True)
+        assert breaker.choose(["a.test", "b.test"]) is None
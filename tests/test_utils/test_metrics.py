@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_metrics.py
+# @Time: 19/10/2026 23:50
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import json
+
+import pytest
+
+from novel_dl.core import Settings
+from novel_dl.utils.metrics import Metrics, timed
+
+
+@pytest.fixture
+def metrics():
+    Settings().METRICS = True
+    Metrics().reset()
+    yield Metrics()
+    Metrics().reset()
+    Settings().METRICS = False
+
+
+class TestMetrics:
+    def test_timer(self, metrics):
+        @timed("test.timed")
+        def work(value):
+            return value * 2
+
+        with metrics.labels(engine="测试引擎"):
+            with metrics.labels(book="测试书籍"):
+                assert work(2) == 4
+                with metrics.timer("test.timer"):
+                    pass
+            metrics.count("test.retries", 2)
+        stages = {i["stage"]: i for i in metrics.to_dict()["stages"]}
+        assert stages["test.timed"]["count"] == 1
+        assert stages["test.timer"]["labels"] == {
+            "engine": "测试引擎", "book": "测试书籍"
+        }
+        counters = metrics.to_dict()["counters"]
+        assert counters == [{
+            "name": "test.retries", "labels": {"engine": "测试引擎"},
+            "value": 2
+        },]
+
+    def test_export(self, metrics, tmp_path):
+        metrics.observe("test.stage", 0.3, book='书"名')
+        text = metrics.to_prometheus()
+        assert 'novel_dl_stage_seconds_bucket{book="书\\"名",' \
+            'le="0.25",stage="test.stage"} 0' in text
+        assert 'le="0.5",stage="test.stage"} 1' in text
+        assert 'novel_dl_stage_seconds_count{book="书\\"名",' \
+            'stage="test.stage"} 1' in text
+        metrics.save(str(tmp_path / "metrics.json"))
+        with open(tmp_path / "metrics.json", encoding="UTF-8") as file:
+            assert json.load(file)["stages"][0]["sum"] == 0.3
+        metrics.save(str(tmp_path / "metrics.prom"))
+        with open(tmp_path / "metrics.prom", encoding="UTF-8") as file:
+            assert file.read() == text
+
+    def test_disabled(self, metrics):
+        Settings().METRICS = False
+        with metrics.labels(engine="测试引擎"), metrics.timer("test.timer"):
+            metrics.count("test.retries")
+        assert metrics.to_dict() == {"stages": [], "counters": []}
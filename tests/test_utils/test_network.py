@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_network.py
+# @Time: 19/10/2026 13:20
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+from novel_dl.utils.network import Network
+
+
+class TestNetwork:
+    def test_normalize_url(self):
+        assert Network.normalize_url("https://example.com/a/1.html") == \
+            "https://example.com/a/1.html"
+        assert Network.normalize_url("HTTP://Example.COM:80/a/") == \
+            "https://example.com/a"
+        assert Network.normalize_url("https://example.com:443/a#top") == \
+            "https://example.com/a"
+        assert Network.normalize_url("https://example.com") == \
+            "https://example.com/"
+        assert Network.normalize_url("https://example.com/a?b=1") == \
+            "https://example.com/a?b=1"
+        assert Network.normalize_url("https://example.com:8080/a") == \
+            "https://example.com:8080/a"
+
+    def test_canonical_url(self):
+        domains = ["www.example.com", "m.example.com"]
+        assert Network.canonical_url(
+            "http://M.example.com/a/?utm_source=x&b=2&a=1#top", domains
+        ) == "https://www.example.com/a?a=1&b=2"
+        assert Network.canonical_url(
+            "https://other.com/a?fbclid=x", domains
+        ) == "https://other.com/a"
+        # 可能影响页面内容的参数不会被去除, 跟踪参数只按完整的名字匹配
+        assert Network.canonical_url(
+            "https://other.com/a?source=2&refid=1&from=x&spmid=3", domains
+        ) == "https://other.com/a?from=x&refid=1&source=2&spmid=3"
+        assert Network.canonical_path("/a/?spm=1#top") == "/a"
+        assert Network.canonical_path("https://example.com/a?page=2") == \
+            "/a?page=2"
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+# @FileName: test_profiler.py
+# @Time: 19/10/2026 23:58
+# @Author: Amundsen Severus Rubeus Bjaaland
+
+
+import time
+import threading
+
+import pytest
+
+from novel_dl.core import Settings
+from novel_dl.utils.profiler import Profiler
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        type(Settings()), "LOG_DIR", property(lambda self: str(tmp_path))
+    )
+    return tmp_path
+
+
+def busy_work(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(100))
+
+
+class TestProfiler:
+    def test_cprofile(self, log_dir):
+        with Profiler("cprofile", "test") as profiler:
+            busy_work(0.05)
+        assert [i.rsplit(".", 1)[1] for i in profiler.paths] == \
+            ["prof", "txt"]
+        with open(profiler.paths[1], encoding="UTF-8") as file:
+            assert "busy_work" in file.read()
+
+    def test_sample(self, log_dir):
+        with Profiler("sample", "test") as profiler:
+            worker = threading.Thread(target=busy_work, args=(0.2,))
+            worker.start()
+            worker.join()
+        assert [i.rsplit(".", 1)[1] for i in profiler.paths] == \
+            ["collapsed", "txt"]
+        with open(profiler.paths[0], encoding="UTF-8") as file:
+            lines = file.read().splitlines()
+        assert any("busy_work" in i for i in lines)
+        assert all(i.rsplit(" ", 1)[1].isdigit() for i in lines)
+        with open(profiler.paths[1], encoding="UTF-8") as file:
+            assert "busy_work" in file.read()
+
+    def test_auto(self):
+        old = Settings().MULTI_THREAD
+        try:
+            Settings().MULTI_THREAD = True
+            assert Profiler().mode == "sample"
+            Settings().MULTI_THREAD = False
+            assert Profiler().mode == "cprofile"
+        finally:
+            Settings().MULTI_THREAD = old